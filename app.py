@@ -1227,6 +1227,23 @@ def generate_qr_code(data):
     
     return f"data:image/png;base64,{img_str}"
 
+@app.route('/api/nova-micro/writing/stream', methods=['POST'])
+@app.route('/api/submit-speaking-response/stream', methods=['POST'])
+def stream_assessment_feedback():
+    """Stream assessment feedback as Server-Sent Events, flushing each event"""
+    data = request.get_json(silent=True) or {}
+    kind = 'writing' if request.path.startswith('/api/nova-micro/writing') else 'speaking'
+    if not data.get('essay_text' if kind == 'writing' else 'audio_data'):
+        return jsonify({'error': 'No essay text provided' if kind == 'writing' else 'No audio data provided'}), 400
+
+    # Evaluation pipeline lives with the Lambda backend (mock services in development)
+    from lambda_handler import iter_writing_assessment_events, iter_speaking_assessment_events
+    from feedback_streaming import sse_flask_response
+
+    events = iter_writing_assessment_events if kind == 'writing' else iter_speaking_assessment_events
+    print(f"[ASSESSMENT] Streaming {kind} feedback for {data.get('user_email', 'test@ieltsgenaiprep.com')}")
+    return sse_flask_response(events(data, narrate=True))
+
 # Test endpoints that simulate Lambda backend
 @app.route('/api/auth/generate-qr', methods=['POST'])
 def generate_qr_token():
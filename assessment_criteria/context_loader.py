@@ -5,10 +5,53 @@ This module loads and prepares IELTS assessment context data from provided conte
 
 import os
 import json
+import hashlib
 import logging
+import threading
+from typing import NamedTuple
 
 logger = logging.getLogger(__name__)
 
+WRITING_TEST_TYPES = ("academic", "general")
+WRITING_TASKS = (1, 2)
+SPEAKING_PARTS = (1, 2, 3)
+
+_TEST_TYPE_NAMES = {"academic": "Academic", "general": "General Training"}
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict for shared context data
+
+    Still a dict, so it serialises with json.dumps and passes isinstance
+    checks; every mutating method raises TypeError. Use dict(context) for
+    a mutable copy.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("IELTS context data is read-only; copy it with dict() to modify")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        # copy, deepcopy and pickle rebuild through the constructor, not __setitem__
+        return (FrozenDict, (dict(self),))
+
+    def __repr__(self):
+        return f"FrozenDict({dict.__repr__(self)})"
+
+
+_EMPTY_CONTEXT = FrozenDict()
+
+
+class PromptContextBlock(NamedTuple):
+    """Prompt-ready rendering of an assessment context with a stable hash"""
+    text: str
+    sha256: str
+
 def load_writing_context_data():
     """
     Load context data from the IELTS Writing Context File.
@@ -201,37 +244,131 @@ Assessment focus:
         logger.error(f"Error loading speaking context data: {str(e)}")
         return context_data
 
+# Frozen contexts and prompt blocks keyed by (assessment_type, test_type, task)
+_context_index = None
+_context_index_lock = threading.Lock()
+
+
+def _freeze(value):
+    """Recursively convert dicts to read-only dicts and lists to tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _render_band_descriptors(band_descriptors):
+    lines = ["Band descriptors:"]
+    for band in sorted(band_descriptors, reverse=True):
+        lines.append(f"Band {band}:")
+        for criterion, descriptor in band_descriptors[band].items():
+            lines.append(f"- {criterion}: {descriptor}")
+    return "\n".join(lines)
+
+
+def _prompt_block(heading, guidance, band_descriptors):
+    sections = [heading] if heading else []
+    if guidance.strip():
+        sections.append(guidance.strip())
+    if band_descriptors:
+        sections.append(_render_band_descriptors(band_descriptors))
+    text = "\n\n".join(sections)
+    return PromptContextBlock(text, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+
+def _build_context_index():
+    """Load every assessment context once and freeze it"""
+    index = {}
+
+    writing_data = load_writing_context_data()
+    for test_type in WRITING_TEST_TYPES:
+        for task_number in WRITING_TASKS:
+            task_data = writing_data[test_type][f"task{task_number}"]
+            context = _freeze(task_data)
+            block = _prompt_block(
+                f"IELTS {_TEST_TYPE_NAMES[test_type]} Writing Task {task_number}",
+                task_data["assessment_guidance"],
+                task_data["band_descriptors"]
+            )
+            index[("writing", test_type, task_number)] = (context, block)
+
+    # Speaking guidance is shared by both test types
+    speaking_data = load_speaking_context_data()
+    band_descriptors = _freeze(speaking_data["band_descriptors"])
+    for task_number in SPEAKING_PARTS:
+        guidance = speaking_data["part_guidance"][f"part{task_number}"]
+        context = FrozenDict({
+            "band_descriptors": band_descriptors,
+            "guidance": guidance
+        })
+        # Part guidance already opens with the part name
+        block = _prompt_block(
+            None,
+            guidance,
+            speaking_data["band_descriptors"]
+        )
+        for test_type in WRITING_TEST_TYPES:
+            index[("speaking", test_type, task_number)] = (context, block)
+
+    return FrozenDict(index)
+
+
+def _get_context_entry(assessment_type, test_type, task_number):
+    global _context_index
+    if _context_index is None:
+        with _context_index_lock:
+            if _context_index is None:
+                _context_index = _build_context_index()
+
+    key = (assessment_type.lower(), test_type.lower(), int(task_number))
+    entry = _context_index.get(key)
+    if entry is None:
+        if key[0] not in ("writing", "speaking"):
+            logger.error(f"Unknown assessment type: {assessment_type}")
+        else:
+            logger.error(f"No IELTS context for {key}")
+    return entry
+
+
 def get_ielts_context_for_assessment(assessment_type, test_type="academic", task_number=1):
     """
     Get the appropriate IELTS context data for a specific assessment.
     
+    Contexts are built once per process and returned as read-only dicts
+    (nested lists become tuples) that serialise with json.dumps; mutating
+    one raises TypeError, so copy with dict() first.
+    
     Args:
         assessment_type (str): "writing" or "speaking"
         test_type (str): "academic" or "general"
         task_number (int): 1, 2, or 3 (for speaking parts)
         
     Returns:
-        dict: Context data for the specified assessment
+        FrozenDict: Context data for the specified assessment
     """
     try:
-        if assessment_type.lower() == "writing":
-            context_data = load_writing_context_data()
-            task_key = f"task{task_number}"
-            return context_data[test_type.lower()][task_key]
-        
-        elif assessment_type.lower() == "speaking":
-            context_data = load_speaking_context_data()
-            part_key = f"part{task_number}"
-            part_context = {
-                "band_descriptors": context_data["band_descriptors"],
-                "guidance": context_data["part_guidance"][part_key]
-            }
-            return part_context
-        
-        else:
-            logger.error(f"Unknown assessment type: {assessment_type}")
-            return {}
+        entry = _get_context_entry(assessment_type, test_type, task_number)
+        return entry[0] if entry else _EMPTY_CONTEXT
             
     except Exception as e:
         logger.error(f"Error getting context for {assessment_type} assessment: {str(e)}")
-        return {}
\ No newline at end of file
+        return _EMPTY_CONTEXT
+
+
+def get_ielts_prompt_block(assessment_type, test_type="academic", task_number=1):
+    """
+    Get the prompt-ready text of an assessment context.
+    
+    The text and its SHA-256 are computed once per process, so prompt caches
+    can key on the hash without re-rendering the descriptors.
+    
+    Returns:
+        PromptContextBlock or None if no context exists for the assessment
+    """
+    try:
+        entry = _get_context_entry(assessment_type, test_type, task_number)
+        return entry[1] if entry else None
+    except Exception as e:
+        logger.error(f"Error getting prompt block for {assessment_type} assessment: {str(e)}")
+        return None
\ No newline at end of file
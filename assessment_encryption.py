@@ -18,6 +18,7 @@ from botocore.exceptions import ClientError
 
 from aws_secrets_manager import get_kms_config
 from dynamodb_dal import get_dal
+from audio_ingest import AudioBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -54,13 +55,13 @@ class AssessmentEncryption:
         if self.is_development:
             logger.warning("[ENCRYPTION] Running in development mode - using mock encryption")
     
-    def encrypt_assessment_data(self, data: Union[str, bytes], user_id: str, 
+    def encrypt_assessment_data(self, data: Union[str, bytes, memoryview, AudioBuffer], user_id: str, 
                                session_id: str, data_type: str = 'text') -> EncryptionResult:
         """
         Encrypt assessment data using envelope encryption
         
         Args:
-            data: Data to encrypt (text or audio bytes)
+            data: Data to encrypt (text, audio bytes or a shared AudioBuffer)
             user_id: User ID for encryption context
             session_id: Assessment session ID
             data_type: Type of data ('text', 'audio', 'metadata')
@@ -69,6 +70,9 @@ class AssessmentEncryption:
             EncryptionResult with encrypted data or error
         """
         try:
+            if isinstance(data, AudioBuffer):
+                data = data.data
+            
             if self.is_development:
                 return self._mock_encrypt(data, user_id, session_id, data_type)
             
@@ -99,7 +103,8 @@ class AssessmentEncryption:
             if isinstance(data, str):
                 data_bytes = data.encode('utf-8')
             else:
-                data_bytes = data
+                # Fernet only takes bytes; this is the one copy of shared audio
+                data_bytes = data if isinstance(data, bytes) else bytes(data)
             
             encrypted_data = fernet.encrypt(data_bytes)
             
@@ -215,7 +220,7 @@ class AssessmentEncryption:
                 error_message=f"Decryption error: {str(e)}"
             )
     
-    def encrypt_audio_stream(self, audio_chunks: bytes, user_id: str, 
+    def encrypt_audio_stream(self, audio_chunks: Union[bytes, memoryview, AudioBuffer], user_id: str, 
                            session_id: str) -> EncryptionResult:
         """
         Encrypt streaming audio data for Nova Sonic
@@ -407,8 +407,32 @@ def handle_get_user_question_stats(event: Dict[str, Any], context: Any) -> Dict[
             })
         }
 
+def handle_preselect_questions(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Internal asynchronous invocation that pre-selects the next session's questions
+    
+    Expected event (sent by QuestionBankDAL.schedule_preselection):
+    {
+        "preselect_questions": {
+            "user_email": "user@example.com",
+            "assessment_type": "academic_speaking"
+        }
+    }
+    """
+    request = event.get('preselect_questions') or {}
+    user_email = request.get('user_email')
+    assessment_type = request.get('assessment_type')
+    
+    if not user_email or not assessment_type:
+        logger.warning("Pre-selection event missing user_email or assessment_type")
+        return {'success': False, 'error': 'user_email and assessment_type are required'}
+    
+    question_dal = get_question_bank_dal()
+    return question_dal.preselect_next_session(user_email, assessment_type)
+
 # Export handlers
 __all__ = [
+    'handle_preselect_questions',
     'handle_start_assessment_session',
     'handle_complete_assessment_session',
     'handle_get_assessment_session',
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Audio Normalization Benchmark
+Measures single-core throughput of the PCM normalisation stage for the
+capture formats browsers and the mobile apps produce, whole-recording and
+at streaming chunk sizes, and the upstream bandwidth it saves
+"""
+
+import os
+
+# Pin BLAS to one thread so figures are per core
+for _variable in ('OPENBLAS_NUM_THREADS', 'OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_variable, '1')
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from audio_normalize import AudioNormalizer, PcmFormat
+
+RECORDING_SECONDS = 30.0
+SIGNAL_SEED = 20250117
+
+# name -> capture layout
+SOURCES = {
+    '48k-stereo-s16': PcmFormat(48000, 2, 16),
+    '44k1-stereo-s16': PcmFormat(44100, 2, 16),
+    '48k-mono-f32': PcmFormat(48000, 1, 32, floating=True),
+    '44k1-mono-s16': PcmFormat(44100, 1, 16),
+    '24k-mono-s16': PcmFormat(24000, 1, 16),
+    '16k-mono-s16': PcmFormat(16000, 1, 16)
+}
+
+# None processes the recording in one call; otherwise chunk length in ms
+CHUNK_MS = (None, 100, 20)
+
+
+def synthetic_recording(source: PcmFormat, seconds: float = RECORDING_SECONDS, seed: int = SIGNAL_SEED) -> bytes:
+    """Speech-like test signal: harmonic tones with a syllable envelope and noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * source.sample_rate)) / source.sample_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / source.sample_rate
+    voice = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    signal = 0.2 * voice * envelope + 0.005 * rng.standard_normal(len(t))
+    frames = np.repeat(signal[:, None], source.channels, axis=1)
+
+    if source.floating:
+        return frames.astype(f'<f{source.bits_per_sample // 8}').tobytes()
+    return np.clip(frames * 2 ** (source.bits_per_sample - 1), -32768, 32767).astype('<i2').tobytes()
+
+
+def benchmark(name: str, source: PcmFormat, recording: bytes, chunk_ms: Optional[int],
+              iterations: int, normalize: Optional[str]) -> Dict[str, Any]:
+    """Audio seconds processed per CPU second for one layout and chunk size"""
+    normalizer = AudioNormalizer(source, normalize=normalize)
+    chunk_bytes = len(recording) if chunk_ms is None else \
+        source.frame_bytes * source.sample_rate * chunk_ms // 1000
+    view = memoryview(recording)
+
+    def run() -> int:
+        produced = 0
+        for offset in range(0, len(view), chunk_bytes):
+            produced += len(normalizer.process(view[offset:offset + chunk_bytes]))
+        return produced + len(normalizer.flush())
+
+    output_bytes = run()  # Warm up filter design and allocator
+
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    for _ in range(iterations):
+        run()
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    audio_seconds = len(recording) / source.frame_bytes / source.sample_rate * iterations
+    return {
+        'source': name,
+        'chunk_ms': chunk_ms,
+        'audio_seconds': audio_seconds,
+        'realtime_per_core': audio_seconds / cpu if cpu else 0.0,
+        'input_mib_per_second': len(recording) * iterations / wall / 2 ** 20 if wall else 0.0,
+        'bandwidth_ratio': len(recording) / output_bytes if output_bytes else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PCM normalisation to 16 kHz mono per core")
+    parser.add_argument('--iterations', type=int, default=5, help="Timed passes per source and chunk size")
+    parser.add_argument('--seconds', type=float, default=RECORDING_SECONDS, help="Length of the test recording")
+    parser.add_argument('--only', action='append', help="Limit to the named source layout (repeatable)")
+    parser.add_argument('--normalize', choices=('peak', 'rms'), help="Apply loudness normalisation too")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    sources = {name: source for name, source in SOURCES.items() if not args.only or name in args.only}
+    results = []
+    for name, source in sources.items():
+        recording = synthetic_recording(source, args.seconds)
+        for chunk_ms in CHUNK_MS:
+            results.append(benchmark(name, source, recording, chunk_ms, args.iterations, args.normalize))
+
+    if args.json:
+        print(json.dumps({'results': results}, indent=2))
+        return 0
+
+    print(f"{'source':18} {'chunk':>7} {'x realtime/core':>16} {'input MiB/s':>12} {'bandwidth':>10}")
+    for result in results:
+        chunk = 'whole' if result['chunk_ms'] is None else f"{result['chunk_ms']}ms"
+        print(f"{result['source']:18} {chunk:>7} {result['realtime_per_core']:16.1f} "
+              f"{result['input_mib_per_second']:12.1f} {result['bandwidth_ratio']:9.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
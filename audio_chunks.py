@@ -0,0 +1,275 @@
+"""
+Audio Chunk Protocol
+Sequence-numbered, timestamped audio chunks for WebSocket streaming: a
+bounded reassembly buffer for client audio that reorders, drops
+duplicates and declares gaps, and the adaptive jitter buffer Maya's
+playback follows, both with loss and reorder metrics
+"""
+
+import struct
+from typing import Dict, Any, Optional, List, NamedTuple, Tuple
+
+CHUNK_PROTOCOL_VERSION = 1
+
+# version, flags, turn, sequence, timestamp (ms of media time)
+CHUNK_HEADER = struct.Struct('!BBHII')
+
+# First chunk of one of Maya's replies; playback re-anchors its schedule there
+FLAG_START_OF_TURN = 0x01
+
+# Chunks held waiting for a missing predecessor before it is declared lost
+REASSEMBLY_WINDOW = 32
+
+# Playback jitter buffer: target delay is JITTER_MULTIPLIER times the
+# smoothed jitter plus one chunk, kept within these bounds. It rises at
+# once when jitter grows and falls by at most JITTER_DECAY_MS per chunk
+JITTER_MIN_DELAY_MS = 40
+JITTER_MAX_DELAY_MS = 400
+JITTER_INITIAL_DELAY_MS = 80
+JITTER_MULTIPLIER = 3.0
+JITTER_DECAY_MS = 2.0
+
+
+class ChunkError(ValueError):
+    """Malformed or unsupported audio chunk"""
+
+
+class AudioChunk(NamedTuple):
+    sequence: int
+    timestamp_ms: int
+    payload: bytes
+    turn: int = 0
+    flags: int = 0
+
+
+def pack_chunk(chunk: AudioChunk) -> bytes:
+    """Binary frame: header then payload"""
+    return CHUNK_HEADER.pack(CHUNK_PROTOCOL_VERSION, chunk.flags, chunk.turn & 0xFFFF,
+                             chunk.sequence & 0xFFFFFFFF, chunk.timestamp_ms & 0xFFFFFFFF) + chunk.payload
+
+
+def unpack_chunk(frame: bytes) -> AudioChunk:
+    if len(frame) < CHUNK_HEADER.size:
+        raise ChunkError('Audio chunk shorter than its header')
+    version, flags, turn, sequence, timestamp = CHUNK_HEADER.unpack_from(frame)
+    if version != CHUNK_PROTOCOL_VERSION:
+        raise ChunkError(f"Unsupported audio chunk version {version}")
+    return AudioChunk(sequence, timestamp, bytes(frame[CHUNK_HEADER.size:]), turn, flags)
+
+
+def chunk_from_message(message: Dict[str, Any], payload: bytes) -> AudioChunk:
+    """Chunk from a JSON audio message's seq, ts and turn fields"""
+    try:
+        sequence, timestamp = int(message['seq']), int(message.get('ts', 0))
+    except (KeyError, TypeError, ValueError):
+        raise ChunkError('Sequenced audio messages need integer seq and ts')
+    return AudioChunk(sequence, timestamp, payload, int(message.get('turn', 0)))
+
+
+class ReassemblyBuffer:
+    """
+    Puts client audio chunks back in sequence order
+
+    Early chunks wait for their predecessors; once ``window`` chunks are
+    waiting, the missing ones are declared lost and delivery moves on.
+    Duplicates and chunks arriving after their slot was skipped are
+    dropped.
+    """
+
+    def __init__(self, window: int = REASSEMBLY_WINDOW, next_sequence: int = 0):
+        self.window = window
+        self.next_sequence = next_sequence
+        self._pending: Dict[int, AudioChunk] = {}
+        self.gaps: List[Tuple[int, int]] = []  # [first, last] sequence ranges declared lost
+        self.stats = {'received': 0, 'delivered': 0, 'duplicates': 0, 'reordered': 0, 'lost': 0, 'late': 0,
+                      'max_depth': 0}
+
+    def push(self, chunk: AudioChunk) -> List[AudioChunk]:
+        """Accept one chunk; returns the chunks now deliverable, in order"""
+        self.stats['received'] += 1
+        sequence = chunk.sequence
+        if sequence < self.next_sequence:
+            lost = any(first <= sequence <= last for first, last in self.gaps)
+            self.stats['late' if lost else 'duplicates'] += 1
+            return []
+        if sequence in self._pending:
+            self.stats['duplicates'] += 1
+            return []
+
+        if sequence > self.next_sequence:
+            self.stats['reordered'] += 1
+        self._pending[sequence] = chunk
+        self.stats['max_depth'] = max(self.stats['max_depth'], len(self._pending))
+
+        ready = self._drain()
+        while len(self._pending) >= self.window:
+            self._skip_to(min(self._pending))
+            ready += self._drain()
+        return ready
+
+    def next_pending(self) -> Optional[AudioChunk]:
+        """Earliest chunk held behind a hole"""
+        return self._pending[min(self._pending)] if self._pending else None
+
+    def skip_gap(self) -> List[AudioChunk]:
+        """Declare the next hole lost; returns the chunks that frees"""
+        if self._pending:
+            self._skip_to(min(self._pending))
+        return self._drain()
+
+    def flush(self) -> List[AudioChunk]:
+        """Deliver everything held, declaring any holes lost (end of turn)"""
+        ready = []
+        while self._pending:
+            ready += self.skip_gap()
+        return ready
+
+    def _drain(self) -> List[AudioChunk]:
+        ready = []
+        while self.next_sequence in self._pending:
+            ready.append(self._pending.pop(self.next_sequence))
+            self.next_sequence += 1
+        self.stats['delivered'] += len(ready)
+        return ready
+
+    def _skip_to(self, sequence: int) -> None:
+        if sequence > self.next_sequence:
+            self.gaps.append((self.next_sequence, sequence - 1))
+            self.stats['lost'] += sequence - self.next_sequence
+            self.next_sequence = sequence
+
+    def metrics(self) -> Dict[str, Any]:
+        expected = self.stats['delivered'] + self.stats['lost']
+        return dict(self.stats, next_sequence=self.next_sequence, pending=len(self._pending),
+                    loss_rate=round(self.stats['lost'] / expected, 4) if expected else 0.0,
+                    reorder_rate=round(self.stats['reordered'] / self.stats['received'], 4)
+                    if self.stats['received'] else 0.0)
+
+
+class ChunkSequencer:
+    """Numbers and timestamps outgoing audio for the client's jitter buffer"""
+
+    def __init__(self, bytes_per_ms: float, next_sequence: int = 0, turn: int = 0):
+        self.bytes_per_ms = bytes_per_ms
+        self.next_sequence = next_sequence
+        self.turn = turn
+        self.media_ms = 0.0
+        self._turn_open = False
+
+    def chunk(self, payload: bytes) -> AudioChunk:
+        flags = 0 if self._turn_open else FLAG_START_OF_TURN
+        chunk = AudioChunk(self.next_sequence, int(self.media_ms), payload, self.turn, flags)
+        self.next_sequence += 1
+        self.media_ms += len(payload) / self.bytes_per_ms
+        self._turn_open = True
+        return chunk
+
+    def end_turn(self) -> None:
+        """The reply finished; the next chunk starts a new turn"""
+        if self._turn_open:
+            self.turn += 1
+            self._turn_open = False
+
+
+class JitterBuffer:
+    """
+    Adaptive playout buffer for Maya's audio (reference for the clients)
+
+    Chunks are scheduled at their media timestamp plus a playout offset
+    fixed by the first chunk of a turn and the target delay. Jitter is the
+    RFC 3550 running estimate; the target delay follows it up at once and
+    down slowly, and is applied when the next turn starts. Chunks missing
+    at their playout time are concealed; ones arriving after it are late.
+    """
+
+    def __init__(self, min_delay_ms: float = JITTER_MIN_DELAY_MS, max_delay_ms: float = JITTER_MAX_DELAY_MS,
+                 initial_delay_ms: float = JITTER_INITIAL_DELAY_MS):
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.target_delay_ms = float(initial_delay_ms)
+        self.jitter_ms = 0.0
+        self._reassembly = ReassemblyBuffer()
+        self._queue: List[AudioChunk] = []
+        self._last_transit: Optional[float] = None
+        self._offset_ms: Optional[float] = None
+        self._turn: Optional[int] = None
+        self._chunk_ms = 20.0
+        self.stats = {'played': 0, 'concealed': 0, 'late': 0, 'underruns': 0}
+
+    def push(self, chunk: AudioChunk, arrival_ms: float, chunk_ms: Optional[float] = None) -> None:
+        """Record a chunk's arrival (client clock, ms)"""
+        if chunk_ms:
+            self._chunk_ms = chunk_ms
+        transit = arrival_ms - chunk.timestamp_ms
+        if self._last_transit is not None:
+            self.jitter_ms += (abs(transit - self._last_transit) - self.jitter_ms) / 16
+        self._last_transit = transit
+
+        wanted = min(self.max_delay_ms, max(self.min_delay_ms, JITTER_MULTIPLIER * self.jitter_ms + self._chunk_ms))
+        self.target_delay_ms = wanted if wanted > self.target_delay_ms else \
+            max(wanted, self.target_delay_ms - JITTER_DECAY_MS)
+
+        if chunk.turn != self._turn:
+            self._turn = chunk.turn
+            self._offset_ms = arrival_ms - chunk.timestamp_ms + self.target_delay_ms
+        if self._offset_ms is not None and chunk.timestamp_ms + self._offset_ms < arrival_ms:
+            self.stats['late'] += 1
+            return
+        self._queue.extend(self._reassembly.push(chunk))
+
+    def pop(self, now_ms: float) -> Tuple[str, Optional[AudioChunk]]:
+        """What to play now: ('play', chunk), ('conceal', None) or ('wait', None)"""
+        if self._offset_ms is None:
+            return 'wait', None
+        if self._queue:
+            chunk = self._queue[0]
+            if chunk.timestamp_ms + self._offset_ms > now_ms:
+                return 'wait', None
+            self._queue.pop(0)
+            self.stats['played'] += 1
+            return 'play', chunk
+        held = self._reassembly.next_pending()
+        if held is not None:
+            # The next chunk is missing; once its slot comes, conceal it
+            if held.timestamp_ms + self._offset_ms - self._chunk_ms > now_ms:
+                return 'wait', None
+            self._queue.extend(self._reassembly.skip_gap())
+            self.stats['concealed'] += 1
+            return 'conceal', None
+        self.stats['underruns'] += 1
+        return 'wait', None
+
+    def metrics(self) -> Dict[str, Any]:
+        return dict(self.stats, jitter_ms=round(self.jitter_ms, 2), target_delay_ms=round(self.target_delay_ms, 2),
+                    reorder=self._reassembly.metrics())
+
+
+def jitter_buffer_spec() -> Dict[str, Any]:
+    """Parameters the clients' playback buffers use, sent when a stream starts"""
+    return {
+        'chunk_protocol': CHUNK_PROTOCOL_VERSION,
+        'header': {'format': '!BBHII', 'fields': ['version', 'flags', 'turn', 'sequence', 'timestamp_ms'],
+                   'flags': {'start_of_turn': FLAG_START_OF_TURN}},
+        'min_delay_ms': JITTER_MIN_DELAY_MS,
+        'max_delay_ms': JITTER_MAX_DELAY_MS,
+        'initial_delay_ms': JITTER_INITIAL_DELAY_MS,
+        'jitter_multiplier': JITTER_MULTIPLIER,
+        'decay_ms_per_chunk': JITTER_DECAY_MS,
+        'jitter_smoothing': 1 / 16
+    }
+
+
+# Export
+__all__ = [
+    'AudioChunk',
+    'CHUNK_PROTOCOL_VERSION',
+    'ChunkError',
+    'ChunkSequencer',
+    'FLAG_START_OF_TURN',
+    'JitterBuffer',
+    'ReassemblyBuffer',
+    'chunk_from_message',
+    'jitter_buffer_spec',
+    'pack_chunk',
+    'unpack_chunk'
+]
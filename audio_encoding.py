@@ -0,0 +1,480 @@
+"""
+Maya Audio Encoding
+Compresses Maya's synthesised LPCM to Opus in an Ogg or WebM container at a
+configurable bitrate, negotiated from the formats the client can play, and
+delivers it inline or as a short-lived fetchable URL rather than base64 LPCM
+inside the JSON reply
+
+Opus needs the system libopus, which the Lambda python3.11 runtime does not
+provide and the deployment package does not bundle; on Lambda only WAV and
+LPCM are negotiated, so Maya audio there is not compressed (WAV is LPCM
+with a header) until a libopus layer is shipped
+"""
+
+import os
+import re
+import time
+import base64
+import struct
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, NamedTuple, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# libopus through opuslib is optional; without it only WAV and LPCM are offered
+try:
+    import opuslib
+    OPUS_AVAILABLE = True
+except Exception:  # opuslib raises at import when libopus itself is missing
+    opuslib = None
+    OPUS_AVAILABLE = False
+
+# Speech is transparent around 24 kbit/s; poor connections can ask for less
+DEFAULT_BITRATE = int(os.environ.get('MAYA_AUDIO_BITRATE', '24000'))
+MIN_BITRATE = 6000
+MAX_BITRATE = 128000
+
+OPUS_FRAME_MS = 20
+OPUS_GRANULE_RATE = 48000  # Ogg granules and WebM timing are always 48 kHz
+OPUS_SEEK_PRE_ROLL_NS = 80000000
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# Ogg pages are flushed at about this many payload bytes
+OGG_PAGE_BYTES = 4096
+
+# WebM block timecodes are int16 milliseconds relative to their cluster
+WEBM_CLUSTER_MS = 5000
+
+# Fetchable audio: S3 presigned URLs in production, in-memory tokens locally
+AUDIO_URL_TTL_SECONDS = int(os.environ.get('MAYA_AUDIO_URL_TTL', '300'))
+AUDIO_URL_PATH = os.environ.get('MAYA_AUDIO_URL_PATH', '/api/maya/audio')
+AUDIO_STORE_MAX_ENTRIES = 256
+
+DELIVERY_INLINE = 'inline'
+DELIVERY_URL = 'url'
+
+
+class AudioEncoding(NamedTuple):
+    """A response audio format the server can produce"""
+    name: str
+    mime_type: str
+    opus: bool
+
+
+OGG_OPUS = AudioEncoding('ogg-opus', 'audio/ogg; codecs=opus', True)
+WEBM_OPUS = AudioEncoding('webm-opus', 'audio/webm; codecs=opus', True)
+WAV = AudioEncoding('wav', 'audio/wav', False)
+LPCM = AudioEncoding('lpcm', 'audio/lpcm', False)
+
+# Server preference when the client rates several formats equally
+ENCODINGS = (OGG_OPUS, WEBM_OPUS, WAV, LPCM)
+
+# MIME type (and codec where the container is ambiguous) -> encoding
+_CLIENT_TYPES = {
+    ('audio/ogg', 'opus'): OGG_OPUS,
+    ('audio/ogg', None): OGG_OPUS,
+    ('audio/opus', None): OGG_OPUS,
+    ('audio/webm', 'opus'): WEBM_OPUS,
+    ('audio/webm', None): WEBM_OPUS,
+    ('audio/wav', None): WAV,
+    ('audio/wav', '1'): WAV,
+    ('audio/wave', None): WAV,
+    ('audio/x-wav', None): WAV,
+    ('audio/lpcm', None): LPCM,
+    ('audio/l16', None): LPCM,
+    ('audio/pcm', None): LPCM
+}
+
+_PARAMETER_RE = re.compile(r'\s*;\s*([\w-]+)\s*=\s*"?([^;"]*)"?')
+
+
+class EncodedAudio(NamedTuple):
+    """One encoded Maya utterance"""
+    data: bytes
+    encoding: AudioEncoding
+    sample_rate: int
+    bitrate: Optional[int]
+    duration_seconds: float
+
+
+def available_encodings() -> List[AudioEncoding]:
+    return [encoding for encoding in ENCODINGS if OPUS_AVAILABLE or not encoding.opus]
+
+
+def _client_formats(capabilities: Union[str, Sequence[str], None]) -> List[Tuple[str, Optional[str], float]]:
+    """(type, codec, q) for an Accept-style string or a list of MIME types"""
+    if not capabilities:
+        return []
+    entries = capabilities.split(',') if isinstance(capabilities, str) else capabilities
+    parsed = []
+    for entry in entries:
+        mime_type, _, rest = str(entry).partition(';')
+        parameters = {key.lower(): value.strip() for key, value in _PARAMETER_RE.findall(';' + rest)}
+        try:
+            quality = float(parameters.get('q', 1))
+        except ValueError:
+            quality = 1.0
+        codec = parameters.get('codecs', '').strip("' ").lower() or None
+        parsed.append((mime_type.strip().lower(), codec, quality))
+    return parsed
+
+
+def negotiate_audio_encoding(capabilities: Union[str, Sequence[str], None]) -> AudioEncoding:
+    """Best encoding the client can play
+
+    ``capabilities`` is an Accept header or the MIME types the client
+    reports playable (``audio.canPlayType``). Only specific audio types
+    opt in: wildcards such as the browser fetch default ``*/*`` are ignored,
+    so clients that name no audio format get LPCM, as before.
+    """
+    formats = _client_formats(capabilities)
+    best, best_quality = LPCM, 0.0
+    for encoding in available_encodings():
+        quality = max((q for mime_type, codec, q in formats
+                       if _CLIENT_TYPES.get((mime_type, codec)) == encoding),
+                      default=0.0)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def clamp_bitrate(bitrate: Optional[Union[int, str]]) -> int:
+    try:
+        value = int(bitrate) if bitrate else DEFAULT_BITRATE
+    except (TypeError, ValueError):
+        value = DEFAULT_BITRATE
+    return max(MIN_BITRATE, min(MAX_BITRATE, value))
+
+
+# Ogg
+
+def _ogg_crc_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+
+_OGG_CRC = _ogg_crc_table()
+
+
+def ogg_crc(data: bytes) -> int:
+    """Ogg page checksum (CRC-32, polynomial 0x04C11DB7, unreflected)"""
+    crc = 0
+    table = _OGG_CRC
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ table[(crc >> 24) ^ byte]
+    return crc
+
+
+def _ogg_page(packets: List[bytes], granule: int, serial: int, sequence: int, flags: int) -> bytes:
+    lacing = bytearray()
+    for packet in packets:
+        lacing.extend(b'\xff' * (len(packet) // 255))
+        lacing.append(len(packet) % 255)
+    header = b'OggS\x00' + struct.pack('<BqIII', flags, granule, serial, sequence, 0) + bytes([len(lacing)]) + lacing
+    page = bytearray(header + b''.join(packets))
+    struct.pack_into('<I', page, 22, ogg_crc(page))
+    return bytes(page)
+
+
+def opus_head(channels: int, pre_skip: int, input_rate: int) -> bytes:
+    """RFC 7845 identification header (mapping family 0)"""
+    return b'OpusHead' + struct.pack('<BBHIhB', 1, channels, pre_skip, input_rate, 0, 0)
+
+
+def _opus_tags() -> bytes:
+    vendor = b'ielts-genai-prep'
+    return b'OpusTags' + struct.pack('<I', len(vendor)) + vendor + struct.pack('<I', 0)
+
+
+def mux_ogg_opus(packets: Sequence[bytes], input_rate: int, channels: int, pre_skip: int,
+                 total_samples: int, serial: Optional[int] = None) -> bytes:
+    """Ogg Opus stream of 20 ms packets; ``total_samples`` at ``input_rate`` trims the padding"""
+    serial = secrets.randbits(32) if serial is None else serial
+    scale = OPUS_GRANULE_RATE // input_rate
+    frame_granules = OPUS_GRANULE_RATE * OPUS_FRAME_MS // 1000
+    end_granule = pre_skip + total_samples * scale
+
+    pages = [_ogg_page([opus_head(channels, pre_skip, input_rate)], 0, serial, 0, 0x02),
+             _ogg_page([_opus_tags()], 0, serial, 1, 0)]
+    page_packets: List[bytes] = []
+    page_bytes = segments = 0
+    granule = pre_skip
+    for index, packet in enumerate(packets):
+        page_packets.append(packet)
+        page_bytes += len(packet)
+        segments += len(packet) // 255 + 1
+        last = index == len(packets) - 1
+        granule = end_granule if last else min(granule + frame_granules, end_granule)
+        if last or page_bytes >= OGG_PAGE_BYTES or segments > 255 - 6:
+            pages.append(_ogg_page(page_packets, granule, serial, len(pages), 0x04 if last else 0))
+            page_packets, page_bytes, segments = [], 0, 0
+    if not packets:
+        pages[-1] = _ogg_page([_opus_tags()], 0, serial, 1, 0x04)
+    return b''.join(pages)
+
+
+# WebM
+
+def _ebml_size(size: int) -> bytes:
+    length = 1
+    while size >= (1 << (7 * length)) - 1:
+        length += 1
+    return ((1 << (7 * length)) | size).to_bytes(length, 'big')
+
+
+def _ebml(element_id: int, payload: Union[bytes, int, float, str]) -> bytes:
+    if isinstance(payload, float):
+        payload = struct.pack('>d', payload)
+    elif isinstance(payload, int):
+        payload = payload.to_bytes(max(1, (payload.bit_length() + 7) // 8), 'big')
+    elif isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big') + _ebml_size(len(payload)) + payload
+
+
+def mux_webm_opus(packets: Sequence[bytes], input_rate: int, channels: int, pre_skip: int,
+                  total_samples: int) -> bytes:
+    """WebM (Matroska) stream of 20 ms Opus packets with a known duration"""
+    header = _ebml(0x1A45DFA3, b''.join([
+        _ebml(0x4286, 1), _ebml(0x42F7, 1), _ebml(0x42F2, 4), _ebml(0x42F3, 8),
+        _ebml(0x4282, 'webm'), _ebml(0x4287, 4), _ebml(0x4285, 2)
+    ]))
+    info = _ebml(0x1549A966, b''.join([
+        _ebml(0x2AD7B1, 1000000),  # Timecodes in milliseconds
+        _ebml(0x4D80, 'ielts-genai-prep'), _ebml(0x5741, 'ielts-genai-prep'),
+        _ebml(0x4489, total_samples * 1000.0 / input_rate)
+    ]))
+    track = _ebml(0xAE, b''.join([
+        _ebml(0xD7, 1), _ebml(0x73C5, 1), _ebml(0x83, 2), _ebml(0x86, 'A_OPUS'),
+        _ebml(0x63A2, opus_head(channels, pre_skip, input_rate)),
+        _ebml(0x56AA, pre_skip * 1000000000 // OPUS_GRANULE_RATE),
+        _ebml(0x56BB, OPUS_SEEK_PRE_ROLL_NS),
+        _ebml(0xE1, _ebml(0xB5, float(OPUS_GRANULE_RATE)) + _ebml(0x9F, channels))
+    ]))
+
+    clusters = []
+    frames_per_cluster = WEBM_CLUSTER_MS // OPUS_FRAME_MS
+    for first in range(0, len(packets), frames_per_cluster):
+        cluster_ms = first * OPUS_FRAME_MS
+        blocks = [_ebml(0xA3, b'\x81' + struct.pack('>hB', offset * OPUS_FRAME_MS, 0x80) + packet)
+                  for offset, packet in enumerate(packets[first:first + frames_per_cluster])]
+        clusters.append(_ebml(0x1F43B675, _ebml(0xE7, cluster_ms) + b''.join(blocks)))
+
+    return header + _ebml(0x18538067, info + _ebml(0x1654AE6B, track) + b''.join(clusters))
+
+
+# WAV
+
+def wav_header(data_bytes: int, sample_rate: int, channels: int = 1, bits_per_sample: int = 16) -> bytes:
+    block_align = channels * bits_per_sample // 8
+    return (b'RIFF' + struct.pack('<I', 36 + data_bytes) + b'WAVE' + b'fmt '
+            + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, sample_rate * block_align, block_align,
+                          bits_per_sample)
+            + b'data' + struct.pack('<I', data_bytes))
+
+
+# Opus
+
+def _opus_rate(sample_rate: int) -> int:
+    """Nearest rate libopus accepts at or above ``sample_rate``"""
+    return next((rate for rate in OPUS_RATES if rate >= sample_rate), OPUS_RATES[-1])
+
+
+def encode_opus_packets(pcm: bytes, sample_rate: int, channels: int = 1,
+                        bitrate: Optional[int] = None) -> Tuple[List[bytes], int]:
+    """20 ms Opus packets of 16-bit little-endian PCM, and the encoder pre-skip at 48 kHz"""
+    if not OPUS_AVAILABLE:
+        raise RuntimeError("Opus encoding needs opuslib and libopus")
+    encoder = opuslib.Encoder(sample_rate, channels, opuslib.APPLICATION_VOIP)
+    encoder.bitrate = clamp_bitrate(bitrate)
+    frame_samples = sample_rate * OPUS_FRAME_MS // 1000
+    frame_bytes = frame_samples * channels * 2
+    lookahead = getattr(encoder, 'lookahead', None) or sample_rate * 65 // 10000  # 6.5 ms
+
+    view = memoryview(pcm)
+    packets = []
+    for offset in range(0, len(view), frame_bytes):
+        frame = bytes(view[offset:offset + frame_bytes])
+        if len(frame) < frame_bytes:
+            frame += bytes(frame_bytes - len(frame))
+        packets.append(encoder.encode(frame, frame_samples))
+    return packets, lookahead * (OPUS_GRANULE_RATE // sample_rate)
+
+
+def encode_maya_audio(pcm: bytes, sample_rate: int, encoding: AudioEncoding,
+                      bitrate: Optional[int] = None, channels: int = 1) -> EncodedAudio:
+    """Encode 16-bit little-endian PCM for delivery"""
+    usable = len(pcm) - len(pcm) % (2 * channels)
+    pcm = bytes(memoryview(pcm)[:usable])
+    total_samples = usable // (2 * channels)
+    duration = total_samples / sample_rate
+
+    if encoding == LPCM:
+        return EncodedAudio(pcm, encoding, sample_rate, None, duration)
+    if encoding == WAV:
+        return EncodedAudio(wav_header(usable, sample_rate, channels) + pcm, encoding, sample_rate, None, duration)
+
+    rate = _opus_rate(sample_rate)
+    if rate != sample_rate:
+        from audio_normalize import normalize_pcm, PcmFormat
+        pcm = normalize_pcm(pcm, PcmFormat(sample_rate, channels), target_rate=rate)
+        channels, total_samples = 1, len(pcm) // 2
+    bitrate = clamp_bitrate(bitrate)
+    packets, pre_skip = encode_opus_packets(pcm, rate, channels, bitrate)
+    mux = mux_ogg_opus if encoding == OGG_OPUS else mux_webm_opus
+    return EncodedAudio(mux(packets, rate, channels, pre_skip, total_samples), encoding, rate, bitrate, duration)
+
+
+# Delivery
+
+class AudioDeliveryStore:
+    """
+    Short-lived fetchable audio
+
+    With MAYA_AUDIO_BUCKET set, audio goes to S3 behind a presigned URL;
+    otherwise it is held in memory under an unguessable token and served
+    by the audio route of the same process (local development).
+    """
+
+    def __init__(self, bucket: Optional[str] = None, ttl_seconds: int = AUDIO_URL_TTL_SECONDS,
+                 max_entries: int = AUDIO_STORE_MAX_ENTRIES):
+        self.bucket = bucket
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._s3 = None
+
+        if bucket:
+            import boto3
+            self._s3 = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+
+    def put(self, data: bytes, mime_type: str) -> str:
+        """Store audio and return the URL the client fetches it from"""
+        token = secrets.token_urlsafe(24)
+        if self._s3 is not None:
+            key = f"maya-audio/{token}"
+            self._s3.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=mime_type)
+            return self._s3.generate_presigned_url(
+                'get_object', Params={'Bucket': self.bucket, 'Key': key}, ExpiresIn=self.ttl_seconds
+            )
+
+        with self._lock:
+            self._expire()
+            self._entries[token] = (time.time() + self.ttl_seconds, data, mime_type)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return f"{AUDIO_URL_PATH}/{token}"
+
+    def get(self, token: str) -> Optional[Tuple[bytes, str]]:
+        """Audio and MIME type for a local token, if not expired"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(token)
+        return (entry[1], entry[2]) if entry else None
+
+    def _expire(self) -> None:
+        now = time.time()
+        while self._entries:
+            token, (expires, _, _) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[token]
+
+
+def _source_pcm(maya_audio: Dict[str, Any]) -> Optional[Tuple[bytes, int]]:
+    """LPCM bytes and sample rate of a synthesis result, if it is LPCM"""
+    if not maya_audio.get('success') or not maya_audio.get('audio_base64'):
+        return None
+    if str(maya_audio.get('format', 'audio/lpcm')).lower() not in ('audio/lpcm', 'lpcm', 'pcm'):
+        return None
+    try:
+        return base64.b64decode(maya_audio['audio_base64']), int(maya_audio.get('sample_rate') or 24000)
+    except (ValueError, TypeError):
+        return None
+
+
+def prepare_maya_audio(maya_audio: Optional[Dict[str, Any]], encoding: AudioEncoding,
+                       delivery: str = DELIVERY_INLINE, bitrate: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Re-encode a synthesis result's LPCM for the client
+
+    Inline delivery keeps ``audio_base64`` (of the encoded audio); URL
+    delivery replaces it with ``audio_url``, falling back to inline when the
+    upload fails. Anything that is not LPCM, or
+    a failed synthesis, is returned unchanged.
+    """
+    if not maya_audio:
+        return maya_audio
+    if encoding == LPCM and delivery == DELIVERY_INLINE:
+        return maya_audio
+    source = _source_pcm(maya_audio)
+    if source is None:
+        return maya_audio
+
+    pcm, sample_rate = source
+    try:
+        encoded = encode_maya_audio(pcm, sample_rate, encoding, bitrate)
+    except Exception as e:
+        logger.error(f"Maya audio encoding failed, sending LPCM: {e}")
+        return maya_audio
+
+    prepared = {key: value for key, value in maya_audio.items() if key != 'audio_base64'}
+    prepared.update({
+        'format': encoded.encoding.mime_type,
+        'encoding': encoded.encoding.name,
+        'sample_rate': encoded.sample_rate,
+        'bitrate': encoded.bitrate,
+        'byte_length': len(encoded.data),
+        'duration_ms': prepared.get('duration_ms') or int(encoded.duration_seconds * 1000)
+    })
+    if delivery == DELIVERY_URL:
+        try:
+            prepared['audio_url'] = get_audio_delivery_store().put(encoded.data, encoded.encoding.mime_type)
+            prepared['audio_url_expires_in'] = AUDIO_URL_TTL_SECONDS
+            return prepared
+        except Exception as e:
+            logger.error(f"Maya audio upload failed, sending inline: {e}")
+    prepared['audio_base64'] = base64.b64encode(encoded.data).decode('ascii')
+    return prepared
+
+
+# Global instance
+_audio_delivery_store = None
+
+def get_audio_delivery_store() -> AudioDeliveryStore:
+    """Get global audio delivery store instance"""
+    global _audio_delivery_store
+    if _audio_delivery_store is None:
+        _audio_delivery_store = AudioDeliveryStore(bucket=os.environ.get('MAYA_AUDIO_BUCKET'))
+    return _audio_delivery_store
+
+
+# Export
+__all__ = [
+    'AudioDeliveryStore',
+    'AudioEncoding',
+    'DELIVERY_INLINE',
+    'DELIVERY_URL',
+    'EncodedAudio',
+    'LPCM',
+    'OGG_OPUS',
+    'OPUS_AVAILABLE',
+    'WAV',
+    'WEBM_OPUS',
+    'available_encodings',
+    'clamp_bitrate',
+    'encode_maya_audio',
+    'get_audio_delivery_store',
+    'mux_ogg_opus',
+    'mux_webm_opus',
+    'negotiate_audio_encoding',
+    'prepare_maya_audio'
+]
@@ -0,0 +1,277 @@
+"""
+Audio Ingestion
+Reads speaking submissions into a single buffer that moderation,
+transcription and encryption share: base64 JSON fields are decoded
+incrementally, raw binary and multipart bodies are sliced in place and the
+container format is checked from the header bytes without copying
+"""
+
+import os
+import re
+import json
+import base64
+import binascii
+import logging
+from typing import Dict, Any, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Largest decoded upload accepted; a 2-minute Part 2 answer is a few MB
+MAX_AUDIO_BYTES = int(os.environ.get('MAX_AUDIO_BYTES', str(10 * 1024 * 1024)))
+
+# Base64 characters decoded per step; a multiple of 4 so steps align with quanta
+BASE64_CHUNK_CHARS = 64 * 1024
+
+# Raw and multipart request bodies that carry audio
+AUDIO_BODY_TYPES = ('application/octet-stream', 'multipart/form-data')
+
+AUDIO_CONTENT_TYPES = {
+    'wav': 'audio/wav',
+    'webm': 'audio/webm',
+    'ogg': 'audio/ogg',
+    'mp3': 'audio/mpeg',
+    'flac': 'audio/flac',
+    'mp4': 'audio/mp4'
+}
+
+_BASE64_RE = re.compile(r'[A-Za-z0-9+/]*={0,2}')
+_DATA_URL_RE = re.compile(r'data:[^,;]*(?:;[^,;]*)*;base64,')
+_DISPOSITION_PARAM_RE = re.compile(r'(\w+)="([^"]*)"')
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class AudioIngestError(ValueError):
+    """Audio upload rejected as malformed, oversized or of an unknown format"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(message)
+
+
+def detect_audio_format(data: BytesLike) -> Optional[str]:
+    """Container format from the first bytes, or None if unrecognised"""
+    header = memoryview(data)[:12]
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'
+    if header[:4] == b'OggS':
+        return 'ogg'
+    if header[:4] == b'fLaC':
+        return 'flac'
+    if header[4:8] == b'ftyp':
+        return 'mp4'
+    if header[:3] == b'ID3' or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return None
+
+
+class AudioBuffer:
+    """
+    Decoded audio held once and passed around by reference
+
+    ``data`` is a memoryview over either the bytearray the upload was
+    decoded into or the raw request body, so slicing and handing it to
+    other services never copies the samples.
+    """
+
+    def __init__(self, data: BytesLike, content_type: Optional[str] = None):
+        self.data = memoryview(data)
+        self.format = detect_audio_format(self.data)
+        self.content_type = AUDIO_CONTENT_TYPES.get(self.format) or content_type
+        # Header probe result (audio_probe.AudioInfo), cached with the upload
+        self.info = None
+
+    def __len__(self) -> int:
+        return self.data.nbytes
+
+    def __bytes__(self) -> bytes:
+        # Copies; only for APIs that insist on an immutable bytes object
+        return self.data.tobytes()
+
+    def to_base64(self) -> str:
+        """Base64 text for JSON payloads and model request bodies"""
+        return base64.b64encode(self.data).decode('ascii')
+
+
+def _base64_span(text: str) -> Tuple[int, int]:
+    """Start offset (after any data URL prefix) and exact decoded length"""
+    match = _DATA_URL_RE.match(text, 0, 256)
+    start = match.end() if match else 0
+    encoded = len(text) - start
+    if encoded % 4:
+        raise AudioIngestError('Invalid base64 audio data')
+    padding = 2 if text.endswith('==') else 1 if text.endswith('=') else 0
+    return start, encoded // 4 * 3 - padding
+
+
+def check_base64_audio(text: str, max_bytes: Optional[int] = None) -> int:
+    """Validate base64 audio without decoding it; returns the decoded size
+
+    The size limit is applied from the encoded length, so oversized uploads
+    are rejected before any work is done on them.
+    """
+    if not isinstance(text, str) or not text:
+        raise AudioIngestError('Invalid audio data format')
+
+    start, size = _base64_span(text)
+    if size > (max_bytes or MAX_AUDIO_BYTES):
+        raise AudioIngestError('Audio data too large', 413)
+    if not _BASE64_RE.fullmatch(text, start):
+        raise AudioIngestError('Invalid base64 audio data')
+    return size
+
+
+def decode_base64_audio(text: str, buffer: Optional[bytearray] = None,
+                        max_bytes: Optional[int] = None) -> memoryview:
+    """Decode base64 audio into ``buffer`` a chunk at a time
+
+    The buffer is sized from the encoded length up front, so apart from it
+    only one chunk of decoded output is alive at any moment. Pass a
+    bytearray to reuse it across submissions; it is grown if too small.
+    Returns a view of the decoded bytes.
+    """
+    size = check_base64_audio(text, max_bytes)
+    start, _ = _base64_span(text)
+
+    if buffer is None:
+        buffer = bytearray(size)
+    elif len(buffer) < size:
+        buffer.extend(bytes(size - len(buffer)))
+
+    view = memoryview(buffer)
+    position = 0
+    try:
+        for offset in range(start, len(text), BASE64_CHUNK_CHARS):
+            decoded = binascii.a2b_base64(text[offset:offset + BASE64_CHUNK_CHARS])
+            view[position:position + len(decoded)] = decoded
+            position += len(decoded)
+    except (binascii.Error, ValueError):
+        raise AudioIngestError('Invalid base64 audio data')
+
+    if position != size:
+        raise AudioIngestError('Invalid base64 audio data')
+    return view[:size]
+
+
+def audio_from_base64(text: str, buffer: Optional[bytearray] = None,
+                      max_bytes: Optional[int] = None) -> AudioBuffer:
+    """AudioBuffer from a base64 (or base64 data URL) JSON field"""
+    return AudioBuffer(decode_base64_audio(text, buffer, max_bytes))
+
+
+def parse_multipart(body: Union[bytes, bytearray], content_type: str,
+                    audio_field: str = 'audio') -> Tuple[Dict[str, str], Optional[AudioBuffer]]:
+    """Form fields and the audio part of a multipart/form-data body
+
+    The audio part is returned as a view into ``body``; only the small text
+    fields are decoded.
+    """
+    boundary = None
+    for param in content_type.split(';')[1:]:
+        key, _, value = param.strip().partition('=')
+        if key.lower() == 'boundary':
+            boundary = value.strip('"')
+    if not boundary:
+        raise AudioIngestError('Multipart boundary missing')
+
+    delimiter = b'--' + boundary.encode('latin-1')
+    view = memoryview(body)
+    fields, audio = {}, None
+
+    position = body.find(delimiter)
+    while position >= 0:
+        headers_start = position + len(delimiter)
+        if body[headers_start:headers_start + 2] == b'--':
+            break
+        headers_end = body.find(b'\r\n\r\n', headers_start)
+        part_end = body.find(b'\r\n' + delimiter, headers_end + 4)
+        if headers_end < 0 or part_end < 0:
+            raise AudioIngestError('Malformed multipart body')
+
+        part_headers = {}
+        for line in bytes(view[headers_start:headers_end]).decode('latin-1').split('\r\n'):
+            name, _, value = line.partition(':')
+            if value:
+                part_headers[name.strip().lower()] = value.strip()
+        disposition = dict(_DISPOSITION_PARAM_RE.findall(part_headers.get('content-disposition', '')))
+        content = view[headers_end + 4:part_end]
+
+        if disposition.get('name') == audio_field or 'filename' in disposition:
+            if audio is None:
+                audio = AudioBuffer(content, part_headers.get('content-type'))
+        elif disposition.get('name'):
+            fields[disposition['name']] = bytes(content).decode('utf-8')
+        position = part_end + 2
+
+    return fields, audio
+
+
+def read_audio_submission(body: Union[str, bytes, None], content_type: Optional[str],
+                          is_base64_encoded: bool = False,
+                          max_bytes: Optional[int] = None) -> Tuple[Dict[str, Any], Optional[AudioBuffer]]:
+    """Fields and audio from a speaking submission request body
+
+    Accepts JSON with a base64 ``audio_data`` field, raw ``audio/*`` or
+    ``application/octet-stream`` bodies, and multipart/form-data uploads
+    with an ``audio`` file part. API Gateway delivers binary bodies base64
+    encoded; they are decoded once into the buffer the audio is sliced from.
+    """
+    max_bytes = max_bytes or MAX_AUDIO_BYTES
+    mime = (content_type or 'application/json').split(';')[0].strip().lower()
+
+    if mime.startswith('audio/') or mime in AUDIO_BODY_TYPES:
+        if isinstance(body, str):
+            # Multipart framing adds a little on top of the audio itself
+            raw = decode_base64_audio(body, max_bytes=max_bytes + 64 * 1024) if is_base64_encoded \
+                else body.encode('latin-1')
+        else:
+            raw = body or b''
+
+        if mime == 'multipart/form-data':
+            if isinstance(raw, memoryview):
+                raw = raw.obj if raw.nbytes == len(raw.obj) else raw.tobytes()
+            fields, audio = parse_multipart(raw, content_type)
+        else:
+            fields, audio = {}, AudioBuffer(raw, content_type if mime.startswith('audio/') else None)
+
+        if audio is not None and len(audio) > max_bytes:
+            raise AudioIngestError('Audio data too large', 413)
+        return fields, audio if audio is not None and len(audio) else None
+
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8')
+    try:
+        fields = json.loads(body) if body else {}
+    except json.JSONDecodeError:
+        raise AudioIngestError('Invalid JSON body')
+
+    audio_data = fields.pop('audio_data', None)
+    audio = audio_from_base64(audio_data, max_bytes=max_bytes) if audio_data else None
+    return fields, audio
+
+
+def base64_audio_format(text: str) -> Optional[str]:
+    """Container format of base64 audio, decoding only its first 16 characters"""
+    start, _ = _base64_span(text)
+    try:
+        return detect_audio_format(binascii.a2b_base64(text[start:start + 16]))
+    except (binascii.Error, ValueError):
+        return None
+
+
+# Export
+__all__ = [
+    'AudioBuffer',
+    'AudioIngestError',
+    'MAX_AUDIO_BYTES',
+    'audio_from_base64',
+    'base64_audio_format',
+    'check_base64_audio',
+    'decode_base64_audio',
+    'detect_audio_format',
+    'parse_multipart',
+    'read_audio_submission'
+]
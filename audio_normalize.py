@@ -0,0 +1,340 @@
+"""
+Audio Normalization
+Converts recorded PCM (44.1/48 kHz, stereo, 8-32 bit or float) into the
+16 kHz 16-bit mono LPCM Nova Sonic expects: polyphase resampling, channel
+downmix, int16 conversion and optional peak/RMS gain, a chunk at a time so
+the same stage serves whole uploads and live streams
+"""
+
+import math
+import logging
+from typing import Optional, NamedTuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from audio_ingest import AudioBuffer
+from audio_probe import probe_audio
+
+logger = logging.getLogger(__name__)
+
+# Nova Sonic audioInput: 16 kHz, 16-bit, mono
+TARGET_SAMPLE_RATE = 16000
+
+# Anti-aliasing filter: Kaiser-windowed sinc, ten zero crossings per side
+KAISER_BETA = 5.0
+FILTER_HALF_WIDTH = 10
+
+# Blocks with fewer outputs per filter phase than this are filtered by gather
+GATHER_BELOW_ROWS_PER_PHASE = 16
+
+# Normalisation targets and the most a quiet recording is boosted
+PEAK_TARGET_DBFS = -1.0
+RMS_TARGET_DBFS = -20.0
+MAX_GAIN_DB = 20.0
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class PcmFormat(NamedTuple):
+    """Layout of interleaved PCM samples"""
+    sample_rate: int
+    channels: int = 1
+    bits_per_sample: int = 16
+    floating: bool = False
+    big_endian: bool = False
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.channels * self.bits_per_sample // 8
+
+
+NOVA_SONIC_INPUT = PcmFormat(TARGET_SAMPLE_RATE)
+
+_INTEGER_BITS = (8, 16, 24, 32)
+_FLOAT_BITS = (32, 64)
+
+
+def _dbfs_to_level(dbfs: float) -> float:
+    return 10.0 ** (dbfs / 20.0)
+
+
+def decode_pcm(data: BytesLike, source: PcmFormat) -> np.ndarray:
+    """Float32 samples in [-1, 1) with shape (frames, channels)
+
+    ``data`` must hold whole frames. 16- and 32-bit input is read in place;
+    only the float32 result is allocated.
+    """
+    order = '>' if source.big_endian else '<'
+    bits = source.bits_per_sample
+    if source.floating:
+        samples = np.frombuffer(data, dtype=f'{order}f{bits // 8}').astype(np.float32)
+    elif bits == 8:
+        # 8-bit WAV is unsigned with a 128 midpoint
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) * (1.0 / 128)
+    elif bits == 24:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        high, low = (0, 2) if source.big_endian else (2, 0)
+        packed = (raw[:, high] << 16) | (raw[:, 1] << 8) | raw[:, low]
+        samples = (packed - ((packed & 0x800000) << 1)).astype(np.float32) * (1.0 / 2 ** 23)
+    else:
+        samples = np.frombuffer(data, dtype=f'{order}i{bits // 8}').astype(np.float32)
+        samples *= 1.0 / 2 ** (bits - 1)
+    return samples.reshape(-1, source.channels)
+
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    """Mono by averaging channels; mono input is returned as a flat view"""
+    if samples.shape[1] == 1:
+        return samples[:, 0]
+    return samples.mean(axis=1, dtype=np.float32)
+
+
+def to_int16(samples: np.ndarray, gain: float = 1.0) -> bytes:
+    """Little-endian 16-bit PCM bytes, rounded and clipped"""
+    scaled = samples * np.float32(gain * 32768.0)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype('<i2').tobytes()
+
+
+def design_lowpass(up: int, down: int) -> np.ndarray:
+    """Anti-aliasing FIR for an up/down polyphase resampler, gain ``up``"""
+    max_rate = max(up, down)
+    half_length = FILTER_HALF_WIDTH * max_rate
+    positions = np.arange(-half_length, half_length + 1, dtype=np.float64)
+    taps = np.sinc(positions / max_rate) * np.kaiser(2 * half_length + 1, KAISER_BETA)
+    return taps * (up / taps.sum())
+
+
+class PolyphaseResampler:
+    """
+    Rational-ratio resampler fed a block of samples at a time
+
+    The input is conceptually upsampled by ``up``, filtered and decimated
+    by ``down``; only the filter phase each output sample needs is ever
+    evaluated. Samples the next block still needs are carried over, so the
+    concatenated output of any chunking is identical to one-shot resampling.
+    """
+
+    def __init__(self, input_rate: int, output_rate: int):
+        divisor = math.gcd(input_rate, output_rate)
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+
+        if self.up == self.down:
+            self.taps = 1
+            self._delay = 0
+            self._bank = np.ones((1, 1), dtype=np.float32)
+        else:
+            lowpass = design_lowpass(self.up, self.down)
+            self._delay = len(lowpass) // 2
+            self.taps = -(-len(lowpass) // self.up)
+            # Row p holds h[p], h[p + up], ... reversed to run oldest sample first
+            padded = np.zeros(self.taps * self.up)
+            padded[:len(lowpass)] = lowpass
+            self._bank = padded.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32)
+        self.reset()
+
+    def reset(self) -> None:
+        # Zeros stand in for the samples before the stream started
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._start = 1 - self.taps
+        self._received = 0
+        self._next_output = 0
+
+    def _base(self, output_index: int) -> int:
+        return (output_index * self.down + self._delay) // self.up
+
+    def _filter(self, buffer: np.ndarray, first: int, stop: int) -> np.ndarray:
+        count = stop - first
+        out = np.empty(max(count, 0), dtype=np.float32)
+        if count <= 0:
+            return out
+        if self.up == self.down:
+            out[:] = buffer[first - self._start:stop - self._start]
+            return out
+
+        windows = sliding_window_view(buffer, self.taps)
+        if count < GATHER_BELOW_ROWS_PER_PHASE * self.up:
+            # Streaming-sized blocks: gather every window in one step rather
+            # than looping over phases that each produce only a row or two
+            bases, phases = np.divmod(np.arange(first, stop) * self.down + self._delay, self.up)
+            out[:] = np.einsum('ij,ij->i', windows[bases - self.taps + 1 - self._start], self._bank[phases])
+            return out
+
+        # Outputs ``up`` apart share a filter phase and step ``down`` input samples
+        for offset in range(min(self.up, count)):
+            base, phase = divmod((first + offset) * self.down + self._delay, self.up)
+            row = base - self.taps + 1 - self._start
+            rows = len(range(offset, count, self.up))
+            out[offset::self.up] = windows[row:row + (rows - 1) * self.down + 1:self.down] @ self._bank[phase]
+        return out
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resampled output available once ``samples`` have been added"""
+        buffer = np.concatenate((self._history, samples.astype(np.float32, copy=False)))
+        self._received += len(samples)
+
+        # Last output whose newest input sample has arrived
+        stop = max(self._next_output, (self.up * self._received - 1 - self._delay) // self.down + 1)
+        out = self._filter(buffer, self._next_output, stop)
+        self._next_output = stop
+
+        keep = min(self._base(stop) - self.taps + 1, self._received)
+        # Copied so a whole-recording block is not pinned by its last few samples
+        self._history = buffer[keep - self._start:].copy()
+        self._start = keep
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Remaining output for the stream end, then ready for a new stream"""
+        total = -(-self._received * self.up // self.down)
+        if total <= self._next_output:
+            self.reset()
+            return np.empty(0, dtype=np.float32)
+
+        end = self._start + len(self._history)
+        padding = max(0, self._base(total - 1) + 1 - end)
+        buffer = np.concatenate((self._history, np.zeros(padding, dtype=np.float32)))
+        out = self._filter(buffer, self._next_output, total)
+        self.reset()
+        return out
+
+
+class AudioNormalizer:
+    """
+    PCM in any supported layout to 16-bit mono at ``target_rate``
+
+    ``process`` accepts arbitrary byte chunks (a frame split across chunks
+    is carried over) and returns the output ready so far; ``flush`` returns
+    the filter tail at the end of the stream.
+
+    ``normalize`` is None, 'peak' or 'rms'. Gain comes from the level of
+    everything seen so far and is capped at ``max_gain_db``; given a whole
+    recording in one call it is exact, on a live stream it only ever falls
+    as louder speech arrives, so it never pumps.
+    """
+
+    def __init__(self, source: PcmFormat, target_rate: int = TARGET_SAMPLE_RATE,
+                 normalize: Optional[str] = None, target_dbfs: Optional[float] = None,
+                 max_gain_db: float = MAX_GAIN_DB):
+        valid_bits = _FLOAT_BITS if source.floating else _INTEGER_BITS
+        if source.bits_per_sample not in valid_bits or source.channels < 1 or source.sample_rate <= 0:
+            raise ValueError(f"Unsupported PCM format: {source}")
+        if normalize not in (None, 'peak', 'rms'):
+            raise ValueError(f"Unknown normalization: {normalize}")
+
+        self.source = source
+        self.target_rate = target_rate
+        self.normalize = normalize
+        self.resampler = PolyphaseResampler(source.sample_rate, target_rate)
+        default_dbfs = PEAK_TARGET_DBFS if normalize == 'peak' else RMS_TARGET_DBFS
+        self._target_level = _dbfs_to_level(default_dbfs if target_dbfs is None else target_dbfs)
+        self._max_gain = _dbfs_to_level(max_gain_db)
+        self.reset()
+
+    def reset(self) -> None:
+        self.resampler.reset()
+        self._pending = b''
+        self._peak = 0.0
+        self._sum_squares = 0.0
+        self._samples_seen = 0
+        self.gain = 1.0
+
+    def _update_gain(self, mono: np.ndarray) -> None:
+        if not self.normalize or not len(mono):
+            return
+        self._peak = max(self._peak, float(np.max(np.abs(mono))))
+        if self._peak == 0.0:
+            return
+        if self.normalize == 'peak':
+            gain = self._target_level / self._peak
+        else:
+            self._sum_squares += float(np.dot(mono, mono))
+            self._samples_seen += len(mono)
+            rms = math.sqrt(self._sum_squares / self._samples_seen)
+            # Never push the loudest sample past full scale
+            gain = min(self._target_level / rms, 1.0 / self._peak)
+        self.gain = min(gain, self._max_gain)
+
+    def process(self, chunk: BytesLike) -> bytes:
+        """16-bit mono output for the whole frames received so far"""
+        data = memoryview(chunk).cast('B')
+        if self._pending:
+            data = memoryview(self._pending + data.tobytes())
+        whole = len(data) - len(data) % self.source.frame_bytes
+        self._pending = data[whole:].tobytes()
+        if not whole:
+            return b''
+
+        mono = downmix(decode_pcm(data[:whole], self.source))
+        self._update_gain(mono)
+        return to_int16(self.resampler.process(mono), self.gain)
+
+    def flush(self) -> bytes:
+        """Filter tail for the end of the stream; resets for reuse"""
+        if self._pending:
+            logger.warning(f"Dropping {len(self._pending)} bytes of incomplete PCM frame")
+        tail = to_int16(self.resampler.flush(), self.gain)
+        self.reset()
+        return tail
+
+
+def normalize_pcm(data: BytesLike, source: PcmFormat, target_rate: int = TARGET_SAMPLE_RATE,
+                  normalize: Optional[str] = None, target_dbfs: Optional[float] = None) -> bytes:
+    """One-shot conversion of a whole PCM recording to 16-bit mono"""
+    normalizer = AudioNormalizer(source, target_rate, normalize, target_dbfs)
+    return normalizer.process(data) + normalizer.flush()
+
+
+def pcm_source_format(audio: AudioBuffer) -> Optional[PcmFormat]:
+    """PcmFormat of an uncompressed upload (WAV or raw LPCM), else None"""
+    info = probe_audio(audio)
+    if info.format not in ('wav', 'pcm') or not info.exact or not info.sample_rate or not info.channels:
+        return None
+    floating = info.codec == 'pcm_float'
+    if not (floating or (info.codec or '').startswith('pcm_s') or info.codec == 'pcm'):
+        return None
+    # audio/L16 and friends are network byte order (RFC 2586)
+    big_endian = info.format == 'pcm' and (audio.content_type or '').strip().lower().startswith('audio/l')
+    source = PcmFormat(info.sample_rate, info.channels, info.bits_per_sample or 16, floating, big_endian)
+    valid_bits = _FLOAT_BITS if floating else _INTEGER_BITS
+    return source if source.bits_per_sample in valid_bits else None
+
+
+def normalize_audio_buffer(audio: AudioBuffer, target_rate: int = TARGET_SAMPLE_RATE,
+                           normalize: Optional[str] = None) -> Optional[bytes]:
+    """16-bit mono PCM for an uncompressed upload, or None for compressed audio
+
+    WAV payloads are read in place from the data chunk; uploads already in
+    the target layout are returned without resampling.
+    """
+    source = pcm_source_format(audio)
+    if source is None:
+        return None
+
+    info = probe_audio(audio)
+    frames = int(round(info.duration_seconds * source.sample_rate))
+    payload = audio.data[info.data_offset:info.data_offset + frames * source.frame_bytes]
+    if source == PcmFormat(target_rate) and not normalize:
+        return payload.tobytes()
+    return normalize_pcm(payload, source, target_rate, normalize)
+
+
+# Export
+__all__ = [
+    'AudioNormalizer',
+    'NOVA_SONIC_INPUT',
+    'PcmFormat',
+    'PolyphaseResampler',
+    'TARGET_SAMPLE_RATE',
+    'decode_pcm',
+    'downmix',
+    'normalize_audio_buffer',
+    'normalize_pcm',
+    'pcm_source_format',
+    'to_int16'
+]
@@ -0,0 +1,345 @@
+"""
+Audio Probe
+Reads duration, sample rate and channel count from container headers
+(WAV/RIFF, WebM/Matroska, Ogg, FLAC) or raw LPCM content-type descriptors
+without decoding the audio payload
+"""
+
+import re
+import struct
+import base64
+import binascii
+import logging
+from typing import Dict, Any, Optional, NamedTuple, Tuple
+
+from audio_ingest import AudioBuffer, AudioIngestError, detect_audio_format
+
+logger = logging.getLogger(__name__)
+
+# Container headers sit in the first few hundred bytes; this leaves slack
+PROBE_HEAD_BYTES = 4096
+
+# Streamed WebM/Ogg carry their end time in the last cluster/page
+PROBE_TAIL_BYTES = 64 * 1024
+
+# Size-based fallback: 16 kHz, 16-bit mono is about 32 KB per second
+FALLBACK_BYTES_PER_SECOND = 32 * 1024
+
+_PCM_TYPE_RE = re.compile(r'audio/(?:l(8|16|24)|pcm|lpcm|x-pcm)\b', re.IGNORECASE)
+
+
+class AudioInfo(NamedTuple):
+    """What the header says about an upload"""
+    format: Optional[str]
+    codec: Optional[str]
+    sample_rate: Optional[int]
+    channels: Optional[int]
+    bits_per_sample: Optional[int]
+    duration_seconds: float
+    exact: bool
+    # Where the sample payload starts (WAV data chunk); 0 for raw PCM
+    data_offset: int = 0
+
+
+def _estimate(total_size: int, audio_format: Optional[str] = None, **known) -> AudioInfo:
+    fields = dict(codec=None, sample_rate=None, channels=None, bits_per_sample=None)
+    fields.update(known)
+    return AudioInfo(format=audio_format, duration_seconds=total_size / FALLBACK_BYTES_PER_SECOND,
+                     exact=False, **fields)
+
+
+# WAV / RIFF
+
+_WAV_CODECS = {1: 'pcm', 3: 'pcm_float', 6: 'pcm_alaw', 7: 'pcm_mulaw', 0xFFFE: 'pcm'}
+
+
+def _probe_wav(head: bytes, total_size: int) -> AudioInfo:
+    fmt, data_offset, data_size = None, None, None
+    position = 12
+    while position + 8 <= len(head):
+        chunk_id = head[position:position + 4]
+        chunk_size = struct.unpack_from('<I', head, position + 4)[0]
+        if chunk_id == b'fmt ' and position + 24 <= len(head):
+            fmt = struct.unpack_from('<HHIIHH', head, position + 8)
+        elif chunk_id == b'data':
+            data_offset, data_size = position + 8, chunk_size
+            break
+        position += 8 + chunk_size + (chunk_size & 1)
+
+    if fmt is None:
+        return _estimate(total_size, 'wav')
+
+    format_tag, channels, sample_rate, byte_rate, _, bits = fmt
+    codec = _WAV_CODECS.get(format_tag, f'wav_{format_tag:#x}')
+    if data_offset is None or not byte_rate:
+        return _estimate(total_size, 'wav', codec=codec, sample_rate=sample_rate, channels=channels, bits_per_sample=bits)
+
+    # Recorders that stream WAV leave the size as 0 or 0xFFFFFFFF; use what arrived
+    available = total_size - data_offset
+    if data_size in (0, 0xFFFFFFFF) or data_size > available:
+        data_size = available
+    return AudioInfo('wav', codec, sample_rate, channels, bits, data_size / byte_rate, True, data_offset)
+
+
+# WebM / Matroska (EBML)
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_TRACKS = 0x1654AE6B
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_CODEC_ID = 0x86
+_EBML_AUDIO = 0xE1
+_EBML_SAMPLING_FREQUENCY = 0xB5
+_EBML_CHANNELS = 0x9F
+_EBML_BIT_DEPTH = 0x6264
+_EBML_CLUSTER = 0x1F43B675
+_EBML_CLUSTER_TIMECODE = 0xE7
+_EBML_SIMPLE_BLOCK = 0xA3
+_EBML_BLOCK_GROUP = 0xA0
+_EBML_BLOCK = 0xA1
+
+_EBML_MASTERS = {_EBML_SEGMENT, _EBML_INFO, _EBML_TRACKS, _EBML_TRACK_ENTRY, _EBML_AUDIO}
+
+# Matroska codec ids to short names
+_WEBM_CODECS = {'A_OPUS': 'opus', 'A_VORBIS': 'vorbis', 'A_PCM/INT/LIT': 'pcm', 'A_AAC': 'aac'}
+
+
+def _ebml_vint(data: bytes, position: int, keep_marker: bool) -> Tuple[Optional[int], int]:
+    """Variable-length integer at ``position``; None for the reserved unknown size"""
+    first = data[position]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8 or position + length > len(data):
+        raise ValueError('Truncated EBML element')
+
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[position + 1:position + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, position + length
+    return value, position + length
+
+
+def _ebml_elements(data: bytes, start: int, end: int):
+    """(id, payload start, payload end) for elements between ``start`` and ``end``"""
+    position = start
+    while position < end:
+        element_id, position = _ebml_vint(data, position, keep_marker=True)
+        size, position = _ebml_vint(data, position, keep_marker=False)
+        payload_end = end if size is None else min(position + size, end)
+        yield element_id, position, payload_end
+        if size is None and element_id not in _EBML_MASTERS:
+            return
+        position = payload_end if element_id not in _EBML_MASTERS else position
+
+
+def _ebml_uint(data: bytes, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], 'big')
+
+
+def _ebml_float(data: bytes, start: int, end: int) -> float:
+    return struct.unpack('>f' if end - start == 4 else '>d', data[start:end])[0]
+
+
+def _webm_last_timecode(tail: bytes) -> Optional[int]:
+    """Latest block timecode in the last complete-looking cluster of ``tail``"""
+    marker = _EBML_CLUSTER.to_bytes(4, 'big')
+    search_end = len(tail)
+    while True:
+        start = tail.rfind(marker, 0, search_end)
+        if start < 0:
+            return None
+        try:
+            cluster_timecode, latest = None, None
+            _, payload = _ebml_vint(tail, start + 4, keep_marker=False)
+            for element_id, child_start, child_end in _ebml_elements(tail, payload, len(tail)):
+                if element_id == _EBML_CLUSTER_TIMECODE:
+                    cluster_timecode = _ebml_uint(tail, child_start, child_end)
+                elif element_id in (_EBML_SIMPLE_BLOCK, _EBML_BLOCK_GROUP, _EBML_BLOCK) and cluster_timecode is not None:
+                    block = child_start
+                    if element_id == _EBML_BLOCK_GROUP:
+                        _, block = _ebml_vint(tail, child_start, keep_marker=True)
+                        _, block = _ebml_vint(tail, block, keep_marker=False)
+                    _, block = _ebml_vint(tail, block, keep_marker=False)  # track number
+                    if block + 2 <= len(tail):
+                        relative = struct.unpack_from('>h', tail, block)[0]
+                        latest = max(latest or 0, cluster_timecode + relative)
+                elif element_id == _EBML_CLUSTER:
+                    break
+            if cluster_timecode is not None:
+                return latest if latest is not None else cluster_timecode
+        except (ValueError, struct.error):
+            pass
+        # Marker bytes inside audio data; keep looking further back
+        search_end = start
+
+
+def _probe_webm(head: bytes, total_size: int, tail: bytes) -> AudioInfo:
+    found: Dict[str, Any] = {'timecode_scale': 1000000}
+    try:
+        for element_id, start, end in _ebml_elements(head, 0, len(head)):
+            if element_id == _EBML_TIMECODE_SCALE:
+                found['timecode_scale'] = _ebml_uint(head, start, end)
+            elif element_id == _EBML_DURATION:
+                found['duration'] = _ebml_float(head, start, end)
+            elif element_id == _EBML_CODEC_ID and 'codec' not in found:
+                codec_id = bytes(head[start:end]).rstrip(b'\x00').decode('ascii', 'replace')
+                found['codec'] = _WEBM_CODECS.get(codec_id, codec_id.lower())
+            elif element_id == _EBML_SAMPLING_FREQUENCY and 'sample_rate' not in found:
+                found['sample_rate'] = int(_ebml_float(head, start, end))
+            elif element_id == _EBML_CHANNELS and 'channels' not in found:
+                found['channels'] = _ebml_uint(head, start, end)
+            elif element_id == _EBML_BIT_DEPTH and 'bits_per_sample' not in found:
+                found['bits_per_sample'] = _ebml_uint(head, start, end)
+            elif element_id == _EBML_CLUSTER:
+                break
+    except (ValueError, struct.error):
+        pass  # headers cut off by the probe window; use what was read
+
+    known = {key: found.get(key) for key in ('codec', 'sample_rate', 'channels', 'bits_per_sample')}
+    scale = found['timecode_scale'] / 1e9
+    if found.get('duration'):
+        return AudioInfo('webm', duration_seconds=found['duration'] * scale, exact=True, **known)
+
+    # MediaRecorder writes live WebM without a Duration; read the last cluster
+    last_timecode = _webm_last_timecode(tail)
+    if last_timecode is None:
+        return _estimate(total_size, 'webm', **known)
+    frame = 0.02 if known['codec'] == 'opus' else 0.0
+    return AudioInfo('webm', duration_seconds=last_timecode * scale + frame, exact=True, **known)
+
+
+# Ogg (Opus / Vorbis)
+
+def _probe_ogg(head: bytes, total_size: int, tail: bytes) -> AudioInfo:
+    segments = head[26] if len(head) > 26 else 0
+    packet = head[27 + segments:27 + segments + 19]
+    if packet[:8] == b'OpusHead':
+        codec, channels, pre_skip, sample_rate = 'opus', packet[9], struct.unpack_from('<H', packet, 10)[0], 48000
+        input_rate = struct.unpack_from('<I', packet, 12)[0] or 48000
+    elif packet[:7] == b'\x01vorbis':
+        codec, channels, pre_skip = 'vorbis', packet[11], 0
+        sample_rate = input_rate = struct.unpack_from('<I', packet, 12)[0]
+    else:
+        return _estimate(total_size, 'ogg')
+
+    position = len(tail)
+    while True:
+        position = tail.rfind(b'OggS', 0, position)
+        if position < 0 or position + 14 > len(tail):
+            return _estimate(total_size, 'ogg', codec=codec, sample_rate=input_rate, channels=channels)
+        if tail[position + 4] == 0:
+            granule = struct.unpack_from('<q', tail, position + 6)[0]
+            if granule >= 0:
+                break
+    return AudioInfo('ogg', codec, input_rate, channels, None, max(0, granule - pre_skip) / sample_rate, True)
+
+
+# FLAC
+
+def _probe_flac(head: bytes, total_size: int) -> AudioInfo:
+    # STREAMINFO is always the first metadata block
+    if len(head) < 42 or head[4] & 0x7F != 0:
+        return _estimate(total_size, 'flac')
+    packed = int.from_bytes(head[18:26], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not samples:
+        return _estimate(total_size, 'flac', codec='flac', sample_rate=sample_rate or None, channels=channels)
+    return AudioInfo('flac', 'flac', sample_rate, channels, bits, samples / sample_rate, True)
+
+
+# Raw LPCM (no header; described by the content type)
+
+def _probe_pcm(content_type: str, total_size: int) -> Optional[AudioInfo]:
+    match = _PCM_TYPE_RE.match(content_type.strip())
+    if not match:
+        return None
+    params = {}
+    for param in content_type.split(';')[1:]:
+        key, _, value = param.strip().partition('=')
+        params[key.lower()] = value.strip()
+    try:
+        sample_rate = int(params.get('rate', '16000'))
+        channels = int(params.get('channels', '1'))
+        bits = int(match.group(1) or params.get('bits', '16'))
+    except ValueError:
+        return None
+    return AudioInfo('pcm', f'pcm_s{bits}', sample_rate, channels, bits,
+                     total_size / (sample_rate * channels * bits / 8), True)
+
+
+def probe_audio_bytes(head: bytes, total_size: int, tail: bytes = b'',
+                      content_type: Optional[str] = None) -> AudioInfo:
+    """AudioInfo from the first and last bytes of an upload
+
+    ``head`` needs only the container header (the first few hundred bytes);
+    ``tail`` is used for streamed WebM/Ogg, whose end time is only known
+    from the last cluster or page.
+    """
+    head = bytes(head)
+    audio_format = detect_audio_format(head)
+    try:
+        if audio_format == 'wav':
+            return _probe_wav(head, total_size)
+        if audio_format == 'webm':
+            return _probe_webm(head, total_size, bytes(tail) or head)
+        if audio_format == 'ogg':
+            return _probe_ogg(head, total_size, bytes(tail) or head)
+        if audio_format == 'flac':
+            return _probe_flac(head, total_size)
+    except (ValueError, IndexError, struct.error) as e:
+        logger.warning(f"Audio header probe failed for {audio_format}: {e}")
+        return _estimate(total_size, audio_format)
+
+    if audio_format is None and content_type:
+        pcm = _probe_pcm(content_type, total_size)
+        if pcm:
+            return pcm
+    return _estimate(total_size, audio_format)
+
+
+def probe_audio(audio: AudioBuffer) -> AudioInfo:
+    """AudioInfo for an upload, probed once and cached on the buffer"""
+    if audio.info is None:
+        size = len(audio)
+        audio.info = probe_audio_bytes(audio.data[:PROBE_HEAD_BYTES], size,
+                                       audio.data[max(0, size - PROBE_TAIL_BYTES):], audio.content_type)
+    return audio.info
+
+
+def probe_base64_audio(text: str, content_type: Optional[str] = None) -> AudioInfo:
+    """AudioInfo for base64 audio, decoding only its head and tail"""
+    match = re.match(r'data:([^,;]*)[^,]*;base64,', text[:256])
+    start = match.end() if match else 0
+    if match and not content_type:
+        content_type = match.group(1)
+
+    encoded = len(text) - start
+    if encoded % 4:
+        raise AudioIngestError('Invalid base64 audio data')
+    padding = 2 if text.endswith('==') else 1 if text.endswith('=') else 0
+    total_size = encoded // 4 * 3 - padding
+
+    head_chars = PROBE_HEAD_BYTES // 3 * 4
+    tail_start = max(start + head_chars, len(text) - PROBE_TAIL_BYTES // 3 * 4)
+    try:
+        head = base64.b64decode(text[start:start + head_chars])
+        tail = base64.b64decode(text[tail_start:]) if tail_start < len(text) else head
+    except (binascii.Error, ValueError):
+        raise AudioIngestError('Invalid base64 audio data')
+    return probe_audio_bytes(head, total_size, tail, content_type)
+
+
+# Export
+__all__ = [
+    'AudioInfo',
+    'probe_audio',
+    'probe_audio_bytes',
+    'probe_base64_audio'
+]
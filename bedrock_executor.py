@@ -0,0 +1,381 @@
+"""
+Bedrock Evaluation Executor
+Bounded-concurrency front for Bedrock invoke_model with per-model limits,
+token-bucket pacing, jittered retry on throttling and request coalescing
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Callable, Iterator, Optional, NamedTuple, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Error codes Bedrock returns when a request should be retried later
+RETRYABLE_ERROR_CODES = frozenset({
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException'
+})
+
+
+class ModelLimits(NamedTuple):
+    """Per-model quota the executor paces requests against"""
+    max_concurrency: int
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+def _default_limits() -> ModelLimits:
+    return ModelLimits(
+        max_concurrency=int(os.environ.get('BEDROCK_MAX_CONCURRENCY', '4')),
+        requests_per_minute=float(os.environ.get('BEDROCK_REQUESTS_PER_MINUTE', '100')),
+        tokens_per_minute=float(os.environ.get('BEDROCK_TOKENS_PER_MINUTE', '100000'))
+    )
+
+
+def _model_limit_overrides() -> Dict[str, ModelLimits]:
+    """Per-model limits from BEDROCK_MODEL_LIMITS (JSON object keyed by model id)"""
+    raw = os.environ.get('BEDROCK_MODEL_LIMITS')
+    if not raw:
+        return {}
+
+    defaults = _default_limits()
+    try:
+        return {
+            model_id: defaults._replace(**{key: type(getattr(defaults, key))(value) for key, value in limits.items()})
+            for model_id, limits in json.loads(raw).items()
+        }
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.error(f"Ignoring invalid BEDROCK_MODEL_LIMITS: {e}")
+        return {}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_minute``"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float) -> float:
+        """Take ``tokens`` now and return the seconds to wait before using them"""
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the time spent waiting"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class _ModelGate:
+    """Concurrency semaphore and RPM/TPM buckets for one model"""
+
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.semaphore = threading.BoundedSemaphore(max(1, limits.max_concurrency))
+        self.requests = TokenBucket(limits.requests_per_minute)
+        self.tokens = TokenBucket(limits.tokens_per_minute)
+        self.in_flight = 0
+
+
+def estimate_request_tokens(body: Dict[str, Any]) -> int:
+    """Rough input plus maximum output token count of a Bedrock request body"""
+    prompt_chars = 0
+    for message in body.get('messages', []):
+        for part in message.get('content', []):
+            if isinstance(part, dict):
+                prompt_chars += len(part.get('text', ''))
+    for part in body.get('system', []):
+        if isinstance(part, dict):
+            prompt_chars += len(part.get('text', ''))
+    prompt_chars += len(body.get('inputText', '') or '')
+
+    max_tokens = body.get('inferenceConfig', {}).get('maxTokens', 0)
+    return prompt_chars // 4 + int(max_tokens or 0) + 1
+
+
+def _error_code(error: Exception) -> str:
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        if code:
+            return code
+    return type(error).__name__
+
+
+class BedrockExecutor:
+    """
+    Bounded-concurrency executor for Bedrock invoke_model
+
+    Requests run on a shared thread pool. Each model gets its own
+    concurrency semaphore and request/token buckets so one busy model does
+    not starve another, throttling errors are retried with full-jitter
+    exponential backoff, and identical requests already in flight share a
+    single Bedrock call.
+    """
+
+    def __init__(self,
+                 client=None,
+                 max_workers: Optional[int] = None,
+                 max_retries: Optional[int] = None,
+                 backoff_base: Optional[float] = None,
+                 backoff_cap: Optional[float] = None,
+                 model_limits: Optional[Dict[str, ModelLimits]] = None,
+                 default_limits: Optional[ModelLimits] = None):
+        self.region = os.environ.get('BEDROCK_REGION', os.environ.get('AWS_REGION', 'us-east-1'))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get('BEDROCK_MAX_RETRIES', '4'))
+        self.backoff_base = backoff_base if backoff_base is not None else float(os.environ.get('BEDROCK_BACKOFF_BASE', '0.25'))
+        self.backoff_cap = backoff_cap if backoff_cap is not None else float(os.environ.get('BEDROCK_BACKOFF_CAP', '8.0'))
+        self.default_limits = default_limits or _default_limits()
+        self.model_limits = model_limits if model_limits is not None else _model_limit_overrides()
+
+        self._client = client
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.environ.get('BEDROCK_EXECUTOR_WORKERS', '16')),
+            thread_name_prefix='bedrock'
+        )
+        self._lock = threading.Lock()
+        self._gates: Dict[str, _ModelGate] = {}
+        self._pending: Dict[Tuple, Future] = {}
+
+        self._queued = 0
+        self._counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'coalesced': 0,
+            'throttle_retries': 0
+        }
+        self._latencies = deque(maxlen=1000)
+        self._queue_waits = deque(maxlen=1000)
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('bedrock-runtime', region_name=self.region)
+        return self._client
+
+    def _gate(self, model_id: str) -> _ModelGate:
+        with self._lock:
+            gate = self._gates.get(model_id)
+            if gate is None:
+                gate = _ModelGate(self.model_limits.get(model_id, self.default_limits))
+                self._gates[model_id] = gate
+            return gate
+
+    def submit(self,
+               model_id: str,
+               body: Union[Dict[str, Any], str],
+               content_type: str = 'application/json',
+               accept: str = 'application/json',
+               client=None,
+               coalesce: bool = True) -> Future:
+        """Queue an invoke_model call; the future resolves to the raw response body bytes"""
+        body_text = body if isinstance(body, str) else json.dumps(body, sort_keys=True)
+        key = (model_id, body_text, content_type, accept, id(client) if client else None)
+        tokens = estimate_request_tokens(body if isinstance(body, dict) else json.loads(body_text or '{}'))
+
+        with self._lock:
+            self._counters['submitted'] += 1
+            if coalesce:
+                pending = self._pending.get(key)
+                if pending is not None:
+                    self._counters['coalesced'] += 1
+                    return pending
+
+            self._queued += 1
+            future = self._pool.submit(
+                self._run, model_id, body_text, content_type, accept, client, tokens, time.monotonic()
+            )
+            if coalesce:
+                self._pending[key] = future
+
+        if coalesce:
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: Tuple, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _run(self, model_id: str, body_text: str, content_type: str, accept: str,
+             client, tokens: int, queued_at: float) -> bytes:
+        gate = self._gate(model_id)
+        gate.requests.acquire(1)
+        gate.tokens.acquire(tokens)
+
+        with gate.semaphore:
+            started = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                gate.in_flight += 1
+                self._queue_waits.append(started - queued_at)
+            try:
+                client = client or self.client
+                result = self._invoke_with_retry(gate, model_id, lambda: client.invoke_model(
+                    modelId=model_id,
+                    body=body_text,
+                    contentType=content_type,
+                    accept=accept
+                )['body'].read())
+            except Exception:
+                with self._lock:
+                    self._counters['failed'] += 1
+                raise
+            finally:
+                with self._lock:
+                    gate.in_flight -= 1
+
+        with self._lock:
+            self._counters['completed'] += 1
+            self._latencies.append(time.monotonic() - started)
+        return result
+
+    def _invoke_with_retry(self, gate: _ModelGate, model_id: str, call: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except Exception as e:
+                code = _error_code(e)
+                if code not in RETRYABLE_ERROR_CODES or attempt >= self.max_retries:
+                    raise
+
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+                attempt += 1
+                with self._lock:
+                    self._counters['throttle_retries'] += 1
+                logger.warning(f"Bedrock {model_id} {code}, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+                gate.requests.acquire(1)
+
+    def stream_text(self, model_id: str, body: Dict[str, Any], client=None) -> Iterator[str]:
+        """Stream a Nova messages response, yielding text deltas as they arrive
+
+        Runs in the calling thread under the model's concurrency and rate
+        limits. Only opening the stream is retried; a partly consumed stream
+        cannot be replayed.
+        """
+        body_text = json.dumps(body, sort_keys=True)
+        gate = self._gate(model_id)
+        with self._lock:
+            self._counters['submitted'] += 1
+        gate.requests.acquire(1)
+        gate.tokens.acquire(estimate_request_tokens(body))
+
+        client = client or self.client
+        with gate.semaphore:
+            started = time.monotonic()
+            with self._lock:
+                gate.in_flight += 1
+            try:
+                response = self._invoke_with_retry(gate, model_id, lambda: client.invoke_model_with_response_stream(
+                    modelId=model_id,
+                    body=body_text,
+                    contentType='application/json',
+                    accept='application/json'
+                ))
+                for event in response['body']:
+                    chunk = event.get('chunk')
+                    if not chunk:
+                        continue
+                    delta = json.loads(chunk['bytes']).get('contentBlockDelta', {}).get('delta', {})
+                    if delta.get('text'):
+                        yield delta['text']
+            except Exception:
+                with self._lock:
+                    self._counters['failed'] += 1
+                raise
+            finally:
+                with self._lock:
+                    gate.in_flight -= 1
+
+        with self._lock:
+            self._counters['completed'] += 1
+            self._latencies.append(time.monotonic() - started)
+
+    def invoke(self, model_id: str, body: Union[Dict[str, Any], str], timeout: Optional[float] = None, **kwargs) -> bytes:
+        """Run an invoke_model call through the executor and wait for its body"""
+        return self.submit(model_id, body, **kwargs).result(timeout)
+
+    def invoke_json(self, model_id: str, body: Union[Dict[str, Any], str], timeout: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        """Like ``invoke`` but decodes the JSON response body"""
+        return json.loads(self.invoke(model_id, body, timeout, **kwargs))
+
+    async def invoke_json_async(self, model_id: str, body: Union[Dict[str, Any], str], **kwargs) -> Dict[str, Any]:
+        """Awaitable ``invoke_json`` for asyncio callers"""
+        raw = await asyncio.wrap_future(self.submit(model_id, body, **kwargs))
+        return json.loads(raw)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight counts, latency percentiles and retry counters"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            waits = sorted(self._queue_waits)
+            return {
+                'queue_depth': self._queued,
+                'in_flight': {model_id: gate.in_flight for model_id, gate in self._gates.items()},
+                'latency_ms': _percentiles(latencies),
+                'queue_wait_ms': _percentiles(waits),
+                **self._counters
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+def _percentiles(samples) -> Dict[str, float]:
+    if not samples:
+        return {'p50': 0.0, 'p99': 0.0}
+    return {
+        'p50': round(samples[len(samples) // 2] * 1000, 2),
+        'p99': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2)
+    }
+
+
+# Global instance
+_bedrock_executor = None
+
+def get_bedrock_executor() -> BedrockExecutor:
+    """Get global Bedrock executor instance"""
+    global _bedrock_executor
+    if _bedrock_executor is None:
+        _bedrock_executor = BedrockExecutor()
+    return _bedrock_executor
+
+# Export
+__all__ = [
+    'BedrockExecutor',
+    'ModelLimits',
+    'TokenBucket',
+    'RETRYABLE_ERROR_CODES',
+    'estimate_request_tokens',
+    'get_bedrock_executor'
+]
@@ -10,10 +10,14 @@ import logging
 import base64
 import json
 import os
-from typing import Dict, Tuple, List, Optional, Union
+from typing import Dict, Tuple, List, Optional, Union, Any
 from enum import Enum
 from datetime import datetime
 
+from audio_ingest import AudioBuffer, decode_base64_audio
+from audio_normalize import NOVA_SONIC_INPUT, normalize_audio_buffer
+from voice_activity import detect_voice_activity_pcm
+
 class ModerationSeverity(Enum):
     """Content moderation severity levels"""
     CLEAN = "clean"
@@ -21,6 +25,9 @@ class ModerationSeverity(Enum):
     MODERATE = "moderate"  # Gentle redirection needed
     SEVERE = "severe"  # Stop assessment immediately
 
+DEFAULT_REDIRECTION = "Let's continue with our discussion."
+NO_SPEECH_MESSAGE = "I'm sorry, I didn't catch that. Could you say it again?"
+
 class ContentModerationService:
     """
     Real-time content moderation service designed specifically for IELTS speaking assessments.
@@ -149,31 +156,38 @@ class ContentModerationService:
         """Select an appropriate redirection response"""
         import random
         responses = self.redirection_responses.get(category, [])
-        return random.choice(responses) if responses else "Let's continue with our discussion."
+        return random.choice(responses) if responses else DEFAULT_REDIRECTION
     
+    def scripted_responses(self) -> List[str]:
+        """Every fixed line moderation can make Maya speak"""
+        lines = [line for responses in self.redirection_responses.values() for line in responses]
+        return lines + [DEFAULT_REDIRECTION, self._get_termination_message(), NO_SPEECH_MESSAGE]
+
     def _get_termination_message(self) -> str:
         """Get message for assessment termination"""
         return """I'm sorry, but I need to end this assessment due to inappropriate content. 
         For IELTS speaking assessments, we maintain professional standards. 
         You may restart the assessment when you're ready to proceed appropriately."""
     
-    def moderate_audio_with_nova_sonic(self, audio_data: Union[str, bytes], user_email: str = "anonymous") -> Dict[str, Any]:
+    def moderate_audio_with_nova_sonic(self, audio_data: Union[str, bytes, memoryview, AudioBuffer], user_email: str = "anonymous") -> Dict[str, Any]:
         """
         Direct audio-to-audio moderation using Nova Sonic bidirectional streaming
         Processes user speech directly and returns Maya's moderated audio response
         
         Args:
-            audio_data: Base64 encoded audio or raw bytes from user speech
+            audio_data: Base64 encoded audio, raw bytes or the submission's AudioBuffer
             user_email: User identifier for logging
             
         Returns:
             Dict containing moderation result and Maya's audio response
         """
         try:
-            # Convert audio data to proper format
-            if isinstance(audio_data, str):
+            # Convert audio data to proper format; buffers are used in place
+            if isinstance(audio_data, AudioBuffer):
+                audio_bytes = audio_data.data
+            elif isinstance(audio_data, str):
                 # Assume base64 encoded
-                audio_bytes = base64.b64decode(audio_data)
+                audio_bytes = decode_base64_audio(audio_data)
             else:
                 audio_bytes = audio_data
                 
@@ -181,7 +195,16 @@ class ContentModerationService:
             if os.environ.get('REPLIT_ENVIRONMENT') == 'true':
                 return self._mock_audio_moderation(audio_bytes, user_email)
             
-            # Production: Use Nova Sonic bidirectional streaming
+            # Production: Use Nova Sonic bidirectional streaming; uncompressed
+            # uploads are sent as 16 kHz mono LPCM instead of 44.1/48 kHz WAV,
+            # trimmed to the speech so silence is never uploaded or processed
+            if isinstance(audio_data, AudioBuffer):
+                pcm = normalize_audio_buffer(audio_data)
+                if pcm is not None:
+                    activity = detect_voice_activity_pcm(pcm)
+                    if not activity.has_speech:
+                        return self._no_speech_response()
+                    return self._process_audio_with_nova_sonic(activity.trim(pcm), user_email, audio_format='lpcm')
             return self._process_audio_with_nova_sonic(audio_bytes, user_email)
             
         except Exception as e:
@@ -194,6 +217,17 @@ class ContentModerationService:
                 'error': str(e)
             }
     
+    def _no_speech_response(self) -> Dict[str, Any]:
+        """Ask again without a model call when the recording holds no speech"""
+        return {
+            'success': True,
+            'continue_assessment': True,
+            'maya_audio': None,
+            'maya_text': NO_SPEECH_MESSAGE,
+            'moderation_applied': False,
+            'processing_type': 'no_speech_detected'
+        }
+    
     def _mock_audio_moderation(self, audio_bytes: bytes, user_email: str) -> Dict[str, Any]:
         """Mock audio moderation for development environment"""
         # Simulate audio processing with realistic responses
@@ -220,7 +254,8 @@ class ContentModerationService:
             'processing_type': 'mock_development'
         }
     
-    def _process_audio_with_nova_sonic(self, audio_bytes: bytes, user_email: str) -> Dict[str, Any]:
+    def _process_audio_with_nova_sonic(self, audio_bytes: bytes, user_email: str,
+                                       audio_format: str = "wav") -> Dict[str, Any]:
         """
         Production audio processing using Nova Sonic bidirectional streaming
         Direct speech-to-speech with real-time content moderation
@@ -232,11 +267,19 @@ class ContentModerationService:
             bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
             
             # Configure bidirectional conversation with content moderation
+            input_audio = {
+                "format": audio_format,  # "wav", "mp3" or normalised "lpcm"
+                "data": base64.b64encode(audio_bytes).decode()
+            }
+            if audio_format == 'lpcm':
+                input_audio.update({
+                    "sampleRateHertz": NOVA_SONIC_INPUT.sample_rate,
+                    "sampleSizeBits": NOVA_SONIC_INPUT.bits_per_sample,
+                    "channelCount": NOVA_SONIC_INPUT.channels
+                })
+
             conversation_config = {
-                "inputAudio": {
-                    "format": "wav",  # or "mp3" based on input
-                    "data": base64.b64encode(audio_bytes).decode()
-                },
+                "inputAudio": input_audio,
                 "conversationConfig": {
                     "systemPrompt": "You are Maya, a professional British IELTS examiner. Monitor conversation content and provide appropriate guidance if inappropriate topics arise. Maintain authentic IELTS speaking test flow while ensuring professional standards.",
                     "voice": "Amy",  # British female voice
@@ -0,0 +1,245 @@
+"""
+Evaluation Result Cache
+Content-hash cache for essay and transcript evaluations with single-flight
+deduplication, an in-process LRU and an optional DynamoDB or Redis tier
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HORIZONTAL_SPACE_RE = re.compile(r'[ \t\f\v\u00a0]+')
+
+
+def normalize_submission_text(text: Optional[str]) -> str:
+    """Canonical form of a submission for hashing
+
+    Unicode is NFC-normalised, line endings unified, runs of spaces collapsed
+    and surrounding whitespace stripped. Line breaks are kept because
+    paragraphing is part of what gets scored.
+    """
+    text = unicodedata.normalize('NFC', text or '')
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = (_HORIZONTAL_SPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(lines).strip()
+
+
+def rubric_version(rubric: Optional[Dict[str, Any]]) -> str:
+    """Explicit rubric version, or a digest of its content"""
+    if not rubric:
+        return 'none'
+    if rubric.get('version'):
+        return str(rubric['version'])
+    canonical = json.dumps(rubric, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def evaluation_cache_key(text: str, prompt_id: str, rubric_ver: str, model_id: str) -> str:
+    """Cache key over normalised text, prompt, rubric version and model"""
+    digest = hashlib.sha256()
+    for part in (model_id, rubric_ver, prompt_id, normalize_submission_text(text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return f"eval:{digest.hexdigest()}"
+
+
+class DynamoDBCacheBackend:
+    """DynamoDB tier; items carry a ``ttl`` attribute for native expiry"""
+
+    def __init__(self, table_name: str, region: Optional[str] = None):
+        import boto3
+        self.table = boto3.resource(
+            'dynamodb', region_name=region or os.environ.get('AWS_REGION', 'us-east-1')
+        ).Table(table_name)
+
+    def get(self, key: str) -> Optional[str]:
+        item = self.table.get_item(Key={'cache_key': key}).get('Item')
+        # DynamoDB TTL deletion is lazy, so check expiry on read as well
+        if not item or int(item.get('ttl', 0)) < time.time():
+            return None
+        return item.get('result')
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self.table.put_item(Item={
+            'cache_key': key,
+            'result': value,
+            'ttl': int(time.time()) + ttl
+        })
+
+
+class RedisCacheBackend:
+    """Redis/ElastiCache tier over any client with ``get`` and ``set(ex=)``"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_endpoint(cls, endpoint: str) -> 'RedisCacheBackend':
+        import redis
+        url = endpoint if '://' in endpoint else f"redis://{endpoint}"
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self.client.set(key, value, ex=ttl)
+
+
+class EvaluationCache:
+    """
+    Two-tier cache with single-flight computation
+
+    Values are stored as JSON so every caller gets its own copy. Concurrent
+    requests for a key that is being computed wait for that computation
+    instead of starting another; failures are not cached.
+    """
+
+    def __init__(self, backend=None, max_entries: Optional[int] = None, ttl: Optional[int] = None):
+        self.backend = backend
+        self.max_entries = max_entries or int(os.environ.get('EVALUATION_CACHE_SIZE', '512'))
+        self.ttl = ttl or int(os.environ.get('EVALUATION_CACHE_TTL', '86400'))
+
+        self._entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'backend_hits': 0, 'shared': 0, 'misses': 0}
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.time() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _backend_get(self, key: str) -> Optional[str]:
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Evaluation cache backend read failed: {e}")
+            return None
+
+    def _backend_set(self, key: str, value: str) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.error(f"Evaluation cache backend write failed: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._memory_get(key)
+        if value is None:
+            value = self._backend_get(key)
+        return json.loads(value) if value is not None else None
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+        """Cached value for ``key`` or the result of ``compute()``
+
+        Returns ``(value, source)`` where source is ``memory``, ``backend``,
+        ``shared`` (joined an identical in-flight request) or ``computed``.
+        """
+        with self._lock:
+            value = self._memory_get(key)
+            if value is not None:
+                self.stats['memory_hits'] += 1
+                return json.loads(value), 'memory'
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = Future()
+                self._in_flight[key] = pending
+                owner = True
+            else:
+                self.stats['shared'] += 1
+                owner = False
+
+        if not owner:
+            return json.loads(pending.result()), 'shared'
+
+        try:
+            source = 'backend'
+            value = self._backend_get(key)
+            if value is None:
+                source = 'computed'
+                value = json.dumps(compute())
+                self._backend_set(key, value)
+
+            with self._lock:
+                self._memory_set(key, value)
+                self.stats['backend_hits' if source == 'backend' else 'misses'] += 1
+            pending.set_result(value)
+            return json.loads(value), source
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _default_backend():
+    """Redis when ELASTICACHE_ENDPOINT is set, else DynamoDB when a table is configured"""
+    try:
+        endpoint = os.environ.get('ELASTICACHE_ENDPOINT')
+        if endpoint:
+            return RedisCacheBackend.from_endpoint(endpoint)
+
+        table_name = os.environ.get('DYNAMODB_EVALUATION_CACHE_TABLE')
+        if table_name:
+            return DynamoDBCacheBackend(table_name)
+    except Exception as e:
+        logger.error(f"Evaluation cache backend unavailable, using in-process cache only: {e}")
+    return None
+
+
+# Global instance
+_evaluation_cache = None
+
+def get_evaluation_cache() -> EvaluationCache:
+    """Get global evaluation cache instance"""
+    global _evaluation_cache
+    if _evaluation_cache is None:
+        _evaluation_cache = EvaluationCache(backend=_default_backend())
+    return _evaluation_cache
+
+# Export
+__all__ = [
+    'EvaluationCache',
+    'DynamoDBCacheBackend',
+    'RedisCacheBackend',
+    'normalize_submission_text',
+    'rubric_version',
+    'evaluation_cache_key',
+    'get_evaluation_cache'
+]
@@ -0,0 +1,487 @@
+"""
+Evaluation Job Queue
+Runs speaking and writing evaluations off the request path: submissions are
+enqueued and answered with a job id, workers process them and results are
+polled from the result endpoint or pushed over the WebSocket API
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable, List
+
+try:
+    from botocore.exceptions import ClientError, HTTPClientError, ConnectionError as BotoConnectionError
+except ImportError:
+    ClientError = HTTPClientError = BotoConnectionError = None
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_PROCESSING = 'processing'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+# Deliveries per job before a transient error fails it; matches the queue's maxReceiveCount
+MAX_ATTEMPTS = int(os.environ.get('EVALUATION_JOB_MAX_ATTEMPTS', '3'))
+
+# DynamoDB items are capped at 400 KB; bigger payloads (speaking audio) go to S3
+PAYLOAD_ITEM_LIMIT = 300 * 1024
+PAYLOAD_PREFIX = 'jobs/'
+
+# Payload fields kept in the job item when the payload itself is in S3
+PAYLOAD_FIELD_LIMIT = 1024
+
+# AWS error codes that are worth another delivery
+RETRYABLE_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'ServiceUnavailableException',
+    'InternalServerException',
+    'ModelNotReadyException',
+    'ModelTimeoutException',
+    'RequestTimeout'
+}
+
+_job_handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+
+def register_job_handler(kind: str, handler: Callable[[Dict[str, Any]], Dict[str, Any]]) -> None:
+    """Register the function that evaluates jobs of ``kind``; it returns the result body"""
+    _job_handlers[kind] = handler
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Throttling, timeouts and dropped connections; anything else fails the job"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if HTTPClientError is not None and isinstance(error, (HTTPClientError, BotoConnectionError)):
+        return True
+    if ClientError is not None and isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in RETRYABLE_ERROR_CODES
+    return False
+
+
+def run_job(job: Dict[str, Any], final_attempt: bool = True) -> Dict[str, Any]:
+    """Evaluate one job and return its status, result and error
+
+    The handler sees the job id as the payload's ``assessment_id``. Retryable
+    errors are re-raised unless this is the final attempt, so the queue
+    redelivers the job instead of recording a failure.
+    """
+    handler = _job_handlers.get(job['kind'])
+    if handler is None:
+        return {'status': JOB_FAILED, 'result': None, 'error': f"No handler for job kind {job['kind']!r}"}
+
+    try:
+        result = handler({**job['payload'], 'assessment_id': job['job_id']})
+        return {'status': JOB_COMPLETED, 'result': result, 'error': None}
+    except Exception as e:
+        if not final_attempt and is_retryable_error(e):
+            logger.warning(f"Evaluation job {job['job_id']} will be retried: {e}")
+            raise
+        logger.error(f"Evaluation job {job['job_id']} failed: {e}")
+        return {'status': JOB_FAILED, 'result': None, 'error': str(e)}
+
+
+def submission_key(owner: Optional[str], submission_id: str) -> str:
+    """Idempotency key for a client's submission id, scoped to the submitting user"""
+    return hashlib.sha256(f"{owner or ''}\n{submission_id}".encode('utf-8')).hexdigest()
+
+
+class WebSocketNotifier:
+    """Pushes finished jobs to the submitting WebSocket connection, if any"""
+
+    def __init__(self, endpoint_url: Optional[str] = None):
+        self.endpoint_url = endpoint_url or os.environ.get('WEBSOCKET_API_ENDPOINT')
+        self._client = None
+
+    def notify(self, job: Dict[str, Any]) -> bool:
+        connection_id = (job.get('payload') or {}).get('connection_id')
+        if not connection_id or not self.endpoint_url:
+            return False
+
+        try:
+            if self._client is None:
+                import boto3
+                self._client = boto3.client('apigatewaymanagementapi', endpoint_url=self.endpoint_url)
+            self._client.post_to_connection(
+                ConnectionId=connection_id,
+                Data=json.dumps({
+                    'action': 'assessment_result',
+                    'job_id': job['job_id'],
+                    'status': job['status'],
+                    'result': job.get('result'),
+                    'error': job.get('error')
+                }).encode('utf-8')
+            )
+            return True
+        except Exception as e:
+            logger.error(f"WebSocket push for job {job['job_id']} failed: {e}")
+            return False
+
+
+class LocalJobQueue:
+    """
+    SQLite-backed job queue with in-process worker threads
+
+    Stand-in for SQS during local development and tests. A file database
+    survives restarts; jobs left in ``processing`` by a crash are requeued,
+    as are jobs that hit a retryable error before their last attempt.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, workers: Optional[int] = None,
+                 notifier: Optional[WebSocketNotifier] = None, start_workers: bool = True,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = db_path or os.environ.get('EVALUATION_JOB_DB', ':memory:')
+        self.workers = workers if workers is not None else int(os.environ.get('EVALUATION_JOB_WORKERS', '2'))
+        self.notifier = notifier
+        self.start_workers = start_workers
+        self.max_attempts = max_attempts
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS evaluation_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    owner TEXT,
+                    submission_key TEXT UNIQUE,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute(
+                'UPDATE evaluation_jobs SET status = ? WHERE status = ?', (JOB_QUEUED, JOB_PROCESSING)
+            )
+            self._conn.commit()
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], owner: Optional[str] = None,
+                submission_id: Optional[str] = None) -> str:
+        """Queue a job and return its id
+
+        Job ids are always generated here. Re-enqueueing the same
+        ``submission_id`` for the same owner returns the existing job.
+        """
+        job_id = str(uuid.uuid4())
+        key = submission_key(owner, submission_id) if submission_id else None
+        now = time.time()
+        with self._available:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO evaluation_jobs '
+                '(job_id, kind, payload, owner, submission_key, status, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(payload), owner, key, JOB_QUEUED, now, now)
+            )
+            if key:
+                job_id = self._conn.execute(
+                    'SELECT job_id FROM evaluation_jobs WHERE submission_key = ?', (key,)
+                ).fetchone()['job_id']
+            self._conn.commit()
+            self._available.notify()
+
+        if self.start_workers:
+            self._ensure_workers()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM evaluation_jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Move the oldest queued job to processing (caller holds the lock)"""
+        row = self._conn.execute(
+            'SELECT * FROM evaluation_jobs WHERE status = ? ORDER BY created_at LIMIT 1', (JOB_QUEUED,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._conn.execute(
+            'UPDATE evaluation_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ?',
+            (JOB_PROCESSING, time.time(), row['job_id'])
+        )
+        self._conn.commit()
+        job = self._row_to_job(row)
+        job['attempts'] += 1
+        return job
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        """Run a claimed job, requeueing it after a retryable error"""
+        try:
+            outcome = run_job(job, final_attempt=job['attempts'] >= self.max_attempts)
+        except Exception as e:
+            with self._available:
+                self._conn.execute(
+                    'UPDATE evaluation_jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?',
+                    (JOB_QUEUED, str(e), time.time(), job['job_id'])
+                )
+                self._conn.commit()
+                self._available.notify()
+            return
+        self._finish(job, outcome)
+
+    def _finish(self, job: Dict[str, Any], outcome: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE evaluation_jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?',
+                (outcome['status'], json.dumps(outcome['result']) if outcome['result'] is not None else None,
+                 outcome['error'], time.time(), job['job_id'])
+            )
+            self._conn.commit()
+
+        if self.notifier:
+            self.notifier.notify({**job, **outcome})
+
+    def process_next(self) -> bool:
+        """Process one queued job in the calling thread; False when the queue is empty"""
+        with self._lock:
+            job = self._claim()
+        if job is None:
+            return False
+        self._run(job)
+        return True
+
+    def process_pending(self) -> int:
+        """Drain the queue in the calling thread"""
+        processed = 0
+        while self.process_next():
+            processed += 1
+        return processed
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for _ in range(self.workers - len(self._threads)):
+                thread = threading.Thread(target=self._worker, name='evaluation-worker', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self) -> None:
+        while True:
+            with self._available:
+                job = self._claim()
+                if job is None:
+                    self._available.wait(timeout=5.0)
+                    continue
+            self._run(job)
+
+
+class SQSJobQueue:
+    """
+    SQS queue with job state in DynamoDB
+
+    The API enqueues; a worker Lambda subscribed to the queue calls
+    ``handle_sqs_event``. Redelivered messages for finished jobs are skipped,
+    so client retries and SQS at-least-once delivery are both safe. A client
+    ``submission_id`` is recorded as a ``submission#<key>`` item pointing at
+    the job it created.
+
+    Payloads too big for a DynamoDB item are written to
+    EVALUATION_PAYLOAD_BUCKET under ``jobs/`` (expired by a lifecycle rule);
+    the item keeps the object key and the payload's small fields.
+    """
+
+    def __init__(self, queue_url: str, table_name: str, notifier: Optional[WebSocketNotifier] = None,
+                 max_attempts: int = MAX_ATTEMPTS, payload_bucket: Optional[str] = None):
+        import boto3
+        region = os.environ.get('AWS_REGION', 'us-east-1')
+        self.queue_url = queue_url
+        self.sqs = boto3.client('sqs', region_name=region)
+        self.table = boto3.resource('dynamodb', region_name=region).Table(table_name)
+        self.notifier = notifier
+        self.ttl = int(os.environ.get('EVALUATION_JOB_TTL', '604800'))
+        self.max_attempts = max_attempts
+        self.payload_bucket = payload_bucket or os.environ.get('EVALUATION_PAYLOAD_BUCKET')
+        self.s3 = boto3.client('s3', region_name=region) if self.payload_bucket else None
+
+    def _store_payload(self, job_id: str, payload: Dict[str, Any], item: Dict[str, Any]) -> None:
+        """Put the payload in the job item, or in S3 when it would not fit"""
+        body = json.dumps(payload)
+        if len(body.encode('utf-8')) <= PAYLOAD_ITEM_LIMIT:
+            item['payload'] = body
+            return
+        if self.s3 is None:
+            raise ValueError('Evaluation payload exceeds the job item limit and EVALUATION_PAYLOAD_BUCKET is not set')
+
+        key = f"{PAYLOAD_PREFIX}{job_id}.json"
+        self.s3.put_object(Bucket=self.payload_bucket, Key=key, Body=body.encode('utf-8'),
+                           ContentType='application/json')
+        item['payload_key'] = key
+        item['payload'] = json.dumps({field: value for field, value in payload.items()
+                                      if len(json.dumps(value)) <= PAYLOAD_FIELD_LIMIT})
+
+    def _load_payload(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        if not job.get('payload_key'):
+            return job['payload']
+        body = self.s3.get_object(Bucket=self.payload_bucket, Key=job['payload_key'])['Body'].read()
+        return json.loads(body)
+
+    def _delete_payload(self, job: Dict[str, Any]) -> None:
+        if not job.get('payload_key'):
+            return
+        try:
+            self.s3.delete_object(Bucket=self.payload_bucket, Key=job['payload_key'])
+        except Exception as e:
+            logger.warning(f"Could not delete payload of evaluation job {job['job_id']}: {e}")
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], owner: Optional[str] = None,
+                submission_id: Optional[str] = None) -> str:
+        job_id = str(uuid.uuid4())
+        now = int(time.time())
+        item = {
+            'job_id': job_id,
+            'kind': kind,
+            'status': JOB_QUEUED,
+            'attempts': 0,
+            'created_at': now,
+            'updated_at': now,
+            'ttl': now + self.ttl
+        }
+        if owner:
+            item['owner'] = owner
+        self._store_payload(job_id, payload, item)
+        self.table.put_item(Item=item)
+
+        if submission_id:
+            marker_id = f"submission#{submission_key(owner, submission_id)}"
+            try:
+                self.table.put_item(
+                    Item={'job_id': marker_id, 'target_job_id': job_id, 'ttl': now + self.ttl},
+                    ConditionExpression='attribute_not_exists(job_id)'
+                )
+            except Exception as e:
+                if getattr(e, 'response', {}).get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                    raise
+                # A retry of a submission already queued; drop the unsent duplicate
+                self.table.delete_item(Key={'job_id': job_id})
+                self._delete_payload(item)
+                marker = self.table.get_item(Key={'job_id': marker_id}, ConsistentRead=True).get('Item')
+                return marker['target_job_id']
+
+        self.sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps({'job_id': job_id}))
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={'job_id': job_id}).get('Item')
+        if not item or 'kind' not in item:
+            return None
+        job = dict(item)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job.get('result') else None
+        return job
+
+    def _update(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        self.table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET #status = :status, #result = :result, #error = :error, '
+                             'updated_at = :now ADD attempts :one',
+            ExpressionAttributeNames={'#status': 'status', '#result': 'result', '#error': 'error'},
+            ExpressionAttributeValues={
+                ':status': status,
+                ':result': json.dumps(result) if result is not None else None,
+                ':error': error,
+                ':now': int(time.time()),
+                ':one': 1 if status == JOB_PROCESSING else 0
+            }
+        )
+
+    def handle_sqs_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Worker Lambda entry point; reports failed records for redelivery
+
+        Retryable errors go back to the queue until the record's receive count
+        reaches ``max_attempts``; on that last receive the job is marked failed.
+        """
+        failures = []
+        for record in event.get('Records', []):
+            job = None
+            try:
+                job = self.get_job(json.loads(record['body'])['job_id'])
+                if job is None or job['status'] in (JOB_COMPLETED, JOB_FAILED):
+                    continue
+
+                receive_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+                self._update(job['job_id'], JOB_PROCESSING)
+                outcome = run_job({**job, 'payload': self._load_payload(job)},
+                                  final_attempt=receive_count >= self.max_attempts)
+                self._update(job['job_id'], outcome['status'], outcome['result'], outcome['error'])
+                self._delete_payload(job)
+                if self.notifier:
+                    self.notifier.notify({**job, **outcome})
+            except Exception as e:
+                logger.error(f"Evaluation queue record {record.get('messageId')} failed: {e}")
+                failures.append({'itemIdentifier': record.get('messageId')})
+                if job is not None:
+                    try:
+                        self._update(job['job_id'], JOB_QUEUED, error=str(e))
+                    except Exception as update_error:
+                        logger.error(f"Could not requeue evaluation job {job['job_id']}: {update_error}")
+        return {'batchItemFailures': failures}
+
+
+# Global instance
+_job_queue = None
+
+def get_job_queue():
+    """Get global job queue: SQS when EVALUATION_QUEUE_URL is set, else the local stand-in
+
+    The local stand-in keeps jobs in process memory, which Lambda freezes and
+    recycles, so it is refused when running on Lambda.
+    """
+    global _job_queue
+    if _job_queue is None:
+        queue_url = os.environ.get('EVALUATION_QUEUE_URL')
+        if not queue_url and os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+            raise RuntimeError('EVALUATION_QUEUE_URL must be set when running on Lambda')
+        if queue_url:
+            _job_queue = SQSJobQueue(
+                queue_url,
+                os.environ.get('DYNAMODB_EVALUATION_JOBS_TABLE', 'ielts-genai-prep-evaluation-jobs'),
+                notifier=WebSocketNotifier()
+            )
+        else:
+            _job_queue = LocalJobQueue(notifier=WebSocketNotifier())
+    return _job_queue
+
+# Export
+__all__ = [
+    'JOB_QUEUED',
+    'JOB_PROCESSING',
+    'JOB_COMPLETED',
+    'JOB_FAILED',
+    'MAX_ATTEMPTS',
+    'PAYLOAD_ITEM_LIMIT',
+    'LocalJobQueue',
+    'SQSJobQueue',
+    'WebSocketNotifier',
+    'register_job_handler',
+    'is_retryable_error',
+    'run_job',
+    'submission_key',
+    'get_job_queue'
+]
@@ -0,0 +1,81 @@
+"""
+Streaming Feedback Delivery
+Server-Sent Events framing for assessment feedback: band scores are sent as
+soon as they are known, criterion feedback and model tokens follow as they
+are produced and a final summary event carries the complete result
+
+Only the Flask server streams. API Gateway proxy integrations return a
+Lambda response in one piece, which would hold back the first event until
+the last, so the Lambda API has no streaming routes
+"""
+
+import json
+import logging
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Feedback event names, in the order a stream emits them
+EVENT_BANDS = 'bands'
+EVENT_CRITERION = 'criterion'
+EVENT_TOKEN = 'token'
+EVENT_SUMMARY = 'summary'
+EVENT_ERROR = 'error'
+
+SSE_HEADERS = {
+    'Content-Type': 'text/event-stream; charset=utf-8',
+    'Cache-Control': 'no-cache',
+    # Stop nginx/CloudFront style proxies from buffering the stream
+    'X-Accel-Buffering': 'no'
+}
+
+# Client reconnect delay sent at the start of every stream
+SSE_RETRY_MS = 3000
+
+
+def format_sse_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """One SSE frame; ``data`` is JSON encoded on a single line"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def iter_sse(events: Iterable[Tuple[str, Any]]) -> Iterator[str]:
+    """SSE frames for ``(event, data)`` pairs
+
+    A failure part way through becomes a final ``error`` event, so clients
+    always see the stream end with ``summary`` or ``error``.
+    """
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    event_id = 0
+    try:
+        for event, data in events:
+            event_id += 1
+            yield format_sse_event(event, data, event_id)
+    except Exception as e:
+        logger.error(f"Feedback stream failed after {event_id} events: {e}")
+        yield format_sse_event(EVENT_ERROR, {'error': 'Assessment processing failed', 'message': str(e),
+                                             'retry_available': True}, event_id + 1)
+
+
+def sse_flask_response(events: Iterable[Tuple[str, Any]]):
+    """Flask response that flushes each frame as soon as it is produced"""
+    from flask import Response, stream_with_context
+    return Response(stream_with_context(iter_sse(events)), headers=SSE_HEADERS)
+
+
+# Export
+__all__ = [
+    'EVENT_BANDS',
+    'EVENT_CRITERION',
+    'EVENT_TOKEN',
+    'EVENT_SUMMARY',
+    'EVENT_ERROR',
+    'SSE_HEADERS',
+    'format_sse_event',
+    'iter_sse',
+    'sse_flask_response'
+]
@@ -226,6 +226,12 @@ def websocket_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         logger.info(f"WebSocket event - Route: {route_key}, Connection: {connection_id}")
         
+        # Audio frames in, Maya's transcripts and audio out, where this
+        # runtime can open Nova Sonic streams
+        from nova_sonic_streaming import handle_websocket_event, streaming_available
+        if streaming_available():
+            return handle_websocket_event(event, context)
+        
         if route_key == '$connect':
             return {'statusCode': 200}
         elif route_key == '$disconnect': 
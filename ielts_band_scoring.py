@@ -15,9 +15,13 @@ from assessment_criteria.speaking_criteria import (
     SPEAKING_ASSESSMENT_CRITERIA,
     calculate_speaking_band_score
 )
+from text_features import TextFeatures, extract_response_features
+from indicator_matcher import GRAMMAR_COMPLEX_INDICATORS
 
 logger = logging.getLogger(__name__)
 
+MAX_EXAMPLES = 2  # Quotes shown per criterion in feedback
+
 class ScoringCriterion(Enum):
     """IELTS Speaking assessment criteria"""
     FLUENCY_COHERENCE = "Fluency and Coherence"
@@ -177,13 +181,16 @@ class IELTSBandScorer:
         }
     
     def evaluate_speaking_assessment(self, conversation_data: Dict[str, Any], 
-                                   ai_analysis: Dict[str, Any] = None) -> Dict[str, Any]:
+                                   ai_analysis: Dict[str, Any] = None,
+                                   running_score: Optional['RunningBandScore'] = None) -> Dict[str, Any]:
         """
         Comprehensive evaluation of speaking assessment
         
         Args:
             conversation_data: Complete conversation data from Maya
             ai_analysis: Optional AI analysis results
+            running_score: Optional per-turn aggregates for the same responses;
+                when supplied the responses are not re-analysed
             
         Returns:
             Dict with detailed band scores and feedback
@@ -202,13 +209,28 @@ class IELTSBandScorer:
                     'error': 'No user responses found for evaluation'
                 }
             
+            if running_score is not None and running_score.response_count == len(user_responses):
+                # Scores, totals and feedback quotes were accumulated turn by
+                # turn over the whole conversation
+                base_scores = running_score.base_scores()
+                features = None
+                totals = running_score.totals()
+                examples = running_score.examples
+            else:
+                base_scores = {}
+                # Tokenise each response once for every criterion and its feedback
+                features = self.extract_features(user_responses)
+                totals = None
+                examples = {}
+            
             # Analyze each criterion
             criterion_scores = {}
             detailed_feedback = {}
             
             for criterion in ScoringCriterion:
                 score, feedback = self.evaluate_criterion(
-                    criterion, user_responses, evaluation_notes, ai_analysis
+                    criterion, user_responses, evaluation_notes, ai_analysis, features,
+                    base_score=base_scores.get(criterion), totals=totals, examples=examples.get(criterion)
                 )
                 criterion_scores[criterion.value] = score
                 detailed_feedback[criterion.value] = feedback
@@ -219,7 +241,7 @@ class IELTSBandScorer:
             # Generate comprehensive report
             report = self.generate_comprehensive_report(
                 overall_score, criterion_scores, detailed_feedback, 
-                conversation_flow, user_responses
+                conversation_flow, user_responses, totals
             )
             
             return {
@@ -239,8 +261,31 @@ class IELTSBandScorer:
                 'error': 'Failed to complete evaluation'
             }
     
+    def evaluate_speaking_batch(self, conversations: List[Dict[str, Any]],
+                                ai_analyses: Optional[List[Optional[Dict[str, Any]]]] = None,
+                                workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Re-score many conversations with vectorised criterion rules
+        
+        Produces the same band scores as ``evaluate_speaking_assessment`` but
+        skips feedback and report generation. See ``ielts_batch_scoring``.
+        """
+        from ielts_batch_scoring import score_speaking_batch
+        return score_speaking_batch(conversations, ai_analyses=ai_analyses, workers=workers)
+    
+    def extract_features(self, responses: List[Dict[str, Any]]) -> Optional[List[TextFeatures]]:
+        """Text features for each response, or None if any text is malformed"""
+        try:
+            return extract_response_features(responses)
+        except Exception as e:
+            logger.warning(f"Failed to extract response text features: {e}")
+            return None
+    
     def evaluate_criterion(self, criterion: ScoringCriterion, user_responses: List[Dict[str, Any]], 
-                         evaluation_notes: List[Dict[str, Any]], ai_analysis: Dict[str, Any] = None) -> Tuple[float, Dict[str, Any]]:
+                         evaluation_notes: List[Dict[str, Any]], ai_analysis: Dict[str, Any] = None,
+                         features: Optional[List[TextFeatures]] = None, base_score: Optional[float] = None,
+                         totals: Optional[Dict[str, Any]] = None,
+                         examples: Optional[List[str]] = None) -> Tuple[float, Dict[str, Any]]:
         """
         Evaluate specific IELTS criterion
         
@@ -249,21 +294,14 @@ class IELTSBandScorer:
         """
         try:
             # Base evaluation from conversation analysis
-            base_score = self.analyze_criterion_from_responses(criterion, user_responses, evaluation_notes)
-            
-            # Adjust with AI analysis if available
-            if ai_analysis and criterion.value.lower().replace(' ', '_') in ai_analysis:
-                ai_score = ai_analysis[criterion.value.lower().replace(' ', '_')].get('score', base_score)
-                # Weight: 70% AI analysis, 30% conversation analysis
-                adjusted_score = (ai_score * 0.7) + (base_score * 0.3)
-            else:
-                adjusted_score = base_score
+            if base_score is None:
+                base_score = self.analyze_criterion_from_responses(criterion, user_responses, evaluation_notes, features)
             
-            # Round to nearest 0.5
-            final_score = round(adjusted_score * 2) / 2
+            final_score = self.finalize_criterion_score(criterion, base_score, ai_analysis)
             
             # Generate detailed feedback
-            feedback = self.generate_criterion_feedback(criterion, final_score, user_responses, evaluation_notes)
+            feedback = self.generate_criterion_feedback(criterion, final_score, user_responses, evaluation_notes,
+                                                        features, totals, examples)
             
             return final_score, feedback
             
@@ -272,17 +310,31 @@ class IELTSBandScorer:
             # Return middle band with generic feedback
             return 5.0, {"score": 5.0, "feedback": "Unable to provide detailed evaluation for this criterion."}
     
+    def finalize_criterion_score(self, criterion: ScoringCriterion, base_score: float,
+                                 ai_analysis: Optional[Dict[str, Any]] = None) -> float:
+        """Blend in AI analysis if available and round to the nearest half band"""
+        if ai_analysis and criterion.value.lower().replace(' ', '_') in ai_analysis:
+            ai_score = ai_analysis[criterion.value.lower().replace(' ', '_')].get('score', base_score)
+            # Weight: 70% AI analysis, 30% conversation analysis
+            adjusted_score = (ai_score * 0.7) + (base_score * 0.3)
+        else:
+            adjusted_score = base_score
+        
+        # Round to nearest 0.5
+        return round(adjusted_score * 2) / 2
+    
     def analyze_criterion_from_responses(self, criterion: ScoringCriterion, 
                                        user_responses: List[Dict[str, Any]], 
-                                       evaluation_notes: List[Dict[str, Any]]) -> float:
+                                       evaluation_notes: List[Dict[str, Any]],
+                                       features: Optional[List[TextFeatures]] = None) -> float:
         """Analyze criterion based on conversation responses"""
         
         if criterion == ScoringCriterion.FLUENCY_COHERENCE:
             return self.analyze_fluency_coherence(user_responses, evaluation_notes)
         elif criterion == ScoringCriterion.LEXICAL_RESOURCE:
-            return self.analyze_lexical_resource(user_responses, evaluation_notes) 
+            return self.analyze_lexical_resource(user_responses, evaluation_notes, features) 
         elif criterion == ScoringCriterion.GRAMMATICAL_RANGE:
-            return self.analyze_grammatical_range(user_responses, evaluation_notes)
+            return self.analyze_grammatical_range(user_responses, evaluation_notes, features)
         elif criterion == ScoringCriterion.PRONUNCIATION:
             return self.analyze_pronunciation(user_responses, evaluation_notes)
         else:
@@ -290,155 +342,216 @@ class IELTSBandScorer:
     
     def analyze_fluency_coherence(self, responses: List[Dict[str, Any]], notes: List[Dict[str, Any]]) -> float:
         """Analyze fluency and coherence from responses"""
-        scores = []
+        if not responses:
+            return 5.0
         
-        for response in responses:
-            score = 5.0  # Base score
-            
-            # Check response length appropriateness
-            word_count = response.get('word_count', 0)
-            duration = response.get('duration', 0)
-            stage = response.get('stage', '')
-            
-            # Fluency indicators
-            if duration > 0 and word_count > 0:
-                words_per_minute = (word_count / duration) * 60
-                if 120 <= words_per_minute <= 180:  # Natural speaking rate
-                    score += 1.0
-                elif words_per_minute < 100 or words_per_minute > 200:
-                    score -= 1.0
-            
-            # Response appropriateness
-            if 'part1' in stage and 10 <= word_count <= 50:
-                score += 0.5
-            elif 'part2' in stage and 150 <= word_count <= 300:
-                score += 1.0
-            elif 'part3' in stage and 30 <= word_count <= 100:
-                score += 0.5
-            elif word_count < 5:  # Very brief responses
-                score -= 1.5
-            
-            # Check evaluation notes for fluency issues
-            fluency_notes = [n for n in notes if n.get('criterion') == 'Fluency and Coherence']
-            if any('hesitation' in n.get('note', '').lower() for n in fluency_notes):
-                score -= 0.5
-            if any('slow speech' in n.get('note', '').lower() for n in fluency_notes):
-                score -= 0.5
-                
-            scores.append(max(1.0, min(9.0, score)))  # Keep within band range
+        penalty = self.fluency_note_penalty(notes)
+        scores = [max(1.0, min(9.0, self.fluency_response_score(response) - penalty))  # Keep within band range
+                  for response in responses]
         
-        return statistics.mean(scores) if scores else 5.0
+        return statistics.mean(scores)
     
-    def analyze_lexical_resource(self, responses: List[Dict[str, Any]], notes: List[Dict[str, Any]]) -> float:
+    @classmethod
+    def fluency_response_score(cls, response: Dict[str, Any]) -> float:
+        """Fluency score of a single response before note penalties and clamping"""
+        score = 5.0  # Base score
+        
+        # Check response length appropriateness
+        word_count = response.get('word_count', 0)
+        duration = response.get('duration', 0)
+        stage = response.get('stage', '')
+        
+        # With VAD statistics the rate is over the spoken span, not the
+        # silence before and after the answer
+        speech_stats = response.get('speech_stats')
+        if speech_stats and speech_stats.get('active_seconds'):
+            duration = speech_stats['active_seconds']
+        
+        # Fluency indicators
+        if duration > 0 and word_count > 0:
+            words_per_minute = (word_count / duration) * 60
+            if 120 <= words_per_minute <= 180:  # Natural speaking rate
+                score += 1.0
+            elif words_per_minute < 100 or words_per_minute > 200:
+                score -= 1.0
+        
+        # Response appropriateness
+        if 'part1' in stage and 10 <= word_count <= 50:
+            score += 0.5
+        elif 'part2' in stage and 150 <= word_count <= 300:
+            score += 1.0
+        elif 'part3' in stage and 30 <= word_count <= 100:
+            score += 0.5
+        elif word_count < 5:  # Very brief responses
+            score -= 1.5
+        
+        return score + cls.fluency_pause_adjustment(speech_stats)
+    
+    @staticmethod
+    def fluency_pause_adjustment(speech_stats: Optional[Dict[str, Any]]) -> float:
+        """Hesitation adjustment from pauses measured on the response audio"""
+        if not speech_stats or not speech_stats.get('active_seconds'):
+            return 0.0
+        long_pauses_per_minute = speech_stats.get('long_pauses_per_minute', 0.0)
+        if long_pauses_per_minute > 6:  # Frequent long silences: noticeable hesitation
+            return -1.0
+        if long_pauses_per_minute > 3:
+            return -0.5
+        if long_pauses_per_minute <= 1 and speech_stats.get('speech_ratio', 0.0) >= 0.75:
+            return 0.5  # Speaks at length without noticeable effort
+        return 0.0
+    
+    @staticmethod
+    def fluency_note_flags(note: Dict[str, Any]) -> Tuple[bool, bool]:
+        """Whether a note reports (hesitation, slow speech)"""
+        if note.get('criterion') != 'Fluency and Coherence':
+            return False, False
+        note_text = note.get('note', '').lower()
+        return 'hesitation' in note_text, 'slow speech' in note_text
+    
+    @classmethod
+    def fluency_note_penalty(cls, notes: List[Dict[str, Any]], hesitation: bool = False,
+                             slow_speech: bool = False) -> float:
+        """Penalty applied to every response for fluency issues noted by Maya"""
+        for note in notes:
+            note_hesitation, note_slow_speech = cls.fluency_note_flags(note)
+            hesitation = hesitation or note_hesitation
+            slow_speech = slow_speech or note_slow_speech
+        return (0.5 if hesitation else 0.0) + (0.5 if slow_speech else 0.0)
+    
+    def analyze_lexical_resource(self, responses: List[Dict[str, Any]], notes: List[Dict[str, Any]],
+                                 features: Optional[List[TextFeatures]] = None) -> float:
         """Analyze lexical resource from responses"""
+        if features is None:
+            features = extract_response_features(responses)
         scores = []
-        all_words = []
+        vocabulary = set()
+        total_words = 0
         
-        for response in responses:
-            score = 5.0  # Base score
-            text = response.get('text', '')
-            words = text.lower().split() if text else []
-            all_words.extend(words)
-            
-            if not words:
-                scores.append(3.0)  # No vocabulary to assess
-                continue
-                
-            # Vocabulary variety
-            unique_words = set(words)
-            variety_ratio = len(unique_words) / len(words) if words else 0
-            
-            if variety_ratio > 0.8:
-                score += 1.5  # High variety
-            elif variety_ratio > 0.6:
-                score += 0.5  # Good variety
-            elif variety_ratio < 0.4:
-                score -= 1.0  # Poor variety
-            
-            # Response length bonus (more words = more vocabulary demonstrated)
-            word_count = len(words)
-            if word_count > 100:
-                score += 0.5
-            elif word_count < 10:
-                score -= 0.5
-            
-            scores.append(max(1.0, min(9.0, score)))
+        for text_features in features:
+            vocabulary.update(text_features.tokens)
+            total_words += text_features.token_count
+            scores.append(self.lexical_response_score(text_features))
         
         # Overall vocabulary variety across all responses
-        if all_words:
-            total_unique = len(set(all_words))
-            total_words = len(all_words)
-            overall_variety = total_unique / total_words
-            
-            variety_bonus = 0
-            if overall_variety > 0.7:
-                variety_bonus = 1.0
-            elif overall_variety > 0.5:
-                variety_bonus = 0.5
-            elif overall_variety < 0.3:
-                variety_bonus = -0.5
-                
+        variety_bonus = self.lexical_variety_bonus(len(vocabulary), total_words)
+        if variety_bonus:
             scores = [s + variety_bonus for s in scores]
         
         return statistics.mean(scores) if scores else 5.0
     
-    def analyze_grammatical_range(self, responses: List[Dict[str, Any]], notes: List[Dict[str, Any]]) -> float:
+    @staticmethod
+    def lexical_response_score(text_features: TextFeatures) -> float:
+        """Lexical score of a single response before the overall variety bonus"""
+        words = text_features.tokens
+        if not words:
+            return 3.0  # No vocabulary to assess
+        
+        score = 5.0  # Base score
+        
+        # Vocabulary variety
+        variety_ratio = text_features.variety_ratio
+        
+        if variety_ratio > 0.8:
+            score += 1.5  # High variety
+        elif variety_ratio > 0.6:
+            score += 0.5  # Good variety
+        elif variety_ratio < 0.4:
+            score -= 1.0  # Poor variety
+        
+        # Response length bonus (more words = more vocabulary demonstrated)
+        word_count = len(words)
+        if word_count > 100:
+            score += 0.5
+        elif word_count < 10:
+            score -= 0.5
+        
+        return max(1.0, min(9.0, score))
+    
+    @staticmethod
+    def lexical_variety_bonus(unique_words: int, total_words: int) -> float:
+        """Bonus added to every response for vocabulary variety across the conversation"""
+        if not total_words:
+            return 0
+        
+        overall_variety = unique_words / total_words
+        if overall_variety > 0.7:
+            return 1.0
+        elif overall_variety > 0.5:
+            return 0.5
+        elif overall_variety < 0.3:
+            return -0.5
+        return 0
+    
+    def analyze_grammatical_range(self, responses: List[Dict[str, Any]], notes: List[Dict[str, Any]],
+                                  features: Optional[List[TextFeatures]] = None) -> float:
         """Analyze grammatical range and accuracy from responses"""
-        scores = []
-        
-        for response in responses:
-            score = 5.0  # Base score
-            text = response.get('text', '')
-            
-            if not text:
-                scores.append(3.0)
-                continue
-            
-            sentences = [s.strip() for s in text.split('.') if s.strip()]
-            
-            # Sentence variety
-            if len(sentences) > 1:
-                score += 0.5  # Multiple sentences show structure variety
-            
-            # Word count indicates complexity potential
-            word_count = response.get('word_count', 0)
-            if word_count > 50:
-                score += 0.5  # Longer responses suggest complex structures
-            elif word_count > 100:
-                score += 1.0
-            
-            # Check for complex sentence indicators
-            complex_indicators = ['because', 'although', 'however', 'therefore', 'which', 'that', 'when', 'if']
-            complex_count = sum(1 for indicator in complex_indicators if indicator in text.lower())
-            
-            if complex_count >= 3:
-                score += 1.0
-            elif complex_count >= 1:
-                score += 0.5
-            
-            scores.append(max(1.0, min(9.0, score)))
+        if features is None:
+            features = extract_response_features(responses)
+        scores = [self.grammar_response_score(response, text_features)
+                  for response, text_features in zip(responses, features)]
         
         return statistics.mean(scores) if scores else 5.0
     
+    @staticmethod
+    def grammar_response_score(response: Dict[str, Any], text_features: TextFeatures) -> float:
+        """Grammatical range score of a single response"""
+        if not text_features:
+            return 3.0
+        
+        score = 5.0  # Base score
+        
+        # Sentence variety
+        if len(text_features.sentences) > 1:
+            score += 0.5  # Multiple sentences show structure variety
+        
+        # Word count indicates complexity potential
+        word_count = response.get('word_count', 0)
+        if word_count > 50:
+            score += 0.5  # Longer responses suggest complex structures
+        elif word_count > 100:
+            score += 1.0
+        
+        # Check for complex sentence indicators
+        complex_count = text_features.count_indicators('grammar_complex')
+        
+        if complex_count >= 3:
+            score += 1.0
+        elif complex_count >= 1:
+            score += 0.5
+        
+        return max(1.0, min(9.0, score))
+    
     def analyze_pronunciation(self, responses: List[Dict[str, Any]], notes: List[Dict[str, Any]]) -> float:
         """Analyze pronunciation from responses (basic analysis without audio)"""
         # Note: Full pronunciation analysis requires audio processing
         # This provides baseline scoring that can be enhanced with AI audio analysis
         
-        base_score = 6.0  # Assume reasonable pronunciation without audio analysis
-        
         # Check evaluation notes for pronunciation issues
-        pronunciation_notes = [n for n in notes if n.get('criterion') == 'Pronunciation']
+        note_adjustment = sum(self.pronunciation_note_adjustment(note) for note in notes)
+        total_words = sum(r.get('word_count', 0) for r in responses)
         
-        for note in pronunciation_notes:
-            note_text = note.get('note', '').lower()
-            if 'unclear' in note_text or 'unintelligible' in note_text:
-                base_score -= 1.0
-            elif 'strain' in note_text or 'effort' in note_text:
-                base_score -= 0.5
+        return self.pronunciation_score(note_adjustment, total_words)
+    
+    @staticmethod
+    def pronunciation_note_adjustment(note: Dict[str, Any]) -> float:
+        """Band adjustment for a single pronunciation note (0 for other criteria)"""
+        if note.get('criterion') != 'Pronunciation':
+            return 0.0
+        
+        note_text = note.get('note', '').lower()
+        if 'unclear' in note_text or 'unintelligible' in note_text:
+            return -1.0
+        elif 'strain' in note_text or 'effort' in note_text:
+            return -0.5
+        return 0.0
+    
+    @staticmethod
+    def pronunciation_score(note_adjustment: float, total_words: float) -> float:
+        """Pronunciation band from summed note adjustments and total words spoken"""
+        base_score = 6.0 + note_adjustment  # Assume reasonable pronunciation without audio analysis
         
         # Response length can indicate confidence in pronunciation
-        total_words = sum(r.get('word_count', 0) for r in responses)
         if total_words > 500:  # Confident speaking suggests better pronunciation
             base_score += 0.5
         elif total_words < 100:  # Very brief may indicate pronunciation concerns
@@ -447,7 +560,10 @@ class IELTSBandScorer:
         return max(3.0, min(8.0, base_score))  # Conservative range without audio
     
     def generate_criterion_feedback(self, criterion: ScoringCriterion, score: float, 
-                                  responses: List[Dict[str, Any]], notes: List[Dict[str, Any]]) -> Dict[str, Any]:
+                                  responses: List[Dict[str, Any]], notes: List[Dict[str, Any]],
+                                  features: Optional[List[TextFeatures]] = None,
+                                  totals: Optional[Dict[str, Any]] = None,
+                                  examples: Optional[List[str]] = None) -> Dict[str, Any]:
         """Generate detailed feedback for specific criterion"""
         
         # Determine performance level
@@ -466,7 +582,7 @@ class IELTSBandScorer:
         descriptor = SPEAKING_BAND_DESCRIPTORS.get(band_level, {}).get(criterion.value, "")
         
         # Analyze specific strengths and weaknesses
-        strengths, weaknesses = self.identify_strengths_weaknesses(criterion, responses, notes, score)
+        strengths, weaknesses = self.identify_strengths_weaknesses(criterion, responses, notes, score, totals)
         
         return {
             "score": score,
@@ -475,19 +591,22 @@ class IELTSBandScorer:
             "strengths": strengths,
             "weaknesses": weaknesses,
             "improvement_suggestions": suggestions[:3],  # Top 3 suggestions
-            "specific_examples": self.get_specific_examples(criterion, responses),
+            "specific_examples": examples if examples is not None else
+                                 self.get_specific_examples(criterion, responses, features),
         }
     
     def identify_strengths_weaknesses(self, criterion: ScoringCriterion, responses: List[Dict[str, Any]], 
-                                    notes: List[Dict[str, Any]], score: float) -> Tuple[List[str], List[str]]:
+                                    notes: List[Dict[str, Any]], score: float,
+                                    totals: Optional[Dict[str, Any]] = None) -> Tuple[List[str], List[str]]:
         """Identify specific strengths and weaknesses for criterion"""
         
         strengths = []
         weaknesses = []
+        totals = totals or self.response_totals(responses)
         
         if criterion == ScoringCriterion.FLUENCY_COHERENCE:
             # Analyze fluency patterns
-            avg_length = statistics.mean([r.get('word_count', 0) for r in responses]) if responses else 0
+            avg_length = totals['average_word_count']
             
             if score >= 6.0:
                 if avg_length > 30:
@@ -506,7 +625,7 @@ class IELTSBandScorer:
                         weaknesses.append("Speech rate slower than natural conversation")
         
         elif criterion == ScoringCriterion.LEXICAL_RESOURCE:
-            total_words = sum(r.get('word_count', 0) for r in responses)
+            total_words = totals['total_word_count']
             
             if score >= 6.0:
                 if total_words > 300:
@@ -538,35 +657,60 @@ class IELTSBandScorer:
         
         return strengths, weaknesses
     
-    def get_specific_examples(self, criterion: ScoringCriterion, responses: List[Dict[str, Any]]) -> List[str]:
+    @staticmethod
+    def response_totals(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Response count and word totals used by feedback and reports"""
+        total_words = sum(r.get('word_count', 0) for r in responses)
+        return {
+            'response_count': len(responses),
+            'total_word_count': total_words,
+            'average_word_count': total_words / len(responses) if responses else 0
+        }
+    
+    def get_specific_examples(self, criterion: ScoringCriterion, responses: List[Dict[str, Any]],
+                              features: Optional[List[TextFeatures]] = None) -> List[str]:
         """Get specific examples from user responses for criterion"""
         examples = []
+        if features is None:
+            features = extract_response_features(responses)
+        
+        # Scan the whole conversation, keeping the first qualifying examples
+        for response, text_features in zip(responses, features):
+            example = self.response_example(criterion, response, text_features)
+            if example:
+                examples.append(example)
+                if len(examples) == MAX_EXAMPLES:
+                    break
+        
+        return examples
+    
+    @staticmethod
+    def response_example(criterion: ScoringCriterion, response: Dict[str, Any],
+                         text_features: TextFeatures) -> Optional[str]:
+        """Quote from a single response illustrating the criterion, if it qualifies"""
+        text = text_features.text
+        if not text:
+            return None
         
-        for response in responses[:3]:  # Analyze first 3 responses
-            text = response.get('text', '')
-            if not text:
-                continue
-                
-            if criterion == ScoringCriterion.FLUENCY_COHERENCE:
-                if len(text.split()) > 25:  # Substantial response
-                    examples.append(f"Extended response in {response.get('stage', 'conversation')}: \"{text[:100]}{'...' if len(text) > 100 else ''}\"")
-            
-            elif criterion == ScoringCriterion.LEXICAL_RESOURCE:
-                words = text.split()
-                if len(set(words)) > len(words) * 0.6:  # Good vocabulary variety
-                    examples.append(f"Vocabulary variety demonstrated: \"{text[:80]}{'...' if len(text) > 80 else ''}\"")
-            
-            elif criterion == ScoringCriterion.GRAMMATICAL_RANGE:
-                complex_indicators = ['because', 'although', 'however', 'when', 'if', 'which']
-                if any(indicator in text.lower() for indicator in complex_indicators):
-                    examples.append(f"Complex structure usage: \"{text[:80]}{'...' if len(text) > 80 else ''}\"")
+        if criterion == ScoringCriterion.FLUENCY_COHERENCE:
+            if text_features.token_count > 25:  # Substantial response
+                return f"Extended response in {response.get('stage', 'conversation')}: \"{text[:100]}{'...' if len(text) > 100 else ''}\""
         
-        return examples[:2]  # Return top 2 examples
+        elif criterion == ScoringCriterion.LEXICAL_RESOURCE:
+            if text_features.variety_ratio > 0.6:  # Good vocabulary variety
+                return f"Vocabulary variety demonstrated: \"{text[:80]}{'...' if len(text) > 80 else ''}\""
+        
+        elif criterion == ScoringCriterion.GRAMMATICAL_RANGE:
+            if text_features.count_indicators('example_complex'):
+                return f"Complex structure usage: \"{text[:80]}{'...' if len(text) > 80 else ''}\""
+        
+        return None
     
     def generate_comprehensive_report(self, overall_score: float, criterion_scores: Dict[str, float], 
                                     detailed_feedback: Dict[str, Dict[str, Any]], 
                                     conversation_flow: Dict[str, Any], 
-                                    user_responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+                                    user_responses: List[Dict[str, Any]],
+                                    totals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate comprehensive IELTS assessment report"""
         
         # Performance summary
@@ -587,9 +731,10 @@ class IELTSBandScorer:
                 priority_improvements.extend(feedback.get('improvement_suggestions', [])[:2])
         
         # Assessment statistics
-        total_responses = len(user_responses)
-        total_words = sum(r.get('word_count', 0) for r in user_responses)
-        avg_response_length = total_words / total_responses if total_responses > 0 else 0
+        totals = totals or self.response_totals(user_responses)
+        total_responses = totals['response_count']
+        total_words = totals['total_word_count']
+        avg_response_length = totals['average_word_count']
         
         # Next steps recommendation
         next_steps = self.generate_next_steps(overall_score, criterion_scores, priority_improvements)
@@ -752,6 +897,102 @@ class IELTSBandScorer:
         
         return notes
 
+class RunningBandScore:
+    """
+    Running speaking-criterion aggregates for one conversation
+    
+    Each turn updates sums, counts and the conversation vocabulary using the
+    same per-response rules as IELTSBandScorer, so bands can be read at any
+    point without re-walking the transcript.
+    """
+    
+    FLUENCY_PENALTIES = (0.0, 0.5, 1.0)
+    
+    def __init__(self, scorer: Optional[IELTSBandScorer] = None):
+        self.scorer = scorer or get_band_scorer()
+        self.response_count = 0
+        self.total_word_count = 0
+        # Feedback quotes, collected from every turn as it arrives
+        self.examples: Dict[ScoringCriterion, List[str]] = {criterion: [] for criterion in ScoringCriterion}
+        
+        # Fluency sums are kept for every possible note penalty because a
+        # later note applies retroactively to all responses
+        self._fluency_sums = {penalty: 0.0 for penalty in self.FLUENCY_PENALTIES}
+        self._hesitation = False
+        self._slow_speech = False
+        self._lexical_sum = 0.0
+        self._vocabulary = set()
+        self._token_count = 0
+        self._grammar_sum = 0.0
+        self._pronunciation_adjustment = 0.0
+    
+    def add_response(self, response: Dict[str, Any]) -> None:
+        """Fold one user response into the aggregates"""
+        text_features = TextFeatures(response.get('text', ''))
+        
+        fluency_score = self.scorer.fluency_response_score(response)
+        for penalty in self.FLUENCY_PENALTIES:
+            self._fluency_sums[penalty] += max(1.0, min(9.0, fluency_score - penalty))
+        
+        self._lexical_sum += self.scorer.lexical_response_score(text_features)
+        self._vocabulary.update(text_features.tokens)
+        self._token_count += text_features.token_count
+        self._grammar_sum += self.scorer.grammar_response_score(response, text_features)
+        
+        self.response_count += 1
+        self.total_word_count += response.get('word_count', 0)
+        for criterion, examples in self.examples.items():
+            if len(examples) < MAX_EXAMPLES:
+                example = self.scorer.response_example(criterion, response, text_features)
+                if example:
+                    examples.append(example)
+    
+    def add_notes(self, notes: List[Dict[str, Any]]) -> None:
+        """Fold evaluation notes into the aggregates"""
+        for note in notes:
+            hesitation, slow_speech = self.scorer.fluency_note_flags(note)
+            self._hesitation = self._hesitation or hesitation
+            self._slow_speech = self._slow_speech or slow_speech
+            self._pronunciation_adjustment += self.scorer.pronunciation_note_adjustment(note)
+    
+    def base_scores(self) -> Dict[ScoringCriterion, float]:
+        """Criterion scores before AI blending and rounding"""
+        count = self.response_count
+        if not count:
+            return {criterion: 5.0 for criterion in ScoringCriterion}
+        
+        penalty = self.scorer.fluency_note_penalty([], self._hesitation, self._slow_speech)
+        variety_bonus = self.scorer.lexical_variety_bonus(len(self._vocabulary), self._token_count)
+        
+        return {
+            ScoringCriterion.FLUENCY_COHERENCE: self._fluency_sums[penalty] / count,
+            ScoringCriterion.LEXICAL_RESOURCE: (self._lexical_sum + variety_bonus * count) / count,
+            ScoringCriterion.GRAMMATICAL_RANGE: self._grammar_sum / count,
+            ScoringCriterion.PRONUNCIATION: self.scorer.pronunciation_score(
+                self._pronunciation_adjustment, self.total_word_count
+            )
+        }
+    
+    def bands(self, ai_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Current criterion and overall bands (partial until the conversation ends)"""
+        criterion_scores = {
+            criterion.value: self.scorer.finalize_criterion_score(criterion, base_score, ai_analysis)
+            for criterion, base_score in self.base_scores().items()
+        }
+        return {
+            'overall_band_score': calculate_speaking_band_score(criterion_scores),
+            'criterion_scores': criterion_scores,
+            'responses_scored': self.response_count
+        }
+    
+    def totals(self) -> Dict[str, Any]:
+        return {
+            'response_count': self.response_count,
+            'total_word_count': self.total_word_count,
+            'average_word_count': self.total_word_count / self.response_count if self.response_count else 0
+        }
+
+
 # Global instance
 _band_scorer = None
 
@@ -764,7 +1005,9 @@ def get_band_scorer() -> IELTSBandScorer:
 
 # Export
 __all__ = [
+    'GRAMMAR_COMPLEX_INDICATORS',
     'IELTSBandScorer',
+    'RunningBandScore',
     'ScoringCriterion',
     'BandLevel',
     'get_band_scorer'
@@ -0,0 +1,379 @@
+"""
+Vectorised Batch Re-scoring for IELTS Speaking
+Applies the IELTSBandScorer criterion rules to many conversations at once with
+NumPy arrays, for bulk re-scoring after rubric or weighting changes
+"""
+
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ielts_band_scoring import IELTSBandScorer, ScoringCriterion
+from text_features import TextFeatures
+from assessment_criteria.speaking_criteria import calculate_speaking_band_score
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Largest integer that converts to float64 without rounding
+_MAX_EXACT_INT = 2 ** 53
+
+_CRITERIA = list(ScoringCriterion)
+_AI_KEYS = [criterion.value.lower().replace(' ', '_') for criterion in _CRITERIA]
+_BOOL_COLUMNS = {'in_part1', 'in_part2', 'in_part3', 'has_text', 'multi_sentence', 'ai_present'}
+
+
+class _UnsupportedConversation(Exception):
+    """Conversation shape the vectorised rules cannot reproduce exactly"""
+
+
+def score_speaking_batch(conversations: List[Dict[str, Any]],
+                         ai_analyses: Optional[List[Optional[Dict[str, Any]]]] = None,
+                         workers: Optional[int] = None,
+                         chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Score a batch of Maya conversations
+
+    Results are aligned with ``conversations`` and carry the same
+    ``overall_band_score`` and ``criterion_scores`` that
+    ``IELTSBandScorer.evaluate_speaking_assessment`` would produce. With more
+    than one worker, chunks are scored in a process pool.
+    """
+    conversations = list(conversations)
+    if ai_analyses is None:
+        ai_analyses = [None] * len(conversations)
+    else:
+        ai_analyses = list(ai_analyses)
+        if len(ai_analyses) != len(conversations):
+            raise ValueError("ai_analyses must be aligned with conversations")
+
+    workers = workers or int(os.environ.get('BATCH_SCORING_WORKERS', 1))
+    chunk_size = chunk_size or int(os.environ.get('BATCH_SCORING_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+
+    if workers <= 1 or len(conversations) <= chunk_size:
+        return _score_chunk(conversations, ai_analyses)
+
+    conversation_chunks = [conversations[i:i + chunk_size] for i in range(0, len(conversations), chunk_size)]
+    analysis_chunks = [ai_analyses[i:i + chunk_size] for i in range(0, len(ai_analyses), chunk_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(_score_chunk, conversation_chunks, analysis_chunks):
+            results.extend(chunk_results)
+    return results
+
+
+def _score_chunk(conversations: List[Dict[str, Any]],
+                 ai_analyses: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Extract features for a chunk and apply the criterion rules column-wise"""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(conversations)
+    features = _FeatureColumns()
+    batch_positions = []
+
+    for position, (conversation, ai_analysis) in enumerate(zip(conversations, ai_analyses)):
+        user_responses = conversation.get('user_responses', [])
+        if not user_responses:
+            results[position] = {
+                'success': False,
+                'error': 'No user responses found for evaluation',
+                'session_id': conversation.get('session_id')
+            }
+            continue
+
+        try:
+            features.add_conversation(len(batch_positions), conversation, ai_analysis)
+        except _UnsupportedConversation:
+            results[position] = _score_with_scalar_path(conversation, ai_analysis)
+            continue
+        batch_positions.append(position)
+
+    if batch_positions:
+        criterion_scores = _apply_rules(features.to_arrays(), len(batch_positions))
+        overall = np.round(criterion_scores.sum(axis=1) / 4 * 2) / 2
+
+        for row, position in enumerate(batch_positions):
+            results[position] = {
+                'success': True,
+                'session_id': conversations[position].get('session_id'),
+                'overall_band_score': float(overall[row]),
+                'criterion_scores': {
+                    criterion.value: float(criterion_scores[row, column])
+                    for column, criterion in enumerate(_CRITERIA)
+                }
+            }
+
+    return results
+
+
+class _FeatureColumns:
+    """Column-oriented per-response and per-conversation features"""
+
+    def __init__(self):
+        # One entry per response
+        self.conversation_index = []
+        self.word_count = []
+        self.duration = []
+        self.in_part1 = []
+        self.in_part2 = []
+        self.in_part3 = []
+        self.token_count = []
+        self.unique_tokens = []
+        self.has_text = []
+        self.multi_sentence = []
+        self.complex_count = []
+        self.pause_adjustment = []
+
+        # One entry per conversation
+        self.fluency_penalty = []
+        self.global_variety = []
+        self.pronunciation_base = []
+        self.total_word_count = []
+        self.ai_scores = []
+        self.ai_present = []
+
+    def add_conversation(self, index: int, conversation: Dict[str, Any],
+                         ai_analysis: Optional[Dict[str, Any]]) -> None:
+        # Validate and collect everything first so a rejected conversation
+        # leaves no partial rows behind
+        user_responses = conversation.get('user_responses', [])
+        notes = conversation.get('evaluation_notes', [])
+        if not isinstance(user_responses, (list, tuple)) or not isinstance(notes, (list, tuple)):
+            raise _UnsupportedConversation()
+
+        response_rows = [self._response_row(response) for response in user_responses]
+        fluency_penalty, pronunciation_base = self._note_features(notes)
+        total_word_count = sum(response.get('word_count', 0) for response in user_responses)
+        ai_scores, ai_present = self._ai_features(ai_analysis)
+
+        all_tokens = []
+        for row, features in response_rows:
+            self.conversation_index.append(index)
+            self.word_count.append(row[0])
+            self.duration.append(row[1])
+            self.in_part1.append(row[2])
+            self.in_part2.append(row[3])
+            self.in_part3.append(row[4])
+            self.token_count.append(features.token_count)
+            self.unique_tokens.append(features.unique_token_count)
+            self.has_text.append(row[5])
+            self.multi_sentence.append(row[6])
+            self.complex_count.append(row[7])
+            self.pause_adjustment.append(row[8])
+            all_tokens.extend(features.tokens)
+
+        self.fluency_penalty.append(fluency_penalty)
+        self.global_variety.append(len(set(all_tokens)) / len(all_tokens) if all_tokens else math.nan)
+        self.pronunciation_base.append(pronunciation_base)
+        self.total_word_count.append(total_word_count)
+        self.ai_scores.append(ai_scores)
+        self.ai_present.append(ai_present)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: np.asarray(values, dtype=np.float64 if name not in _BOOL_COLUMNS else bool)
+                for name, values in vars(self).items()}
+
+    @staticmethod
+    def _response_row(response: Dict[str, Any]):
+        if not isinstance(response, dict):
+            raise _UnsupportedConversation()
+
+        word_count = _exact_float(response.get('word_count', 0))
+        duration = _exact_float(response.get('duration', 0))
+        stage = response.get('stage', '')
+        text = response.get('text', '')
+        if not isinstance(stage, str) or not (text is None or isinstance(text, str)):
+            raise _UnsupportedConversation()
+
+        speech_stats = response.get('speech_stats')
+        if speech_stats is not None and not isinstance(speech_stats, dict):
+            raise _UnsupportedConversation()
+        pause_adjustment = 0.0
+        if speech_stats and speech_stats.get('active_seconds'):
+            duration = _exact_float(speech_stats['active_seconds'])
+            pause_adjustment = IELTSBandScorer.fluency_pause_adjustment({
+                key: _exact_float(speech_stats.get(key, 0.0))
+                for key in ('active_seconds', 'long_pauses_per_minute', 'speech_ratio')
+            })
+
+        features = TextFeatures(text)
+        row = (word_count, duration, 'part1' in stage, 'part2' in stage, 'part3' in stage,
+               bool(features), len(features.sentences) > 1,
+               features.count_indicators('grammar_complex'), pause_adjustment)
+        return row, features
+
+    @staticmethod
+    def _note_features(notes: List[Dict[str, Any]]):
+        hesitation = slow_speech = False
+        pronunciation_base = 6.0
+
+        for note in notes:
+            if not isinstance(note, dict):
+                raise _UnsupportedConversation()
+            criterion = note.get('criterion')
+            if criterion not in ('Fluency and Coherence', 'Pronunciation'):
+                continue
+            note_text = note.get('note', '')
+            if not isinstance(note_text, str):
+                raise _UnsupportedConversation()
+            note_text = note_text.lower()
+
+            if criterion == 'Fluency and Coherence':
+                hesitation = hesitation or 'hesitation' in note_text
+                slow_speech = slow_speech or 'slow speech' in note_text
+            elif 'unclear' in note_text or 'unintelligible' in note_text:
+                pronunciation_base -= 1.0
+            elif 'strain' in note_text or 'effort' in note_text:
+                pronunciation_base -= 0.5
+
+        return 0.5 * hesitation + 0.5 * slow_speech, pronunciation_base
+
+    @staticmethod
+    def _ai_features(ai_analysis: Optional[Dict[str, Any]]):
+        scores = [math.nan] * len(_AI_KEYS)
+        present = [False] * len(_AI_KEYS)
+        if not ai_analysis:
+            return scores, present
+        if not isinstance(ai_analysis, dict):
+            raise _UnsupportedConversation()
+
+        for column, key in enumerate(_AI_KEYS):
+            if key not in ai_analysis:
+                continue
+            entry = ai_analysis[key]
+            if not isinstance(entry, dict):
+                raise _UnsupportedConversation()
+            present[column] = True
+            if 'score' in entry:
+                score = _exact_float(entry['score'])
+                if not math.isfinite(score):
+                    raise _UnsupportedConversation()
+                scores[column] = score
+        return scores, present
+
+
+
+def _exact_float(value: Any) -> float:
+    if isinstance(value, float):
+        return value
+    if isinstance(value, int) and abs(value) < _MAX_EXACT_INT:
+        return float(value)
+    raise _UnsupportedConversation()
+
+
+def _apply_rules(columns: Dict[str, np.ndarray], conversation_count: int) -> np.ndarray:
+    """Return a (conversations, 4) array of criterion bands in ScoringCriterion order"""
+    index = columns['conversation_index'].astype(np.intp)
+    responses_per_conversation = np.bincount(index, minlength=conversation_count)
+
+    def per_conversation_mean(values):
+        return np.bincount(index, weights=values, minlength=conversation_count) / responses_per_conversation
+
+    word_count = columns['word_count']
+    duration = columns['duration']
+
+    # Fluency and coherence
+    timed = (duration > 0) & (word_count > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        words_per_minute = np.where(timed, word_count / np.where(timed, duration, 1.0) * 60, 0.0)
+    rate_adjustment = np.select(
+        [timed & (words_per_minute >= 120) & (words_per_minute <= 180),
+         timed & ((words_per_minute < 100) | (words_per_minute > 200))],
+        [1.0, -1.0], 0.0
+    )
+    length_adjustment = np.select(
+        [columns['in_part1'] & (word_count >= 10) & (word_count <= 50),
+         columns['in_part2'] & (word_count >= 150) & (word_count <= 300),
+         columns['in_part3'] & (word_count >= 30) & (word_count <= 100),
+         word_count < 5],
+        [0.5, 1.0, 0.5, -1.5], 0.0
+    )
+    fluency = np.clip(5.0 + rate_adjustment + length_adjustment + columns['pause_adjustment']
+                      - columns['fluency_penalty'][index], 1.0, 9.0)
+
+    # Lexical resource
+    token_count = columns['token_count']
+    has_tokens = token_count > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variety = np.where(has_tokens, columns['unique_tokens'] / np.where(has_tokens, token_count, 1.0), 0.0)
+    variety_adjustment = np.select([variety > 0.8, variety > 0.6, variety < 0.4], [1.5, 0.5, -1.0], 0.0)
+    token_adjustment = np.select([token_count > 100, token_count < 10], [0.5, -0.5], 0.0)
+    lexical = np.where(has_tokens, np.clip(5.0 + variety_adjustment + token_adjustment, 1.0, 9.0), 3.0)
+
+    global_variety = columns['global_variety']
+    variety_bonus = np.select(
+        [global_variety > 0.7, global_variety > 0.5, global_variety < 0.3],
+        [1.0, 0.5, -0.5], 0.0
+    )
+    lexical = lexical + variety_bonus[index]
+
+    # Grammatical range and accuracy
+    complex_count = columns['complex_count']
+    grammar = np.clip(
+        5.0
+        + np.where(columns['multi_sentence'], 0.5, 0.0)
+        + np.where(word_count > 50, 0.5, 0.0)
+        + np.select([complex_count >= 3, complex_count >= 1], [1.0, 0.5], 0.0),
+        1.0, 9.0
+    )
+    grammar = np.where(columns['has_text'], grammar, 3.0)
+
+    # Pronunciation is scored per conversation
+    total_word_count = columns['total_word_count']
+    pronunciation = np.clip(
+        columns['pronunciation_base']
+        + np.select([total_word_count > 500, total_word_count < 100], [0.5, -0.5], 0.0),
+        3.0, 8.0
+    )
+
+    base_scores = np.column_stack([
+        per_conversation_mean(fluency),
+        per_conversation_mean(lexical),
+        per_conversation_mean(grammar),
+        pronunciation
+    ])
+
+    # 70% AI analysis, 30% conversation analysis, falling back to the base
+    # score when an analysis entry has no score
+    ai_scores = np.where(np.isnan(columns['ai_scores']), base_scores, columns['ai_scores'])
+    adjusted = np.where(columns['ai_present'], (ai_scores * 0.7) + (base_scores * 0.3), base_scores)
+
+    return np.round(adjusted * 2) / 2
+
+
+def _score_with_scalar_path(conversation: Dict[str, Any],
+                            ai_analysis: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Score an irregular conversation with the reference implementation"""
+    from ielts_band_scoring import get_band_scorer
+
+    try:
+        scorer = get_band_scorer()
+        user_responses = conversation.get('user_responses', [])
+        evaluation_notes = conversation.get('evaluation_notes', [])
+
+        criterion_scores = {}
+        for criterion in _CRITERIA:
+            score, _ = scorer.evaluate_criterion(criterion, user_responses, evaluation_notes, ai_analysis)
+            criterion_scores[criterion.value] = score
+
+        return {
+            'success': True,
+            'session_id': conversation.get('session_id'),
+            'overall_band_score': calculate_speaking_band_score(criterion_scores),
+            'criterion_scores': criterion_scores
+        }
+    except Exception as e:
+        logger.error(f"Failed to score conversation {conversation.get('session_id')}: {e}")
+        return {
+            'success': False,
+            'error': 'Failed to complete evaluation',
+            'session_id': conversation.get('session_id')
+        }
+
+
+# Export
+__all__ = ['score_speaking_batch']
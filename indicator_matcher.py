@@ -0,0 +1,157 @@
+"""
+Indicator Phrase Matcher
+Aho-Corasick automaton over words that counts every scoring indicator
+vocabulary in one linear scan of a text, matching whole words only
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Sequence, Tuple, Iterable
+
+# Connectives and subordinators counted as evidence of complex structures
+GRAMMAR_COMPLEX_INDICATORS = ['because', 'although', 'however', 'therefore', 'which', 'that', 'when', 'if']
+
+# Narrower set used to pick quotable complex-structure examples
+EXAMPLE_COMPLEX_INDICATORS = ['because', 'although', 'however', 'when', 'if', 'which']
+
+# Nova Micro speaking evaluator vocabularies
+SPEAKING_COMPLEX_WORDS = ['multicultural', 'responsibilities', 'conservation', 'authentic', 'dramatically',
+                          'sustainable', 'environmentally', 'comprehensive', 'globalized']
+SPEAKING_COMPLEX_STRUCTURES = ['have been', 'would use', 'which is', 'that requires', 'increasingly']
+
+# Nova Micro writing evaluator vocabularies
+WRITING_TASK_WORDS = ['shows', 'illustrates', 'demonstrates', 'according to', 'overall', 'in conclusion',
+                      'however', 'furthermore']
+WRITING_COHERENCE_WORDS = ['firstly', 'secondly', 'moreover', 'furthermore', 'in addition', 'however',
+                           'nevertheless', 'in conclusion']
+WRITING_LEXICAL_WORDS = ['significant', 'approximately', 'dramatically', 'proportion', 'accommodation',
+                         'correspondingly', 'predominant']
+WRITING_GRAMMAR_WORDS = ['which', 'that', 'although', 'despite', 'having', 'been', 'would', 'could', 'should']
+
+SCORING_INDICATORS: Dict[str, List[str]] = {
+    'grammar_complex': GRAMMAR_COMPLEX_INDICATORS,
+    'example_complex': EXAMPLE_COMPLEX_INDICATORS,
+    'speaking_complex_words': SPEAKING_COMPLEX_WORDS,
+    'speaking_complex_structures': SPEAKING_COMPLEX_STRUCTURES,
+    'writing_task': WRITING_TASK_WORDS,
+    'writing_coherence': WRITING_COHERENCE_WORDS,
+    'writing_lexical': WRITING_LEXICAL_WORDS,
+    'writing_grammar': WRITING_GRAMMAR_WORDS,
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def split_words(text: str) -> List[str]:
+    """Word tokens of already lower-cased text, punctuation removed"""
+    return _WORD_RE.findall(text)
+
+
+class IndicatorMatcher:
+    """
+    Multi-pattern matcher for indicator phrases
+
+    Phrases are compiled into a trie over words with failure links, so a
+    scan visits each word of the text once regardless of how many phrases
+    or categories are registered. A phrase counts once per category it
+    belongs to, however often it occurs.
+    """
+
+    def __init__(self, vocabularies: Dict[str, Sequence[str]]):
+        self.categories: Tuple[str, ...] = tuple(vocabularies)
+
+        # Phrase id -> categories it counts towards (with list multiplicity)
+        self._phrases: List[Tuple[str, ...]] = []
+        self._phrase_categories: List[List[str]] = []
+        phrase_ids: Dict[Tuple[str, ...], int] = {}
+
+        for category, phrases in vocabularies.items():
+            for phrase in phrases:
+                words = tuple(split_words(phrase.lower()))
+                if not words:
+                    raise ValueError(f"Indicator phrase {phrase!r} in {category!r} has no words")
+                if words not in phrase_ids:
+                    phrase_ids[words] = len(self._phrases)
+                    self._phrases.append(words)
+                    self._phrase_categories.append([])
+                self._phrase_categories[phrase_ids[words]].append(category)
+
+        self._build(phrase_ids)
+
+    def _build(self, phrase_ids: Dict[Tuple[str, ...], int]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for words, phrase_id in phrase_ids.items():
+            node = 0
+            for word in words:
+                next_node = self._goto[node].get(word)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][word] = next_node
+                    self._goto.append({})
+                    self._output.append(())
+                node = next_node
+            self._output[node] += (phrase_id,)
+
+        # Breadth-first failure links; each node's output absorbs the output
+        # of its failure target so a scan never walks the suffix chain
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    def matched_phrases(self, words: Iterable[str]) -> set:
+        """Ids of the phrases that occur in a sequence of lower-cased words"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = set()
+        node = 0
+
+        for word in words:
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+    def count(self, words: Iterable[str]) -> Dict[str, int]:
+        """Number of distinct phrases found per category"""
+        counts = dict.fromkeys(self.categories, 0)
+        for phrase_id in self.matched_phrases(words):
+            for category in self._phrase_categories[phrase_id]:
+                counts[category] += 1
+        return counts
+
+    def count_text(self, text: str) -> Dict[str, int]:
+        return self.count(split_words(text.lower()))
+
+
+# Global instance
+_indicator_matcher = None
+
+def get_indicator_matcher() -> IndicatorMatcher:
+    """Get global matcher compiled from all scoring indicator vocabularies"""
+    global _indicator_matcher
+    if _indicator_matcher is None:
+        _indicator_matcher = IndicatorMatcher(SCORING_INDICATORS)
+    return _indicator_matcher
+
+# Export
+__all__ = [
+    'GRAMMAR_COMPLEX_INDICATORS',
+    'EXAMPLE_COMPLEX_INDICATORS',
+    'SCORING_INDICATORS',
+    'IndicatorMatcher',
+    'get_indicator_matcher',
+    'split_words'
+]
@@ -4,6 +4,7 @@ Integrates Maya conversation engine with IELTS band scoring for complete assessm
 """
 
 import json
+import base64
 import logging
 from datetime import datetime
 from typing import Dict, Any
@@ -14,9 +15,21 @@ from question_bank_dal import get_question_bank_dal
 from maya_conversation_engine import get_maya_engine
 from ielts_band_scoring import get_band_scorer
 from conversation_data_retention import get_retention_manager
+from audio_probe import probe_base64_audio
+from audio_ingest import AudioIngestError, audio_from_base64
+from voice_activity import speech_statistics
+from audio_encoding import get_audio_delivery_store, negotiate_audio_encoding, prepare_maya_audio
 
 logger = logging.getLogger(__name__)
 
+def _prepare_maya_audio_for_client(event: Dict[str, Any], body: Dict[str, Any], maya_response: Dict[str, Any]) -> None:
+    """Re-encode Maya's audio in the best format the client reports it can play"""
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    encoding = negotiate_audio_encoding(body.get('audio_formats') or headers.get('accept'))
+    maya_response['maya_audio'] = prepare_maya_audio(
+        maya_response.get('maya_audio'), encoding, body.get('audio_delivery', 'inline'), body.get('audio_bitrate')
+    )
+
 @security_middleware(sensitive_endpoint=True, require_recaptcha=False)
 def handle_start_maya_conversation(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -25,7 +38,10 @@ def handle_start_maya_conversation(event: Dict[str, Any], context: Any) -> Dict[
     Expected payload:
     {
         "session_id": "session_123456789",
-        "assessment_type": "academic_speaking"
+        "assessment_type": "academic_speaking",
+        "audio_formats": ["audio/ogg; codecs=opus", "audio/wav"],
+        "audio_delivery": "inline" | "url",
+        "audio_bitrate": 24000
     }
     """
     try:
@@ -102,6 +118,7 @@ def handle_start_maya_conversation(event: Dict[str, Any], context: Any) -> Dict[
         
         if conversation_result['success']:
             logger.info(f"Maya conversation started for session: {session_id}")
+            _prepare_maya_audio_for_client(event, body, conversation_result)
             
             return {
                 'statusCode': 200,
@@ -154,7 +171,11 @@ def handle_maya_conversation_turn(event: Dict[str, Any], context: Any) -> Dict[s
         "session_id": "session_123456789",
         "user_response": "transcribed text from user",
         "audio_duration": 15.2,
-        "conversation_stage": "part1_questions"
+        "audio_data": "<optional base64 recording; its header duration replaces audio_duration>",
+        "conversation_stage": "part1_questions",
+        "audio_formats": ["audio/webm; codecs=opus"],
+        "audio_delivery": "inline" | "url",
+        "audio_bitrate": 16000
     }
     """
     try:
@@ -178,6 +199,20 @@ def handle_maya_conversation_turn(event: Dict[str, Any], context: Any) -> Dict[s
         user_response = body.get('user_response', '').strip()
         audio_duration = body.get('audio_duration', 0.0)
         
+        # Words-per-minute fluency needs the real length, so prefer the
+        # recording's header over the client's timer when audio is sent;
+        # uncompressed recordings also give measured pauses via VAD
+        speech_stats = None
+        if body.get('audio_data'):
+            try:
+                audio_info = probe_base64_audio(body['audio_data'])
+                if audio_info.exact:
+                    audio_duration = audio_info.duration_seconds
+                if audio_info.format in ('wav', 'pcm'):
+                    speech_stats = speech_statistics(audio_from_base64(body['audio_data']))
+            except AudioIngestError as e:
+                logger.warning(f"Ignoring unreadable audio for session {session_id}: {e.message}")
+        
         if not session_id or not user_response:
             return {
                 'statusCode': 400,
@@ -221,17 +256,20 @@ def handle_maya_conversation_turn(event: Dict[str, Any], context: Any) -> Dict[s
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         conversation_turn = loop.run_until_complete(
-            maya_engine.process_user_response(user_response, audio_duration)
+            maya_engine.process_user_response(user_response, audio_duration, speech_stats)
         )
         
         if conversation_turn['success']:
+            _prepare_maya_audio_for_client(event, body, conversation_turn)
+            
             # Check if assessment is complete
             is_complete = conversation_turn.get('assessment_complete', False)
             
             response_data = {
                 'success': True,
                 'maya_response': conversation_turn,
-                'assessment_complete': is_complete
+                'assessment_complete': is_complete,
+                'partial_bands': maya_engine.get_partial_bands()
             }
             
             # If complete, generate band score report
@@ -239,8 +277,10 @@ def handle_maya_conversation_turn(event: Dict[str, Any], context: Any) -> Dict[s
                 conversation_summary = maya_engine.get_conversation_summary()
                 band_scorer = get_band_scorer()
                 
-                # Generate comprehensive evaluation
-                evaluation_result = band_scorer.evaluate_speaking_assessment(conversation_summary)
+                # Generate comprehensive evaluation from the per-turn aggregates
+                evaluation_result = band_scorer.evaluate_speaking_assessment(
+                    conversation_summary, running_score=maya_engine.get_running_score()
+                )
                 
                 if evaluation_result['success']:
                     response_data['band_score_report'] = evaluation_result
@@ -505,13 +545,24 @@ def handle_generate_band_score_report(event: Dict[str, Any], context: Any) -> Di
                     })
                 }
         else:
-            # Data not yet cleaned - get from conversation summary
+            # Data not yet cleaned - score from the running aggregates kept
+            # during the conversation
             maya_engine = get_maya_engine()
-            conversation_summary = maya_engine.get_conversation_summary()
+            running_score = maya_engine.get_running_score()
             
-            # Generate band score report
-            band_scorer = get_band_scorer()
-            evaluation_result = band_scorer.evaluate_speaking_assessment(conversation_summary)
+            if not include_detailed and running_score.response_count:
+                evaluation_result = {
+                    'success': True,
+                    **running_score.bands(),
+                    'assessment_date': datetime.utcnow().isoformat(),
+                    'session_id': session_id
+                }
+            else:
+                conversation_summary = maya_engine.get_conversation_summary()
+                band_scorer = get_band_scorer()
+                evaluation_result = band_scorer.evaluate_speaking_assessment(
+                    conversation_summary, running_score=running_score
+                )
         
         if evaluation_result['success']:
             # Optionally filter detailed feedback
@@ -645,11 +696,38 @@ def handle_get_user_assessment_history(event: Dict[str, Any], context: Any) -> D
             })
         }
 
+def handle_get_maya_audio(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Serve encoded Maya audio delivered by URL (local store; S3 serves its own)
+    
+    Path: /api/maya/audio/{token}
+    """
+    token = (event.get('pathParameters') or {}).get('token') or event.get('path', '').rsplit('/', 1)[-1]
+    stored = get_audio_delivery_store().get(token)
+    if not stored:
+        return {
+            'statusCode': 404,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({
+                'success': False,
+                'error': 'Audio not found or expired'
+            })
+        }
+    
+    data, mime_type = stored
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': mime_type, 'Cache-Control': 'private, max-age=300'},
+        'body': base64.b64encode(data).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
 # Export handlers
 __all__ = [
     'handle_start_maya_conversation',
     'handle_maya_conversation_turn',
     'handle_get_conversation_summary',
     'handle_generate_band_score_report',
-    'handle_get_user_assessment_history'
+    'handle_get_user_assessment_history',
+    'handle_get_maya_audio'
 ]
\ No newline at end of file
@@ -12,6 +12,9 @@ from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
 
 from nova_sonic_service import get_nova_sonic_service, NovaSonicService
+from nova_sonic_pool import get_stream_pool
+from ielts_band_scoring import RunningBandScore
+from tts_cache import TTSVoice, get_tts_cache, register_tts_voice
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +41,62 @@ class ResponseType(Enum):
     FOLLOW_UP = "follow_up"
     TIME_CHECK = "time_check"
 
+# Maya's voice for the engine's Nova Sonic synthesis
+MAYA_VOICE_ID = "matthew"  # Nova Sonic compatible voice
+MAYA_SAMPLE_RATE = 24000
+MAYA_TTS_VOICE = "maya"  # tts_cache voice name
+
+# Fixed examiner lines; every one is pre-synthesised into the TTS cache
+GREETING_MESSAGE = "Hello! I'm Maya, your IELTS examiner today. I can see you're ready to begin - that's wonderful! Before we start, could you please tell me your full name?"
+
+CONTEXTUAL_RESPONSES = {
+    'engineer': "That sounds fascinating! Engineering is such a diverse field. What specifically drew you to that type of work, and how long have you been doing it?",
+    'teacher': "Teaching is such an important profession! What subjects do you teach, and what do you find most rewarding about working with students?",
+    'work': "That's interesting work! Can you tell me more about what a typical day looks like for you?",
+    'study': "Your studies sound engaging! What aspects of your subject do you find most interesting, and what are your future plans?",
+    'home': "That sounds like a nice place to live! What do you particularly like about your area, and how long have you been there?",
+    'part1_time_up': "That's really interesting. Let me ask you about something different now...",
+    'part1_follow_up': "That's really interesting to hear. Can you tell me a bit more about how that influences your daily life?",
+    'part2_continue': "You're doing very well. Please continue - I'd love to hear more details about that.",
+    'part2_wrap_up': "Thank you for that detailed description. Can you tell me briefly why this topic is particularly meaningful to you?",
+    'default': "Thank you for sharing that with me. That's very interesting."
+}
+
+FALLBACK_RESPONSES = {
+    ConversationStage.INITIAL_GREETING: "Hello! I'm Maya, your IELTS examiner. How are you today?",
+    ConversationStage.IDENTITY_CONFIRMATION: "Could you please tell me your full name?",
+    ConversationStage.PART1_QUESTIONS: "That's interesting. Can you tell me more about that?",
+    ConversationStage.PART2_SPEAKING: "Please continue with your response.",
+    ConversationStage.PART3_DISCUSSION: "That's a good point. What do you think about that?"
+}
+DEFAULT_FALLBACK_RESPONSE = "Thank you. Please continue."
+
+PART1_FALLBACK_QUESTION = "Tell me about yourself and your background."
+PART2_PREPARATION_OVER = "Your preparation time is up. Please begin speaking about your topic. Remember, you should speak for 1-2 minutes."
+PART2_FOLLOW_UPS = [
+    "Thank you. Can you tell me a bit more about why this is important to you?",
+    "That's interesting. How do you think this has influenced you?",
+    "Thank you for that detailed description."
+]
+PART3_FALLBACK_QUESTION = "What do you think about the role this plays in modern society?"
+
+
+def scripted_maya_lines() -> List[str]:
+    """Every fixed line the engine speaks, for TTS pre-warming"""
+    return [GREETING_MESSAGE, DEFAULT_FALLBACK_RESPONSE, PART1_FALLBACK_QUESTION, PART2_PREPARATION_OVER,
+            PART3_FALLBACK_QUESTION, *CONTEXTUAL_RESPONSES.values(), *FALLBACK_RESPONSES.values(),
+            *PART2_FOLLOW_UPS]
+
+
+def synthesize_maya_line(text: str) -> Optional[str]:
+    """Base64 Nova Sonic audio for one line, or None if synthesis failed"""
+    result = get_nova_sonic_service().synthesize_maya_speech(text=text, voice_id=MAYA_VOICE_ID)
+    return result.get('audio_base64') if result.get('success') else None
+
+
+register_tts_voice(MAYA_TTS_VOICE, TTSVoice(MAYA_VOICE_ID, MAYA_SAMPLE_RATE, 'audio/lpcm',
+                                            scripted_maya_lines, synthesize_maya_line))
+
 class MayaConversationEngine:
     """
     Maya AI Examiner Conversation Engine
@@ -81,6 +140,7 @@ class MayaConversationEngine:
             "user_context": {},  # What we've learned about the user
             "current_topics": [],  # Active discussion topics
             "evaluation_notes": [],
+            "running_score": RunningBandScore(),  # Per-turn band aggregates
             "streaming_session": None  # Active Nova Sonic session
         }
     
@@ -104,35 +164,17 @@ class MayaConversationEngine:
                 "total_time": 0,
                 "started_at": datetime.utcnow().isoformat(),
                 "user_responses": [],
-                "evaluation_notes": []
+                "evaluation_notes": [],
+                "running_score": RunningBandScore()
             }
             
-            # Initialize Nova Sonic session for streaming (if available)
+            # Streams are leased from the container's warm pool when the client
+            # connects over the WebSocket API; here we only make sure one is ready
             streaming_context = None
             try:
-                import asyncio
-                # Attempt to initialize streaming session
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                streaming_result = loop.run_until_complete(
-                    self.nova_sonic.start_maya_conversation(
-                        system_prompt=self.nova_sonic.get_maya_ielts_system_prompt(assessment_type or "academic_speaking"),
-                        voice_id="matthew"
-                    )
-                )
-                
-                if streaming_result.get('success'):
-                    streaming_context = {
-                        'stream': streaming_result.get('stream'),
-                        'session_id': streaming_result.get('session_id'),
-                        'voice_id': streaming_result.get('voice_id'),
-                        'status': streaming_result.get('status')
-                    }
-                    logger.info(f"Nova Sonic streaming session initialized: {streaming_result.get('session_id')}")
-                else:
-                    logger.warning(f"Nova Sonic streaming failed: {streaming_result.get('error', 'Unknown error')}")
+                get_stream_pool().prewarm()
             except Exception as e:
-                logger.warning(f"Failed to initialize Nova Sonic streaming: {e}")
+                logger.warning(f"Failed to prewarm Nova Sonic streams: {e}")
             
             # Set start times for time management
             self.conversation_state["start_time"] = time.time()
@@ -161,13 +203,15 @@ class MayaConversationEngine:
                 "error": "Failed to initialize conversation"
             }
     
-    async def process_user_response(self, user_input: str, audio_duration: float = 0) -> Dict[str, Any]:
+    async def process_user_response(self, user_input: str, audio_duration: float = 0,
+                                    speech_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Process user response and generate Maya's next natural response
         
         Args:
             user_input: User's spoken text (transcribed)
             audio_duration: Duration of user's audio in seconds
+            speech_stats: Speech time and pause statistics from voice activity detection
             
         Returns:
             Dict with Maya's response and conversation state
@@ -183,12 +227,19 @@ class MayaConversationEngine:
                 "duration": audio_duration,
                 "word_count": len(user_input.split()) if user_input else 0
             }
+            if speech_stats:
+                response_record["speech_stats"] = speech_stats
             self.conversation_state["user_responses"].append(response_record)
             
             # Generate evaluation notes
             evaluation_notes = self.evaluate_response(user_input, audio_duration, current_stage)
             self.conversation_state["evaluation_notes"].extend(evaluation_notes)
             
+            # Keep running band aggregates current for progress and the final report
+            running_score = self.get_running_score()
+            running_score.add_response(response_record)
+            running_score.add_notes(evaluation_notes)
+            
             # Determine next stage and response using AI
             next_response = await self.determine_next_response(user_input, current_stage)
             
@@ -297,7 +348,7 @@ Respond as Maya would, naturally and professionally."""
         self.conversation_state['user_context'].update(user_context)
         
         if stage == 'initial_greeting':
-            return "Hello! I'm Maya, your IELTS examiner today. I can see you're ready to begin - that's wonderful! Before we start, could you please tell me your full name?"
+            return GREETING_MESSAGE
         
         elif stage == 'identity_confirmation':
             name = user_context.get('name', 'there')
@@ -307,31 +358,31 @@ Respond as Maya would, naturally and professionally."""
             # Generate contextual follow-ups based on what user said
             if 'work' in user_input.lower():
                 if 'engineer' in user_input.lower():
-                    return "That sounds fascinating! Engineering is such a diverse field. What specifically drew you to that type of work, and how long have you been doing it?"
+                    return CONTEXTUAL_RESPONSES['engineer']
                 elif 'teacher' in user_input.lower():
-                    return "Teaching is such an important profession! What subjects do you teach, and what do you find most rewarding about working with students?"
+                    return CONTEXTUAL_RESPONSES['teacher']
                 else:
-                    return "That's interesting work! Can you tell me more about what a typical day looks like for you?"
+                    return CONTEXTUAL_RESPONSES['work']
             
             elif 'study' in user_input.lower():
-                return "Your studies sound engaging! What aspects of your subject do you find most interesting, and what are your future plans?"
+                return CONTEXTUAL_RESPONSES['study']
             
             elif 'home' in user_input.lower() or 'live' in user_input.lower():
-                return "That sounds like a nice place to live! What do you particularly like about your area, and how long have you been there?"
+                return CONTEXTUAL_RESPONSES['home']
             
             # Time-aware responses
             if time_remaining and time_remaining < 30:
-                return "That's really interesting. Let me ask you about something different now..."
+                return CONTEXTUAL_RESPONSES['part1_time_up']
             
-            return "That's really interesting to hear. Can you tell me a bit more about how that influences your daily life?"
+            return CONTEXTUAL_RESPONSES['part1_follow_up']
         
         elif stage == 'part2_speaking':
             if time_remaining and time_remaining > 30:
-                return "You're doing very well. Please continue - I'd love to hear more details about that."
+                return CONTEXTUAL_RESPONSES['part2_continue']
             else:
-                return "Thank you for that detailed description. Can you tell me briefly why this topic is particularly meaningful to you?"
+                return CONTEXTUAL_RESPONSES['part2_wrap_up']
         
-        return "Thank you for sharing that with me. That's very interesting."
+        return CONTEXTUAL_RESPONSES['default']
     
     def _synthesize_maya_response(self, text: str, session_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -345,12 +396,26 @@ Respond as Maya would, naturally and professionally."""
             Dict with both text and audio synthesis result
         """
         try:
-            # Use Nova Sonic service to synthesize Maya's speech
-            synthesis_result = self.nova_sonic.synthesize_maya_speech(
-                text=text,
-                voice_id="matthew",  # Nova Sonic compatible voice
-                session_context=session_context
-            )
+            tts_cache = get_tts_cache()
+            if tts_cache.is_scripted(MAYA_TTS_VOICE, text):
+                # Fixed lines come pre-synthesised from the TTS cache
+                audio_base64, source = tts_cache.speak(MAYA_TTS_VOICE, text)
+                synthesis_result = {
+                    "success": bool(audio_base64),
+                    "audio_base64": audio_base64,
+                    "format": "audio/lpcm",
+                    "sample_rate": MAYA_SAMPLE_RATE,
+                    "voice_id": MAYA_VOICE_ID,
+                    "cached": source != 'synthesized',
+                    "error": None if audio_base64 else "Synthesis failed"
+                }
+            else:
+                # Use Nova Sonic service to synthesize Maya's speech
+                synthesis_result = self.nova_sonic.synthesize_maya_speech(
+                    text=text,
+                    voice_id=MAYA_VOICE_ID,
+                    session_context=session_context
+                )
             
             if synthesis_result.get('success'):
                 return {
@@ -363,7 +428,8 @@ Respond as Maya would, naturally and professionally."""
                         "voice_id": synthesis_result.get('voice_id', 'matthew'),
                         "duration_ms": synthesis_result.get('duration_ms', 0),
                         "streaming": synthesis_result.get('streaming', False),
-                        "fallback_mode": synthesis_result.get('fallback_mode', False)
+                        "fallback_mode": synthesis_result.get('fallback_mode', False),
+                        "cached": synthesis_result.get('cached', False)
                     }
                 }
             else:
@@ -618,14 +684,7 @@ Respond as Maya would, naturally and professionally."""
     
     def _get_fallback_response(self, stage: ConversationStage) -> str:
         """Get fallback response if AI generation fails"""
-        fallbacks = {
-            ConversationStage.INITIAL_GREETING: "Hello! I'm Maya, your IELTS examiner. How are you today?",
-            ConversationStage.IDENTITY_CONFIRMATION: "Could you please tell me your full name?",
-            ConversationStage.PART1_QUESTIONS: "That's interesting. Can you tell me more about that?",
-            ConversationStage.PART2_SPEAKING: "Please continue with your response.",
-            ConversationStage.PART3_DISCUSSION: "That's a good point. What do you think about that?"
-        }
-        return fallbacks.get(stage, "Thank you. Please continue.")
+        return FALLBACK_RESPONSES.get(stage, DEFAULT_FALLBACK_RESPONSE)
     
     async def _handle_fallback_progression(self, current_stage: ConversationStage) -> Dict[str, Any]:
         """Handle conversation progression if AI generation fails"""
@@ -699,7 +758,7 @@ Respond as Maya would, naturally and professionally."""
         
         if not part1_questions:
             # Fallback question
-            question_text = "Tell me about yourself and your background."
+            question_text = PART1_FALLBACK_QUESTION
         else:
             question_text = part1_questions[0].get("content", {}).get("text", "Tell me about yourself.")
         
@@ -774,7 +833,7 @@ Respond as Maya would, naturally and professionally."""
         
         return {
             "success": True,
-            "maya_message": "Your preparation time is up. Please begin speaking about your topic. Remember, you should speak for 1-2 minutes.",
+            "maya_message": PART2_PREPARATION_OVER,
             "stage": ConversationStage.PART2_PREPARATION.value,
             "expected_response": "long_turn_speech",
             "instructions": "Speak for 1-2 minutes about your topic. Cover all the points on the card.",
@@ -786,13 +845,7 @@ Respond as Maya would, naturally and professionally."""
         self.conversation_state["stage"] = ConversationStage.PART2_SPEAKING
         
         # Generate follow-up questions
-        follow_up_questions = [
-            "Thank you. Can you tell me a bit more about why this is important to you?",
-            "That's interesting. How do you think this has influenced you?",
-            "Thank you for that detailed description."
-        ]
-        
-        follow_up = random.choice(follow_up_questions)
+        follow_up = random.choice(PART2_FOLLOW_UPS)
         
         return {
             "success": True,
@@ -837,7 +890,7 @@ Respond as Maya would, naturally and professionally."""
         if part3_questions:
             question_text = part3_questions[0].get("content", {}).get("text", "What are your thoughts on this topic in general?")
         else:
-            question_text = "What do you think about the role this plays in modern society?"
+            question_text = PART3_FALLBACK_QUESTION
         
         self.conversation_state["part3_questions_asked"] = 1
         
@@ -988,8 +1041,24 @@ Respond as Maya would, naturally and professionally."""
             },
             "user_responses": self.conversation_state["user_responses"],
             "evaluation_notes": self.conversation_state["evaluation_notes"],
+            "partial_bands": self.get_partial_bands(),
             "completion_status": self.conversation_state["stage"] == ConversationStage.CLOSING
         }
+    
+    def get_running_score(self) -> RunningBandScore:
+        """Running band aggregates for the current conversation"""
+        running_score = self.conversation_state.get("running_score")
+        if running_score is None:
+            running_score = RunningBandScore()
+            self.conversation_state["running_score"] = running_score
+        return running_score
+    
+    def get_partial_bands(self) -> Optional[Dict[str, Any]]:
+        """Bands for the responses so far, or None before the first response"""
+        running_score = self.get_running_score()
+        if not running_score.response_count:
+            return None
+        return running_score.bands()
 
 # Global instance
 _maya_engine = None
@@ -1006,5 +1075,6 @@ __all__ = [
     'MayaConversationEngine',
     'ConversationStage',
     'ResponseType', 
-    'get_maya_engine'
+    'get_maya_engine',
+    'scripted_maya_lines'
 ]
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Nova Sonic Stream Pool
+Per-container pool for Nova Sonic streams: one background event loop,
+Bedrock runtime clients created once and reused, spare streams opened
+ahead of demand, a cap on concurrent streams, and stream setup timed
+apart from inference
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple
+
+from nova_sonic_streaming import (
+    StreamCapacityError, create_bedrock_runtime_client, open_model_stream, streaming_available
+)
+
+logger = logging.getLogger(__name__)
+
+# Streams one container leases at once; spares are only opened into free slots
+MAX_STREAMS = int(os.environ.get('NOVA_SONIC_MAX_STREAMS', '8'))
+
+# Opened streams kept ready for the next session, and how long one stays usable
+SPARE_STREAMS = int(os.environ.get('NOVA_SONIC_SPARE_STREAMS', '1'))
+SPARE_MAX_AGE_SECONDS = float(os.environ.get('NOVA_SONIC_SPARE_MAX_AGE', '30'))
+
+# How long a new session waits for a free stream before giving up
+ACQUIRE_TIMEOUT_SECONDS = float(os.environ.get('NOVA_SONIC_ACQUIRE_TIMEOUT', '5'))
+
+# Time a timed-out coroutine gets to clean up after being cancelled on the loop
+CANCEL_GRACE_SECONDS = 2
+
+# Recent timings kept for the metrics summary
+TIMING_SAMPLES = 200
+
+
+class StreamLease:
+    """An opened model stream held by one session until released"""
+
+    def __init__(self, pool: 'NovaSonicStreamPool', stream, warm: bool, acquire_ms: float):
+        self.pool = pool
+        self.stream = stream
+        self.warm = warm
+        self.acquire_ms = acquire_ms
+        self._released = False
+
+    async def release(self, unused: bool = False) -> None:
+        """Give the slot back; a stream no events were sent on can be kept as a spare"""
+        if not self._released:
+            self._released = True
+            await self.pool.release(self, unused)
+
+
+class NovaSonicStreamPool:
+    """
+    Warm Nova Sonic streams for this container
+
+    Every stream lives on the pool's event loop, so the Bedrock client and
+    its HTTP/2 connection are shared by all of them. A Nova Sonic session
+    ends with its stream, so leased streams are never handed to another
+    session; what carries over is the client and the spares opened ahead.
+    """
+
+    def __init__(self, max_streams: int = MAX_STREAMS, spare_streams: int = SPARE_STREAMS,
+                 spare_max_age: float = SPARE_MAX_AGE_SECONDS, region: Optional[str] = None):
+        self.max_streams = max(1, max_streams)
+        self.spare_streams = min(spare_streams, self.max_streams)
+        self.spare_max_age = spare_max_age
+        self.region = region or os.environ.get('BEDROCK_REGION', 'us-east-1')
+        self.active = 0
+        self._spares: Deque[Tuple[Any, float]] = deque()
+        self._clients: Dict[str, Any] = {}
+        self._slots = asyncio.Semaphore(self.max_streams)
+        self._replenishing = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._timings: Dict[str, Deque[float]] = {'setup': deque(maxlen=TIMING_SAMPLES),
+                                                  'inference': deque(maxlen=TIMING_SAMPLES)}
+        self.stats = {'clients_created': 0, 'streams_opened': 0, 'warm_hits': 0, 'cold_opens': 0,
+                      'expired_spares': 0, 'rejected': 0, 'peak_active': 0}
+
+    def submit(self, coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the pool's loop, starting it on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='nova-sonic-streams', daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """
+        Run a coroutine on the pool's loop and wait for its result
+
+        With a timeout the coroutine is cancelled on the loop when it runs
+        over, so it can release what it holds before the caller sees the
+        TimeoutError.
+        """
+        if timeout is None:
+            return self.submit(coroutine).result()
+        future = self.submit(asyncio.wait_for(coroutine, timeout))
+        try:
+            return future.result(timeout + CANCEL_GRACE_SECONDS)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def client(self, region: str):
+        """Bedrock runtime client for a region, created once per container"""
+        if region not in self._clients:
+            self._clients[region] = create_bedrock_runtime_client(region)
+            self.stats['clients_created'] += 1
+        return self._clients[region]
+
+    async def _open(self):
+        stream = open_model_stream(client_factory=self.client)
+        await stream.open()
+        self.stats['streams_opened'] += 1
+        return stream
+
+    async def _take_spare(self):
+        while self._spares:
+            stream, opened_at = self._spares.popleft()
+            if time.time() - opened_at <= self.spare_max_age:
+                return stream
+            self.stats['expired_spares'] += 1
+            await self._close_quietly(stream)
+        return None
+
+    async def acquire(self, timeout: float = ACQUIRE_TIMEOUT_SECONDS) -> StreamLease:
+        """Lease an opened stream, waiting up to ``timeout`` for a free slot"""
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.stats['rejected'] += 1
+            raise StreamCapacityError(f"All {self.max_streams} Nova Sonic streams are in use; try again shortly")
+
+        try:
+            stream = await self._take_spare()
+            warm = stream is not None
+            if not warm:
+                stream = await self._open()
+        except BaseException:
+            # Including cancellation, or the slot is lost for good
+            self._slots.release()
+            raise
+
+        self.active += 1
+        self.stats['peak_active'] = max(self.stats['peak_active'], self.active)
+        self.stats['warm_hits' if warm else 'cold_opens'] += 1
+        self._schedule_replenish()
+        return StreamLease(self, stream, warm, (time.perf_counter() - started) * 1000)
+
+    async def release(self, lease: StreamLease, unused: bool = False) -> None:
+        self.active -= 1
+        self._slots.release()
+        if unused and len(self._spares) < self.spare_streams:
+            self._spares.append((lease.stream, time.time()))
+        elif unused:
+            await self._close_quietly(lease.stream)
+        self._schedule_replenish()
+
+    def _schedule_replenish(self) -> None:
+        if not self._replenishing and len(self._spares) < self.spare_streams:
+            asyncio.ensure_future(self._replenish())
+
+    async def _replenish(self) -> None:
+        self._replenishing = True
+        try:
+            while (len(self._spares) < self.spare_streams
+                   and self.active + len(self._spares) < self.max_streams):
+                self._spares.append((await self._open(), time.time()))
+        except Exception as e:
+            logger.warning(f"Opening a spare Nova Sonic stream failed: {e}")
+        finally:
+            self._replenishing = False
+
+    @staticmethod
+    async def _close_quietly(stream) -> None:
+        try:
+            await stream.close()
+        except Exception as e:
+            logger.debug(f"Closing a Nova Sonic stream failed: {e}")
+
+    def prewarm(self) -> None:
+        """Create the client and open spares in the background (container start)"""
+        if self.spare_streams <= 0 or not streaming_available():
+            return
+
+        async def warm():
+            self._schedule_replenish()
+
+        self.submit(warm())
+
+    def check(self, timeout: float = ACQUIRE_TIMEOUT_SECONDS + 10) -> Dict[str, Any]:
+        """Connectivity check that leaves the stream it opened as a spare"""
+        async def lease_and_return():
+            lease = await self.acquire()
+            await lease.release(unused=True)
+            return {'success': True, 'warm': lease.warm, 'setup_ms': round(lease.acquire_ms, 1)}
+
+        try:
+            return self.run(lease_and_return(), timeout)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def record(self, kind: str, milliseconds: float) -> None:
+        """Record a 'setup' or 'inference' timing"""
+        self._timings[kind].append(milliseconds)
+
+    def metrics(self) -> Dict[str, Any]:
+        timings = {}
+        for kind, samples in self._timings.items():
+            ordered = sorted(samples)
+            timings[f"{kind}_ms"] = {
+                'count': len(ordered),
+                'mean': round(sum(ordered) / len(ordered), 1) if ordered else None,
+                'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1) if ordered else None
+            }
+        return dict(self.stats, active=self.active, spares=len(self._spares), max_streams=self.max_streams,
+                    **timings)
+
+
+# Global instance
+_stream_pool = None
+
+def get_stream_pool() -> NovaSonicStreamPool:
+    """Get global Nova Sonic stream pool instance"""
+    global _stream_pool
+    if _stream_pool is None:
+        _stream_pool = NovaSonicStreamPool()
+    return _stream_pool
+
+
+# Export
+__all__ = [
+    'NovaSonicStreamPool',
+    'StreamCapacityError',
+    'StreamLease',
+    'get_stream_pool'
+]
@@ -9,10 +9,13 @@ import base64
 import asyncio
 import logging
 import os
-from typing import Dict, Any, Optional, AsyncGenerator, Callable
+from typing import Dict, Any, List, Optional, AsyncGenerator, Callable
 from datetime import datetime
 import uuid
 
+from bedrock_executor import get_bedrock_executor
+from audio_normalize import AudioNormalizer, NOVA_SONIC_INPUT
+
 logger = logging.getLogger(__name__)
 
 class NovaSonicService:
@@ -92,17 +95,24 @@ class NovaSonicService:
             }
         }
     
-    def create_audio_input_event(self, audio_data: bytes) -> Dict[str, Any]:
-        """Create audio input event with base64 encoded audio"""
+    def create_audio_input_event(self, audio_data: bytes,
+                                 normalizer: Optional[AudioNormalizer] = None) -> Dict[str, Any]:
+        """Create audio input event with base64 encoded audio
+
+        Pass the stream's AudioNormalizer when the microphone is not already
+        16 kHz mono 16-bit; it carries filter state from chunk to chunk.
+        """
+        if normalizer is not None:
+            audio_data = normalizer.process(audio_data)
         audio_base64 = base64.b64encode(audio_data).decode('utf-8')
         return {
             "event": {
                 "audioInput": {
                     "audio": {
                         "mediaType": "audio/lpcm",
-                        "sampleRateHertz": 16000,
-                        "sampleSizeBits": 16,
-                        "channelCount": 1,
+                        "sampleRateHertz": NOVA_SONIC_INPUT.sample_rate,
+                        "sampleSizeBits": NOVA_SONIC_INPUT.bits_per_sample,
+                        "channelCount": NOVA_SONIC_INPUT.channels,
                         "encoding": "base64",
                         "audioType": "SPEECH",
                         "data": audio_base64
@@ -111,6 +121,68 @@ class NovaSonicService:
             }
         }
     
+    def create_text_content_events(self, prompt_name: str, content_name: str, text: str,
+                                   role: str = "SYSTEM") -> List[Dict[str, Any]]:
+        """Create contentStart, textInput and contentEnd events for one text block"""
+        return [
+            {"event": {"contentStart": {
+                "promptName": prompt_name,
+                "contentName": content_name,
+                "type": "TEXT",
+                "interactive": True,
+                "role": role,
+                "textInputConfiguration": {"mediaType": "text/plain"}
+            }}},
+            {"event": {"textInput": {"promptName": prompt_name, "contentName": content_name, "content": text}}},
+            self.create_content_end_event(prompt_name, content_name)
+        ]
+    
+    def create_audio_content_start_event(self, prompt_name: str, content_name: str) -> Dict[str, Any]:
+        """Create contentStart event opening the user's audio input"""
+        return {
+            "event": {
+                "contentStart": {
+                    "promptName": prompt_name,
+                    "contentName": content_name,
+                    "type": "AUDIO",
+                    "interactive": True,
+                    "role": "USER",
+                    "audioInputConfiguration": {
+                        "mediaType": "audio/lpcm",
+                        "sampleRateHertz": NOVA_SONIC_INPUT.sample_rate,
+                        "sampleSizeBits": NOVA_SONIC_INPUT.bits_per_sample,
+                        "channelCount": NOVA_SONIC_INPUT.channels,
+                        "audioType": "SPEECH",
+                        "encoding": "base64"
+                    }
+                }
+            }
+        }
+    
+    def create_audio_chunk_event(self, prompt_name: str, content_name: str, audio_data: bytes) -> Dict[str, Any]:
+        """Create audioInput event for one chunk of 16 kHz mono PCM within an open audio content"""
+        return {
+            "event": {
+                "audioInput": {
+                    "promptName": prompt_name,
+                    "contentName": content_name,
+                    "content": base64.b64encode(audio_data).decode('utf-8')
+                }
+            }
+        }
+    
+    def create_content_end_event(self, prompt_name: str, content_name: str) -> Dict[str, Any]:
+        """Create contentEnd event"""
+        return {"event": {"contentEnd": {"promptName": prompt_name, "contentName": content_name}}}
+    
+    def create_prompt_end_event(self, prompt_name: str) -> Dict[str, Any]:
+        """Create promptEnd event"""
+        return {"event": {"promptEnd": {"promptName": prompt_name}}}
+    
+    def create_session_end_event(self) -> Dict[str, Any]:
+        """Create sessionEnd event"""
+        return {"event": {"sessionEnd": {}}}
+    
     async def start_maya_conversation(self, 
                                     system_prompt: str,
                                     voice_id: str = "matthew",  # Valid Nova Sonic voice
@@ -300,15 +372,10 @@ Keep the conversation natural and focused on everyday topics."""
                 if not self.client:
                     raise Exception("Nova Sonic client not initialized")
                     
-                # Real Bedrock call to Nova Sonic
-                response = self.client.invoke_model(
-                    modelId=self.model_id,
-                    body=json.dumps(request_body),
-                    accept="application/json",
-                    contentType="application/json"
+                # Real Bedrock call to Nova Sonic, paced by the shared executor
+                response_body = get_bedrock_executor().invoke_json(
+                    self.model_id, request_body, client=self.client
                 )
-                
-                response_body = json.loads(response['body'].read())
                 audio_data = response_body.get('audioData', '')
                 
                 # Return real audio data from Nova Sonic
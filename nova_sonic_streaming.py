@@ -0,0 +1,749 @@
+"""
+Nova Sonic Streaming
+Bidirectional speech-to-speech sessions behind the WebSocket API: audio
+frames go to Nova Sonic as audioInput events as they arrive, and Maya's
+transcripts and audio are relayed back to the connection in model order,
+with per-connection state kept in the sessions table. Clients that ask for
+the chunk protocol get sequenced, timestamped audio in both directions
+
+Streaming needs the aws_sdk_bedrock_runtime package (Python 3.12+), which
+is not in requirements.txt, and one long-lived process per connection:
+websocket_dev_server.py holds each stream for the life of its socket.
+Called directly without a client or the local stand-in, $connect is
+refused with a 501; the Lambda websocket_handler keeps its stub instead.
+"""
+
+import os
+import json
+import time
+import uuid
+import base64
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable, List, Union
+
+from audio_chunks import (
+    AudioChunk, ChunkSequencer, ReassemblyBuffer, chunk_from_message, jitter_buffer_spec, pack_chunk, unpack_chunk
+)
+from audio_normalize import AudioNormalizer, PcmFormat, NOVA_SONIC_INPUT
+from nova_sonic_service import get_nova_sonic_service
+
+logger = logging.getLogger(__name__)
+
+# The experimental Smithy-based Bedrock runtime SDK is the only Python client
+# for InvokeModelWithBidirectionalStream; boto3 does not support it
+try:
+    from aws_sdk_bedrock_runtime.client import (
+        BedrockRuntimeClient, InvokeModelWithBidirectionalStreamOperationInput
+    )
+    from aws_sdk_bedrock_runtime.models import (
+        InvokeModelWithBidirectionalStreamInputChunk, BidirectionalInputPayloadPart
+    )
+    from aws_sdk_bedrock_runtime.config import Config, HTTPAuthSchemeResolver, SigV4AuthScheme
+    from smithy_aws_core.credentials_resolvers.environment import EnvironmentCredentialsResolver
+    BIDIRECTIONAL_STREAMING_AVAILABLE = True
+except ImportError:
+    BIDIRECTIONAL_STREAMING_AVAILABLE = False
+
+NOVA_SONIC_MODEL_ID = 'amazon.nova-sonic-v1:0'
+NOVA_SONIC_OUTPUT_RATE = 24000
+
+# API Gateway ends an integration after 29 seconds, whatever the function timeout
+INTEGRATION_TIMEOUT_SECONDS = 29
+
+# Invocation time kept back for reopening the audio turn and saving state
+STATE_SAVE_MARGIN_SECONDS = 4
+
+# Longest an end-of-turn message waits for Maya's reply to finish
+TURN_TIMEOUT_SECONDS = float(os.environ.get('NOVA_SONIC_TURN_TIMEOUT', '20'))
+
+# Connection rows expire from the sessions table after this long
+CONNECTION_TTL_SECONDS = 2 * 60 * 60
+
+STREAM_ROUTE = 'nova-sonic-stream'
+
+# Longest hole in client audio filled with silence when chunks are lost
+MAX_CONCEALED_MS = 1000
+
+Sender = Callable[[Union[str, bytes]], None]
+
+
+UNAVAILABLE_MESSAGE = ("Nova Sonic streaming is not available in this deployment: it needs the "
+                       "aws_sdk_bedrock_runtime package (Python 3.12+)")
+
+
+class StreamCapacityError(RuntimeError):
+    """The container already runs its maximum number of streams"""
+
+
+class StreamingUnavailableError(RuntimeError):
+    """No bidirectional-streaming client in this environment"""
+
+
+def use_local_model() -> bool:
+    return (os.environ.get('NOVA_SONIC_LOCAL_STREAM') == 'true'
+            or os.environ.get('REPLIT_ENVIRONMENT') == 'true')
+
+
+def streaming_available() -> bool:
+    """Whether this environment can open Nova Sonic streams (real or local stand-in)"""
+    return BIDIRECTIONAL_STREAMING_AVAILABLE or use_local_model()
+
+
+def turn_timeout(context: Any = None) -> float:
+    """
+    How long one invocation may wait on Nova Sonic
+
+    Bounded by the integration limit and, on Lambda, by the time the
+    invocation has left, less a margin so the turn's state is still saved.
+    """
+    budget = float(INTEGRATION_TIMEOUT_SECONDS)
+    remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if callable(remaining):
+        budget = min(budget, remaining() / 1000)
+    return max(1.0, min(TURN_TIMEOUT_SECONDS, budget - STATE_SAVE_MARGIN_SECONDS))
+
+
+def create_bedrock_runtime_client(region: str):
+    """Bidirectional-streaming Bedrock runtime client; its HTTP/2 connection is reused across streams"""
+    if not BIDIRECTIONAL_STREAMING_AVAILABLE:
+        raise StreamingUnavailableError(UNAVAILABLE_MESSAGE)
+    config = Config(
+        endpoint_uri=f"https://bedrock-runtime.{region}.amazonaws.com",
+        region=region,
+        aws_credentials_identity_resolver=EnvironmentCredentialsResolver(),
+        http_auth_scheme_resolver=HTTPAuthSchemeResolver(),
+        http_auth_schemes={"aws.auth#sigv4": SigV4AuthScheme()}
+    )
+    return BedrockRuntimeClient(config=config)
+
+
+class BedrockModelStream:
+    """One InvokeModelWithBidirectionalStream call to Nova Sonic"""
+
+    def __init__(self, region: Optional[str] = None, model_id: str = NOVA_SONIC_MODEL_ID,
+                 client_factory: Callable[[str], Any] = create_bedrock_runtime_client):
+        self.region = region or os.environ.get('BEDROCK_REGION', 'us-east-1')
+        self.model_id = model_id
+        self.client_factory = client_factory
+        self._stream = None
+        self._output = None
+
+    async def open(self) -> None:
+        client = self.client_factory(self.region)
+        self._stream = await client.invoke_model_with_bidirectional_stream(
+            InvokeModelWithBidirectionalStreamOperationInput(model_id=self.model_id)
+        )
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        chunk = InvokeModelWithBidirectionalStreamInputChunk(
+            value=BidirectionalInputPayloadPart(bytes_=json.dumps(event).encode('utf-8'))
+        )
+        await self._stream.input_stream.send(chunk)
+
+    async def receive(self) -> Optional[Dict[str, Any]]:
+        """Next output event, or None once the stream has ended"""
+        if self._output is None:
+            self._output = (await self._stream.await_output())[1]
+        result = await self._output.receive()
+        if result is None or not result.value or not result.value.bytes_:
+            return None
+        return json.loads(result.value.bytes_.decode('utf-8'))
+
+    async def close(self) -> None:
+        if self._stream is not None:
+            await self._stream.input_stream.close()
+
+
+class LocalModelStream:
+    """
+    Development stand-in for Nova Sonic
+
+    Answers each finished audio turn with a user transcript, a fixed
+    assistant line and a short burst of silent 24 kHz audio, using the
+    real output event shapes.
+    """
+
+    REPLY_TEXT = "Thank you. Please continue."
+    REPLY_SECONDS = 0.6
+    REPLY_CHUNKS = 3
+
+    def __init__(self):
+        self._output: 'asyncio.Queue[Optional[Dict[str, Any]]]' = asyncio.Queue()
+        self._audio_bytes: Dict[str, int] = {}
+        self._audio_contents = set()
+
+    async def open(self) -> None:
+        pass
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        body = event.get('event', {})
+        if 'contentStart' in body and body['contentStart'].get('type') == 'AUDIO':
+            self._audio_contents.add(body['contentStart']['contentName'])
+        elif 'audioInput' in body:
+            name = body['audioInput']['contentName']
+            self._audio_bytes[name] = self._audio_bytes.get(name, 0) + len(base64.b64decode(body['audioInput']['content']))
+        elif 'contentEnd' in body and body['contentEnd']['contentName'] in self._audio_contents:
+            self._reply(self._audio_bytes.pop(body['contentEnd']['contentName'], 0))
+        elif 'sessionEnd' in body:
+            await self._output.put(None)
+
+    def _reply(self, audio_bytes: int) -> None:
+        seconds = audio_bytes / NOVA_SONIC_INPUT.frame_bytes / NOVA_SONIC_INPUT.sample_rate
+        events = []
+        for role, text in (('USER', f"[{seconds:.1f} seconds of speech]"), ('ASSISTANT', self.REPLY_TEXT)):
+            content_id = str(uuid.uuid4())
+            events += [
+                {'event': {'contentStart': {'contentId': content_id, 'type': 'TEXT', 'role': role,
+                                            'additionalModelFields': json.dumps({'generationStage': 'FINAL'})}}},
+                {'event': {'textOutput': {'contentId': content_id, 'role': role, 'content': text}}},
+                {'event': {'contentEnd': {'contentId': content_id, 'stopReason': 'PARTIAL_TURN'}}}
+            ]
+        content_id = str(uuid.uuid4())
+        chunk = bytes(int(NOVA_SONIC_OUTPUT_RATE * self.REPLY_SECONDS / self.REPLY_CHUNKS) * 2)
+        events.append({'event': {'contentStart': {'contentId': content_id, 'type': 'AUDIO', 'role': 'ASSISTANT'}}})
+        events += [{'event': {'audioOutput': {'contentId': content_id,
+                                              'content': base64.b64encode(chunk).decode('ascii')}}}] * self.REPLY_CHUNKS
+        events.append({'event': {'contentEnd': {'contentId': content_id, 'stopReason': 'END_TURN'}}})
+        for event in events:
+            self._output.put_nowait(event)
+
+    async def receive(self) -> Optional[Dict[str, Any]]:
+        return await self._output.get()
+
+    async def close(self) -> None:
+        await self._output.put(None)
+
+
+def open_model_stream(client_factory: Callable[[str], Any] = create_bedrock_runtime_client):
+    """Nova Sonic stream for this environment (unopened)"""
+    if use_local_model():
+        return LocalModelStream()
+    return BedrockModelStream(client_factory=client_factory)
+
+
+class NovaSonicStreamSession:
+    """
+    One connection's conversation with Nova Sonic
+
+    Client audio is normalised to 16 kHz mono and forwarded as it arrives;
+    a single relay task turns model output into client messages, so text
+    and audio reach the client in the order the model produced them.
+    """
+
+    def __init__(self, connection_id: str, send: Sender, system_prompt: str,
+                 voice_id: str = "matthew", source: PcmFormat = NOVA_SONIC_INPUT,
+                 binary_audio: bool = True, chunk_protocol: int = 0, next_input_sequence: int = 0,
+                 next_output_sequence: int = 0, output_turn: int = 0, model_stream=None, lease=None):
+        self.connection_id = connection_id
+        self.send = send
+        self.system_prompt = system_prompt
+        self.voice_id = voice_id
+        self.binary_audio = binary_audio
+        self.session_id = str(uuid.uuid4())
+        self.prompt_name = f"maya-ielts-session-{self.session_id}"
+        self.audio_content_name: Optional[str] = None
+        self.turns = 0
+        self.audio_bytes_in = 0
+        self.audio_chunks_out = 0
+        self.concealed_ms = 0
+
+        # Stream setup is timed apart from each turn's inference
+        self.setup_ms: Optional[float] = None
+        self.last_inference_ms: Optional[float] = None
+        self.last_first_audio_ms: Optional[float] = None
+        self._turn_ended_at: Optional[float] = None
+
+        # Chunk protocol: reorder client audio and sequence Maya's
+        self.chunk_protocol = chunk_protocol
+        self.source = source
+        self._reassembly = ReassemblyBuffer(next_sequence=next_input_sequence) if chunk_protocol else None
+        self._sequencer = ChunkSequencer(NOVA_SONIC_OUTPUT_RATE * 2 / 1000, next_output_sequence, output_turn) \
+            if chunk_protocol else None
+        self._next_input_ms: Optional[float] = None
+
+        self._service = get_nova_sonic_service()
+        self._lease = lease
+        self._model = lease.stream if lease is not None else (model_stream or open_model_stream())
+        self._normalizer = None if source == NOVA_SONIC_INPUT else AudioNormalizer(source)
+        self._contents: Dict[str, Dict[str, Any]] = {}
+        self._relay_task: Optional[asyncio.Task] = None
+        self._turn_done = asyncio.Event()
+
+    async def start(self) -> None:
+        """Open the model stream, send the examiner prompt and open the first audio turn"""
+        opened_at = time.perf_counter()
+        if self._lease is None:
+            await self._model.open()
+        config = self._service.get_session_config(voice_id=self.voice_id)
+        await self._model.send(self._service.create_session_start_event(config))
+        await self._model.send(self._service.create_prompt_start_event(self.prompt_name, config))
+        for event in self._service.create_text_content_events(self.prompt_name, str(uuid.uuid4()), self.system_prompt):
+            await self._model.send(event)
+        self._relay_task = asyncio.ensure_future(self._relay())
+        await self._open_audio_turn()
+        started = {'type': 'session_started', 'session_id': self.session_id,
+                   'input_sample_rate': NOVA_SONIC_INPUT.sample_rate, 'output_sample_rate': NOVA_SONIC_OUTPUT_RATE}
+        self.setup_ms = (time.perf_counter() - opened_at) * 1000 + (self._lease.acquire_ms if self._lease else 0)
+        started.update(setup_ms=round(self.setup_ms, 1), warm_stream=bool(self._lease and self._lease.warm))
+        if self._lease is not None:
+            self._lease.pool.record('setup', self.setup_ms)
+        if self.chunk_protocol:
+            started['jitter_buffer'] = jitter_buffer_spec()
+        self._send_json(started)
+
+    async def _open_audio_turn(self) -> None:
+        self.audio_content_name = str(uuid.uuid4())
+        self._turn_done.clear()
+        await self._model.send(self._service.create_audio_content_start_event(self.prompt_name, self.audio_content_name))
+
+    async def send_audio(self, chunk: bytes) -> None:
+        """Forward one client audio frame"""
+        self.audio_bytes_in += len(chunk)
+        pcm = self._normalizer.process(chunk) if self._normalizer is not None else chunk
+        if pcm:
+            await self._model.send(self._service.create_audio_chunk_event(self.prompt_name, self.audio_content_name, pcm))
+
+    async def receive_audio(self, data: bytes, message: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Client audio from a binary frame, or a JSON message's decoded audio
+
+        Under the chunk protocol the frame carries a chunk header (the
+        message its seq and ts fields) and goes through reassembly first.
+        """
+        if not self.chunk_protocol:
+            await self.send_audio(data)
+            return
+        chunk = chunk_from_message(message, data) if message is not None else unpack_chunk(data)
+        for ready in self._reassembly.push(chunk):
+            await self._forward_chunk(ready)
+
+    async def _forward_chunk(self, chunk: AudioChunk) -> None:
+        # Lost chunks leave a hole in the timestamps; fill it with silence
+        # so Nova Sonic hears the pause rather than spliced speech
+        bytes_per_ms = self.source.sample_rate * self.source.frame_bytes / 1000
+        if self._next_input_ms is not None and chunk.timestamp_ms > self._next_input_ms + 1:
+            missing_ms = min(chunk.timestamp_ms - self._next_input_ms, MAX_CONCEALED_MS)
+            self.concealed_ms += int(missing_ms)
+            await self.send_audio(bytes(int(missing_ms * bytes_per_ms) // self.source.frame_bytes * self.source.frame_bytes))
+        self._next_input_ms = chunk.timestamp_ms + len(chunk.payload) / bytes_per_ms
+        await self.send_audio(chunk.payload)
+
+    async def end_turn(self, timeout: float = TURN_TIMEOUT_SECONDS) -> bool:
+        """Close the user's audio turn and wait for Maya's reply to finish relaying"""
+        if self._reassembly is not None:
+            for ready in self._reassembly.flush():
+                await self._forward_chunk(ready)
+            self._next_input_ms = None
+        if self._normalizer is not None:
+            tail = self._normalizer.flush()
+            if tail:
+                await self._model.send(self._service.create_audio_chunk_event(self.prompt_name, self.audio_content_name, tail))
+        await self._model.send(self._service.create_content_end_event(self.prompt_name, self.audio_content_name))
+        self._turn_ended_at = time.perf_counter()
+        self.last_first_audio_ms = None
+        self.turns += 1
+        try:
+            await asyncio.wait_for(self._turn_done.wait(), timeout)
+            finished = True
+        except asyncio.TimeoutError:
+            logger.warning(f"Nova Sonic turn timed out for connection {self.connection_id}")
+            finished = False
+        await self._open_audio_turn()
+        return finished
+
+    async def close(self) -> None:
+        """End the prompt and session and stop relaying"""
+        try:
+            await self._model.send(self._service.create_content_end_event(self.prompt_name, self.audio_content_name))
+            await self._model.send(self._service.create_prompt_end_event(self.prompt_name))
+            await self._model.send(self._service.create_session_end_event())
+            await self._model.close()
+        except Exception as e:
+            logger.warning(f"Nova Sonic stream close failed for connection {self.connection_id}: {e}")
+        finally:
+            if self._lease is not None:
+                await self._lease.release()
+        if self._relay_task is not None:
+            try:
+                await asyncio.wait_for(self._relay_task, 5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._relay_task.cancel()
+
+    async def _relay(self) -> None:
+        try:
+            while True:
+                event = await self._model.receive()
+                if event is None:
+                    break
+                self._handle_output(event.get('event', {}))
+        except Exception as e:
+            logger.error(f"Nova Sonic relay failed for connection {self.connection_id}: {e}")
+            self._send_json({'type': 'error', 'error': 'Nova Sonic stream failed'})
+        finally:
+            self._turn_done.set()
+
+    def _handle_output(self, body: Dict[str, Any]) -> None:
+        if 'contentStart' in body:
+            start = body['contentStart']
+            fields = start.get('additionalModelFields')
+            stage = json.loads(fields).get('generationStage') if isinstance(fields, str) else None
+            self._contents[start.get('contentId')] = {'type': start.get('type'), 'role': start.get('role'),
+                                                      'stage': stage}
+        elif 'textOutput' in body:
+            output = body['textOutput']
+            content = self._contents.get(output.get('contentId'), {})
+            self._send_json({'type': 'transcript', 'role': output.get('role', content.get('role')),
+                             'text': output.get('content', ''), 'final': content.get('stage') != 'SPECULATIVE'})
+        elif 'audioOutput' in body:
+            audio = base64.b64decode(body['audioOutput'].get('content', ''))
+            self.audio_chunks_out += 1
+            if self._turn_ended_at is not None and self.last_first_audio_ms is None:
+                self.last_first_audio_ms = (time.perf_counter() - self._turn_ended_at) * 1000
+            chunk = self._sequencer.chunk(audio) if self._sequencer is not None else None
+            if self.binary_audio:
+                self.send(pack_chunk(chunk) if chunk is not None else audio)
+            else:
+                message = {'type': 'audio', 'format': 'audio/lpcm', 'sample_rate': NOVA_SONIC_OUTPUT_RATE,
+                           'audio': base64.b64encode(audio).decode('ascii')}
+                if chunk is not None:
+                    message.update(seq=chunk.sequence, ts=chunk.timestamp_ms, turn=chunk.turn)
+                self._send_json(message)
+        elif 'contentEnd' in body:
+            end = body['contentEnd']
+            content = self._contents.pop(end.get('contentId'), {})
+            if content.get('type') == 'AUDIO' and end.get('stopReason') in ('END_TURN', 'INTERRUPTED'):
+                complete = {'type': 'turn_complete', 'stop_reason': end['stopReason']}
+                if self._turn_ended_at is not None:
+                    self.last_inference_ms = (time.perf_counter() - self._turn_ended_at) * 1000
+                    self._turn_ended_at = None
+                    complete['timing'] = {'inference_ms': round(self.last_inference_ms, 1),
+                                          'first_audio_ms': round(self.last_first_audio_ms, 1)
+                                          if self.last_first_audio_ms is not None else None}
+                    if self._lease is not None:
+                        self._lease.pool.record('inference', self.last_inference_ms)
+                if self.chunk_protocol:
+                    self._sequencer.end_turn()
+                    complete['input_metrics'] = dict(self._reassembly.metrics(), concealed_ms=self.concealed_ms)
+                self._send_json(complete)
+                self._turn_done.set()
+        elif 'completionEnd' in body:
+            self._turn_done.set()
+
+    def _send_json(self, message: Dict[str, Any]) -> None:
+        self.send(json.dumps(message))
+
+    def state(self) -> Dict[str, Any]:
+        """What the sessions table keeps about this stream"""
+        state = {'stream_session_id': self.session_id, 'prompt_name': self.prompt_name, 'voice_id': self.voice_id,
+                 'binary_audio': self.binary_audio, 'turns': self.turns, 'audio_bytes_in': self.audio_bytes_in,
+                 'chunk_protocol': self.chunk_protocol}
+        # Whole milliseconds: the sessions table takes no floats
+        if self.setup_ms is not None:
+            state['setup_ms'] = int(self.setup_ms)
+        if self.last_inference_ms is not None:
+            state['last_inference_ms'] = int(self.last_inference_ms)
+        if self.chunk_protocol:
+            metrics = self._reassembly.metrics()
+            state.update(next_input_sequence=self._reassembly.next_sequence,
+                         next_output_sequence=self._sequencer.next_sequence, output_turn=self._sequencer.turn,
+                         chunks_lost=metrics['lost'], chunks_reordered=metrics['reordered'],
+                         chunks_duplicated=metrics['duplicates'], chunks_late=metrics['late'],
+                         concealed_ms=self.concealed_ms)
+        return state
+
+
+class ConnectionStateStore:
+    """Per-connection rows in the sessions table; in memory when no table is configured"""
+
+    KEY_PREFIX = 'ws-connection#'
+
+    def __init__(self, table_name: Optional[str] = None):
+        self.table_name = table_name or os.environ.get('DYNAMODB_SESSIONS_TABLE')
+        self._table = None
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.table_name:
+            import boto3
+            self._table = boto3.resource(
+                'dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1')
+            ).Table(self.table_name)
+
+    def save(self, connection_id: str, **fields) -> Dict[str, Any]:
+        """Merge ``fields`` into the connection's row"""
+        item = dict(self.load(connection_id) or {}, **fields)
+        item.update({'session_id': self.KEY_PREFIX + connection_id, 'connection_id': connection_id,
+                     'updated_at': int(time.time()), 'expires_at': int(time.time()) + CONNECTION_TTL_SECONDS})
+        if self._table is not None:
+            self._table.put_item(Item=item)
+        else:
+            with self._lock:
+                self._items[connection_id] = item
+        return item
+
+    def load(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        if self._table is not None:
+            return self._table.get_item(Key={'session_id': self.KEY_PREFIX + connection_id}).get('Item')
+        with self._lock:
+            item = self._items.get(connection_id)
+        return dict(item) if item else None
+
+    def delete(self, connection_id: str) -> None:
+        if self._table is not None:
+            self._table.delete_item(Key={'session_id': self.KEY_PREFIX + connection_id})
+        else:
+            with self._lock:
+                self._items.pop(connection_id, None)
+
+
+class ConnectionPoster:
+    """Sends messages to WebSocket connections through the API Gateway management API"""
+
+    def __init__(self, endpoint_url: Optional[str] = None):
+        self.endpoint_url = endpoint_url or os.environ.get('WEBSOCKET_API_ENDPOINT')
+        self._client = None
+
+    def sender(self, connection_id: str) -> Sender:
+        def send(message: Union[str, bytes]) -> None:
+            if self._client is None:
+                import boto3
+                self._client = boto3.client('apigatewaymanagementapi', endpoint_url=self.endpoint_url)
+            data = message.encode('utf-8') if isinstance(message, str) else message
+            try:
+                self._client.post_to_connection(ConnectionId=connection_id, Data=data)
+            except Exception as e:
+                logger.error(f"WebSocket post to {connection_id} failed: {e}")
+        return send
+
+
+class NovaSonicStreamManager:
+    """
+    Live stream sessions of this process, keyed by connection id
+
+    Streams are leased from the container's stream pool and run on its
+    background event loop so synchronous Lambda invocations can feed them;
+    output keeps relaying between invocations wherever the process is not
+    frozen (local server, containers).
+    """
+
+    def __init__(self, state_store: Optional[ConnectionStateStore] = None, pool=None):
+        if pool is None:
+            from nova_sonic_pool import get_stream_pool
+            pool = get_stream_pool()
+        self.state_store = state_store or ConnectionStateStore()
+        self.pool = pool
+        self.sessions: Dict[str, NovaSonicStreamSession] = {}
+
+    def _run(self, coroutine, timeout: Optional[float] = None):
+        return self.pool.run(coroutine, timeout)
+
+    def connect(self, connection_id: str, user_email: Optional[str] = None,
+                assessment_type: str = 'academic_speaking') -> None:
+        self.state_store.save(connection_id, status='connected', user_email=user_email,
+                              assessment_type=assessment_type, connected_at=int(time.time()))
+
+    def start(self, connection_id: str, send: Sender, options: Dict[str, Any],
+              timeout: float = TURN_TIMEOUT_SECONDS) -> NovaSonicStreamSession:
+        """Open a stream for the connection, replacing any previous one"""
+        if not streaming_available():
+            raise StreamingUnavailableError(UNAVAILABLE_MESSAGE)
+        self.stop(connection_id, keep_state=True)
+        state = self.state_store.load(connection_id) or {}
+        assessment_type = options.get('assessment_type') or state.get('assessment_type') or 'academic_speaking'
+        source = PcmFormat(int(options.get('sample_rate') or NOVA_SONIC_INPUT.sample_rate),
+                           int(options.get('channels') or 1))
+
+        service = get_nova_sonic_service()
+
+        async def create():
+            # Leased and started in one coroutine, so a timeout cancels
+            # whichever step is running and the lease is always given back
+            session = NovaSonicStreamSession(
+                connection_id, send, service.get_maya_ielts_system_prompt(assessment_type),
+                voice_id=options.get('voice_id') or state.get('voice_id') or 'matthew',
+                source=source, binary_audio=bool(options.get('binary_audio', state.get('binary_audio', True))),
+                chunk_protocol=int(options.get('chunk_protocol') or 0),
+                # Sequence numbers carry on only when reopening from stored state
+                next_input_sequence=int(options.get('next_input_sequence') or 0),
+                next_output_sequence=int(options.get('next_output_sequence') or 0),
+                output_turn=int(options.get('output_turn') or 0),
+                lease=await self.pool.acquire()
+            )
+            try:
+                await session.start()
+            except BaseException:
+                await session.close()
+                raise
+            return session
+
+        session = self._run(create(), timeout=timeout)
+        self.sessions[connection_id] = session
+        self.state_store.save(connection_id, status='streaming', assessment_type=assessment_type,
+                              sample_rate=source.sample_rate, channels=source.channels, **session.state())
+        return session
+
+    def session_for(self, connection_id: str, send: Sender,
+                    timeout: float = TURN_TIMEOUT_SECONDS) -> NovaSonicStreamSession:
+        """
+        The connection's current stream, reopened from the stored state if
+        this process does not hold it
+
+        API Gateway can deliver a connection's frames to any container. A
+        reopened stream is a new Nova Sonic session without the earlier
+        conversation, so the client is sent a ``stream_reset`` message; a
+        stream this process holds that another container has since replaced
+        is closed so its lease is not kept.
+        """
+        state = self.state_store.load(connection_id)
+        if not state or state.get('status') != 'streaming':
+            raise LookupError('No active stream; send a start message first')
+        session = self.sessions.get(connection_id)
+        if session is not None and state.get('stream_session_id') == session.session_id:
+            return session
+        if session is not None:
+            self.sessions.pop(connection_id)
+            self._run(session.close(), timeout=timeout)
+
+        logger.info(f"Reopening Nova Sonic stream for connection {connection_id} from stored state")
+        session = self.start(connection_id, send, state, timeout)
+        send(json.dumps({'type': 'stream_reset', 'session_id': session.session_id,
+                         'previous_session_id': state.get('stream_session_id'),
+                         'reason': 'The stream was reopened; earlier turns of the conversation were lost'}))
+        return session
+
+    def send_audio(self, connection_id: str, send: Sender, data: bytes,
+                   message: Optional[Dict[str, Any]] = None, timeout: float = TURN_TIMEOUT_SECONDS) -> None:
+        session = self.session_for(connection_id, send, timeout)
+        self._run(session.receive_audio(data, message), timeout=timeout)
+
+    def end_turn(self, connection_id: str, send: Sender, timeout: float = TURN_TIMEOUT_SECONDS) -> bool:
+        """Wait up to ``timeout`` for Maya's reply, then save the stream state"""
+        session = self.session_for(connection_id, send, timeout)
+        finished = self._run(session.end_turn(timeout), timeout=timeout + 1)
+        self.state_store.save(connection_id, **session.state())
+        return finished
+
+    def stop(self, connection_id: str, keep_state: bool = True) -> None:
+        session = self.sessions.pop(connection_id, None)
+        if session is not None:
+            self._run(session.close(), timeout=TURN_TIMEOUT_SECONDS)
+        if keep_state:
+            if session is not None:
+                self.state_store.save(connection_id, status='connected', **session.state())
+        else:
+            self.state_store.delete(connection_id)
+
+
+def _message_audio(message: Dict[str, Any]) -> bytes:
+    try:
+        return base64.b64decode(message.get('audio') or '', validate=True)
+    except ValueError:
+        raise ValueError('audio must be base64')
+
+
+def handle_websocket_event(event: Dict[str, Any], context: Any = None,
+                           sender: Optional[Sender] = None) -> Dict[str, Any]:
+    """
+    API Gateway WebSocket event for the Nova Sonic stream
+
+    Text frames are JSON with ``type`` start, audio (base64 ``audio``),
+    end_turn or stop; binary frames (``$default`` route) are raw audio.
+    A start message with ``chunk_protocol: 1`` switches the connection to
+    sequenced audio: binary frames in both directions lead with a chunk
+    header and JSON audio messages carry ``seq`` and ``ts``.
+    """
+    request_context = event.get('requestContext', {})
+    route_key = request_context.get('routeKey')
+    connection_id = request_context.get('connectionId')
+    manager = get_stream_manager()
+
+    if route_key == '$connect':
+        if not streaming_available():
+            logger.error(UNAVAILABLE_MESSAGE)
+            return {'statusCode': 501, 'body': json.dumps({'error': UNAVAILABLE_MESSAGE})}
+        query = event.get('queryStringParameters') or {}
+        authorizer = request_context.get('authorizer') or {}
+        manager.connect(connection_id, authorizer.get('user_email'),
+                        query.get('assessment_type', 'academic_speaking'))
+        # Have a stream opening while the client gets ready to send start
+        manager.pool.prewarm()
+        return {'statusCode': 200}
+    if route_key == '$disconnect':
+        manager.stop(connection_id, keep_state=False)
+        return {'statusCode': 200}
+    if route_key not in (STREAM_ROUTE, '$default'):
+        return {'statusCode': 404}
+
+    if sender is None:
+        endpoint = None
+        if request_context.get('domainName') and request_context.get('stage'):
+            endpoint = f"https://{request_context['domainName']}/{request_context['stage']}"
+        sender = ConnectionPoster(endpoint).sender(connection_id)
+
+    timeout = turn_timeout(context)
+    try:
+        if event.get('isBase64Encoded'):
+            manager.send_audio(connection_id, sender, base64.b64decode(event.get('body') or ''), timeout=timeout)
+            return {'statusCode': 200}
+
+        message = json.loads(event.get('body') or '{}')
+        message_type = message.get('type')
+        if message_type == 'start':
+            manager.start(connection_id, sender, message, timeout)
+        elif message_type == 'audio':
+            manager.send_audio(connection_id, sender, _message_audio(message), message, timeout)
+        elif message_type == 'end_turn':
+            manager.end_turn(connection_id, sender, timeout)
+        elif message_type == 'stop':
+            manager.stop(connection_id)
+            sender(json.dumps({'type': 'session_stopped'}))
+        else:
+            raise ValueError(f"Unknown message type {message_type!r}")
+        return {'statusCode': 200}
+
+    except (ValueError, LookupError) as e:
+        sender(json.dumps({'type': 'error', 'error': str(e)}))
+        return {'statusCode': 400}
+    except StreamCapacityError as e:
+        sender(json.dumps({'type': 'error', 'error': str(e), 'retry': True}))
+        return {'statusCode': 503}
+    except StreamingUnavailableError as e:
+        sender(json.dumps({'type': 'error', 'error': str(e)}))
+        return {'statusCode': 501}
+    except Exception as e:
+        logger.error(f"Nova Sonic stream error for connection {connection_id}: {e}")
+        sender(json.dumps({'type': 'error', 'error': 'Nova Sonic stream failed'}))
+        return {'statusCode': 500}
+
+
+# Global instance
+_stream_manager = None
+
+def get_stream_manager() -> NovaSonicStreamManager:
+    """Get global Nova Sonic stream manager instance"""
+    global _stream_manager
+    if _stream_manager is None:
+        _stream_manager = NovaSonicStreamManager()
+    return _stream_manager
+
+
+# Export
+__all__ = [
+    'BIDIRECTIONAL_STREAMING_AVAILABLE',
+    'BedrockModelStream',
+    'ConnectionPoster',
+    'ConnectionStateStore',
+    'LocalModelStream',
+    'NovaSonicStreamManager',
+    'NovaSonicStreamSession',
+    'StreamCapacityError',
+    'StreamingUnavailableError',
+    'get_stream_manager',
+    'handle_websocket_event',
+    'create_bedrock_runtime_client',
+    'open_model_stream',
+    'streaming_available',
+    'turn_timeout',
+    'use_local_model'
+]
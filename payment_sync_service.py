@@ -156,6 +156,9 @@ class PaymentSyncService:
             
             logger.info(f"Successfully synced purchase for {user_email}: {product_type.value}")
             
+            # Pick the first attempt's questions before the user gets to the start screen
+            self._schedule_question_preselection(user_email, product_type)
+            
             return {
                 'success': True,
                 'user_email': user_email,
@@ -379,6 +382,29 @@ class PaymentSyncService:
                 'error': 'Access update failed'
             }
     
+    def _schedule_question_preselection(self, user_email: str,
+                                        product_type: PurchaseProductType) -> None:
+        """Queue background question pre-selection for the purchased assessments"""
+        try:
+            from question_bank_dal import get_question_bank_dal
+            
+            if product_type == PurchaseProductType.ASSESSMENT_PACKAGE:
+                assessment_types = [
+                    PurchaseProductType.ACADEMIC_SPEAKING.value,
+                    PurchaseProductType.ACADEMIC_WRITING.value,
+                    PurchaseProductType.GENERAL_SPEAKING.value,
+                    PurchaseProductType.GENERAL_WRITING.value
+                ]
+            else:
+                assessment_types = [product_type.value]
+            
+            question_dal = get_question_bank_dal()
+            for assessment_type in assessment_types:
+                question_dal.schedule_preselection(user_email, assessment_type)
+                
+        except Exception as e:
+            logger.warning(f"Failed to schedule question pre-selection for {user_email}: {e}")
+    
     def _get_attempts_for_product(self, product_type: PurchaseProductType) -> int:
         """Get number of attempts for product type"""
         if product_type == PurchaseProductType.ASSESSMENT_PACKAGE:
@@ -0,0 +1,306 @@
+"""
+Evaluation Prompt Assembly
+Builds Nova evaluation requests with the static rubric and IELTS context as a
+cached, cache-point-marked prefix and the submission after it, counting
+tokens up front so over-long submissions are truncated or chunked
+deterministically
+"""
+
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, NamedTuple, Tuple
+
+from evaluation_cache import rubric_version
+from assessment_criteria.context_loader import get_ielts_prompt_block
+
+logger = logging.getLogger(__name__)
+
+# Models that accept a cachePoint marker in the system prompt
+PROMPT_CACHING_MODELS = frozenset({
+    'amazon.nova-micro-v1:0',
+    'amazon.nova-lite-v1:0',
+    'amazon.nova-pro-v1:0'
+})
+
+# Bedrock only caches prefixes at least this long
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Deterministic, slightly conservative token estimate
+
+    Punctuation marks count as one token each and words as one token per
+    four characters, which tracks sub-word tokenisers closely enough for
+    budgeting without shipping a tokenizer.
+    """
+    if not text:
+        return 0
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_RE.findall(text))
+
+
+class PromptPrefix(NamedTuple):
+    """Static rubric and context text shared by every evaluation of a rubric"""
+    text: str
+    version: str
+    tokens: int
+
+
+class AssembledPrompt(NamedTuple):
+    """One Bedrock request body plus its token accounting"""
+    body: Dict[str, Any]
+    prefix: PromptPrefix
+    submission_text: str
+    submission_tokens: int
+    input_tokens: int
+    truncated: bool
+    chunk_index: int
+    chunk_count: int
+
+
+def parse_assessment_type(assessment_type: str) -> Tuple[str, str]:
+    """('writing' | 'speaking', 'academic' | 'general') from e.g. 'academic-writing'"""
+    normalized = (assessment_type or '').lower()
+    kind = 'speaking' if 'speaking' in normalized else 'writing'
+    test_type = 'general' if 'general' in normalized else 'academic'
+    return kind, test_type
+
+
+def _render_criteria(heading: str, criteria: Dict[str, Any]) -> List[str]:
+    lines = ['', heading]
+    for name, spec in criteria.items():
+        if not isinstance(spec, dict):
+            continue
+        weight = spec.get('weight')
+        title = name.replace('_', ' ').title()
+        lines.append(f"{title} ({weight:.0%}):" if isinstance(weight, (int, float)) else f"{title}:")
+
+        descriptors = spec.get('band_descriptors') or {
+            key[len('band_'):]: value for key, value in spec.items() if key.startswith('band_')
+        }
+        for band in sorted(descriptors, key=lambda band: -float(band)):
+            lines.append(f"- Band {band}: {descriptors[band]}")
+    return lines
+
+
+def render_rubric(rubric: Dict[str, Any]) -> str:
+    """Rubric instructions and band descriptors as prompt text
+
+    Handles both the fallback rubric shape (``nova_micro_prompt`` plus
+    ``criteria`` with ``band_descriptors``) and the DynamoDB shape
+    (``nova_micro_prompts``, ``band_N`` keys, per-task sections).
+    """
+    lines = []
+    if rubric.get('nova_micro_prompt'):
+        lines.append(rubric['nova_micro_prompt'].strip())
+
+    for prompts_key in ('nova_micro_prompts', 'nova_sonic_prompts'):
+        prompts = rubric.get(prompts_key)
+        if isinstance(prompts, dict):
+            if prompts.get('system_prompt'):
+                lines.append(prompts['system_prompt'].strip())
+            for key, value in prompts.items():
+                if key != 'system_prompt' and isinstance(value, str):
+                    lines.append(f"{key.replace('_', ' ').capitalize()}: {value}")
+            break
+
+    for section in ('criteria', 'task_1', 'task_2'):
+        criteria = rubric.get(section)
+        if isinstance(criteria, dict) and criteria:
+            heading = 'BAND DESCRIPTORS' if section == 'criteria' else f"BAND DESCRIPTORS - {section.replace('_', ' ').upper()}"
+            lines.extend(_render_criteria(heading, criteria))
+
+    return '\n'.join(lines).strip()
+
+
+class PromptAssembler:
+    """
+    Assembles evaluation prompts around cached static prefixes
+
+    Prefixes are rendered once per (rubric version, IELTS context block)
+    and kept in a small LRU, so repeated evaluations only build the
+    submission part.
+    """
+
+    def __init__(self, max_prefixes: int = 64,
+                 max_submission_tokens: Optional[int] = None,
+                 max_output_tokens: Optional[int] = None):
+        self.max_prefixes = max_prefixes
+        self.max_submission_tokens = max_submission_tokens or int(
+            os.environ.get('EVALUATION_MAX_SUBMISSION_TOKENS', '4000')
+        )
+        self.max_output_tokens = max_output_tokens or int(os.environ.get('EVALUATION_MAX_OUTPUT_TOKENS', '1000'))
+        self.prompt_caching = os.environ.get('BEDROCK_PROMPT_CACHING', 'true').lower() == 'true'
+
+        self._prefixes: 'OrderedDict[Tuple[str, str], PromptPrefix]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'prefix_hits': 0, 'prefix_builds': 0}
+
+    def get_prefix(self, rubric: Dict[str, Any], assessment_type: str, task_number: Optional[int] = None) -> PromptPrefix:
+        """Static prefix for a rubric and assessment, built on first use"""
+        kind, test_type = parse_assessment_type(assessment_type)
+        task_number = task_number or (2 if kind == 'writing' else 1)
+        context_block = get_ielts_prompt_block(kind, test_type, task_number)
+        key = (rubric_version(rubric), context_block.sha256 if context_block else '')
+
+        with self._lock:
+            prefix = self._prefixes.get(key)
+            if prefix is not None:
+                self._prefixes.move_to_end(key)
+                self.stats['prefix_hits'] += 1
+                return prefix
+
+        parts = [render_rubric(rubric or {})]
+        if context_block:
+            parts.append(context_block.text)
+        text = '\n\n'.join(part for part in parts if part)
+        prefix = PromptPrefix(text, hashlib.sha256(text.encode('utf-8')).hexdigest()[:16], count_tokens(text))
+
+        with self._lock:
+            self._prefixes[key] = prefix
+            self._prefixes.move_to_end(key)
+            while len(self._prefixes) > self.max_prefixes:
+                self._prefixes.popitem(last=False)
+            self.stats['prefix_builds'] += 1
+        return prefix
+
+    def build_body(self, prefix: PromptPrefix, user_text: str, model_id: str) -> Dict[str, Any]:
+        """Nova messages body with the prefix first and a cache point after it"""
+        system = [{'text': prefix.text}]
+        if self.prompt_caching and model_id in PROMPT_CACHING_MODELS and prefix.tokens >= PROMPT_CACHE_MIN_TOKENS:
+            system.append({'cachePoint': {'type': 'default'}})
+
+        return {
+            'schemaVersion': 'messages-v1',
+            'system': system,
+            'messages': [{'role': 'user', 'content': [{'text': user_text}]}],
+            'inferenceConfig': {'maxTokens': self.max_output_tokens, 'temperature': 0.0}
+        }
+
+    def assemble(self,
+                 rubric: Dict[str, Any],
+                 assessment_type: str,
+                 submission_text: str,
+                 model_id: str,
+                 task_prompt: Optional[str] = None,
+                 task_number: Optional[int] = None,
+                 overflow: str = 'truncate') -> List[AssembledPrompt]:
+        """Evaluation request(s) for a submission
+
+        Submissions over the token budget are truncated at the last whole
+        sentence that fits (``overflow='truncate'``) or split into
+        paragraph/sentence aligned chunks, one request each
+        (``overflow='chunk'``).
+        """
+        prefix = self.get_prefix(rubric, assessment_type, task_number)
+        kind, _ = parse_assessment_type(assessment_type)
+        label = 'TRANSCRIPT' if kind == 'speaking' else 'ESSAY'
+        header = f"TASK:\n{task_prompt.strip()}\n\n" if task_prompt and task_prompt.strip() else ''
+
+        chunks = split_to_token_budget(submission_text or '', self.max_submission_tokens)
+        truncated = len(chunks) > 1
+        if overflow != 'chunk':
+            chunks = chunks[:1]
+
+        prompts = []
+        for index, chunk in enumerate(chunks):
+            part = f" (PART {index + 1} OF {len(chunks)})" if len(chunks) > 1 else ''
+            user_text = f"{header}{label}{part}:\n{chunk}"
+            submission_tokens = count_tokens(chunk)
+            prompts.append(AssembledPrompt(
+                body=self.build_body(prefix, user_text, model_id),
+                prefix=prefix,
+                submission_text=chunk,
+                submission_tokens=submission_tokens,
+                input_tokens=prefix.tokens + count_tokens(user_text),
+                truncated=truncated and overflow != 'chunk',
+                chunk_index=index,
+                chunk_count=len(chunks)
+            ))
+        return prompts
+
+
+def _split_units(text: str, max_tokens: int) -> List[Tuple[str, str, int]]:
+    """Paragraphs, then sentences, then word runs, each within ``max_tokens``
+
+    Yields ``(unit, joiner, tokens)`` where ``joiner`` is the separator that
+    preceded the unit in the original text. Token counts are additive over
+    whitespace, so chunk sizes are summed rather than re-counted.
+    """
+    units = []
+    for paragraph in text.split('\n\n'):
+        joiner = '\n\n'
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            units.append((paragraph, joiner, tokens))
+            continue
+        for sentence in _SENTENCE_END_RE.split(paragraph):
+            tokens = count_tokens(sentence)
+            if tokens <= max_tokens:
+                units.append((sentence, joiner, tokens))
+                joiner = ' '
+                continue
+            run, run_tokens = [], 0
+            for word in sentence.split():
+                word_tokens = count_tokens(word)
+                if run and run_tokens + word_tokens > max_tokens:
+                    units.append((' '.join(run), joiner, run_tokens))
+                    joiner = ' '
+                    run, run_tokens = [], 0
+                run.append(word)
+                run_tokens += word_tokens
+            if run:
+                units.append((' '.join(run), joiner, run_tokens))
+                joiner = ' '
+    return units
+
+
+def split_to_token_budget(text: str, max_tokens: int) -> List[str]:
+    """Deterministic split of ``text`` into chunks of at most ``max_tokens``
+
+    Splits never fall inside a word, so a single word longer than the budget
+    becomes its own chunk.
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+
+    chunks, current, current_tokens = [], '', 0
+    for unit, joiner, tokens in _split_units(text, max_tokens):
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = '', 0
+        current = f"{current}{joiner}{unit}" if current else unit
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# Global instance
+_prompt_assembler = None
+
+def get_prompt_assembler() -> PromptAssembler:
+    """Get global prompt assembler instance"""
+    global _prompt_assembler
+    if _prompt_assembler is None:
+        _prompt_assembler = PromptAssembler()
+    return _prompt_assembler
+
+# Export
+__all__ = [
+    'AssembledPrompt',
+    'PromptAssembler',
+    'PromptPrefix',
+    'PROMPT_CACHING_MODELS',
+    'count_tokens',
+    'parse_assessment_type',
+    'render_rubric',
+    'split_to_token_budget',
+    'get_prompt_assembler'
+]
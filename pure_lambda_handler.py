@@ -49,6 +49,7 @@ from repurchase_handler import (
     handle_get_repurchase_history
 )
 from assessment_session_handler import (
+    handle_preselect_questions,
     handle_start_assessment_session,
     handle_complete_assessment_session,
     handle_get_assessment_session,
@@ -59,7 +60,8 @@ from maya_assessment_handler import (
     handle_maya_conversation_turn,
     handle_get_conversation_summary,
     handle_generate_band_score_report,
-    handle_get_user_assessment_history
+    handle_get_user_assessment_history,
+    handle_get_maya_audio
 )
 
 # Configure logging
@@ -141,6 +143,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Direct routing without web framework overhead for maximum performance
     """
     try:
+        # Internal asynchronous self-invocations carry no HTTP envelope
+        if 'preselect_questions' in event:
+            return handle_preselect_questions(event, context)
+        
         # Extract request details
         path = event.get('path', '/')
         method = event.get('httpMethod', 'GET')
@@ -318,6 +324,9 @@ def handle_api_request(event: Dict[str, Any], context: Any, path: str, method: s
     elif path == '/api/user-assessment-history' and method == 'GET':
         return handle_get_user_assessment_history(event, context)
     
+    elif path.startswith('/api/maya/audio/') and method == 'GET':
+        return handle_get_maya_audio(event, context)
+    
     # Mobile API delegation
     elif path.startswith('/api/v1/') and MOBILE_API_AVAILABLE:
         return delegate_to_mobile_api(path, method, headers, query_params, data)
@@ -9,7 +9,10 @@ import random
 from datetime import datetime
 from typing import Dict, Any, List
 
-from question_bank_dal import QuestionCategory, RepeatPolicy, get_question_bank_dal
+from question_bank_dal import (
+    META_POOL_ID, POOL_STATS_PREFIX, QuestionCategory, RepeatPolicy, get_question_bank_dal
+)
+from question_import import QuestionImportPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,16 @@ class QuestionBankAdmin:
         Returns:
             Dict with success status and question details
         """
+        result = self._put_question(assessment_type, category, content,
+                                    difficulty, tags, repeat_policy)
+        if result['success']:
+            self._bump_content_version()
+        return result
+    
+    def _put_question(self, assessment_type: str, category: str, content: Dict[str, Any],
+                      difficulty: str = 'medium', tags: List[str] = None,
+                      repeat_policy: str = 'unique') -> Dict[str, Any]:
+        """Write a single question item without touching the content version"""
         try:
             # Generate question ID
             question_id = self._generate_question_id(assessment_type, category)
@@ -45,6 +58,9 @@ class QuestionBankAdmin:
             shard = random.randint(0, self.shard_count - 1)
             pool_id = f"{assessment_type}#{category}#{shard}"
             
+            # Stable ordinal used by per-user usage bitmaps
+            ordinal = self.question_dal.allocate_question_ordinals(assessment_type)
+            
             # Create question record
             question_data = {
                 'pool_id': pool_id,
@@ -52,6 +68,7 @@ class QuestionBankAdmin:
                 'assessment_type': assessment_type,
                 'category': category,
                 'shard': shard,
+                'ordinal': ordinal,
                 'content': content,
                 'difficulty': difficulty,
                 'tags': tags or [],
@@ -61,8 +78,21 @@ class QuestionBankAdmin:
                 'version': 1
             }
             
-            # Add to DynamoDB
-            self.question_dal.questions_table.put_item(Item=question_data)
+            # Add to DynamoDB together with the pool counter increment
+            self.question_dal.dynamodb.meta.client.transact_write_items(
+                TransactItems=[
+                    {
+                        'Put': {
+                            'TableName': self.question_dal.questions_table_name,
+                            'Item': question_data,
+                            'ConditionExpression': 'attribute_not_exists(question_id)'
+                        }
+                    },
+                    self.question_dal.pool_counter_update(
+                        assessment_type, category, shard, total_delta=1, active_delta=1
+                    )
+                ]
+            )
             
             logger.info(f"Question added: {question_id} to {pool_id}")
             
@@ -80,25 +110,29 @@ class QuestionBankAdmin:
                 'error': 'Failed to add question'
             }
     
-    def batch_add_questions(self, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Add multiple questions in batch"""
+    def batch_add_questions(self, questions: List[Dict[str, Any]],
+                            writers: int = 4) -> Dict[str, Any]:
+        """Add multiple questions in batch through the bulk import pipeline"""
         try:
-            results = []
-            failed_count = 0
+            pipeline = QuestionImportPipeline(question_dal=self.question_dal, writers=writers)
+            report = pipeline.run(questions, bump_content_version=False)
             
-            for question_spec in questions:
-                result = self.add_question(**question_spec)
-                results.append(result)
-                
-                if not result['success']:
-                    failed_count += 1
+            # One version bump per batch invalidates every container's cache
+            if report['written']:
+                self._bump_content_version()
+            
+            successful = report['written'] + report['already_present']
+            failed_count = len(questions) - successful
             
             return {
                 'success': True,
                 'total_questions': len(questions),
-                'successful': len(questions) - failed_count,
+                'successful': successful,
                 'failed': failed_count,
-                'results': results
+                'rejected': report['rejected'],
+                'duplicates': report['duplicates'],
+                'items_per_second': report['items_per_second'],
+                'results': report['results']
             }
             
         except Exception as e:
@@ -108,30 +142,63 @@ class QuestionBankAdmin:
                 'error': 'Failed to batch add questions'
             }
     
-    def get_question_pool_stats(self, assessment_type: str = None) -> Dict[str, Any]:
-        """Get statistics about question pools"""
+    def deactivate_question(self, pool_id: str, question_id: str) -> Dict[str, Any]:
+        """Take a question out of selection and decrement its pool's active count"""
         try:
-            # This would require scanning - in production, consider maintaining counters
-            # For now, return basic structure
+            assessment_type, category, shard = pool_id.rsplit('#', 2)
             
-            stats = {
-                'success': True,
-                'assessment_types': {
-                    'academic_speaking': self._get_assessment_stats('academic_speaking'),
-                    'general_speaking': self._get_assessment_stats('general_speaking'),
-                    'academic_writing': self._get_assessment_stats('academic_writing'),
-                    'general_writing': self._get_assessment_stats('general_writing')
-                }
+            self.question_dal.dynamodb.meta.client.transact_write_items(
+                TransactItems=[
+                    {
+                        'Update': {
+                            'TableName': self.question_dal.questions_table_name,
+                            'Key': {'pool_id': pool_id, 'question_id': question_id},
+                            'UpdateExpression': 'SET active = :inactive, deactivated_at = :now',
+                            'ConditionExpression': 'active = :active',
+                            'ExpressionAttributeValues': {
+                                ':inactive': False,
+                                ':active': True,
+                                ':now': datetime.utcnow().isoformat()
+                            }
+                        }
+                    },
+                    self.question_dal.pool_counter_update(
+                        assessment_type, category, int(shard), active_delta=-1
+                    )
+                ]
+            )
+            
+            self._bump_content_version()
+            logger.info(f"Question deactivated: {question_id} in {pool_id}")
+            
+            return {'success': True, 'question_id': question_id}
+            
+        except Exception as e:
+            logger.error(f"Failed to deactivate question {question_id}: {e}")
+            return {
+                'success': False,
+                'error': 'Failed to deactivate question'
             }
+    
+    def get_question_pool_stats(self, assessment_type: str = None) -> Dict[str, Any]:
+        """Get statistics about question pools from the maintained pool counters"""
+        try:
+            assessment_types = [assessment_type] if assessment_type else list(
+                self.question_dal.question_requirements
+            )
+            all_stats = {a_type: self._get_assessment_stats(a_type) for a_type in assessment_types}
             
             if assessment_type:
-                stats = {
+                return {
                     'success': True,
                     'assessment_type': assessment_type,
-                    'stats': stats['assessment_types'].get(assessment_type, {})
+                    'stats': all_stats[assessment_type]
                 }
             
-            return stats
+            return {
+                'success': True,
+                'assessment_types': all_stats
+            }
             
         except Exception as e:
             logger.error(f"Failed to get question pool stats: {e}")
@@ -143,42 +210,16 @@ class QuestionBankAdmin:
     def _get_assessment_stats(self, assessment_type: str) -> Dict[str, Any]:
         """Get stats for specific assessment type"""
         try:
-            # Sample a few shards to estimate totals (production implementation)
-            sample_shards = [0, 1, 2, 3, 4]  # Sample first 5 shards
+            counters = self.question_dal.get_pool_counters(assessment_type)
             category_stats = {}
             
             for category in QuestionCategory:
                 if not self._category_applies_to_assessment(category, assessment_type):
                     continue
-                    
-                total_estimate = 0
-                active_estimate = 0
-                
-                for shard in sample_shards:
-                    pool_id = f"{assessment_type}#{category.value}#{shard}"
-                    
-                    try:
-                        response = self.question_dal.questions_table.query(
-                            KeyConditionExpression='pool_id = :pool_id',
-                            ExpressionAttributeValues={':pool_id': pool_id}
-                        )
-                        
-                        items = response.get('Items', [])
-                        shard_total = len(items)
-                        shard_active = sum(1 for item in items if item.get('active', True))
-                        
-                        total_estimate += shard_total
-                        active_estimate += shard_active
-                        
-                    except Exception:
-                        continue
-                
-                # Extrapolate to all shards
-                multiplier = self.shard_count / len(sample_shards)
-                category_stats[category.value] = {
-                    'estimated_total': int(total_estimate * multiplier),
-                    'estimated_active': int(active_estimate * multiplier)
-                }
+                category_stats[category.value] = counters.get(
+                    category.value,
+                    {'total_questions': 0, 'active_questions': 0, 'shards_populated': 0}
+                )
             
             return category_stats
             
@@ -186,6 +227,150 @@ class QuestionBankAdmin:
             logger.warning(f"Failed to get stats for {assessment_type}: {e}")
             return {}
     
+    def check_pool_capacity(self, min_sessions: int = 8) -> Dict[str, Any]:
+        """
+        Flag categories whose active pool cannot cover ``min_sessions`` sessions
+        
+        A user never sees a unique question twice, so a category with fewer
+        than ``per-session requirement * min_sessions`` active questions will
+        run dry for users who keep buying attempts.
+        """
+        try:
+            alerts = []
+            capacity = {}
+            
+            for assessment_type, requirements in self.question_dal.question_requirements.items():
+                counters = self.question_dal.get_pool_counters(assessment_type)
+                capacity[assessment_type] = {}
+                
+                for category, per_session in requirements.items():
+                    active = counters.get(category.value, {}).get('active_questions', 0)
+                    sessions_available = active // per_session
+                    capacity[assessment_type][category.value] = sessions_available
+                    
+                    if sessions_available < min_sessions:
+                        alerts.append({
+                            'assessment_type': assessment_type,
+                            'category': category.value,
+                            'active_questions': active,
+                            'required_questions': per_session * min_sessions,
+                            'sessions_available': sessions_available
+                        })
+            
+            if alerts:
+                logger.warning(f"Low question pool capacity in {len(alerts)} categories")
+            
+            return {
+                'success': True,
+                'healthy': not alerts,
+                'min_sessions': min_sessions,
+                'sessions_available': capacity,
+                'alerts': alerts
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to check pool capacity: {e}")
+            return {
+                'success': False,
+                'error': 'Failed to check pool capacity'
+            }
+    
+    def reconcile_pool_counters(self, segments: int = 8) -> Dict[str, Any]:
+        """
+        Recompute every pool counter from a parallel scan of the questions table
+        
+        Counters are overwritten with the scanned values, so run this outside of
+        bulk imports; writes racing the scan are picked up by the next run.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        try:
+            client = self.question_dal.dynamodb.meta.client
+            table_name = self.question_dal.questions_table_name
+            
+            def scan_segment(segment: int):
+                counts: Dict[tuple, List[int]] = {}
+                counter_keys = []
+                scan_kwargs = {
+                    'TableName': table_name,
+                    'Segment': segment,
+                    'TotalSegments': segments,
+                    'ProjectionExpression': 'pool_id, question_id, assessment_type, category, shard, active'
+                }
+                while True:
+                    response = client.scan(**scan_kwargs)
+                    for item in response.get('Items', []):
+                        if item['pool_id'].endswith(f"#{META_POOL_ID}"):
+                            if item['question_id'].startswith(POOL_STATS_PREFIX):
+                                counter_keys.append({'pool_id': item['pool_id'],
+                                                     'question_id': item['question_id']})
+                            continue
+                        if item['pool_id'] == META_POOL_ID or 'shard' not in item:
+                            continue
+                        key = (item['assessment_type'], item['category'], int(item['shard']))
+                        entry = counts.setdefault(key, [0, 0])
+                        entry[0] += 1
+                        if item.get('active', True):
+                            entry[1] += 1
+                    
+                    if 'LastEvaluatedKey' not in response:
+                        return counts, counter_keys
+                    scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            
+            totals: Dict[tuple, List[int]] = {}
+            existing_counter_keys = []
+            with ThreadPoolExecutor(max_workers=segments) as executor:
+                for counts, counter_keys in executor.map(scan_segment, range(segments)):
+                    existing_counter_keys.extend(counter_keys)
+                    for key, (total, active) in counts.items():
+                        entry = totals.setdefault(key, [0, 0])
+                        entry[0] += total
+                        entry[1] += active
+            
+            new_values = {}
+            for (assessment_type, category, shard), counts in totals.items():
+                counter_key = self.question_dal.pool_counter_key(assessment_type, category, shard)
+                new_values[(counter_key['pool_id'], counter_key['question_id'])] = counts
+            # Counters whose pools no longer hold any question drop to zero
+            for counter_key in existing_counter_keys:
+                new_values.setdefault((counter_key['pool_id'], counter_key['question_id']), [0, 0])
+            
+            for (pool_id, question_id), (total, active) in new_values.items():
+                self.question_dal.questions_table.update_item(
+                    Key={'pool_id': pool_id, 'question_id': question_id},
+                    UpdateExpression='SET total_count = :total, active_count = :active',
+                    ExpressionAttributeValues={':total': total, ':active': active}
+                )
+            
+            logger.info(f"Reconciled {len(totals)} pool counters")
+            
+            return {
+                'success': True,
+                'pools_reconciled': len(new_values),
+                'total_questions': sum(total for total, _ in totals.values())
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to reconcile pool counters: {e}")
+            return {
+                'success': False,
+                'error': 'Failed to reconcile pool counters'
+            }
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit rates and occupancy of this container's question cache"""
+        return {
+            'success': True,
+            'cache': self.question_dal.question_cache.stats()
+        }
+    
+    def _bump_content_version(self) -> None:
+        try:
+            version = self.question_dal.bump_content_version()
+            logger.info(f"Question content version bumped to {version}")
+        except Exception as e:
+            logger.error(f"Failed to bump question content version: {e}")
+    
     def _category_applies_to_assessment(self, category: QuestionCategory, assessment_type: str) -> bool:
         """Check if category applies to assessment type"""
         if 'speaking' in assessment_type:
@@ -5,13 +5,16 @@ Handles question storage, selection, and usage tracking to prevent repeats
 
 import json
 import logging
+import os
 import random
 import secrets
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
 
 from dynamodb_dal import get_dal
+from question_cache import get_question_cache
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +35,90 @@ class RepeatPolicy(Enum):
     INTRO = "intro"  # Can repeat (Maya's introduction)
     UNIQUE = "unique"  # Must be unique per user per assessment type
 
+# Pre-selected candidates older than this are discarded at session start
+PRESELECTION_MAX_AGE = timedelta(days=7)
+
+# Reserved sort keys for bookkeeping items that live alongside real records
+USAGE_BITMAP_KEY = '__usage_bitmap__'
+PRESELECTION_KEY = '__preselected__'
+
+# Usage-table sort keys that are bookkeeping rather than used questions
+RESERVED_USAGE_KEYS = frozenset({USAGE_BITMAP_KEY, PRESELECTION_KEY})
+ORDINAL_COUNTER_KEY = '__ordinal_counter__'
+CONTENT_VERSION_KEY = '__content_version__'
+META_POOL_ID = '__meta__'
+POOL_STATS_PREFIX = 'stats#'
+
+
+class QuestionUsageBitmap:
+    """
+    Compact record of the questions a user has seen for one assessment type
+    
+    Questions carry a stable per-assessment-type ``ordinal``; bit ``n`` of the
+    bitmap is set once the question with ordinal ``n`` has been served. Questions
+    created before ordinals existed are tracked by ID in ``legacy_ids``.
+    """
+    
+    def __init__(self, bitmap: bytes = b'', legacy_ids: Optional[set] = None,
+                 version: int = 0):
+        self.bitmap = bytearray(bitmap)
+        self.legacy_ids = set(legacy_ids or ())
+        self.version = version  # 0 means the item has not been persisted yet
+    
+    @staticmethod
+    def _ordinal_of(question: Dict[str, Any]) -> Optional[int]:
+        ordinal = question.get('ordinal')
+        return int(ordinal) if ordinal is not None else None
+    
+    def contains(self, question: Dict[str, Any]) -> bool:
+        """Check whether the question has already been served to the user"""
+        ordinal = self._ordinal_of(question)
+        if ordinal is None:
+            return question['question_id'] in self.legacy_ids
+        byte_index = ordinal >> 3
+        if byte_index >= len(self.bitmap):
+            return False
+        return bool(self.bitmap[byte_index] & (1 << (ordinal & 7)))
+    
+    def add(self, question: Dict[str, Any]) -> None:
+        """Mark a question as served"""
+        ordinal = self._ordinal_of(question)
+        if ordinal is None:
+            self.legacy_ids.add(question['question_id'])
+            return
+        byte_index = ordinal >> 3
+        if byte_index >= len(self.bitmap):
+            self.bitmap.extend(b'\x00' * (byte_index + 1 - len(self.bitmap)))
+        self.bitmap[byte_index] |= 1 << (ordinal & 7)
+    
+    def copy(self) -> 'QuestionUsageBitmap':
+        return QuestionUsageBitmap(bytes(self.bitmap), self.legacy_ids, self.version)
+    
+    def __len__(self) -> int:
+        return sum(bin(byte).count('1') for byte in self.bitmap) + len(self.legacy_ids)
+    
+    def to_item(self, user_assessment_key: str) -> Dict[str, Any]:
+        """Serialise as a usage-table item (version is bumped for the write)"""
+        item = {
+            'user_assessment_key': user_assessment_key,
+            'question_id': USAGE_BITMAP_KEY,
+            'bitmap': bytes(self.bitmap),
+            'usage_version': self.version + 1,
+            'last_used_at': datetime.utcnow().isoformat()
+        }
+        # DynamoDB rejects empty sets, so only include legacy IDs when present
+        if self.legacy_ids:
+            item['legacy_ids'] = set(self.legacy_ids)
+        return item
+    
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> 'QuestionUsageBitmap':
+        raw = item.get('bitmap', b'')
+        # boto3 returns Binary wrappers for B attributes
+        raw = getattr(raw, 'value', raw)
+        return cls(bytes(raw), item.get('legacy_ids'), int(item.get('usage_version', 0)))
+
+
 class QuestionBankDAL:
     """Data Access Layer for Question Bank Management"""
     
@@ -52,6 +139,9 @@ class QuestionBankDAL:
         self.usage_table = self.dynamodb.Table(self.usage_table_name)
         self.profiles_table = self.dynamodb.Table(self.profiles_table_name)
         
+        # Container-wide cache of question content and pool manifests
+        self.question_cache = get_question_cache()
+        
         # Question requirements per assessment type
         self.question_requirements = {
             'academic_speaking': {
@@ -105,51 +195,64 @@ class QuestionBankDAL:
             # Generate session ID
             session_id = self._generate_session_id()
             
-            # Select questions for each category
-            selected_questions = {}
-            question_ids_by_category = {}
+            self.question_cache.ensure_fresh(self.get_content_version)
             
-            requirements = self.question_requirements[assessment_type]
+            # One round trip fetches the usage bitmap and any pre-selected set
+            usage, preselection = self._load_usage_and_preselection(user_email, assessment_type)
             
-            for category, count in requirements.items():
-                questions = self._select_questions_for_category(
-                    user_email, assessment_type, category, count
+            selected_questions = self._validate_preselection(preselection, usage, assessment_type)
+            used_preselection = selected_questions is not None
+            if not used_preselection:
+                selected_questions, missing_category = self._select_session_questions(
+                    user_email, assessment_type, usage
                 )
-                
-                if not questions:
+                if missing_category:
                     return {
                         'success': False,
-                        'error': f'Insufficient questions available for {category.value}',
-                        'category': category.value
+                        'error': f'Insufficient questions available for {missing_category}',
+                        'category': missing_category
                     }
-                
-                selected_questions[category.value] = questions
-                question_ids_by_category[category.value] = [q['question_id'] for q in questions]
             
-            # Create session record
-            session_data = {
-                'session_id': session_id,
-                'user_email': user_email,
-                'assessment_type': assessment_type,
-                'purchase_id': purchase_id,
-                'status': 'active',
-                'created_at': datetime.utcnow().isoformat(),
-                'question_ids_by_category': question_ids_by_category,
-                'version': 1
-            }
+            session_data = self._build_session_data(
+                session_id, user_email, assessment_type, purchase_id, selected_questions
+            )
             
-            # Reserve questions transactionally
+            # Reserve questions transactionally, consuming any stashed set
             reservation_success = self._reserve_questions_transactionally(
-                session_data, selected_questions, user_email, assessment_type
+                session_data, selected_questions, user_email, assessment_type,
+                usage=usage, consume_preselection=preselection
             )
             
+            if not reservation_success and preselection is not None:
+                # The stashed set lost a race, or a newer set was stashed since
+                # it was read; fall back to live selection and leave the stash
+                logger.info(f"Pre-selected questions stale for {user_email} - {assessment_type}")
+                usage = self.get_user_usage_bitmap(user_email, assessment_type)
+                selected_questions, missing_category = self._select_session_questions(
+                    user_email, assessment_type, usage
+                )
+                if missing_category:
+                    return {
+                        'success': False,
+                        'error': f'Insufficient questions available for {missing_category}',
+                        'category': missing_category
+                    }
+                session_data = self._build_session_data(
+                    session_id, user_email, assessment_type, purchase_id, selected_questions
+                )
+                reservation_success = self._reserve_questions_transactionally(
+                    session_data, selected_questions, user_email, assessment_type,
+                    usage=usage
+                )
+                used_preselection = False
+            
             if not reservation_success:
                 return {
                     'success': False,
                     'error': 'Failed to reserve questions - possible race condition'
                 }
             
-            logger.info(f"Assessment session started: {session_id}")
+            logger.info(f"Assessment session started: {session_id} (preselected={used_preselection})")
             
             return {
                 'success': True,
@@ -166,11 +269,173 @@ class QuestionBankDAL:
                 'error': 'Failed to start assessment session'
             }
     
+    def _select_session_questions(self, user_email: str, assessment_type: str,
+                                  usage: QuestionUsageBitmap) -> Tuple[Dict[str, List[Dict[str, Any]]], Optional[str]]:
+        """
+        Live question selection for every category of an assessment type
+        
+        Returns the selection and, if a category ran dry, that category's name.
+        """
+        selected_questions = {}
+        for category, count in self.question_requirements[assessment_type].items():
+            questions = self._select_questions_for_category(
+                user_email, assessment_type, category, count, usage=usage
+            )
+            if not questions:
+                return selected_questions, category.value
+            selected_questions[category.value] = questions
+        return selected_questions, None
+    
+    def _build_session_data(self, session_id: str, user_email: str, assessment_type: str,
+                            purchase_id: str,
+                            selected_questions: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        question_ids_by_category = {}
+        question_pool_ids = {}
+        for category, questions in selected_questions.items():
+            question_ids_by_category[category] = [q['question_id'] for q in questions]
+            question_pool_ids.update({q['question_id']: q['pool_id'] for q in questions})
+        
+        return {
+            'session_id': session_id,
+            'user_email': user_email,
+            'assessment_type': assessment_type,
+            'purchase_id': purchase_id,
+            'status': 'active',
+            'created_at': datetime.utcnow().isoformat(),
+            'question_ids_by_category': question_ids_by_category,
+            'question_pool_ids': question_pool_ids,
+            'version': 1
+        }
+    
+    def preselect_next_session(self, user_email: str, assessment_type: str) -> Dict[str, Any]:
+        """
+        Select and stash the question set for the user's next attempt
+        
+        Runs off the request path (after a session completes or a purchase is
+        granted) so the next session start only has to validate and reserve.
+        """
+        try:
+            if assessment_type not in self.question_requirements:
+                return {'success': False, 'error': f'Invalid assessment type: {assessment_type}'}
+            
+            self.question_cache.ensure_fresh(self.get_content_version)
+            usage = self.get_user_usage_bitmap(user_email, assessment_type)
+            
+            selected_questions, missing_category = self._select_session_questions(
+                user_email, assessment_type, usage
+            )
+            if missing_category:
+                return {
+                    'success': False,
+                    'error': f'Insufficient questions available for {missing_category}'
+                }
+            
+            self.usage_table.put_item(Item={
+                'user_assessment_key': f"{user_email}#{assessment_type}",
+                'question_id': PRESELECTION_KEY,
+                'stash_id': secrets.token_hex(8),
+                'candidates': selected_questions,
+                'content_version': self.question_cache.version or 0,
+                'created_at': datetime.utcnow().isoformat()
+            })
+            
+            logger.info(f"Pre-selected next session questions for {user_email} - {assessment_type}")
+            return {'success': True}
+            
+        except Exception as e:
+            logger.error(f"Failed to pre-select questions for {user_email}: {e}")
+            return {'success': False, 'error': 'Failed to pre-select questions'}
+    
+    def schedule_preselection(self, user_email: str, assessment_type: str) -> None:
+        """
+        Run ``preselect_next_session`` without blocking the caller
+        
+        With PRESELECTION_FUNCTION_NAME set this is an asynchronous invocation
+        handled by ``pure_lambda_handler``; otherwise a daemon thread.
+        """
+        function_name = os.environ.get('PRESELECTION_FUNCTION_NAME')
+        try:
+            if function_name:
+                import boto3
+                boto3.client('lambda').invoke(
+                    FunctionName=function_name,
+                    InvocationType='Event',
+                    Payload=json.dumps({
+                        'preselect_questions': {
+                            'user_email': user_email,
+                            'assessment_type': assessment_type
+                        }
+                    })
+                )
+            else:
+                threading.Thread(
+                    target=self.preselect_next_session,
+                    args=(user_email, assessment_type),
+                    daemon=True
+                ).start()
+        except Exception as e:
+            # Pre-selection is an optimisation; session start falls back to live selection
+            logger.warning(f"Failed to schedule question pre-selection for {user_email}: {e}")
+    
+    def _load_usage_and_preselection(self, user_email: str, assessment_type: str) -> Tuple[QuestionUsageBitmap, Optional[Dict[str, Any]]]:
+        """Fetch the usage bitmap and pre-selection stash in a single BatchGetItem"""
+        user_assessment_key = f"{user_email}#{assessment_type}"
+        try:
+            response = self.dynamodb.batch_get_item(RequestItems={
+                self.usage_table_name: {
+                    'Keys': [
+                        {'user_assessment_key': user_assessment_key, 'question_id': USAGE_BITMAP_KEY},
+                        {'user_assessment_key': user_assessment_key, 'question_id': PRESELECTION_KEY}
+                    ]
+                }
+            })
+            items = {item['question_id']: item
+                     for item in response.get('Responses', {}).get(self.usage_table_name, [])}
+            if not response.get('UnprocessedKeys'):
+                if USAGE_BITMAP_KEY in items:
+                    usage = QuestionUsageBitmap.from_item(items[USAGE_BITMAP_KEY])
+                else:
+                    usage = self._build_usage_bitmap_from_items(user_assessment_key)
+                return usage, items.get(PRESELECTION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to batch-read usage for {user_assessment_key}: {e}")
+        
+        return self.get_user_usage_bitmap(user_email, assessment_type), None
+    
+    def _validate_preselection(self, preselection: Optional[Dict[str, Any]],
+                               usage: QuestionUsageBitmap,
+                               assessment_type: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Return the stashed candidates if they are still usable, otherwise None"""
+        if not preselection:
+            return None
+        
+        if int(preselection.get('content_version', 0)) != (self.question_cache.version or 0):
+            return None
+        
+        try:
+            created_at = datetime.fromisoformat(preselection['created_at'])
+        except (KeyError, ValueError):
+            return None
+        if datetime.utcnow() - created_at > PRESELECTION_MAX_AGE:
+            return None
+        
+        candidates = preselection.get('candidates', {})
+        for category, count in self.question_requirements[assessment_type].items():
+            questions = candidates.get(category.value, [])
+            if len(questions) < count:
+                return None
+            for question in questions:
+                repeat_policy = question.get('repeat_policy', RepeatPolicy.UNIQUE.value)
+                if repeat_policy != RepeatPolicy.INTRO.value and usage.contains(question):
+                    return None
+        
+        return candidates
+    
     def complete_assessment_session(self, session_id: str, user_email: str) -> Dict[str, Any]:
         """Mark assessment session as completed"""
         try:
             # Update session status
-            self.sessions_table.update_item(
+            response = self.sessions_table.update_item(
                 Key={'session_id': session_id},
                 UpdateExpression='SET #status = :status, completed_at = :completed_at',
                 ExpressionAttributeNames={'#status': 'status'},
@@ -180,11 +445,17 @@ class QuestionBankDAL:
                     ':user_email': user_email,
                     ':active_status': 'active'
                 },
-                ConditionExpression='user_email = :user_email AND #status = :active_status'
+                ConditionExpression='user_email = :user_email AND #status = :active_status',
+                ReturnValues='ALL_NEW'
             )
             
             logger.info(f"Assessment session completed: {session_id}")
             
+            # Prepare the next attempt's questions while the user reads feedback
+            assessment_type = response.get('Attributes', {}).get('assessment_type')
+            if assessment_type:
+                self.schedule_preselection(user_email, assessment_type)
+            
             return {'success': True}
             
         except Exception as e:
@@ -218,11 +489,13 @@ class QuestionBankDAL:
             }
     
     def _select_questions_for_category(self, user_email: str, assessment_type: str, 
-                                     category: QuestionCategory, count: int) -> List[Dict[str, Any]]:
+                                     category: QuestionCategory, count: int,
+                                     usage: Optional[QuestionUsageBitmap] = None) -> List[Dict[str, Any]]:
         """Select questions for specific category avoiding user's previous questions"""
         try:
             # Get user's previously used questions for this assessment type
-            used_question_ids = self._get_user_used_questions(user_email, assessment_type, category)
+            if usage is None:
+                usage = self.get_user_usage_bitmap(user_email, assessment_type)
             
             # Try multiple random shards to find enough questions
             selected_questions = []
@@ -241,28 +514,17 @@ class QuestionBankDAL:
                 pool_id = f"{assessment_type}#{category.value}#{shard}"
                 
                 try:
-                    response = self.questions_table.query(
-                        KeyConditionExpression='pool_id = :pool_id',
-                        FilterExpression='active = :active',
-                        ExpressionAttributeValues={
-                            ':pool_id': pool_id,
-                            ':active': True
-                        },
-                        Limit=count * 3  # Get more than needed for filtering
-                    )
-                    
-                    candidate_questions = response.get('Items', [])
+                    candidate_questions = self._get_pool_questions(pool_id)
                     
                     # Filter out previously used questions (unless intro policy)
                     for question in candidate_questions:
                         if len(selected_questions) >= count:
                             break
                             
-                        question_id = question['question_id']
                         repeat_policy = question.get('repeat_policy', RepeatPolicy.UNIQUE.value)
                         
                         # Allow intro questions to repeat, filter others
-                        if repeat_policy == RepeatPolicy.INTRO.value or question_id not in used_question_ids:
+                        if repeat_policy == RepeatPolicy.INTRO.value or not usage.contains(question):
                             selected_questions.append(question)
                     
                 except Exception as e:
@@ -278,6 +540,147 @@ class QuestionBankDAL:
             logger.error(f"Failed to select questions for {category.value}: {e}")
             return []
     
+    def _get_pool_questions(self, pool_id: str) -> List[Dict[str, Any]]:
+        """Get active questions of a pool, served from the content cache when warm"""
+        cached = self.question_cache.get_pool(pool_id)
+        if cached is not None:
+            return cached
+        
+        items = []
+        query_kwargs = {
+            'KeyConditionExpression': 'pool_id = :pool_id',
+            'FilterExpression': 'active = :active',
+            'ExpressionAttributeValues': {
+                ':pool_id': pool_id,
+                ':active': True
+            }
+        }
+        while True:
+            response = self.questions_table.query(**query_kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        self.question_cache.put_pool(pool_id, items)
+        return items
+    
+    def get_questions_by_key(self, question_pool_ids: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get question items for a ``{question_id: pool_id}`` mapping
+        
+        Cached content is returned directly; misses are fetched with BatchGetItem.
+        """
+        self.question_cache.ensure_fresh(self.get_content_version)
+        
+        questions = {}
+        missing_keys = []
+        for question_id, pool_id in question_pool_ids.items():
+            cached = self.question_cache.get_question(question_id)
+            if cached is not None:
+                questions[question_id] = cached
+            else:
+                missing_keys.append({'pool_id': pool_id, 'question_id': question_id})
+        
+        # BatchGetItem accepts at most 100 keys per request
+        for start in range(0, len(missing_keys), 100):
+            request_items = {
+                self.questions_table_name: {'Keys': missing_keys[start:start + 100]}
+            }
+            while request_items:
+                response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response.get('Responses', {}).get(self.questions_table_name, []):
+                    self.question_cache.put_question(item)
+                    questions[item['question_id']] = item
+                request_items = response.get('UnprocessedKeys') or None
+        
+        return questions
+    
+    def get_session_questions(self, session: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Resolve a session's question IDs into question items, grouped by category"""
+        question_pool_ids = session.get('question_pool_ids', {})
+        questions = self.get_questions_by_key(question_pool_ids)
+        
+        return {
+            category: [questions[qid] for qid in question_ids if qid in questions]
+            for category, question_ids in session.get('question_ids_by_category', {}).items()
+        }
+    
+    def get_content_version(self) -> int:
+        """Read the global question content version stamp"""
+        response = self.questions_table.get_item(
+            Key={'pool_id': META_POOL_ID, 'question_id': CONTENT_VERSION_KEY},
+            ProjectionExpression='content_version'
+        )
+        return int(response.get('Item', {}).get('content_version', 0))
+    
+    def bump_content_version(self) -> int:
+        """Advance the global content version so every container drops its cache"""
+        response = self.questions_table.update_item(
+            Key={'pool_id': META_POOL_ID, 'question_id': CONTENT_VERSION_KEY},
+            UpdateExpression='ADD content_version :one',
+            ExpressionAttributeValues={':one': 1},
+            ReturnValues='UPDATED_NEW'
+        )
+        self.question_cache.invalidate()
+        return int(response['Attributes']['content_version'])
+    
+    def pool_counter_key(self, assessment_type: str, category: str, shard: int) -> Dict[str, str]:
+        """Key of the counter item for one ``(assessment_type, category, shard)`` pool"""
+        return {
+            'pool_id': f"{assessment_type}#{META_POOL_ID}",
+            'question_id': f"{POOL_STATS_PREFIX}{category}#{int(shard):03d}"
+        }
+    
+    def pool_counter_update(self, assessment_type: str, category: str, shard: int,
+                            total_delta: int = 0, active_delta: int = 0) -> Dict[str, Any]:
+        """Build a TransactWriteItems ``Update`` that adjusts a pool counter"""
+        return {
+            'Update': {
+                'TableName': self.questions_table_name,
+                'Key': self.pool_counter_key(assessment_type, category, shard),
+                'UpdateExpression': 'ADD total_count :total, active_count :active',
+                'ExpressionAttributeValues': {
+                    ':total': total_delta,
+                    ':active': active_delta
+                }
+            }
+        }
+    
+    def get_pool_counters(self, assessment_type: str) -> Dict[str, Dict[str, int]]:
+        """
+        Roll up the pool counters of an assessment type by category
+        
+        One query over the assessment type's meta partition, independent of
+        how many questions the bank holds.
+        """
+        totals: Dict[str, Dict[str, int]] = {}
+        query_kwargs = {
+            'KeyConditionExpression': 'pool_id = :pool_id AND begins_with(question_id, :prefix)',
+            'ExpressionAttributeValues': {
+                ':pool_id': f"{assessment_type}#{META_POOL_ID}",
+                ':prefix': POOL_STATS_PREFIX
+            }
+        }
+        while True:
+            response = self.questions_table.query(**query_kwargs)
+            for item in response.get('Items', []):
+                category = item['question_id'][len(POOL_STATS_PREFIX):].rsplit('#', 1)[0]
+                category_totals = totals.setdefault(
+                    category, {'total_questions': 0, 'active_questions': 0, 'shards_populated': 0}
+                )
+                active = int(item.get('active_count', 0))
+                category_totals['total_questions'] += int(item.get('total_count', 0))
+                category_totals['active_questions'] += active
+                if active > 0:
+                    category_totals['shards_populated'] += 1
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        return totals
+    
     def _get_user_used_questions(self, user_email: str, assessment_type: str, 
                                category: QuestionCategory) -> set:
         """Get set of question IDs user has previously used for this assessment type"""
@@ -292,6 +695,8 @@ class QuestionBankDAL:
             
             used_ids = set()
             for item in response.get('Items', []):
+                if item['question_id'] in RESERVED_USAGE_KEYS:
+                    continue
                 # Filter by category if question has category info
                 question_category = item.get('category')
                 if not question_category or question_category == category.value:
@@ -303,13 +708,82 @@ class QuestionBankDAL:
             logger.error(f"Failed to get user used questions: {e}")
             return set()
     
+    def get_user_usage_bitmap(self, user_email: str, assessment_type: str) -> QuestionUsageBitmap:
+        """
+        Load the user's compact usage bitmap for an assessment type
+        
+        A single GetItem in the common case. Users whose history predates the
+        bitmap are migrated from the itemised usage records; the rebuilt bitmap
+        is persisted by the next reservation.
+        """
+        user_assessment_key = f"{user_email}#{assessment_type}"
+        try:
+            response = self.usage_table.get_item(
+                Key={
+                    'user_assessment_key': user_assessment_key,
+                    'question_id': USAGE_BITMAP_KEY
+                }
+            )
+            if 'Item' in response:
+                return QuestionUsageBitmap.from_item(response['Item'])
+        except Exception as e:
+            logger.warning(f"Failed to read usage bitmap for {user_assessment_key}: {e}")
+        
+        return self._build_usage_bitmap_from_items(user_assessment_key)
+    
+    def _build_usage_bitmap_from_items(self, user_assessment_key: str) -> QuestionUsageBitmap:
+        """Rebuild a usage bitmap from the itemised usage table (migration path)"""
+        usage = QuestionUsageBitmap()
+        try:
+            query_kwargs = {
+                'KeyConditionExpression': 'user_assessment_key = :pk',
+                'ExpressionAttributeValues': {':pk': user_assessment_key}
+            }
+            while True:
+                response = self.usage_table.query(**query_kwargs)
+                for item in response.get('Items', []):
+                    if item['question_id'] in RESERVED_USAGE_KEYS:
+                        continue
+                    usage.add(item)
+                
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except Exception as e:
+            logger.error(f"Failed to migrate usage records for {user_assessment_key}: {e}")
+        
+        return usage
+    
+    def allocate_question_ordinals(self, assessment_type: str, count: int = 1) -> int:
+        """
+        Reserve ``count`` consecutive question ordinals for an assessment type
+        
+        Returns the first ordinal of the reserved range.
+        """
+        response = self.questions_table.update_item(
+            Key={
+                'pool_id': f"{assessment_type}#{META_POOL_ID}",
+                'question_id': ORDINAL_COUNTER_KEY
+            },
+            UpdateExpression='ADD next_ordinal :count',
+            ExpressionAttributeValues={':count': count},
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes']['next_ordinal']) - count
+    
     def _reserve_questions_transactionally(self, session_data: Dict[str, Any], 
                                          selected_questions: Dict[str, List[Dict[str, Any]]],
-                                         user_email: str, assessment_type: str) -> bool:
-        """Reserve questions using DynamoDB transactions to prevent race conditions"""
+                                         user_email: str, assessment_type: str,
+                                         usage: Optional[QuestionUsageBitmap] = None,
+                                         consume_preselection: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Reserve questions using DynamoDB transactions to prevent race conditions
+        
+        ``consume_preselection`` is the stash item read at session start; it is
+        deleted only if it is still that item, so a set stashed in the meantime
+        is not dropped unseen.
+        """
         try:
-            from boto3.dynamodb.conditions import Attr
-            
             transaction_items = []
             
             # 1. Put session record
@@ -325,6 +799,10 @@ class QuestionBankDAL:
             user_assessment_key = f"{user_email}#{assessment_type}"
             current_time = datetime.utcnow().isoformat()
             
+            if usage is None:
+                usage = self.get_user_usage_bitmap(user_email, assessment_type)
+            updated_usage = usage.copy()
+            
             for category, questions in selected_questions.items():
                 for question in questions:
                     question_id = question['question_id']
@@ -340,6 +818,9 @@ class QuestionBankDAL:
                             'last_used_at': current_time,
                             'session_id': session_data['session_id']
                         }
+                        if question.get('ordinal') is not None:
+                            usage_item['ordinal'] = question['ordinal']
+                        updated_usage.add(question)
                         
                         transaction_items.append({
                             'Put': {
@@ -349,6 +830,36 @@ class QuestionBankDAL:
                             }
                         })
             
+            # 3. Swap in the updated usage bitmap (optimistic version check)
+            bitmap_put = {
+                'TableName': self.usage_table_name,
+                'Item': updated_usage.to_item(user_assessment_key)
+            }
+            if usage.version:
+                bitmap_put['ConditionExpression'] = 'usage_version = :expected_version'
+                bitmap_put['ExpressionAttributeValues'] = {':expected_version': usage.version}
+            else:
+                bitmap_put['ConditionExpression'] = 'attribute_not_exists(question_id)'
+            transaction_items.append({'Put': bitmap_put})
+            
+            # 4. Drop the pre-selection stash so it is never served twice
+            if consume_preselection:
+                stash_delete = {
+                    'TableName': self.usage_table_name,
+                    'Key': {
+                        'user_assessment_key': user_assessment_key,
+                        'question_id': PRESELECTION_KEY
+                    }
+                }
+                if consume_preselection.get('stash_id'):
+                    stash_delete['ConditionExpression'] = 'stash_id = :stash_id'
+                    stash_delete['ExpressionAttributeValues'] = {':stash_id': consume_preselection['stash_id']}
+                else:
+                    # Stashed before stash IDs existed
+                    stash_delete['ConditionExpression'] = 'created_at = :created_at'
+                    stash_delete['ExpressionAttributeValues'] = {':created_at': consume_preselection.get('created_at')}
+                transaction_items.append({'Delete': stash_delete})
+            
             # Execute transaction
             self.dynamodb.meta.client.transact_write_items(
                 TransactItems=transaction_items
@@ -376,7 +887,8 @@ class QuestionBankDAL:
                 ExpressionAttributeValues={':pk': pk}
             )
             
-            items = response.get('Items', [])
+            items = [item for item in response.get('Items', [])
+                     if item['question_id'] not in RESERVED_USAGE_KEYS]
             
             # Group by category
             stats_by_category = {}
@@ -485,6 +997,7 @@ def get_question_bank_dal() -> QuestionBankDAL:
 __all__ = [
     'QuestionBankDAL',
     'QuestionCategory', 
+    'QuestionUsageBitmap',
     'RepeatPolicy',
     'get_question_bank_dal'
 ]
\ No newline at end of file
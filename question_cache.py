@@ -0,0 +1,199 @@
+"""
+In-process Question Content Cache
+LRU cache of question items and pool manifests shared across requests in a
+Lambda container, invalidated by a global content version stamp
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_VERSION_CHECK_SECONDS = 30
+
+
+class QuestionContentCache:
+    """
+    LRU cache for question content keyed by question_id
+
+    Pool manifests (the ordered question IDs of a pool) are cached alongside
+    the content. Everything is dropped when the global content version read
+    through ``ensure_fresh`` changes. Cached items are shared between callers
+    and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = None, version_check_interval: float = None):
+        self.max_bytes = max_bytes or int(
+            os.environ.get('QUESTION_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        )
+        self.version_check_interval = (
+            version_check_interval if version_check_interval is not None
+            else float(os.environ.get('QUESTION_CACHE_VERSION_CHECK_SECONDS',
+                                      DEFAULT_VERSION_CHECK_SECONDS))
+        )
+
+        self._lock = threading.RLock()
+        self._questions: 'OrderedDict[str, Tuple[Dict[str, Any], int]]' = OrderedDict()
+        self._pools: 'OrderedDict[str, Tuple[Tuple[str, ...], int]]' = OrderedDict()
+        self._current_bytes = 0
+
+        self._version: Optional[int] = None
+        self._last_version_check = 0.0
+
+        self._stats = {
+            'question_hits': 0,
+            'question_misses': 0,
+            'pool_hits': 0,
+            'pool_misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'version_checks': 0
+        }
+
+    def ensure_fresh(self, fetch_version: Callable[[], int]) -> None:
+        """Drop cached content if the global version stamp has moved on"""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._last_version_check < self.version_check_interval:
+                return
+            self._last_version_check = now
+
+        try:
+            version = int(fetch_version())
+        except Exception as e:
+            # Serve from cache rather than failing the request
+            logger.warning(f"Failed to read question content version: {e}")
+            return
+
+        with self._lock:
+            self._stats['version_checks'] += 1
+            if self._version is not None and version != self._version:
+                logger.info(f"Question content version {self._version} -> {version}, clearing cache")
+                self._clear()
+                self._stats['invalidations'] += 1
+            self._version = version
+
+    @property
+    def version(self) -> Optional[int]:
+        """Content version the cached data belongs to (None until first check)"""
+        return self._version
+
+    def invalidate(self) -> None:
+        """Clear the cache and force a version re-read on next access"""
+        with self._lock:
+            self._clear()
+            self._version = None
+            self._stats['invalidations'] += 1
+
+    def get_question(self, question_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._questions.get(question_id)
+            if entry is None:
+                self._stats['question_misses'] += 1
+                return None
+            self._questions.move_to_end(question_id)
+            self._stats['question_hits'] += 1
+            return entry[0]
+
+    def put_question(self, item: Dict[str, Any]) -> None:
+        size = self._estimate_size(item)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            question_id = item['question_id']
+            if question_id in self._questions:
+                self._current_bytes -= self._questions.pop(question_id)[1]
+            self._questions[question_id] = (item, size)
+            self._current_bytes += size
+            self._evict()
+
+    def get_pool(self, pool_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached items of a pool, or None if any part was evicted"""
+        with self._lock:
+            entry = self._pools.get(pool_id)
+            if entry is None:
+                self._stats['pool_misses'] += 1
+                return None
+
+            items = []
+            for question_id in entry[0]:
+                question_entry = self._questions.get(question_id)
+                if question_entry is None:
+                    # Manifest is only useful with all of its content present
+                    self._current_bytes -= self._pools.pop(pool_id)[1]
+                    self._stats['pool_misses'] += 1
+                    return None
+                self._questions.move_to_end(question_id)
+                items.append(question_entry[0])
+
+            self._pools.move_to_end(pool_id)
+            self._stats['pool_hits'] += 1
+            return items
+
+    def put_pool(self, pool_id: str, items: List[Dict[str, Any]]) -> None:
+        for item in items:
+            self.put_question(item)
+        manifest = tuple(item['question_id'] for item in items)
+        size = self._estimate_size(manifest)
+        with self._lock:
+            if pool_id in self._pools:
+                self._current_bytes -= self._pools.pop(pool_id)[1]
+            self._pools[pool_id] = (manifest, size)
+            self._current_bytes += size
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache occupancy and hit rates"""
+        with self._lock:
+            question_lookups = self._stats['question_hits'] + self._stats['question_misses']
+            pool_lookups = self._stats['pool_hits'] + self._stats['pool_misses']
+            return {
+                **self._stats,
+                'question_hit_rate': self._stats['question_hits'] / question_lookups if question_lookups else 0.0,
+                'pool_hit_rate': self._stats['pool_hits'] / pool_lookups if pool_lookups else 0.0,
+                'cached_questions': len(self._questions),
+                'cached_pools': len(self._pools),
+                'bytes_used': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'content_version': self._version
+            }
+
+    def _clear(self) -> None:
+        self._questions.clear()
+        self._pools.clear()
+        self._current_bytes = 0
+
+    def _evict(self) -> None:
+        # Manifests are cheap to rebuild from a query, so they go first
+        while self._current_bytes > self.max_bytes and self._pools:
+            _, (_, size) = self._pools.popitem(last=False)
+            self._current_bytes -= size
+            self._stats['evictions'] += 1
+        while self._current_bytes > self.max_bytes and self._questions:
+            _, (_, size) = self._questions.popitem(last=False)
+            self._current_bytes -= size
+            self._stats['evictions'] += 1
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        return len(json.dumps(value, default=str))
+
+
+# Global instance
+_question_cache = None
+
+def get_question_cache() -> QuestionContentCache:
+    """Get global question content cache instance"""
+    global _question_cache
+    if _question_cache is None:
+        _question_cache = QuestionContentCache()
+    return _question_cache
+
+# Export
+__all__ = ['QuestionContentCache', 'get_question_cache']
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Bulk Question Import Pipeline
+Streams questions from knowledge base exports, JSON and CSV files into the
+question bank using chunked transactional writes on parallel writers
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Any, List, Iterable, Iterator, Optional
+
+from question_bank_dal import QuestionCategory, RepeatPolicy, get_question_bank_dal
+
+logger = logging.getLogger(__name__)
+
+# Questions per chunk; each chunk is one TransactWriteItems call
+BATCH_WRITE_LIMIT = 25
+
+# Pool counter updates per TransactWriteItems call when counters are applied
+COUNTER_UPDATE_LIMIT = 100
+
+SPEAKING_ASSESSMENT_TYPES = ('academic_speaking', 'general_speaking')
+
+# Knowledge base document -> (question category, content type)
+KNOWLEDGE_BASE_DOCUMENTS = {
+    'speaking_part_1_questions': ('speaking_part1', 'personal'),
+    'speaking_part_2_questions': ('speaking_part2', 'cue_card'),
+    'speaking_part_3_questions': ('speaking_part3', 'discussion')
+}
+
+NUMBERED_ITEM = re.compile(r'^(\d+)\.\s+(.*)$')
+
+VALID_CATEGORIES = {category.value for category in QuestionCategory}
+VALID_REPEAT_POLICIES = {policy.value for policy in RepeatPolicy}
+VALID_DIFFICULTIES = {'easy', 'medium', 'hard'}
+
+
+# ---------------------------------------------------------------------------
+# Source parsers (all generators yielding add_question-style specs)
+# ---------------------------------------------------------------------------
+
+def iter_knowledge_base_questions(path: str,
+                                  assessment_types: Iterable[str] = SPEAKING_ASSESSMENT_TYPES) -> Iterator[Dict[str, Any]]:
+    """
+    Parse a knowledge_base_export/*.txt document
+
+    Questions are numbered lines; unindented lines that follow belong to the
+    same question (Part 2 cue card points). Indented prose ends a question.
+    Documents that do not hold questions yield nothing.
+    """
+    assessment_types = tuple(assessment_types)
+    document_id = None
+    lines: List[str] = []
+
+    def flush():
+        if not lines:
+            return
+        category, content_type = KNOWLEDGE_BASE_DOCUMENTS[document_id]
+        content = {'type': content_type, 'text': lines[0], 'source': document_id}
+        if len(lines) > 1:
+            content['points'] = lines[1:]
+        for assessment_type in assessment_types:
+            yield {
+                'assessment_type': assessment_type,
+                'category': category,
+                'content': dict(content)
+            }
+        lines.clear()
+
+    with open(path, encoding='utf-8') as f:
+        for raw_line in f:
+            if raw_line.startswith('Document ID:'):
+                document_id = raw_line.split(':', 1)[1].strip()
+                continue
+            if document_id not in KNOWLEDGE_BASE_DOCUMENTS:
+                continue
+
+            line = raw_line.rstrip('\n')
+            match = NUMBERED_ITEM.match(line)
+            if match:
+                yield from flush()
+                lines.append(match.group(2).strip())
+            elif lines and line.strip() and not line[0].isspace():
+                lines.append(line.strip())
+            else:
+                yield from flush()
+
+    yield from flush()
+
+
+def iter_json_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """Parse a JSON array or JSON-lines file of question specs"""
+    with open(path, encoding='utf-8') as f:
+        first_char = f.read(1)
+        f.seek(0)
+        if first_char == '[':
+            for spec in json.load(f, parse_float=Decimal):
+                yield spec
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line, parse_float=Decimal)
+
+
+def iter_csv_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Parse a CSV file of questions
+
+    Required columns: assessment_type, category, text. Optional columns
+    difficulty, tags (semicolon separated) and repeat_policy are mapped to
+    question attributes; any other column is stored in the question content.
+    """
+    reserved = {'assessment_type', 'category', 'difficulty', 'tags', 'repeat_policy'}
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            content = {key: value for key, value in row.items()
+                       if key not in reserved and value not in (None, '')}
+            spec = {
+                'assessment_type': row.get('assessment_type', ''),
+                'category': row.get('category', ''),
+                'content': content
+            }
+            if row.get('difficulty'):
+                spec['difficulty'] = row['difficulty']
+            if row.get('tags'):
+                spec['tags'] = [tag.strip() for tag in row['tags'].split(';') if tag.strip()]
+            if row.get('repeat_policy'):
+                spec['repeat_policy'] = row['repeat_policy']
+            yield spec
+
+
+def iter_source_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """Dispatch to the parser matching the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.txt':
+        return iter_knowledge_base_questions(path)
+    if extension in ('.json', '.jsonl'):
+        return iter_json_questions(path)
+    if extension == '.csv':
+        return iter_csv_questions(path)
+    raise ValueError(f"Unsupported question source: {path}")
+
+
+def validate_question_spec(spec: Dict[str, Any], valid_assessment_types: Iterable[str]) -> List[str]:
+    """Return a list of validation errors for a question spec (empty if valid)"""
+    errors = []
+    assessment_type = spec.get('assessment_type')
+    category = spec.get('category')
+
+    if assessment_type not in valid_assessment_types:
+        errors.append(f"invalid assessment_type: {assessment_type!r}")
+    if category not in VALID_CATEGORIES:
+        errors.append(f"invalid category: {category!r}")
+    elif assessment_type and category.split('_')[0] not in assessment_type:
+        errors.append(f"category {category} does not apply to {assessment_type}")
+
+    content = spec.get('content')
+    if not isinstance(content, dict) or not str(content.get('text', '')).strip():
+        errors.append("content.text is required")
+
+    if spec.get('difficulty', 'medium') not in VALID_DIFFICULTIES:
+        errors.append(f"invalid difficulty: {spec.get('difficulty')!r}")
+    if spec.get('repeat_policy', RepeatPolicy.UNIQUE.value) not in VALID_REPEAT_POLICIES:
+        errors.append(f"invalid repeat_policy: {spec.get('repeat_policy')!r}")
+
+    return errors
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class ImportStats:
+    """Thread-safe counters for an import run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.parsed = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.existing = 0
+        self.skipped = 0
+        self.written = 0
+        self.failed = 0
+        self.batch_calls = 0
+        self.retries = 0
+        self.counter_updates = 0
+        self.counter_failures = 0
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            'parsed': self.parsed,
+            'rejected': self.rejected,
+            'duplicates': self.duplicates,
+            'already_present': self.existing,
+            'skipped_from_checkpoint': self.skipped,
+            'written': self.written,
+            'failed': self.failed,
+            'batch_calls': self.batch_calls,
+            'retries': self.retries,
+            'counter_updates': self.counter_updates,
+            'counter_failures': self.counter_failures,
+            'elapsed_seconds': round(elapsed, 3),
+            'items_per_second': round(self.written / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+class QuestionImportPipeline:
+    """
+    Streaming question import
+
+    Specs are validated and each question is sharded by its own content
+    hash, so a question lands on the same shard whatever else is in the
+    batch and re-imports never move it. Specs are grouped into chunks and
+    written by a pool of writer threads, one transaction per chunk. Pool
+    counter increments for the questions that landed are summed per pool
+    and applied once at the end of the run.
+    Completed chunk numbers and the counter increments not yet applied are
+    recorded in an optional checkpoint file so an interrupted import can be
+    resumed with the same sources.
+    """
+
+    def __init__(self, question_dal=None, writers: int = 4, max_retries: int = 8,
+                 checkpoint_path: Optional[str] = None):
+        self.question_dal = question_dal or get_question_bank_dal()
+        self.writers = max(1, writers)
+        self.max_retries = max_retries
+        self.checkpoint_path = checkpoint_path
+        self.shard_count = self.question_dal.shard_count
+        self.table_name = self.question_dal.questions_table_name
+        # Clients are thread-safe, resources are not; the resource's client
+        # still accepts native Python types
+        self.client = self.question_dal.dynamodb.meta.client
+
+        self._checkpoint_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._counter_deltas: Dict[tuple, int] = {}
+        self._completed_chunks = self._load_checkpoint()
+
+    def run(self, specs: Iterable[Dict[str, Any]], bump_content_version: bool = True) -> Dict[str, Any]:
+        """Import question specs and return a throughput report"""
+        stats = ImportStats()
+        results = self._write_chunks(self._prepare(specs, stats), stats)
+        self._apply_counter_deltas(stats)
+
+        if bump_content_version and stats.written:
+            try:
+                self.question_dal.bump_content_version()
+            except Exception as e:
+                logger.error(f"Failed to bump question content version after import: {e}")
+
+        report = stats.report()
+        report['success'] = stats.failed == 0 and stats.counter_failures == 0
+        report['results'] = results
+        return report
+
+    def _prepare(self, specs: Iterable[Dict[str, Any]], stats: ImportStats) -> Iterator[Dict[str, Any]]:
+        """Validate, de-duplicate and shard specs without materialising the stream"""
+        valid_assessment_types = set(self.question_dal.question_requirements)
+        seen_ids = set()
+
+        for spec in specs:
+            stats.add(parsed=1)
+            errors = validate_question_spec(spec, valid_assessment_types)
+            if errors:
+                stats.add(rejected=1)
+                logger.warning(f"Rejected question spec: {'; '.join(errors)}")
+                continue
+
+            question_id = self._question_id(spec)
+            if question_id in seen_ids:
+                stats.add(duplicates=1)
+                continue
+            seen_ids.add(question_id)
+
+            pool_key = f"{spec['assessment_type']}#{spec['category']}"
+            shard = self._question_shard(question_id)
+
+            yield {
+                'pool_id': f"{pool_key}#{shard}",
+                'question_id': question_id,
+                'assessment_type': spec['assessment_type'],
+                'category': spec['category'],
+                'shard': shard,
+                'content': spec['content'],
+                'difficulty': spec.get('difficulty', 'medium'),
+                'tags': spec.get('tags') or [],
+                'repeat_policy': spec.get('repeat_policy', RepeatPolicy.UNIQUE.value),
+                'active': True,
+                'created_at': datetime.utcnow().isoformat(),
+                'version': 1
+            }
+
+    def _write_chunks(self, items: Iterator[Dict[str, Any]], stats: ImportStats) -> List[Dict[str, Any]]:
+        results = []
+        in_flight = {}
+        max_in_flight = self.writers * 2  # bounds memory while streaming
+
+        with ThreadPoolExecutor(max_workers=self.writers) as executor:
+            for chunk_index, chunk in enumerate(self._chunked(items, BATCH_WRITE_LIMIT)):
+                if chunk_index in self._completed_chunks:
+                    stats.add(skipped=len(chunk))
+                    continue
+
+                try:
+                    self._assign_ordinals(chunk)
+                except Exception as e:
+                    logger.error(f"Reserving ordinals for chunk {chunk_index} failed: {e}")
+                    stats.add(failed=len(chunk))
+                    results.extend(self._chunk_results(chunk, {item['question_id'] for item in chunk}))
+                    continue
+                future = executor.submit(self._write_chunk, chunk, stats)
+                in_flight[future] = (chunk_index, chunk)
+
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        results.extend(self._collect(finished, in_flight.pop(finished)))
+
+            for finished in list(in_flight):
+                results.extend(self._collect(finished, in_flight.pop(finished)))
+
+        return results
+
+    def _collect(self, future, chunk_info) -> List[Dict[str, Any]]:
+        chunk_index, chunk = chunk_info
+        failed_ids = future.result()
+        if not failed_ids:
+            self._mark_chunk_complete(chunk_index)
+        return self._chunk_results(chunk, failed_ids)
+
+    @staticmethod
+    def _chunk_results(chunk: List[Dict[str, Any]], failed_ids: set) -> List[Dict[str, Any]]:
+        return [{
+            'success': item['question_id'] not in failed_ids,
+            'question_id': item['question_id'],
+            'pool_id': item['pool_id'],
+            'shard': item['shard']
+        } for item in chunk]
+
+    def _assign_ordinals(self, chunk: List[Dict[str, Any]]) -> None:
+        """Reserve one contiguous ordinal range per assessment type in the chunk"""
+        by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for item in chunk:
+            by_type.setdefault(item['assessment_type'], []).append(item)
+        for assessment_type, type_items in by_type.items():
+            first = self.question_dal.allocate_question_ordinals(assessment_type, len(type_items))
+            for offset, item in enumerate(type_items):
+                item['ordinal'] = first + offset
+
+    def _write_chunk(self, chunk: List[Dict[str, Any]], stats: ImportStats) -> set:
+        """
+        Write one chunk as a single transaction, retrying on throttling and
+        connection errors; returns IDs that never landed
+
+        Questions that already exist (a re-run of the same source) are dropped
+        from the chunk so their counters are not incremented twice. Any other
+        error fails this chunk only; the rest of the import carries on.
+        """
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        pending = list(chunk)
+        attempt = 0
+        while pending:
+            try:
+                self.client.transact_write_items(TransactItems=self._chunk_actions(pending))
+                stats.add(batch_calls=1, written=len(pending))
+                self._add_counter_deltas(pending)
+                pending = []
+                break
+            except ClientError as e:
+                stats.add(batch_calls=1)
+                reasons = e.response.get('CancellationReasons', [])
+                existing = {
+                    pending[index]['question_id']
+                    for index, reason in enumerate(reasons[:len(pending)])
+                    if reason.get('Code') == 'ConditionalCheckFailed'
+                }
+                if existing:
+                    stats.add(existing=len(existing))
+                    pending = [item for item in pending if item['question_id'] not in existing]
+                    continue
+                logger.warning(f"TransactWriteItems failed (attempt {attempt + 1}): {e}")
+            except BotoCoreError as e:
+                stats.add(batch_calls=1)
+                logger.warning(f"TransactWriteItems failed (attempt {attempt + 1}): {e}")
+            except Exception as e:
+                # Not retryable (bad item, bug); only this chunk is lost
+                logger.error(f"Chunk of {len(pending)} questions failed: {e}")
+                break
+
+            attempt += 1
+            if attempt > self.max_retries:
+                break
+            stats.add(retries=len(pending))
+            # Exponential backoff with full jitter
+            time.sleep(random.uniform(0, min(5.0, 0.05 * (2 ** attempt))))
+
+        failed_ids = {item['question_id'] for item in pending}
+        if failed_ids:
+            stats.add(failed=len(failed_ids))
+            logger.error(f"Giving up on {len(failed_ids)} questions after {attempt} retries")
+        return failed_ids
+
+    def _chunk_actions(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Conditional question puts, in chunk order so cancellation reasons line up"""
+        return [{
+            'Put': {
+                'TableName': self.table_name,
+                'Item': item,
+                'ConditionExpression': 'attribute_not_exists(question_id)'
+            }
+        } for item in items]
+
+    def _add_counter_deltas(self, items: List[Dict[str, Any]]) -> None:
+        with self._counter_lock:
+            for item in items:
+                key = (item['assessment_type'], item['category'], item['shard'])
+                self._counter_deltas[key] = self._counter_deltas.get(key, 0) + 1
+
+    def _apply_counter_deltas(self, stats: ImportStats) -> None:
+        """Increment each touched pool counter once for the whole run"""
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        with self._counter_lock:
+            deltas = sorted(self._counter_deltas.items())
+        for start in range(0, len(deltas), COUNTER_UPDATE_LIMIT):
+            group = deltas[start:start + COUNTER_UPDATE_LIMIT]
+            actions = [self.question_dal.pool_counter_update(
+                assessment_type, category, shard, total_delta=delta, active_delta=delta
+            ) for (assessment_type, category, shard), delta in group]
+
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.client.transact_write_items(TransactItems=actions)
+                    stats.add(counter_updates=len(group))
+                    with self._counter_lock:
+                        for key, delta in group:
+                            self._counter_deltas[key] -= delta
+                            if not self._counter_deltas[key]:
+                                del self._counter_deltas[key]
+                    break
+                except (BotoCoreError, ClientError) as e:
+                    logger.warning(f"Pool counter update failed (attempt {attempt + 1}): {e}")
+                    if attempt < self.max_retries:
+                        time.sleep(random.uniform(0, min(5.0, 0.05 * (2 ** (attempt + 1)))))
+            else:
+                stats.add(counter_failures=len(group))
+                logger.error(f"Giving up on {len(group)} pool counter updates; "
+                             f"they stay in the checkpoint for the next run")
+
+        self._save_checkpoint()
+
+    @staticmethod
+    def _chunked(items: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _question_shard(self, question_id: str) -> int:
+        """Shard from the question's own content hash"""
+        return int(question_id.rsplit('_', 1)[1], 16) % self.shard_count
+
+    @staticmethod
+    def _question_id(spec: Dict[str, Any]) -> str:
+        """Deterministic ID so re-running an import overwrites rather than duplicates"""
+        canonical = json.dumps(
+            [spec['assessment_type'], spec['category'], spec['content']],
+            sort_keys=True, default=str
+        )
+        digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+        prefix = f"{spec['assessment_type']}_{spec['category']}".replace('_', '')[:20]
+        return f"{prefix}_{digest}"
+
+    def _load_checkpoint(self) -> set:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        completed = set(checkpoint.get('completed_chunks', []))
+        for assessment_type, category, shard, delta in checkpoint.get('counter_deltas', []):
+            self._counter_deltas[(assessment_type, category, shard)] = delta
+        logger.info(f"Resuming import: {len(completed)} chunks already written")
+        return completed
+
+    def _mark_chunk_complete(self, chunk_index: int) -> None:
+        if not self.checkpoint_path:
+            return
+        with self._checkpoint_lock:
+            self._completed_chunks.add(chunk_index)
+        self._save_checkpoint()
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        with self._checkpoint_lock:
+            with self._counter_lock:
+                counter_deltas = [list(key) + [delta] for key, delta in sorted(self._counter_deltas.items())]
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'completed_chunks': sorted(self._completed_chunks),
+                    'counter_deltas': counter_deltas,
+                    'updated_at': datetime.utcnow().isoformat()
+                }, f)
+            os.replace(tmp_path, self.checkpoint_path)
+
+
+def main(argv: List[str] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Bulk import questions into the question bank')
+    parser.add_argument('sources', nargs='+',
+                        help='knowledge_base_export/*.txt, .json/.jsonl or .csv files')
+    parser.add_argument('--writers', type=int, default=4, help='parallel writer threads')
+    parser.add_argument('--checkpoint', help='checkpoint file for resumable imports')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    def all_specs():
+        for path in args.sources:
+            yield from iter_source_questions(path)
+
+    pipeline = QuestionImportPipeline(writers=args.writers, checkpoint_path=args.checkpoint)
+    report = pipeline.run(all_specs())
+    report.pop('results')
+
+    print("📦 Question import report")
+    print("=" * 40)
+    for key, value in report.items():
+        print(f"   {key}: {value}")
+
+    return 0 if report['success'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
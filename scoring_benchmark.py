@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Scoring Benchmark and Golden-set Regression Suite
+Runs every band scorer over a deterministic synthetic corpus, reports
+throughput, latency percentiles and allocations, and checks band outputs
+against scoring_golden.json so performance work cannot silently move scores
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_golden.json')
+CORPUS_SEED = 20250117
+ITEMS_PER_LENGTH = 20
+
+# (responses per conversation, target words per response)
+SPEAKING_LENGTHS = {
+    'short': (4, 20),
+    'medium': (8, 60),
+    'long': (14, 150)
+}
+
+# Target words per essay
+ESSAY_LENGTHS = {
+    'short': 90,
+    'standard': 260,
+    'long': 480
+}
+
+VOCABULARY = (
+    "people city family work study time technology education environment government society "
+    "children young older change future country culture important different problem solution "
+    "think believe because although however therefore which that when if moreover furthermore "
+    "firstly secondly in addition nevertheless overall in conclusion according to shows "
+    "illustrates demonstrates significant approximately dramatically proportion sustainable "
+    "multicultural authentic comprehensive increasingly have been would use which is having "
+    "despite could should my our their many some most often usually sometimes never always "
+    "is are was were will can may might must do does did make take give get go come see know"
+).split()
+
+STAGES = ['part1', 'part1', 'part2', 'part3', 'part3']
+
+NOTES = [
+    {'criterion': 'Fluency and Coherence', 'note': 'Some hesitation before complex answers'},
+    {'criterion': 'Fluency and Coherence', 'note': 'Slow speech when describing the cue card'},
+    {'criterion': 'Pronunciation', 'note': 'A few words were unclear'},
+    {'criterion': 'Pronunciation', 'note': 'Occasional listener effort required'},
+    {'criterion': 'Lexical Resource', 'note': 'Good topic vocabulary'}
+]
+
+SPEAKING_CRITERIA = ["Fluency and Coherence", "Lexical Resource", "Grammatical Range and Accuracy", "Pronunciation"]
+WRITING_TASK1_CRITERIA = ["Task Achievement", "Coherence and Cohesion", "Lexical Resource", "Grammatical Range and Accuracy"]
+WRITING_TASK2_CRITERIA = ["Task Response", "Coherence and Cohesion", "Lexical Resource", "Grammatical Range and Accuracy"]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(max(1, words))).capitalize()
+
+
+def _passage(rng: random.Random, words: int) -> str:
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(6, 22))
+        sentences.append(_sentence(rng, length) + rng.choice(['.', '.', '.', '?', '!']))
+        remaining -= length
+    return ' '.join(sentences)
+
+
+def build_corpus(seed: int = CORPUS_SEED) -> Dict[str, List[Dict[str, Any]]]:
+    """Deterministic synthetic conversations, essays and criterion score sets"""
+    rng = random.Random(seed)
+    corpus = {'speaking': [], 'writing': [], 'speaking_scores': [], 'writing_scores': []}
+    bands = [score / 2 for score in range(6, 19)]
+
+    for length, (responses, words) in SPEAKING_LENGTHS.items():
+        for index in range(ITEMS_PER_LENGTH):
+            user_responses = []
+            for turn in range(responses):
+                text = _passage(rng, max(1, int(rng.gauss(words, words / 3))))
+                word_count = len(text.split())
+                user_responses.append({
+                    'text': text,
+                    'word_count': word_count,
+                    'duration': round(word_count / rng.uniform(1.2, 3.6), 2),
+                    'stage': STAGES[turn % len(STAGES)]
+                })
+            corpus['speaking'].append({
+                'id': f'speaking-{length}-{index:02d}',
+                'conversation': {
+                    'session_id': f'speaking-{length}-{index:02d}',
+                    'user_responses': user_responses,
+                    'evaluation_notes': rng.sample(NOTES, rng.randint(0, len(NOTES))),
+                    'conversation_flow': {}
+                },
+                'transcription': ' '.join(response['text'] for response in user_responses)
+            })
+
+    for length, words in ESSAY_LENGTHS.items():
+        for index in range(ITEMS_PER_LENGTH):
+            paragraphs = rng.randint(3, 5)
+            essay = '\n\n'.join(_passage(rng, words // paragraphs) for _ in range(paragraphs))
+            corpus['writing'].append({
+                'id': f'writing-{length}-{index:02d}',
+                'essay': essay,
+                'prompt': 'Some people believe technology has made life more complicated. Discuss.'
+            })
+
+    for index in range(ITEMS_PER_LENGTH * 3):
+        corpus['speaking_scores'].append({
+            'id': f'speaking-scores-{index:02d}',
+            'scores': {criterion: rng.choice(bands) for criterion in SPEAKING_CRITERIA}
+        })
+        corpus['writing_scores'].append({
+            'id': f'writing-scores-{index:02d}',
+            'task1': {criterion: rng.choice(bands) for criterion in WRITING_TASK1_CRITERIA},
+            'task2': {criterion: rng.choice(bands) for criterion in WRITING_TASK2_CRITERIA}
+        })
+
+    return corpus
+
+
+class Evaluator:
+    """A scorer under benchmark: a corpus section and a function to its band output"""
+
+    def __init__(self, name: str, corpus: str, score: Callable, batch: bool = False):
+        self.name = name
+        self.corpus = corpus
+        self.score = score
+        self.batch = batch
+
+    def run(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.batch:
+            return self.score(items)
+        return [self.score(item) for item in items]
+
+
+def load_evaluators() -> Tuple[Dict[str, Evaluator], Dict[str, str]]:
+    """Return available evaluators and the reasons any were skipped"""
+    evaluators = {}
+    skipped = {}
+
+    from ielts_band_scoring import IELTSBandScorer
+    from assessment_criteria.speaking_criteria import calculate_speaking_band_score
+    from assessment_criteria.writing_criteria import calculate_writing_band_score
+
+    scorer = IELTSBandScorer()
+
+    def band_scorer(item):
+        result = scorer.evaluate_speaking_assessment(item['conversation'])
+        return {'overall': result['overall_band_score'], 'criteria': result['criterion_scores']}
+
+    evaluators['ielts_band_scorer'] = Evaluator('ielts_band_scorer', 'speaking', band_scorer)
+    evaluators['calculate_speaking_band_score'] = Evaluator(
+        'calculate_speaking_band_score', 'speaking_scores',
+        lambda item: {'overall': calculate_speaking_band_score(item['scores'])}
+    )
+    evaluators['calculate_writing_band_score'] = Evaluator(
+        'calculate_writing_band_score', 'writing_scores',
+        lambda item: {'overall': calculate_writing_band_score(item['task1'], item['task2'])}
+    )
+
+    try:
+        from ielts_batch_scoring import score_speaking_batch
+
+        def batch_scorer(items):
+            results = score_speaking_batch([item['conversation'] for item in items])
+            return [{'overall': r['overall_band_score'], 'criteria': r['criterion_scores']} for r in results]
+
+        evaluators['ielts_batch_scoring'] = Evaluator('ielts_batch_scoring', 'speaking', batch_scorer, batch=True)
+    except ImportError as e:
+        skipped['ielts_batch_scoring'] = str(e)
+
+    try:
+        import lambda_handler
+
+        def nova_micro_speaking(item):
+            # The pronunciation estimate is randomised, so pin it per item
+            random.seed(item['id'])
+            result = lambda_handler.evaluate_speaking_with_nova_micro(item['transcription'], {}, 'academic_speaking')
+            return {'overall': result['overall_band'], 'criteria': result['criteria_scores']}
+
+        def nova_micro_writing(item):
+            random.seed(item['id'])
+            result = lambda_handler.evaluate_writing_with_nova_micro(item['essay'], item['prompt'], {}, 'academic_writing')
+            return {'overall': result['overall_band'], 'criteria': result['criteria_scores']}
+
+        evaluators['nova_micro_speaking'] = Evaluator('nova_micro_speaking', 'speaking', nova_micro_speaking)
+        evaluators['nova_micro_writing'] = Evaluator('nova_micro_writing', 'writing', nova_micro_writing)
+    except ImportError as e:
+        skipped['nova_micro_speaking'] = skipped['nova_micro_writing'] = str(e)
+
+    return evaluators, skipped
+
+
+def compute_outputs(evaluators: Dict[str, Evaluator],
+                    corpus: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Band output of every evaluator for every corpus item, keyed by item id"""
+    outputs = {}
+    for name, evaluator in evaluators.items():
+        items = corpus[evaluator.corpus]
+        outputs[name] = {item['id']: output for item, output in zip(items, evaluator.run(items))}
+    return outputs
+
+
+def load_golden(path: str = GOLDEN_PATH) -> Dict[str, Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)['outputs']
+
+
+def write_golden(outputs: Dict[str, Dict[str, Any]], path: str = GOLDEN_PATH) -> None:
+    with open(path, 'w') as f:
+        json.dump({'corpus_seed': CORPUS_SEED, 'outputs': outputs}, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def compare_outputs(actual: Dict[str, Dict[str, Any]], golden: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Describe every band that differs from the golden file"""
+    mismatches = []
+    for name, outputs in actual.items():
+        expected_outputs = golden.get(name)
+        if expected_outputs is None:
+            mismatches.append(f"{name}: not in golden file")
+            continue
+        for item_id, output in outputs.items():
+            expected = expected_outputs.get(item_id)
+            if output != expected:
+                mismatches.append(f"{name} {item_id}: expected {expected}, got {output}")
+    return mismatches
+
+
+def benchmark(evaluator: Evaluator, items: List[Dict[str, Any]], iterations: int) -> Dict[str, Any]:
+    """Throughput, latency percentiles and allocation figures for one evaluator"""
+    evaluator.run(items)  # Warm caches and lazy imports
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if evaluator.batch:
+            call_started = time.perf_counter()
+            evaluator.run(items)
+            # Batch scorers only have an amortised per-item latency
+            latencies.extend([(time.perf_counter() - call_started) / len(items)] * len(items))
+        else:
+            for item in items:
+                call_started = time.perf_counter()
+                evaluator.score(item)
+                latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    evaluator.run(items)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'evaluator': evaluator.name,
+        'items': len(items) * iterations,
+        'items_per_second': len(items) * iterations / elapsed if elapsed else 0.0,
+        'p50_ms': quantiles[49] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'peak_kib': peak / 1024,
+        'allocated_blocks': allocations,
+        'batch': evaluator.batch
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark band scorers and check them against the golden set")
+    parser.add_argument('--iterations', type=int, default=5, help="Timed passes over the corpus per evaluator")
+    parser.add_argument('--only', action='append', help="Limit to the named evaluator (repeatable)")
+    parser.add_argument('--update-golden', action='store_true', help="Rewrite the golden file from current outputs")
+    parser.add_argument('--skip-golden', action='store_true', help="Benchmark without checking the golden file")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus()
+    evaluators, skipped = load_evaluators()
+    if args.only:
+        evaluators = {name: evaluator for name, evaluator in evaluators.items() if name in args.only}
+
+    exit_code = 0
+    mismatches = []
+    if args.update_golden:
+        if skipped:
+            print(f"Refusing to update golden file with evaluators unavailable: {', '.join(skipped)}")
+            return 1
+        write_golden(compute_outputs(evaluators, corpus))
+        print(f"Golden file written to {GOLDEN_PATH}")
+    elif not args.skip_golden:
+        mismatches = compare_outputs(compute_outputs(evaluators, corpus), load_golden())
+        exit_code = 1 if mismatches else 0
+
+    results = [benchmark(evaluator, corpus[evaluator.corpus], args.iterations) for evaluator in evaluators.values()]
+
+    if args.json:
+        print(json.dumps({'results': results, 'skipped': skipped, 'golden_mismatches': mismatches}, indent=2))
+        return exit_code
+
+    print(f"{'evaluator':32} {'items/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>9} {'blocks':>8}")
+    for result in results:
+        marker = '*' if result['batch'] else ' '
+        print(f"{result['evaluator'] + marker:32} {result['items_per_second']:10.1f} {result['p50_ms']:9.3f} "
+              f"{result['p99_ms']:9.3f} {result['peak_kib']:9.1f} {result['allocated_blocks']:8d}")
+    if any(result['batch'] for result in results):
+        print("* batch scorer: latency is amortised per item")
+    for name, reason in skipped.items():
+        print(f"skipped {name}: {reason}")
+
+    if mismatches:
+        print(f"\n{len(mismatches)} band outputs differ from the golden file:")
+        for mismatch in mismatches[:20]:
+            print(f"  {mismatch}")
+    elif not args.skip_golden and not args.update_golden:
+        print("\nAll band outputs match the golden file")
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
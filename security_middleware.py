@@ -14,6 +14,8 @@ import jsonschema
 from jsonschema import validate, ValidationError
 from flask import request, jsonify, current_app, g
 
+from audio_ingest import check_base64_audio, AudioIngestError
+
 logger = logging.getLogger(__name__)
 
 # Request schemas for validation
@@ -142,22 +144,17 @@ class InputSanitizer:
     
     @staticmethod
     def sanitize_audio_data(audio_data: str) -> str:
-        """Validate base64 audio data"""
+        """Validate base64 audio data without decoding it"""
         if not isinstance(audio_data, str):
             raise SecurityValidationError("Invalid audio data format")
         
-        # Check if it's valid base64
+        # Size comes from the encoded length and the alphabet is checked in
+        # place, so the payload is decoded once, later, by audio_ingest
         try:
-            import base64
-            decoded = base64.b64decode(audio_data, validate=True)
-            
-            # Check size limits
-            if len(decoded) > MAX_CONTENT_LENGTHS['audio']:
-                raise SecurityValidationError("Audio data too large")
-            
+            check_base64_audio(audio_data, MAX_CONTENT_LENGTHS['audio'])
             return audio_data
-        except Exception:
-            raise SecurityValidationError("Invalid base64 audio data")
+        except AudioIngestError as e:
+            raise SecurityValidationError(e.message if e.status_code == 413 else "Invalid base64 audio data")
     
     @staticmethod
     def sanitize_json_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -298,12 +298,20 @@ class MobileAPIClient {
     // Nova Micro writing assessment (uses regional endpoint)
     async submitWritingAssessment(essayText, prompt, assessmentType = 'academic_writing') {
         try {
-            const response = await this.makeAPICall('/api/nova-micro/writing', 'POST', {
+            // Same submission id on every retry so the server evaluates once
+            const submissionId = `writing_${Date.now()}_${Math.random().toString(36).slice(2, 10)}`;
+            let response = await this.makeAPICall('/api/nova-micro/writing', 'POST', {
                 essay_text: essayText,
                 prompt: prompt,
-                assessment_type: assessmentType
+                assessment_type: assessmentType,
+                submission_id: submissionId
             });
-            
+
+            // Evaluation is queued; poll the result endpoint until it finishes
+            if (response.job_id) {
+                response = await this.waitForAssessmentResult(response.job_id);
+            }
+
             return {
                 success: true,
                 data: response
@@ -315,6 +323,27 @@ class MobileAPIClient {
             };
         }
     }
+
+    async waitForAssessmentResult(jobId, maxPolls = 60, intervalMs = 2000) {
+        // Jobs are only returned to the session that submitted them
+        const session = this.sessionId ? `&session_id=${encodeURIComponent(this.sessionId)}` : '';
+        for (let poll = 1; poll <= maxPolls; poll++) {
+            const job = await this.makeAPICall(
+                `/api/get-assessment-result?job_id=${encodeURIComponent(jobId)}${session}`, 'GET'
+            );
+
+            if (job.status === 'completed') {
+                return job.result;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Assessment evaluation failed');
+            }
+            if (poll < maxPolls) {
+                await new Promise(resolve => setTimeout(resolve, intervalMs));
+            }
+        }
+        throw new Error('Assessment evaluation is taking longer than expected');
+    }
     
     // In-app purchase verification
     async verifyApplePurchase(receiptData, productId) {
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the audio chunk protocol, reassembly and jitter buffers
+"""
+
+import base64
+import json
+
+import pytest
+
+import nova_sonic_streaming
+from audio_chunks import (
+    AudioChunk, ChunkError, FLAG_START_OF_TURN, JitterBuffer, ReassemblyBuffer, pack_chunk, unpack_chunk
+)
+from nova_sonic_streaming import ConnectionStateStore, NovaSonicStreamManager, handle_websocket_event
+
+
+def chunk(sequence, payload=b'x', timestamp=None, turn=0):
+    return AudioChunk(sequence, sequence * 20 if timestamp is None else timestamp, payload, turn)
+
+
+def test_header_round_trip_and_rejects_bad_frames():
+    original = AudioChunk(70000, 123456, b'\x01\x02', 3, FLAG_START_OF_TURN)
+    assert unpack_chunk(pack_chunk(original)) == original
+    with pytest.raises(ChunkError):
+        unpack_chunk(b'\x01\x00')
+    with pytest.raises(ChunkError):
+        unpack_chunk(b'\x09' + pack_chunk(original)[1:])
+
+
+def test_reassembly_reorders_drops_duplicates_and_declares_gaps():
+    buffer = ReassemblyBuffer(window=3)
+    delivered = []
+    for sequence in (0, 2, 1, 1, 4, 5, 6, 3, 7):
+        delivered += [item.sequence for item in buffer.push(chunk(sequence))]
+
+    # 3 never arrived in time: the window filled with 4, 5 and 6, so it was skipped and is late
+    assert delivered == [0, 1, 2, 4, 5, 6, 7]
+    metrics = buffer.metrics()
+    assert (metrics['duplicates'], metrics['late'], metrics['lost'], metrics['reordered']) == (1, 1, 1, 4)
+    assert metrics['loss_rate'] == pytest.approx(1 / 8)
+    assert buffer.gaps == [(3, 3)]
+
+    buffer.push(chunk(9))
+    assert [item.sequence for item in buffer.flush()] == [9]
+    assert buffer.metrics()['lost'] == 2
+
+
+def test_jitter_buffer_adapts_delay_and_conceals_loss():
+    steady = JitterBuffer()
+    for sequence in range(50):
+        steady.push(chunk(sequence), 1000 + sequence * 20, chunk_ms=20)
+    assert steady.target_delay_ms == steady.min_delay_ms
+
+    jittery = JitterBuffer()
+    for sequence in range(50):
+        jittery.push(chunk(sequence), 1000 + sequence * 20 + (60 if sequence % 2 else 0), chunk_ms=20)
+    assert jittery.jitter_ms > 30
+    assert jittery.target_delay_ms > steady.target_delay_ms
+
+    playback = JitterBuffer(initial_delay_ms=40)
+    for sequence in (0, 2, 3):
+        playback.push(chunk(sequence), 1000 + sequence * 20)
+    assert playback.pop(1000) == ('wait', None)
+    assert playback.pop(1040)[0] == 'play'
+    assert playback.pop(1060) == ('conceal', None)
+    assert playback.pop(1080)[1].sequence == 2
+    playback.push(chunk(1), 1200)
+    assert playback.metrics()['late'] == 1
+
+
+def test_sequenced_stream_reorders_input_and_numbers_output(monkeypatch):
+    monkeypatch.setenv('NOVA_SONIC_LOCAL_STREAM', 'true')
+    manager = NovaSonicStreamManager(ConnectionStateStore(table_name=''))
+    monkeypatch.setattr(nova_sonic_streaming, '_stream_manager', manager)
+    event = lambda route, body=None, binary=False: {'requestContext': {'routeKey': route, 'connectionId': 'conn-1'},
+                                                    'body': body, 'isBase64Encoded': binary}
+    sent = []
+    handle_websocket_event(event('$connect'), None, sent.append)
+    handle_websocket_event(event('nova-sonic-stream', json.dumps({'type': 'start', 'chunk_protocol': 1})),
+                           None, sent.append)
+    assert json.loads(sent[0])['jitter_buffer']['chunk_protocol'] == 1
+
+    # 100 ms chunks of 16 kHz audio: 2 arrives before 1, 1 is repeated, 3 is lost
+    audio = bytes(3200)
+    for sequence in (0, 2, 1, 1, 4):
+        frame = pack_chunk(AudioChunk(sequence, sequence * 100, audio))
+        handle_websocket_event(event('$default', base64.b64encode(frame).decode(), True), None, sent.append)
+    handle_websocket_event(event('nova-sonic-stream', json.dumps({'type': 'end_turn'})), None, sent.append)
+
+    replies = [json.loads(item) for item in sent[1:] if isinstance(item, str)]
+    assert replies[0]['text'] == '[0.5 seconds of speech]'  # four chunks plus 100 ms of concealment
+    metrics = replies[-1]['input_metrics']
+    assert (metrics['reordered'], metrics['duplicates'], metrics['lost'], metrics['concealed_ms']) == (2, 1, 1, 100)
+
+    frames = [unpack_chunk(item) for item in sent if isinstance(item, bytes)]
+    assert [frame.sequence for frame in frames] == [0, 1, 2]
+    assert [frame.timestamp_ms for frame in frames] == [0, 200, 400]
+    assert frames[0].flags == FLAG_START_OF_TURN and frames[1].flags == 0
+
+    state = manager.state_store.load('conn-1')
+    assert (state['next_input_sequence'], state['next_output_sequence'], state['output_turn']) == (5, 3, 1)
+    handle_websocket_event(event('$disconnect'), None, sent.append)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
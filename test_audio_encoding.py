@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for Maya response audio encoding, negotiation and delivery
+"""
+
+import base64
+import struct
+
+import numpy as np
+import pytest
+
+import audio_encoding
+from audio_encoding import (
+    LPCM, OGG_OPUS, WAV, WEBM_OPUS, AudioDeliveryStore, mux_ogg_opus, mux_webm_opus,
+    negotiate_audio_encoding, ogg_crc, prepare_maya_audio
+)
+from audio_probe import probe_audio_bytes
+
+
+def tone(seconds, sample_rate=24000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype('<i2').tobytes()
+
+
+@pytest.fixture
+def with_opus(monkeypatch):
+    monkeypatch.setattr(audio_encoding, 'OPUS_AVAILABLE', True)
+
+
+def test_negotiation_follows_quality_then_server_preference(with_opus):
+    assert negotiate_audio_encoding(None) == LPCM
+    assert negotiate_audio_encoding('application/json') == LPCM
+    assert negotiate_audio_encoding('audio/webm;codecs=opus, audio/ogg;codecs=opus') == OGG_OPUS
+    assert negotiate_audio_encoding('audio/ogg;codecs=opus;q=0.5, audio/webm;codecs="opus"') == WEBM_OPUS
+    assert negotiate_audio_encoding(['audio/ogg; codecs=vorbis', 'audio/wav; codecs="1"']) == WAV
+    # Wildcards, such as the fetch default Accept, do not opt in
+    assert negotiate_audio_encoding('audio/*') == LPCM
+    assert negotiate_audio_encoding('application/json, text/plain, */*') == LPCM
+
+
+def test_opus_is_not_offered_without_libopus(monkeypatch):
+    monkeypatch.setattr(audio_encoding, 'OPUS_AVAILABLE', False)
+    assert negotiate_audio_encoding('audio/webm;codecs=opus, audio/wav;q=0.1') == WAV
+    assert negotiate_audio_encoding('audio/ogg;codecs=opus') == LPCM
+
+
+def test_ogg_opus_stream_has_valid_pages_and_trimmed_duration():
+    packets = [bytes([index % 256]) * 300 for index in range(150)]  # 3 s, packets over 255 bytes
+    stream = mux_ogg_opus(packets, 24000, 1, 312, 24000 * 3 - 240, serial=7)
+
+    info = probe_audio_bytes(stream, len(stream), stream)
+    assert (info.codec, info.sample_rate, info.channels) == ('opus', 24000, 1)
+    assert info.duration_seconds == pytest.approx(2.99)
+
+    position, payload = 0, b''
+    while position < len(stream):
+        assert stream[position:position + 4] == b'OggS'
+        segments = stream[position + 26]
+        size = 27 + segments + sum(stream[position + 27:position + 27 + segments])
+        page = bytearray(stream[position:position + size])
+        crc = struct.unpack_from('<I', page, 22)[0]
+        page[22:26] = bytes(4)
+        assert ogg_crc(page) == crc
+        payload += page[27 + segments:]
+        position += size
+    assert payload.endswith(b''.join(packets))
+
+
+def test_webm_opus_stream_probes_as_opus_with_duration():
+    packets = [bytes(40)] * 400  # 8 s, spans two clusters
+    stream = mux_webm_opus(packets, 24000, 1, 312, 24000 * 8)
+    info = probe_audio_bytes(stream, len(stream), stream)
+    assert (info.format, info.codec, info.channels) == ('webm', 'opus', 1)
+    assert info.duration_seconds == pytest.approx(8.0)
+
+
+def test_wav_inline_and_url_delivery(monkeypatch):
+    monkeypatch.setattr(audio_encoding, '_audio_delivery_store', AudioDeliveryStore())
+    pcm = tone(0.5)
+    synthesis = {'success': True, 'audio_base64': base64.b64encode(pcm).decode(), 'format': 'audio/lpcm',
+                 'sample_rate': 24000, 'voice_id': 'matthew'}
+
+    inline = prepare_maya_audio(synthesis, WAV)
+    audio = base64.b64decode(inline['audio_base64'])
+    assert audio[:4] == b'RIFF' and audio[44:] == pcm
+    assert (inline['format'], inline['duration_ms'], inline['voice_id']) == ('audio/wav', 500, 'matthew')
+
+    by_url = prepare_maya_audio(synthesis, WAV, delivery='url')
+    assert 'audio_base64' not in by_url
+    token = by_url['audio_url'].rsplit('/', 1)[-1]
+    assert audio_encoding.get_audio_delivery_store().get(token) == (audio, 'audio/wav')
+
+    # A failed upload falls back to inline delivery
+    class FailingStore(AudioDeliveryStore):
+        def put(self, data, content_type):
+            raise RuntimeError('S3 unavailable')
+
+    monkeypatch.setattr(audio_encoding, '_audio_delivery_store', FailingStore())
+    fallback = prepare_maya_audio(synthesis, WAV, delivery='url')
+    assert 'audio_url' not in fallback and base64.b64decode(fallback['audio_base64']) == audio
+
+    # Failed or non-LPCM synthesis is passed through untouched
+    failed = {'success': False, 'error': 'Synthesis failed'}
+    assert prepare_maya_audio(failed, WAV) is failed
+    mp3 = dict(synthesis, format='mp3')
+    assert prepare_maya_audio(mp3, WAV) is mp3
+
+
+def test_expired_audio_is_not_served():
+    store = AudioDeliveryStore(ttl_seconds=-1)
+    token = store.put(b'audio', 'audio/wav').rsplit('/', 1)[-1]
+    assert store.get(token) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
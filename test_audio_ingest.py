@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for speaking audio ingestion
+"""
+
+import base64
+import json
+
+import pytest
+
+from audio_ingest import (
+    AudioIngestError, audio_from_base64, base64_audio_format, check_base64_audio,
+    decode_base64_audio, detect_audio_format, read_audio_submission
+)
+import audio_ingest
+
+WAV = b'RIFF\x24\x00\x00\x00WAVEfmt ' + bytes(range(256)) * 40
+WEBM = b'\x1a\x45\xdf\xa3' + b'\x00' * 64
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(audio_ingest, 'BASE64_CHUNK_CHARS', 16)
+
+
+@pytest.mark.parametrize('length', [0, 1, 2, 3, 100, 1001])
+def test_incremental_decode_matches_b64decode(small_chunks, length):
+    payload = bytes((n * 7) % 256 for n in range(length)) or b'\x00'
+    text = base64.b64encode(payload).decode()
+    assert decode_base64_audio(text).tobytes() == payload
+
+
+def test_decode_reuses_the_callers_buffer(small_chunks):
+    buffer = bytearray(len(WAV))
+    view = decode_base64_audio(base64.b64encode(WAV).decode(), buffer)
+    assert view.obj is buffer
+    assert bytes(buffer) == WAV
+
+
+def test_data_urls_and_formats_are_recognised():
+    text = 'data:audio/webm;codecs=opus;base64,' + base64.b64encode(WEBM).decode()
+    assert base64_audio_format(text) == 'webm'
+    assert audio_from_base64(text).format == 'webm'
+    assert detect_audio_format(WAV) == 'wav'
+    assert detect_audio_format(b'not audio at all') is None
+
+
+def test_bad_and_oversized_base64_is_rejected_before_decoding():
+    with pytest.raises(AudioIngestError):
+        check_base64_audio('abc')
+    with pytest.raises(AudioIngestError):
+        check_base64_audio('ab!d')
+    with pytest.raises(AudioIngestError) as error:
+        check_base64_audio('A' * 4000, max_bytes=1000)
+    assert error.value.status_code == 413
+
+
+def test_raw_bodies_are_used_in_place():
+    body = bytearray(WAV)
+    fields, audio = read_audio_submission(body, 'audio/wav')
+    assert fields == {}
+    assert audio.data.obj is body
+    assert audio.format == 'wav' and len(audio) == len(WAV)
+
+
+def test_multipart_audio_part_is_a_view_into_the_body():
+    boundary = 'XyZ'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="question_id"\r\n\r\n4\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="audio"; filename="answer.wav"\r\n'
+        f'Content-Type: audio/wav\r\n\r\n'
+    ).encode() + WAV + f'\r\n--{boundary}--\r\n'.encode()
+
+    fields, audio = read_audio_submission(base64.b64encode(body).decode(),
+                                          f'multipart/form-data; boundary={boundary}', is_base64_encoded=True)
+    assert fields == {'question_id': '4'}
+    assert audio.data.tobytes() == WAV
+    assert audio.data.obj is not None and len(audio.data.obj) == len(body)
+
+
+def test_json_bodies_decode_audio_data():
+    fields, audio = read_audio_submission(json.dumps({'audio_data': base64.b64encode(WAV).decode(), 'question_id': 1}),
+                                          'application/json')
+    assert fields == {'question_id': 1}
+    assert bytes(audio) == WAV
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
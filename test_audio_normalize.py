@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for PCM resampling, downmix and loudness normalisation
+"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from audio_ingest import AudioBuffer
+from audio_normalize import AudioNormalizer, PcmFormat, normalize_audio_buffer, normalize_pcm
+
+
+def tone(frequency, sample_rate, seconds=1.0, amplitude=0.5, channels=1):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    samples = np.repeat((amplitude * np.sin(2 * np.pi * frequency * t))[:, None], channels, axis=1)
+    return (samples * 32767).astype('<i2').tobytes()
+
+
+def samples_of(pcm):
+    return np.frombuffer(pcm, dtype='<i2').astype(np.float64) / 32768
+
+
+def dominant_frequency(pcm, sample_rate=16000):
+    samples = samples_of(pcm)
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples))))
+    return np.argmax(spectrum) * sample_rate / len(samples)
+
+
+@pytest.mark.parametrize('rate', [48000, 44100, 24000, 8000])
+def test_resampled_tone_keeps_pitch_level_and_duration(rate):
+    out = normalize_pcm(tone(1000, rate, channels=2), PcmFormat(rate, 2))
+    assert len(out) == 2 * 16000
+    assert dominant_frequency(out) == pytest.approx(1000, abs=2)
+    assert np.max(np.abs(samples_of(out)[1000:-1000])) == pytest.approx(0.5, abs=0.01)
+
+
+def test_content_above_8khz_is_filtered_out():
+    out = normalize_pcm(tone(11000, 48000), PcmFormat(48000))
+    assert np.max(np.abs(samples_of(out)[1000:-1000])) < 0.005
+
+
+@pytest.mark.parametrize('rate', [48000, 44100])
+def test_chunked_output_matches_one_shot(rate):
+    source = PcmFormat(rate, 2)
+    audio = tone(440, rate, seconds=0.5, channels=2)
+    normalizer = AudioNormalizer(source)
+    # Odd chunk sizes split frames and samples across calls
+    chunks = [normalizer.process(audio[offset:offset + 1237]) for offset in range(0, len(audio), 1237)]
+    chunked = np.frombuffer(b''.join(chunks) + normalizer.flush(), dtype='<i2')
+    one_shot = np.frombuffer(normalize_pcm(audio, source), dtype='<i2')
+    assert len(chunked) == len(one_shot)
+    assert np.max(np.abs(chunked.astype(int) - one_shot)) <= 1
+
+
+def test_downmix_averages_channels():
+    left, right = np.full(1600, 8000, '<i2'), np.full(1600, -4000, '<i2')
+    out = normalize_pcm(np.stack([left, right], axis=1).tobytes(), PcmFormat(16000, 2))
+    assert set(np.frombuffer(out, dtype='<i2')) == {2000}
+
+
+def test_peak_and_rms_normalisation():
+    speech = tone(300, 16000, amplitude=0.2)
+    assert np.max(np.abs(samples_of(normalize_pcm(speech, PcmFormat(16000), normalize='peak')))) == \
+        pytest.approx(10 ** (-1 / 20), abs=0.002)
+    rms = np.sqrt(np.mean(samples_of(normalize_pcm(speech, PcmFormat(16000), normalize='rms')) ** 2))
+    assert rms == pytest.approx(0.1, rel=0.01)
+
+    # Near-silence is boosted by at most 20 dB
+    whisper = normalize_pcm(tone(300, 16000, amplitude=0.01), PcmFormat(16000), normalize='peak')
+    assert np.max(np.abs(samples_of(whisper))) == pytest.approx(0.1, abs=0.002)
+
+
+def test_float_and_24_bit_sources():
+    samples = np.array([0.5, -0.25, 0.0, 1 / 32768], dtype='<f4')
+    assert list(np.frombuffer(normalize_pcm(samples.tobytes(), PcmFormat(16000, 1, 32, floating=True)), '<i2')) \
+        == [16384, -8192, 0, 1]
+    packed = b''.join(struct.pack('<i', value)[:3] for value in (0x400000, -0x200000))
+    assert list(np.frombuffer(normalize_pcm(packed, PcmFormat(16000, 1, 24)), '<i2')) == [16384, -8192]
+
+
+def test_wav_upload_is_read_from_its_data_chunk():
+    data = tone(1000, 48000, seconds=0.5, channels=2)
+    fmt = struct.pack('<HHIIHH', 1, 2, 48000, 48000 * 4, 4, 16)
+    wav = b'RIFF' + struct.pack('<I', 36 + len(data)) + b'WAVEfmt ' + struct.pack('<I', 16) + fmt \
+        + b'data' + struct.pack('<I', len(data)) + data
+    out = normalize_audio_buffer(AudioBuffer(wav))
+    assert len(out) == 16000
+    assert dominant_frequency(out) == pytest.approx(1000, abs=4)
+    assert normalize_audio_buffer(AudioBuffer(b'\x1a\x45\xdf\xa3' + bytes(64))) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for header-based audio duration and format probing
+"""
+
+import base64
+import struct
+
+import pytest
+
+from audio_ingest import AudioBuffer
+from audio_probe import probe_audio, probe_audio_bytes, probe_base64_audio
+
+
+def wav(seconds, sample_rate=16000, channels=1, data_size=None):
+    data = bytes(int(seconds * sample_rate) * channels * 2)
+    fmt = struct.pack('<HHIIHH', 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16)
+    size = len(data) if data_size is None else data_size
+    return (b'RIFF' + struct.pack('<I', 36 + len(data)) + b'WAVE' + b'fmt ' + struct.pack('<I', 16) + fmt
+            + b'LIST' + struct.pack('<I', 3) + b'abc\x00' + b'data' + struct.pack('<I', size) + data)
+
+
+def ebml(element_id, payload, unknown_size=False):
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown_size else (0x10000000 | len(payload)).to_bytes(4, 'big')
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big') + size + payload
+
+
+def webm(duration_ms=None, clusters=((0, 50), (1000, 25))):
+    info = ebml(0x2AD7B1, (1000000).to_bytes(3, 'big'))
+    if duration_ms:
+        info += ebml(0x4489, struct.pack('>d', duration_ms))
+    audio = ebml(0xB5, struct.pack('>d', 48000.0)) + ebml(0x9F, b'\x01')
+    tracks = ebml(0x1654AE6B, ebml(0xAE, ebml(0x86, b'A_OPUS') + ebml(0xE1, audio)))
+    body = b''.join(
+        ebml(0x1F43B675, ebml(0xE7, timecode.to_bytes(2, 'big')) + b''.join(
+            ebml(0xA3, b'\x81' + struct.pack('>h', 20 * block) + b'\x80' + bytes(40)) for block in range(blocks)
+        ), unknown_size=True)
+        for timecode, blocks in clusters
+    )
+    return ebml(0x1A45DFA3, ebml(0x4282, b'webm')) + ebml(0x18538067, ebml(0x1549A966, info) + tracks + body,
+                                                            unknown_size=True)
+
+
+def ogg_page(granule, packet):
+    return b'OggS\x00\x00' + struct.pack('<qIII', granule, 1, 0, 0) + bytes([1, len(packet)]) + packet
+
+
+def test_wav_duration_comes_from_the_data_chunk():
+    info = probe_audio(AudioBuffer(wav(2.5, channels=2)))
+    assert (info.format, info.sample_rate, info.channels, info.bits_per_sample) == ('wav', 16000, 2, 16)
+    assert info.duration_seconds == pytest.approx(2.5)
+    assert info.exact
+
+
+def test_streamed_wav_without_a_data_size_uses_the_received_bytes():
+    assert probe_audio(AudioBuffer(wav(1.5, data_size=0xFFFFFFFF))).duration_seconds == pytest.approx(1.5)
+
+
+def test_webm_reads_duration_or_the_last_cluster():
+    info = probe_audio(AudioBuffer(webm(duration_ms=2500.0)))
+    assert (info.codec, info.sample_rate, info.channels, info.duration_seconds) == ('opus', 48000, 1, 2.5)
+
+    # MediaRecorder output: no Duration, last block at 1480 ms plus one Opus frame
+    assert probe_audio(AudioBuffer(webm())).duration_seconds == pytest.approx(1.5)
+
+
+def test_ogg_opus_duration_comes_from_the_last_granule():
+    head = b'OpusHead\x01\x01' + struct.pack('<HIhB', 312, 16000, 0, 0)
+    audio = ogg_page(0, head) + ogg_page(48000, bytes(50)) + ogg_page(48000 * 3 + 312, bytes(50))
+    info = probe_audio_bytes(audio, len(audio), audio)
+    assert (info.format, info.codec, info.sample_rate, info.channels) == ('ogg', 'opus', 16000, 1)
+    assert info.duration_seconds == pytest.approx(3.0)
+
+
+def test_flac_streaminfo_gives_exact_duration():
+    packed = (44100 << 44) | (1 << 41) | (15 << 36) | (44100 * 4)
+    audio = b'fLaC' + b'\x80\x00\x00\x22' + bytes(10) + packed.to_bytes(8, 'big') + bytes(16) + bytes(100)
+    info = probe_audio(AudioBuffer(audio))
+    assert (info.sample_rate, info.channels, info.bits_per_sample) == (44100, 2, 16)
+    assert info.duration_seconds == pytest.approx(4.0)
+
+
+def test_raw_pcm_uses_the_content_type_descriptor():
+    info = probe_audio(AudioBuffer(bytes(64000), 'audio/L16; rate=8000; channels=2'))
+    assert (info.format, info.duration_seconds, info.exact) == ('pcm', 2.0, True)
+
+
+def test_unknown_audio_falls_back_to_a_size_estimate():
+    info = probe_audio(AudioBuffer(bytes(64 * 1024)))
+    assert info.format is None and not info.exact
+    assert info.duration_seconds == pytest.approx(2.0)
+
+
+def test_probe_is_cached_on_the_buffer():
+    audio = AudioBuffer(wav(1.0))
+    assert probe_audio(audio) is probe_audio(audio)
+
+
+def test_base64_probe_decodes_only_the_ends():
+    audio = wav(30.0)
+    text = 'data:audio/wav;base64,' + base64.b64encode(audio).decode()
+    info = probe_base64_audio(text)
+    assert info.duration_seconds == pytest.approx(30.0)
+    assert probe_base64_audio(base64.b64encode(webm()).decode()).duration_seconds == pytest.approx(1.5)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
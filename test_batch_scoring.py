@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Parity tests for vectorised batch re-scoring
+Every conversation scored by ielts_batch_scoring must match the band scores
+of the scalar IELTSBandScorer criterion path exactly
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from ielts_band_scoring import IELTSBandScorer, ScoringCriterion
+from ielts_batch_scoring import score_speaking_batch
+from assessment_criteria.speaking_criteria import calculate_speaking_band_score
+
+VOCABULARY = (
+    "I think that people should travel more because it broadens the mind although "
+    "however therefore which when if my hometown is quite small but very green and "
+    "peaceful we usually go to the market on weekends technology education family"
+).split()
+
+STAGES = ['part1_intro', 'part1', 'part2_cue_card', 'part2', 'part3_discussion', 'part3', 'closing', '']
+
+NOTES = [
+    ('Fluency and Coherence', 'Noticeable hesitation before answering'),
+    ('Fluency and Coherence', 'Slow speech throughout'),
+    ('Fluency and Coherence', 'Good pace'),
+    ('Pronunciation', 'Some words were unclear'),
+    ('Pronunciation', 'Listener effort required'),
+    ('Pronunciation', 'Strain on longer words'),
+    ('Lexical Resource', 'Repetitive vocabulary'),
+]
+
+
+def _random_text(rng):
+    if rng.random() < 0.05:
+        return rng.choice(['', None, '   ', '...'])
+    sentences = []
+    for _ in range(rng.randint(1, 6)):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(1, 40))]
+        sentences.append(' '.join(words))
+    return '. '.join(sentences) + rng.choice(['.', '', '?'])
+
+
+def _random_conversation(rng, index):
+    responses = []
+    for _ in range(rng.randint(0 if rng.random() < 0.03 else 1, 12)):
+        text = _random_text(rng)
+        word_count = len(text.split()) if text else 0
+        if rng.random() < 0.2:
+            word_count = rng.randint(0, 400)
+        responses.append({
+            'text': text,
+            'word_count': word_count,
+            'duration': rng.choice([0, 0, rng.randint(1, 180), round(rng.uniform(0.5, 120), 3)]),
+            'stage': rng.choice(STAGES)
+        })
+
+    notes = [
+        {'criterion': criterion, 'note': note}
+        for criterion, note in rng.sample(NOTES, rng.randint(0, len(NOTES)))
+    ]
+    return {
+        'session_id': f'session_{index}',
+        'user_responses': responses,
+        'evaluation_notes': notes
+    }
+
+
+def _random_ai_analysis(rng):
+    if rng.random() < 0.5:
+        return None
+    analysis = {}
+    for criterion in ScoringCriterion:
+        if rng.random() < 0.7:
+            key = criterion.value.lower().replace(' ', '_')
+            analysis[key] = {} if rng.random() < 0.1 else {'score': rng.choice([4, 5.5, 6.25, 7, 7.75, 8.5])}
+    return analysis
+
+
+def _corpus(size, seed=1234):
+    rng = random.Random(seed)
+    conversations = [_random_conversation(rng, i) for i in range(size)]
+    analyses = [_random_ai_analysis(rng) for _ in range(size)]
+    return conversations, analyses
+
+
+def _expected_scores(scorer, conversation, analysis):
+    """Band scores from the scalar criterion path used by evaluate_speaking_assessment"""
+    criterion_scores = {}
+    for criterion in ScoringCriterion:
+        score, _ = scorer.evaluate_criterion(
+            criterion, conversation['user_responses'], conversation.get('evaluation_notes', []), analysis
+        )
+        criterion_scores[criterion.value] = score
+    return criterion_scores, calculate_speaking_band_score(criterion_scores)
+
+
+def _assert_parity(conversations, analyses, results):
+    scorer = IELTSBandScorer()
+    assert len(results) == len(conversations)
+    for conversation, analysis, result in zip(conversations, analyses, results):
+        assert result['session_id'] == conversation['session_id']
+        if not conversation['user_responses']:
+            assert result['success'] is False
+            continue
+
+        criterion_scores, overall = _expected_scores(scorer, conversation, analysis)
+        assert result['success'] is True, conversation['session_id']
+        assert result['criterion_scores'] == criterion_scores, conversation['session_id']
+        assert result['overall_band_score'] == overall, conversation['session_id']
+
+
+def test_batch_matches_scalar_scoring():
+    conversations, analyses = _corpus(1500)
+    results = score_speaking_batch(conversations, analyses)
+    _assert_parity(conversations, analyses, results)
+
+
+def test_batch_matches_full_assessment():
+    conversations, analyses = _corpus(200, seed=7)
+    scorer = IELTSBandScorer()
+    for result, conversation, analysis in zip(score_speaking_batch(conversations, analyses), conversations, analyses):
+        expected = scorer.evaluate_speaking_assessment(conversation, analysis)
+        assert result['success'] == expected['success']
+        if expected['success']:
+            assert result['criterion_scores'] == expected['criterion_scores']
+            assert result['overall_band_score'] == expected['overall_band_score']
+
+
+def test_irregular_conversations_use_scalar_path():
+    conversations = [
+        {'session_id': 'str_word_count', 'user_responses': [{'text': 'hello there', 'word_count': '2'}]},
+        {'session_id': 'none_notes', 'user_responses': [{'text': 'hello'}], 'evaluation_notes': None},
+        {'session_id': 'string_ai_score', 'user_responses': [{'text': 'because it is', 'word_count': 3}]},
+        {'session_id': 'empty', 'user_responses': []},
+    ]
+    analyses = [None, None, {'pronunciation': {'score': '7'}}, None]
+    results = score_speaking_batch(conversations, analyses)
+    _assert_parity(conversations, analyses, results)
+
+
+def test_batch_matches_scalar_scoring_with_pause_statistics():
+    conversations, analyses = _corpus(400, seed=45)
+    rng = random.Random(45)
+    for conversation in conversations:
+        for response in conversation['user_responses']:
+            if rng.random() < 0.7:
+                response['speech_stats'] = {
+                    'active_seconds': rng.choice([0, round(rng.uniform(2, 150), 2)]),
+                    'long_pauses_per_minute': rng.choice([0.0, 1.0, 2.5, 4.0, 7.5]),
+                    'speech_ratio': rng.choice([0.5, 0.75, 0.9])
+                }
+    _assert_parity(conversations, analyses, score_speaking_batch(conversations, analyses))
+
+
+def test_process_pool_preserves_order():
+    conversations, analyses = _corpus(300, seed=99)
+    results = score_speaking_batch(conversations, analyses, workers=2, chunk_size=64)
+    assert [r['session_id'] for r in results] == [c['session_id'] for c in conversations]
+    _assert_parity(conversations, analyses, results)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
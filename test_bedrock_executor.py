@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded-concurrency Bedrock executor
+A local stand-in client records calls so limits, retries and coalescing can
+be checked without AWS
+"""
+
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from bedrock_executor import BedrockExecutor, ModelLimits, TokenBucket, estimate_request_tokens
+
+MODEL = 'amazon.nova-micro-v1:0'
+PAYLOAD = {
+    'messages': [{'role': 'user', 'content': [{'text': 'Describe your hometown.'}]}],
+    'inferenceConfig': {'maxTokens': 200}
+}
+
+
+class ThrottlingException(Exception):
+    def __init__(self):
+        super().__init__('Rate exceeded')
+        self.response = {'Error': {'Code': 'ThrottlingException'}}
+
+
+class StandInClient:
+    """Records invoke_model calls; optionally throttles or stalls them"""
+
+    def __init__(self, throttle_first=0, delay=0.0):
+        self.throttle_first = throttle_first
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, modelId, body, contentType, accept):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if call <= self.throttle_first:
+                raise ThrottlingException()
+            return {'body': io.BytesIO(json.dumps({'model': modelId, 'call': call}).encode())}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _executor(client, **kwargs):
+    kwargs.setdefault('default_limits', ModelLimits(max_concurrency=4, requests_per_minute=6000, tokens_per_minute=10 ** 7))
+    return BedrockExecutor(client=client, max_workers=16, backoff_base=0.001, backoff_cap=0.01, **kwargs)
+
+
+def test_throttling_is_retried_with_backoff():
+    client = StandInClient(throttle_first=2)
+    executor = _executor(client)
+
+    result = executor.invoke_json(MODEL, PAYLOAD)
+
+    assert result['call'] == 3
+    metrics = executor.get_metrics()
+    assert metrics['throttle_retries'] == 2
+    assert metrics['completed'] == 1
+
+
+def test_retries_give_up_after_max_retries():
+    client = StandInClient(throttle_first=10)
+    executor = _executor(client, max_retries=2)
+
+    with pytest.raises(ThrottlingException):
+        executor.invoke(MODEL, PAYLOAD)
+    assert client.calls == 3
+    assert executor.get_metrics()['failed'] == 1
+
+
+def test_concurrency_is_capped_per_model():
+    client = StandInClient(delay=0.02)
+    executor = _executor(client, default_limits=ModelLimits(2, 6000, 10 ** 7))
+
+    futures = [executor.submit(MODEL, {**PAYLOAD, 'n': n}) for n in range(10)]
+    for future in futures:
+        future.result(5)
+
+    assert client.calls == 10
+    assert client.peak_active == 2
+    assert executor.get_metrics()['queue_depth'] == 0
+
+
+def test_identical_in_flight_requests_are_coalesced():
+    client = StandInClient(delay=0.05)
+    executor = _executor(client)
+
+    futures = [executor.submit(MODEL, dict(PAYLOAD)) for _ in range(5)]
+    results = {future.result(5) for future in futures}
+
+    assert client.calls == 1
+    assert len(results) == 1
+    assert executor.get_metrics()['coalesced'] == 4
+
+    # Finished requests are not reused
+    executor.invoke(MODEL, PAYLOAD)
+    assert client.calls == 2
+
+
+def test_token_bucket_paces_requests():
+    now = [0.0]
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=lambda: now[0])
+
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+    now[0] += 3.0
+    assert bucket.reserve(1) == 0.0
+
+
+def test_estimate_request_tokens_counts_prompt_and_output():
+    assert estimate_request_tokens(PAYLOAD) == len('Describe your hometown.') // 4 + 200 + 1
+
+
+def test_async_invoke():
+    import asyncio
+
+    executor = _executor(StandInClient())
+    result = asyncio.run(executor.invoke_json_async(MODEL, PAYLOAD))
+    assert result['model'] == MODEL
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
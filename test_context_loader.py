@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the frozen IELTS assessment context index
+"""
+
+import copy
+import json
+import pickle
+
+import pytest
+
+from assessment_criteria.context_loader import (
+    FrozenDict, get_ielts_context_for_assessment, get_ielts_prompt_block, load_speaking_context_data,
+    load_writing_context_data
+)
+
+
+def test_contexts_serialise_like_the_loader_data():
+    writing = get_ielts_context_for_assessment('writing', 'general', 2)
+    expected = load_writing_context_data()['general']['task2']
+    assert json.loads(json.dumps(writing)) == json.loads(json.dumps(expected))
+
+    speaking = get_ielts_context_for_assessment('speaking', 'academic', 3)
+    loaded = load_speaking_context_data()
+    assert json.loads(json.dumps(speaking)) == json.loads(json.dumps(
+        {'band_descriptors': loaded['band_descriptors'], 'guidance': loaded['part_guidance']['part3']}
+    ))
+    assert json.dumps(get_ielts_context_for_assessment('listening')) == '{}'
+
+
+def test_contexts_are_shared_and_read_only():
+    context = get_ielts_context_for_assessment('Writing', 'Academic', '1')
+    assert context is get_ielts_context_for_assessment('writing', 'academic', 1)
+    assert isinstance(context, dict) and isinstance(context['band_descriptors'], FrozenDict)
+
+    band = next(iter(context['band_descriptors']))
+    for mutate in (lambda: context.__setitem__('examples', []), lambda: context.update(examples=[]),
+                   lambda: context['band_descriptors'].pop(band), lambda: context.clear()):
+        with pytest.raises(TypeError):
+            mutate()
+    assert isinstance(context['examples'], tuple)
+
+    editable = dict(context)
+    editable['examples'] = ['mine']
+    assert context['examples'] == ()
+
+
+def test_copies_stay_frozen_and_equal():
+    context = get_ielts_context_for_assessment('speaking', 'general', 1)
+    for duplicate in (copy.copy(context), copy.deepcopy(context), pickle.loads(pickle.dumps(context))):
+        assert duplicate == context and isinstance(duplicate, FrozenDict)
+        with pytest.raises(TypeError):
+            duplicate['guidance'] = ''
+
+
+def test_prompt_block_is_stable_and_matches_context():
+    block = get_ielts_prompt_block('writing', 'academic', 2)
+    assert block is get_ielts_prompt_block('writing', 'academic', 2)
+    assert block.text.startswith('IELTS Academic Writing Task 2')
+    assert len(block.sha256) == 64
+    assert get_ielts_prompt_block('speaking', 'academic', 2) == get_ielts_prompt_block('speaking', 'general', 2)
+    assert get_ielts_prompt_block('writing', 'academic', 3) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
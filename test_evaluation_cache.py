@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-hash evaluation cache
+"""
+
+import threading
+import time
+
+import pytest
+
+from evaluation_cache import (
+    EvaluationCache, RedisCacheBackend, evaluation_cache_key, normalize_submission_text, rubric_version
+)
+
+MODEL = 'amazon.nova-micro-v1:0'
+ESSAY = "Technology has changed daily life.\n\nHowever, it also brings new problems."
+
+
+class DictRedis:
+    """Minimal client with the redis get/set(ex=) interface"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode('utf-8')
+
+
+def test_key_ignores_whitespace_noise_but_not_paragraphs():
+    key = evaluation_cache_key(ESSAY, 'task2', 'v1', MODEL)
+
+    noisy = "  Technology  has changed\tdaily life.  \r\n\r\nHowever, it also brings new problems.\n"
+    assert evaluation_cache_key(noisy, 'task2', 'v1', MODEL) == key
+    assert evaluation_cache_key(ESSAY.replace('\n\n', ' '), 'task2', 'v1', MODEL) != key
+    assert evaluation_cache_key(ESSAY, 'task1', 'v1', MODEL) != key
+    assert evaluation_cache_key(ESSAY, 'task2', 'v2', MODEL) != key
+    assert evaluation_cache_key(ESSAY, 'task2', 'v1', 'other-model') != key
+
+
+def test_normalize_keeps_line_breaks():
+    assert normalize_submission_text(' a   b\r\nc ') == 'a b\nc'
+    assert normalize_submission_text(None) == ''
+
+
+def test_rubric_version_tracks_content():
+    rubric = {'criteria': {'lexical_resource': {'weight': 0.25}}}
+    assert rubric_version(rubric) == rubric_version({'criteria': {'lexical_resource': {'weight': 0.25}}})
+    assert rubric_version(rubric) != rubric_version({'criteria': {'lexical_resource': {'weight': 0.3}}})
+    assert rubric_version({'version': '2025-01', 'criteria': {}}) == '2025-01'
+
+
+def test_repeat_submission_is_served_from_memory():
+    cache = EvaluationCache()
+    calls = []
+
+    def evaluate():
+        calls.append(1)
+        return {'overall_band': 7.0}
+
+    first, first_source = cache.get_or_compute('k', evaluate)
+    second, second_source = cache.get_or_compute('k', evaluate)
+
+    assert (first_source, second_source) == ('computed', 'memory')
+    assert first == second == {'overall_band': 7.0}
+    assert len(calls) == 1
+
+    # Callers get independent copies
+    second['overall_band'] = 1.0
+    assert cache.get('k') == {'overall_band': 7.0}
+
+
+def test_concurrent_identical_requests_share_one_evaluation():
+    cache = EvaluationCache()
+    calls = []
+    started = threading.Event()
+
+    def evaluate():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return {'overall_band': 6.5}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', evaluate))) for _ in range(5)]
+    threads[0].start()
+    started.wait(1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ['computed'] + ['shared'] * 4
+
+
+def test_failures_are_not_cached():
+    cache = EvaluationCache()
+
+    def failing():
+        raise RuntimeError('model unavailable')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', failing)
+    assert cache.get_or_compute('k', lambda: {'overall_band': 5.5}) == ({'overall_band': 5.5}, 'computed')
+
+
+def test_backend_tier_survives_process_cache_loss():
+    backend = RedisCacheBackend(DictRedis())
+    cache = EvaluationCache(backend=backend)
+    cache.get_or_compute('k', lambda: {'overall_band': 8.0})
+
+    fresh = EvaluationCache(backend=backend)
+    assert fresh.get_or_compute('k', lambda: pytest.fail('re-evaluated')) == ({'overall_band': 8.0}, 'backend')
+
+
+def test_lru_eviction_and_ttl():
+    cache = EvaluationCache(max_entries=2, ttl=60)
+    for key in ('a', 'b', 'c'):
+        cache.get_or_compute(key, lambda: {'key': key})
+    assert cache.get('a') is None
+    assert cache.get('c') == {'key': 'c'}
+
+    expiring = EvaluationCache(ttl=1)
+    expiring.get_or_compute('k', lambda: {'overall_band': 7.0})
+    expiring._entries['k'] = (time.time() - 1, expiring._entries['k'][1])
+    assert expiring.get('k') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
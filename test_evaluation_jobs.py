@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Tests for the evaluation job queue local stand-in
+"""
+
+import io
+import json
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+import evaluation_jobs
+from evaluation_jobs import (
+    LocalJobQueue, SQSJobQueue, WebSocketNotifier, register_job_handler,
+    JOB_QUEUED, JOB_COMPLETED, JOB_FAILED
+)
+
+calls = []
+throttled = []
+
+
+def _evaluate(payload):
+    calls.append(payload['essay_text'])
+    return {'success': True, 'overall_band': 7.0}
+
+
+def _explode(payload):
+    raise RuntimeError('model unavailable')
+
+
+def _throttled(payload):
+    throttled.append(payload['assessment_id'])
+    if len(throttled) < payload['succeed_on']:
+        raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'InvokeModel')
+    return {'success': True}
+
+
+register_job_handler('test-writing', _evaluate)
+register_job_handler('test-broken', _explode)
+register_job_handler('test-throttled', _throttled)
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    calls.clear()
+    throttled.clear()
+
+
+def test_jobs_are_queued_then_completed():
+    queue = LocalJobQueue(start_workers=False)
+    job_id = queue.enqueue('test-writing', {'essay_text': 'An essay.'})
+
+    assert queue.get_job(job_id)['status'] == JOB_QUEUED
+    assert queue.process_pending() == 1
+
+    job = queue.get_job(job_id)
+    assert job['status'] == JOB_COMPLETED
+    assert job['result'] == {'success': True, 'overall_band': 7.0}
+    assert job['attempts'] == 1
+
+
+def test_resubmitting_a_submission_does_not_evaluate_twice():
+    queue = LocalJobQueue(start_workers=False)
+    first = queue.enqueue('test-writing', {'essay_text': 'An essay.'}, owner='a@example.com', submission_id='s-1')
+    again = queue.enqueue('test-writing', {'essay_text': 'An essay.'}, owner='a@example.com', submission_id='s-1')
+    other = queue.enqueue('test-writing', {'essay_text': 'Mine.'}, owner='b@example.com', submission_id='s-1')
+
+    # Job ids are generated server-side; the submission id only deduplicates per owner
+    assert first == again and other != first and 's-1' not in (first, other)
+    assert queue.get_job(first)['owner'] == 'a@example.com'
+    assert queue.process_pending() == 2
+    assert sorted(calls) == ['An essay.', 'Mine.']
+
+
+def test_failures_are_recorded():
+    queue = LocalJobQueue(start_workers=False)
+    job_id = queue.enqueue('test-broken', {})
+    unknown_id = queue.enqueue('no-such-kind', {})
+    queue.process_pending()
+
+    assert queue.get_job(job_id)['status'] == JOB_FAILED
+    assert queue.get_job(job_id)['error'] == 'model unavailable'
+    assert 'No handler' in queue.get_job(unknown_id)['error']
+
+
+def test_retryable_errors_are_retried_until_the_last_attempt():
+    queue = LocalJobQueue(start_workers=False, max_attempts=3)
+    recovers = queue.enqueue('test-throttled', {'succeed_on': 2})
+    assert queue.process_pending() == 2
+    assert queue.get_job(recovers)['status'] == JOB_COMPLETED
+    assert throttled == [recovers, recovers]
+
+    throttled.clear()
+    gives_up = queue.enqueue('test-throttled', {'succeed_on': 10})
+    assert queue.process_pending() == 3
+    job = queue.get_job(gives_up)
+    assert (job['status'], job['attempts']) == (JOB_FAILED, 3)
+    assert 'ThrottlingException' in job['error']
+
+
+class FakeTable:
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, Item, ConditionExpression=None):
+        if ConditionExpression and Item['job_id'] in self.items:
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+        self.items[Item['job_id']] = dict(Item)
+
+    def get_item(self, Key, ConsistentRead=False):
+        item = self.items.get(Key['job_id'])
+        return {'Item': dict(item)} if item else {}
+
+    def delete_item(self, Key):
+        self.items.pop(Key['job_id'], None)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        item = self.items[Key['job_id']]
+        item.update(status=ExpressionAttributeValues[':status'], result=ExpressionAttributeValues[':result'],
+                    error=ExpressionAttributeValues[':error'])
+        item['attempts'] += ExpressionAttributeValues[':one']
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+class FakeSQS:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, QueueUrl, MessageBody):
+        self.sent.append(json.loads(MessageBody)['job_id'])
+
+
+@pytest.fixture
+def sqs_queue():
+    queue = SQSJobQueue.__new__(SQSJobQueue)
+    queue.queue_url, queue.table, queue.sqs = 'https://example.invalid/queue', FakeTable(), FakeSQS()
+    queue.notifier, queue.ttl, queue.max_attempts = None, 60, 3
+    queue.payload_bucket, queue.s3 = 'jobs-bucket', FakeS3()
+    return queue
+
+
+def record(job_id, receive_count):
+    return {'messageId': f'm-{receive_count}', 'body': json.dumps({'job_id': job_id}),
+            'attributes': {'ApproximateReceiveCount': str(receive_count)}}
+
+
+def test_sqs_throttling_is_reported_for_redelivery(sqs_queue):
+    job_id = sqs_queue.enqueue('test-throttled', {'succeed_on': 10}, owner='a@example.com')
+
+    for receive_count in (1, 2):
+        response = sqs_queue.handle_sqs_event({'Records': [record(job_id, receive_count)]})
+        assert response == {'batchItemFailures': [{'itemIdentifier': f'm-{receive_count}'}]}
+        assert sqs_queue.get_job(job_id)['status'] == JOB_QUEUED
+
+    # The last receive records the failure instead of sending the message to the DLQ
+    assert sqs_queue.handle_sqs_event({'Records': [record(job_id, 3)]}) == {'batchItemFailures': []}
+    assert sqs_queue.get_job(job_id)['status'] == JOB_FAILED
+
+
+def test_sqs_permanent_errors_fail_at_once(sqs_queue):
+    job_id = sqs_queue.enqueue('test-broken', {})
+    assert sqs_queue.handle_sqs_event({'Records': [record(job_id, 1)]}) == {'batchItemFailures': []}
+    assert sqs_queue.get_job(job_id)['error'] == 'model unavailable'
+
+
+def test_sqs_resubmission_returns_the_original_job(sqs_queue):
+    first = sqs_queue.enqueue('test-writing', {'essay_text': 'An essay.'}, owner='a@example.com', submission_id='s-1')
+    again = sqs_queue.enqueue('test-writing', {'essay_text': 'An essay.'}, owner='a@example.com', submission_id='s-1')
+
+    assert first == again and sqs_queue.sqs.sent == [first]
+    assert sqs_queue.get_job(first)['owner'] == 'a@example.com'
+    marker = next(key for key in sqs_queue.table.items if key.startswith('submission#'))
+    assert sqs_queue.get_job(marker) is None
+
+
+def test_sqs_payloads_over_the_item_limit_go_to_s3(sqs_queue):
+    register_job_handler('test-audio', lambda payload: {'bytes': len(payload['audio_data'])})
+    audio = 'A' * (500 * 1024)
+    job_id = sqs_queue.enqueue('test-audio', {'audio_data': audio, 'connection_id': 'conn-1'}, owner='a@example.com')
+
+    item = sqs_queue.table.items[job_id]
+    assert len(json.dumps(item)) < 400 * 1024
+    assert json.loads(item['payload']) == {'connection_id': 'conn-1'}
+    assert list(sqs_queue.s3.objects) == [f'jobs/{job_id}.json']
+
+    assert sqs_queue.handle_sqs_event({'Records': [record(job_id, 1)]}) == {'batchItemFailures': []}
+    assert sqs_queue.get_job(job_id)['result'] == {'bytes': len(audio)}
+    assert sqs_queue.s3.objects == {}
+
+
+def test_sqs_oversized_payload_needs_a_bucket(sqs_queue):
+    sqs_queue.s3 = None
+    with pytest.raises(ValueError):
+        sqs_queue.enqueue('test-writing', {'essay_text': 'x' * (500 * 1024)})
+    assert sqs_queue.table.items == {} and sqs_queue.sqs.sent == []
+
+
+def test_local_queue_is_refused_on_lambda(monkeypatch):
+    monkeypatch.setattr(evaluation_jobs, '_job_queue', None)
+    monkeypatch.delenv('EVALUATION_QUEUE_URL', raising=False)
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'ielts-genai-prep-api')
+    with pytest.raises(RuntimeError):
+        evaluation_jobs.get_job_queue()
+
+
+def test_worker_threads_process_in_background():
+    queue = LocalJobQueue(workers=2)
+    job_ids = [queue.enqueue('test-writing', {'essay_text': f'Essay {n}.'}) for n in range(5)]
+
+    deadline = time.time() + 5
+    while time.time() < deadline and any(queue.get_job(job_id)['status'] != JOB_COMPLETED for job_id in job_ids):
+        time.sleep(0.01)
+
+    assert all(queue.get_job(job_id)['status'] == JOB_COMPLETED for job_id in job_ids)
+    assert sorted(calls) == [f'Essay {n}.' for n in range(5)]
+
+
+def test_interrupted_jobs_are_requeued_on_restart(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    queue = LocalJobQueue(db_path=db_path, start_workers=False)
+    job_id = queue.enqueue('test-writing', {'essay_text': 'An essay.'})
+    with queue._lock:
+        queue._claim()
+
+    restarted = LocalJobQueue(db_path=db_path, start_workers=False)
+    assert restarted.get_job(job_id)['status'] == JOB_QUEUED
+    assert restarted.process_pending() == 1
+
+
+def test_finished_jobs_are_pushed_to_the_websocket_connection():
+    class Connections:
+        def __init__(self):
+            self.posted = []
+
+        def post_to_connection(self, ConnectionId, Data):
+            self.posted.append((ConnectionId, Data))
+
+    notifier = WebSocketNotifier(endpoint_url='https://example.invalid/Prod')
+    notifier._client = Connections()
+    queue = LocalJobQueue(notifier=notifier, start_workers=False)
+    queue.enqueue('test-writing', {'essay_text': 'An essay.', 'connection_id': 'conn-1'})
+    queue.enqueue('test-writing', {'essay_text': 'No socket.'})
+    queue.process_pending()
+
+    assert [connection for connection, _ in notifier._client.posted] == ['conn-1']
+    assert b'"status": "completed"' in notifier._client.posted[0][1]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming feedback delivery over Server-Sent Events
+"""
+
+import json
+
+import pytest
+
+from bedrock_executor import BedrockExecutor, ModelLimits
+from feedback_streaming import format_sse_event, iter_sse
+
+
+def parse_sse(body):
+    """(event, data) pairs from an SSE body"""
+    events = []
+    for frame in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if ': ' in line)
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_frames_are_single_line_json_with_ids():
+    frame = format_sse_event('criterion', {'feedback': 'line one\nline two'}, event_id=3)
+    assert frame == 'id: 3\nevent: criterion\ndata: {"feedback":"line one\\nline two"}\n\n'
+
+
+def test_failures_end_the_stream_with_an_error_event():
+    def events():
+        yield 'bands', {'overall_band': 7.0}
+        raise RuntimeError('model unavailable')
+
+    frames = list(iter_sse(events()))
+    assert frames[0].startswith('retry: ')
+    assert parse_sse(''.join(frames)) == [
+        ('bands', {'overall_band': 7.0}),
+        ('error', {'error': 'Assessment processing failed', 'message': 'model unavailable', 'retry_available': True})
+    ]
+
+
+def test_executor_streams_nova_text_deltas():
+    class StreamingClient:
+        def invoke_model_with_response_stream(self, **kwargs):
+            chunks = [{'messageStart': {'role': 'assistant'}},
+                      {'contentBlockDelta': {'delta': {'text': 'Good '}}},
+                      {'contentBlockDelta': {'delta': {'text': 'range.'}}},
+                      {'messageStop': {}}]
+            return {'body': [{'chunk': {'bytes': json.dumps(chunk).encode()}} for chunk in chunks]}
+
+    executor = BedrockExecutor(client=StreamingClient(), max_workers=1,
+                               default_limits=ModelLimits(1, 6000, 10 ** 9), model_limits={})
+    assert list(executor.stream_text('amazon.nova-micro-v1:0', {'messages': []})) == ['Good ', 'range.']
+    assert executor.get_metrics()['completed'] == 1
+    executor.shutdown()
+
+
+def test_writing_stream_sends_bands_first_and_the_response_body_last():
+    lambda_handler = pytest.importorskip('lambda_handler')
+    data = {'essay_text': 'Technology has changed society. However, many people disagree.\n\nIn conclusion, it helps.'}
+    events = parse_sse(''.join(iter_sse(lambda_handler.iter_writing_assessment_events(dict(data), narrate=True))))
+
+    assert [event for event, _ in events] == ['bands'] + ['criterion'] * 4 + ['summary']
+    summary = events[-1][1]
+    assert summary['success']
+    assert summary['assessment_result']['criteria_scores'] == events[0][1]['criteria_scores']
+    assert [payload['feedback'] for _, payload in events[1:-1]] == \
+        summary['assessment_result']['detailed_feedback'].split('\n')[:4]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
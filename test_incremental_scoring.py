@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Parity tests for incremental band scoring
+Aggregates built turn by turn with RunningBandScore must give the same bands
+and report as scoring the finished conversation in one pass
+"""
+
+import pytest
+
+from ielts_band_scoring import IELTSBandScorer, RunningBandScore
+from scoring_benchmark import build_corpus
+
+SPEAKING = build_corpus()['speaking']
+AI_ANALYSIS = {
+    'fluency_and_coherence': {'score': 7.5},
+    'pronunciation': {'score': 5.0}
+}
+
+
+def _run_conversation(scorer, conversation):
+    running_score = RunningBandScore(scorer)
+    notes = conversation['evaluation_notes']
+    for turn, response in enumerate(conversation['user_responses']):
+        running_score.add_response(response)
+        running_score.add_notes(notes[turn::len(conversation['user_responses'])])
+    return running_score
+
+
+def _without_date(result):
+    return {key: value for key, value in result.items() if key != 'assessment_date'}
+
+
+@pytest.mark.parametrize('ai_analysis', [None, AI_ANALYSIS])
+def test_running_bands_match_full_scoring(ai_analysis):
+    scorer = IELTSBandScorer()
+    for item in SPEAKING:
+        conversation = item['conversation']
+        expected = scorer.evaluate_speaking_assessment(conversation, ai_analysis)
+        bands = _run_conversation(scorer, conversation).bands(ai_analysis)
+
+        assert bands['criterion_scores'] == expected['criterion_scores'], item['id']
+        assert bands['overall_band_score'] == expected['overall_band_score'], item['id']
+        assert bands['responses_scored'] == len(conversation['user_responses'])
+
+
+def test_report_from_running_score_matches_full_report():
+    scorer = IELTSBandScorer()
+    for item in SPEAKING:
+        conversation = item['conversation']
+        running_score = _run_conversation(scorer, conversation)
+
+        expected = scorer.evaluate_speaking_assessment(conversation)
+        actual = scorer.evaluate_speaking_assessment(conversation, running_score=running_score)
+        assert _without_date(actual) == _without_date(expected), item['id']
+
+
+def test_feedback_quotes_the_whole_conversation():
+    scorer = IELTSBandScorer()
+    brief = {'text': 'Yes, I do.', 'word_count': 3, 'stage': 'part1_questions'}
+    extended = {'text': ' '.join(['I usually spend my weekends walking along the river with friends'] * 3),
+                'word_count': 33, 'stage': 'part3_discussion'}
+    conversation = {'session_id': 'late-example', 'user_responses': [brief] * 4 + [extended],
+                    'evaluation_notes': []}
+    running_score = _run_conversation(scorer, conversation)
+
+    for result in (scorer.evaluate_speaking_assessment(conversation),
+                   scorer.evaluate_speaking_assessment(conversation, running_score=running_score)):
+        examples = result['detailed_feedback']['Fluency and Coherence']['specific_examples']
+        assert examples and 'part3_discussion' in examples[0]
+
+
+def test_stale_running_score_is_ignored():
+    scorer = IELTSBandScorer()
+    conversation = SPEAKING[-1]['conversation']
+    running_score = RunningBandScore(scorer)
+    running_score.add_response(conversation['user_responses'][0])
+
+    expected = scorer.evaluate_speaking_assessment(conversation)
+    actual = scorer.evaluate_speaking_assessment(conversation, running_score=running_score)
+    assert _without_date(actual) == _without_date(expected)
+
+
+def test_partial_bands_before_any_response():
+    bands = RunningBandScore().bands()
+    assert bands['responses_scored'] == 0
+    assert bands['overall_band_score'] == 5.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
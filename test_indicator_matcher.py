@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the word-level Aho-Corasick indicator matcher
+"""
+
+import random
+import re
+
+import pytest
+
+from indicator_matcher import SCORING_INDICATORS, IndicatorMatcher, get_indicator_matcher
+from text_features import TextFeatures
+
+
+def whole_word_count(text, phrases):
+    """The old per-indicator counting rule, restricted to whole words"""
+    lower = text.lower()
+    return sum(1 for phrase in phrases if re.search(r'\b' + re.escape(phrase) + r'\b', lower))
+
+
+def test_overlapping_and_nested_phrases_all_match():
+    matcher = IndicatorMatcher({'places': ['new york', 'york city', 'new york city', 'city']})
+    assert matcher.count_text('We flew to New York City.') == {'places': 4}
+    assert matcher.count_text('New York, then the city') == {'places': 2}
+
+
+def test_multi_word_phrase_found_after_a_false_start():
+    matcher = IndicatorMatcher({'linking': ['in addition', 'on the other hand']})
+    # "in in addition" and "on the on the other hand" need the failure links
+    assert matcher.count_text('In in addition to that') == {'linking': 1}
+    assert matcher.count_text('on the on the other hand') == {'linking': 1}
+    assert matcher.count_text('in the addition') == {'linking': 0}
+
+
+def test_counts_distinct_phrases_per_category():
+    matcher = IndicatorMatcher({'a': ['however', 'which', 'which'], 'b': ['however']})
+    # Repeats in the text count once; a phrase listed twice counts twice, as before
+    assert matcher.count_text('However, which one? However, which.') == {'a': 3, 'b': 1}
+    assert matcher.count_text('') == {'a': 0, 'b': 0}
+
+
+def test_whole_words_only():
+    counts = get_indicator_matcher().count_text('What a different and significant thatch')
+    # The old substring check counted 'that' in 'what'/'thatch' and 'if' in 'different'
+    assert counts['grammar_complex'] == 0
+    assert counts['writing_lexical'] == 1
+
+
+def test_empty_phrase_is_rejected():
+    with pytest.raises(ValueError):
+        IndicatorMatcher({'broken': ['...']})
+
+
+def test_parity_with_whole_word_counting():
+    vocabulary = sorted({phrase for phrases in SCORING_INDICATORS.values() for phrase in phrases})
+    fillers = ['cat', 'sun', 'river', 'blue', 'we', 'ran', 'to', 'my']
+    rng = random.Random(33)
+    for _ in range(300):
+        words = [rng.choice(vocabulary if rng.random() < 0.4 else fillers) for _ in range(rng.randint(0, 30))]
+        text = ''.join(word + rng.choice([' ', ' ', ', ', '. ', '! ']) for word in words)
+        if rng.random() < 0.5:
+            text = text.title()
+
+        features = TextFeatures(text)
+        for category, phrases in SCORING_INDICATORS.items():
+            assert features.count_indicators(category) == whole_word_count(text, phrases), (category, text)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm Nova Sonic stream pool
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+import nova_sonic_streaming
+from nova_sonic_pool import NovaSonicStreamPool
+from nova_sonic_streaming import (
+    ConnectionStateStore, NovaSonicStreamManager, StreamCapacityError, handle_websocket_event
+)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv('NOVA_SONIC_LOCAL_STREAM', 'true')
+    return NovaSonicStreamPool(max_streams=2, spare_streams=1)
+
+
+def wait_for_spares(pool, count=1):
+    deadline = time.time() + 5
+    while pool.metrics()['spares'] < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_spares_are_reused_and_streams_are_capped(pool):
+    pool.prewarm()
+    wait_for_spares(pool)
+
+    first = pool.run(pool.acquire())
+    assert first.warm
+    second = pool.run(pool.acquire())
+    with pytest.raises(StreamCapacityError):
+        pool.run(pool.acquire(timeout=0.05))
+
+    pool.run(first.release())
+    pool.run(second.release())
+    metrics = pool.metrics()
+    assert metrics['warm_hits'] + metrics['cold_opens'] == 2
+    assert (metrics['rejected'], metrics['peak_active'], metrics['active']) == (1, 2, 0)
+
+
+def test_stale_spares_are_replaced(pool):
+    pool.spare_max_age = 0
+    pool.prewarm()
+    wait_for_spares(pool)
+    time.sleep(0.01)
+
+    lease = pool.run(pool.acquire())
+    assert not lease.warm and pool.metrics()['expired_spares'] == 1
+    pool.run(lease.release())
+
+
+def test_connection_check_leaves_a_warm_spare(pool):
+    result = pool.check()
+    assert result['success'] and not result['warm']
+    assert pool.check()['warm']
+    assert pool.metrics()['streams_opened'] == 1
+
+
+def test_timed_out_start_gives_its_lease_back(pool, monkeypatch):
+    async def stalled_start(session):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(nova_sonic_streaming.NovaSonicStreamSession, 'start', stalled_start)
+    manager = NovaSonicStreamManager(ConnectionStateStore(table_name=''), pool)
+    with pytest.raises(TimeoutError):
+        manager.start('conn-1', [].append, {}, timeout=0.2)
+
+    assert 'conn-1' not in manager.sessions
+    assert pool.metrics()['active'] == 0
+    # Both slots are free again
+    leases = [pool.run(pool.acquire(timeout=0.5)) for _ in range(2)]
+    for lease in leases:
+        pool.run(lease.release())
+
+
+def test_sessions_report_setup_and_inference_time(pool, monkeypatch):
+    manager = NovaSonicStreamManager(ConnectionStateStore(table_name=''), pool)
+    monkeypatch.setattr(nova_sonic_streaming, '_stream_manager', manager)
+    event = lambda route, body=None: {'requestContext': {'routeKey': route, 'connectionId': 'conn-1'},
+                                      'body': body, 'isBase64Encoded': False}
+    sent = []
+    handle_websocket_event(event('$connect'), None, sent.append)
+    wait_for_spares(pool)
+
+    # The stream opened on connect serves the session's start and every turn after it
+    handle_websocket_event(event('nova-sonic-stream', json.dumps({'type': 'start'})), None, sent.append)
+    for _ in range(2):
+        handle_websocket_event(event('nova-sonic-stream', json.dumps({'type': 'end_turn'})), None, sent.append)
+
+    messages = [json.loads(item) for item in sent if isinstance(item, str)]
+    started = messages[0]
+    assert started['warm_stream'] and started['setup_ms'] >= 0
+    timings = [message['timing'] for message in messages if message['type'] == 'turn_complete']
+    assert len(timings) == 2 and all(timing['first_audio_ms'] <= timing['inference_ms'] for timing in timings)
+
+    metrics = pool.metrics()
+    assert (metrics['setup_ms']['count'], metrics['inference_ms']['count'], metrics['active']) == (1, 2, 1)
+    assert manager.state_store.load('conn-1')['last_inference_ms'] >= 0
+
+    handle_websocket_event(event('$disconnect'), None, sent.append)
+    assert pool.metrics()['active'] == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
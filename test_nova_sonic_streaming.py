@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for the Nova Sonic WebSocket streaming handler and local server
+"""
+
+import asyncio
+import base64
+import json
+import os
+
+import pytest
+
+import nova_sonic_streaming
+from nova_sonic_streaming import ConnectionStateStore, NovaSonicStreamManager, handle_websocket_event
+from websocket_dev_server import LocalWebSocketServer, OP_BINARY, OP_CLOSE, OP_TEXT, accept_key, encode_frame, read_frame
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv('NOVA_SONIC_LOCAL_STREAM', 'true')
+    manager = NovaSonicStreamManager(ConnectionStateStore(table_name=''))
+    monkeypatch.setattr(nova_sonic_streaming, '_stream_manager', manager)
+    return manager
+
+
+def event(route_key, body=None, binary=False):
+    return {'requestContext': {'routeKey': route_key, 'connectionId': 'conn-1'},
+            'body': body, 'isBase64Encoded': binary}
+
+
+def message(**fields):
+    return event('nova-sonic-stream', json.dumps(dict(action='nova-sonic-stream', **fields)))
+
+
+def test_audio_is_streamed_and_replies_relay_in_order(manager):
+    sent = []
+    assert handle_websocket_event(event('$connect'), None, sent.append)['statusCode'] == 200
+    assert manager.state_store.load('conn-1')['status'] == 'connected'
+
+    assert handle_websocket_event(message(type='start', sample_rate=48000, channels=2), None, sent.append)['statusCode'] == 200
+    assert json.loads(sent[0])['type'] == 'session_started'
+    state = manager.state_store.load('conn-1')
+    assert (state['status'], state['sample_rate']) == ('streaming', 48000)
+
+    # One second of 48 kHz stereo, half as JSON and half as binary frames
+    chunk = bytes(48000 * 2 * 2 // 10)
+    for index in range(10):
+        if index % 2:
+            handle_websocket_event(event('$default', base64.b64encode(chunk).decode(), binary=True), None, sent.append)
+        else:
+            handle_websocket_event(message(type='audio', audio=base64.b64encode(chunk).decode()), None, sent.append)
+    handle_websocket_event(message(type='end_turn'), None, sent.append)
+
+    replies = [json.loads(item) if isinstance(item, str) else 'audio' for item in sent[1:]]
+    assert [reply if reply == 'audio' else reply['type'] for reply in replies] == [
+        'transcript', 'transcript', 'audio', 'audio', 'audio', 'turn_complete'
+    ]
+    assert replies[0] == {'type': 'transcript', 'role': 'USER', 'text': '[1.0 seconds of speech]', 'final': True}
+    assert replies[1]['role'] == 'ASSISTANT'
+    assert manager.state_store.load('conn-1')['turns'] == 1
+
+    handle_websocket_event(event('$disconnect'), None, sent.append)
+    assert manager.state_store.load('conn-1') is None
+    assert 'conn-1' not in manager.sessions
+
+
+def test_audio_before_start_is_rejected(manager):
+    sent = []
+    handle_websocket_event(event('$connect'), None, sent.append)
+    response = handle_websocket_event(message(type='audio', audio='AAAA'), None, sent.append)
+    assert response['statusCode'] == 400
+    assert json.loads(sent[-1])['type'] == 'error'
+
+
+def test_stream_is_reopened_from_stored_state(manager):
+    sent = []
+    handle_websocket_event(event('$connect'), None, sent.append)
+    handle_websocket_event(message(type='start', binary_audio=False), None, sent.append)
+
+    # Another process picks up the connection: no live stream, state in the table
+    stale = manager.sessions.pop('conn-1')
+    handle_websocket_event(message(type='audio', audio=base64.b64encode(bytes(3200)).decode()), None, sent.append)
+    handle_websocket_event(message(type='end_turn'), None, sent.append)
+
+    types = [json.loads(item)['type'] for item in sent]
+    assert types.count('session_started') == 2
+    assert types[-2:] == ['audio', 'turn_complete']
+    reset = json.loads(sent[types.index('stream_reset')])
+    assert reset['previous_session_id'] == stale.session_id
+    assert reset['session_id'] == manager.sessions['conn-1'].session_id
+
+    manager._run(stale.close())
+    handle_websocket_event(event('$disconnect'), None, sent.append)
+
+
+def test_stream_replaced_by_another_container_is_closed(manager):
+    sent = []
+    handle_websocket_event(event('$connect'), None, sent.append)
+    handle_websocket_event(message(type='start'), None, sent.append)
+    held = manager.sessions['conn-1']
+    assert manager.pool.metrics()['active'] == 1
+
+    # Another container reopened the stream; this one still holds the old lease
+    manager.state_store.save('conn-1', stream_session_id='elsewhere')
+    handle_websocket_event(message(type='end_turn'), None, sent.append)
+
+    assert manager.sessions['conn-1'] is not held
+    assert held._lease._released and manager.pool.metrics()['active'] == 1
+    assert json.loads(sent[-1])['type'] == 'turn_complete'
+    assert any(json.loads(item)['type'] == 'stream_reset' for item in sent if isinstance(item, str))
+    handle_websocket_event(event('$disconnect'), None, sent.append)
+
+
+def test_connect_is_refused_without_a_streaming_client(manager, monkeypatch):
+    monkeypatch.delenv('NOVA_SONIC_LOCAL_STREAM')
+    monkeypatch.delenv('REPLIT_ENVIRONMENT', raising=False)
+    monkeypatch.setattr(nova_sonic_streaming, 'BIDIRECTIONAL_STREAMING_AVAILABLE', False)
+
+    response = handle_websocket_event(event('$connect'), None, [].append)
+    assert response['statusCode'] == 501
+    assert 'aws_sdk_bedrock_runtime' in json.loads(response['body'])['error']
+    assert manager.state_store.load('conn-1') is None
+
+    sent = []
+    assert handle_websocket_event(message(type='start'), None, sent.append)['statusCode'] == 501
+    assert json.loads(sent[-1])['type'] == 'error'
+
+
+def test_turn_timeout_leaves_time_to_save_state():
+    class Context:
+        def __init__(self, remaining_ms):
+            self.remaining_ms = remaining_ms
+
+        def get_remaining_time_in_millis(self):
+            return self.remaining_ms
+
+    assert nova_sonic_streaming.turn_timeout() <= 29 - nova_sonic_streaming.STATE_SAVE_MARGIN_SECONDS
+    assert nova_sonic_streaming.turn_timeout(Context(30000)) <= 25
+    assert nova_sonic_streaming.turn_timeout(Context(10000)) == 10 - nova_sonic_streaming.STATE_SAVE_MARGIN_SECONDS
+    assert nova_sonic_streaming.turn_timeout(Context(2000)) == 1.0
+
+
+def test_local_server_speaks_websocket(manager):
+    async def conversation():
+        server = LocalWebSocketServer()
+        port = await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET /?assessment_type=general_speaking HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        response = (await reader.readuntil(b'\r\n\r\n')).decode()
+        assert '101' in response.split('\r\n')[0] and accept_key(key) in response
+
+        mask = b'\x01\x02\x03\x04'
+        writer.write(encode_frame(OP_TEXT, json.dumps({'action': 'nova-sonic-stream', 'type': 'start'}).encode(), mask))
+        writer.write(encode_frame(OP_BINARY, bytes(16000), mask))
+        writer.write(encode_frame(OP_TEXT, json.dumps({'action': 'nova-sonic-stream', 'type': 'end_turn'}).encode(), mask))
+
+        received = []
+        while not received or received[-1] != 'turn_complete':
+            _, opcode, payload = await asyncio.wait_for(read_frame(reader), 10)
+            received.append(json.loads(payload)['type'] if opcode == OP_TEXT else 'audio')
+
+        writer.write(encode_frame(OP_CLOSE, b'\x03\xe8', mask))
+        await asyncio.wait_for(read_frame(reader), 10)
+        writer.close()
+        await server.close()
+        return received
+
+    received = asyncio.run(conversation())
+    assert received[0] == 'session_started'
+    assert received[-4:] == ['audio', 'audio', 'audio', 'turn_complete']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
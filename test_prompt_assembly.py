@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for evaluation prompt assembly and token budgeting
+"""
+
+import pytest
+
+from prompt_assembly import (
+    PromptAssembler, count_tokens, render_rubric, split_to_token_budget, PROMPT_CACHE_MIN_TOKENS
+)
+
+MODEL = 'amazon.nova-micro-v1:0'
+RUBRIC = {
+    'nova_micro_prompt': 'You are an expert IELTS examiner evaluating academic writing responses.',
+    'criteria': {
+        'lexical_resource': {
+            'weight': 0.25,
+            'band_descriptors': {'6': 'Adequate range', '9': 'Wide range', '7': 'Sufficient range'}
+        }
+    }
+}
+DYNAMODB_RUBRIC = {
+    'rubric_id': 'ielts_academic_writing_v2024',
+    'task_2': {'task_response': {'band_9': 'Fully addresses all parts.', 'band_8': 'Sufficiently addresses.'}},
+    'nova_micro_prompts': {'system_prompt': 'You are an IELTS examiner.', 'task_2_requirements': 'Minimum 250 words.'}
+}
+ESSAY = '\n\n'.join(
+    ' '.join(f"Sentence {paragraph}.{sentence} talks about technology and society." for sentence in range(6))
+    for paragraph in range(8)
+)
+
+
+def test_count_tokens_is_deterministic_and_additive():
+    assert count_tokens('') == 0
+    assert count_tokens('Hello, world!') == 6
+    assert count_tokens('a b') == count_tokens('a') + count_tokens('b')
+    assert count_tokens('internationalisation') == 5
+
+
+def test_rubric_rendering_orders_bands_and_handles_both_shapes():
+    text = render_rubric(RUBRIC)
+    assert text.startswith('You are an expert IELTS examiner')
+    assert text.index('Band 9') < text.index('Band 7') < text.index('Band 6')
+    assert 'Lexical Resource (25%):' in text
+
+    text = render_rubric(DYNAMODB_RUBRIC)
+    assert 'BAND DESCRIPTORS - TASK 2' in text
+    assert 'Task 2 requirements: Minimum 250 words.' in text
+
+
+def test_prefix_is_built_once_per_rubric_version():
+    assembler = PromptAssembler()
+    first = assembler.get_prefix(RUBRIC, 'academic-writing')
+    second = assembler.get_prefix(dict(RUBRIC), 'academic-writing')
+
+    assert first is second
+    assert assembler.stats == {'prefix_hits': 1, 'prefix_builds': 1}
+    assert assembler.get_prefix(DYNAMODB_RUBRIC, 'academic-writing') is not first
+    assert assembler.get_prefix(RUBRIC, 'general-writing') is not first
+
+
+def test_static_prefix_comes_first_and_is_cache_marked():
+    prompt = PromptAssembler().assemble(RUBRIC, 'academic-writing', 'A short essay.', MODEL, task_prompt='Discuss.')[0]
+
+    assert prompt.prefix.tokens >= PROMPT_CACHE_MIN_TOKENS
+    assert prompt.body['system'] == [{'text': prompt.prefix.text}, {'cachePoint': {'type': 'default'}}]
+    assert prompt.body['messages'][0]['content'][0]['text'] == 'TASK:\nDiscuss.\n\nESSAY:\nA short essay.'
+    assert not prompt.truncated
+
+    uncached = PromptAssembler().assemble(RUBRIC, 'academic-writing', 'A short essay.', 'amazon.nova-sonic-v1:0')[0]
+    assert len(uncached.body['system']) == 1
+
+
+def test_over_budget_essay_is_truncated_at_a_boundary():
+    assembler = PromptAssembler(max_submission_tokens=120)
+    prompt = assembler.assemble(RUBRIC, 'academic-writing', ESSAY, MODEL)[0]
+
+    assert prompt.truncated
+    assert prompt.submission_tokens <= 120
+    assert ESSAY.startswith(prompt.submission_text)
+    assert prompt.submission_text.endswith('society.')
+    assert assembler.assemble(RUBRIC, 'academic-writing', ESSAY, MODEL)[0].submission_text == prompt.submission_text
+
+
+def test_chunking_covers_the_whole_essay():
+    prompts = PromptAssembler(max_submission_tokens=120).assemble(RUBRIC, 'academic-writing', ESSAY, MODEL, overflow='chunk')
+
+    assert len(prompts) > 1
+    assert all(prompt.submission_tokens <= 120 for prompt in prompts)
+    assert [prompt.chunk_index for prompt in prompts] == list(range(len(prompts)))
+    assert 'PART 1 OF' in prompts[0].body['messages'][0]['content'][0]['text']
+    assert sum(prompt.submission_tokens for prompt in prompts) == count_tokens(ESSAY)
+
+
+@pytest.mark.parametrize('budget', [5, 40, 500])
+def test_split_respects_budget_even_inside_long_sentences(budget):
+    text = ESSAY + ' ' + ' '.join(['word'] * 300)
+    chunks = split_to_token_budget(text, budget)
+    assert all(count_tokens(chunk) <= budget for chunk in chunks)
+    assert ' '.join(' '.join(chunks).split()) == ' '.join(text.split())
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
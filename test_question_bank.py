@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Tests for the question bank and bulk question import against an in-memory
+DynamoDB stand-in
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+import question_bank_admin
+import question_bank_dal
+from question_bank_dal import PRESELECTION_KEY, USAGE_BITMAP_KEY, QuestionBankDAL, QuestionCategory, QuestionUsageBitmap
+from question_cache import QuestionContentCache
+from question_import import QuestionImportPipeline
+
+
+class FakeTable:
+    """One table with the key, update, condition and query expressions the question bank uses"""
+
+    def __init__(self, name, key_names):
+        self.name = name
+        self.key_names = key_names
+        self.items = {}
+
+    def _key(self, key):
+        return tuple(key[name] for name in self.key_names)
+
+    def check(self, key, condition, names=None, values=None):
+        item = self.items.get(self._key(key))
+        for clause in (condition or '').split(' AND ') if condition else []:
+            clause = clause.strip()
+            match = re.fullmatch(r'attribute_(not_)?exists\((\w+)\)', clause)
+            if match:
+                present = item is not None and match.group(2) in item
+                if present == bool(match.group(1)):
+                    return False
+                continue
+            attribute, placeholder = [part.strip() for part in clause.split('=')]
+            attribute = (names or {}).get(attribute, attribute)
+            if item is None or item.get(attribute) != values[placeholder]:
+                return False
+        return True
+
+    def get_item(self, Key, ProjectionExpression=None):
+        item = self.items.get(self._key(Key))
+        return {'Item': dict(item)} if item is not None else {}
+
+    def put_item(self, Item):
+        self.items[self._key(Item)] = dict(Item)
+
+    def delete(self, key):
+        self.items.pop(self._key(key), None)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None, ExpressionAttributeNames=None,
+                    ConditionExpression=None, ReturnValues=None):
+        values = ExpressionAttributeValues or {}
+        if not self.check(Key, ConditionExpression, ExpressionAttributeNames, values):
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        item = self.items.setdefault(self._key(Key), dict(Key))
+        action, assignments = UpdateExpression.split(' ', 1)
+        updated = {}
+        for assignment in assignments.split(','):
+            if action == 'ADD':
+                attribute, placeholder = assignment.split()
+                item[attribute] = item.get(attribute, 0) + values[placeholder]
+            else:
+                attribute, placeholder = [part.strip() for part in assignment.split('=')]
+                attribute = (ExpressionAttributeNames or {}).get(attribute, attribute)
+                item[attribute] = values[placeholder]
+            updated[attribute] = item[attribute]
+        return {'Attributes': dict(item) if ReturnValues == 'ALL_NEW' else updated}
+
+    def query(self, KeyConditionExpression, ExpressionAttributeValues, FilterExpression=None,
+              ExclusiveStartKey=None):
+        hash_value = ExpressionAttributeValues[re.match(r'\w+ = (:\w+)', KeyConditionExpression).group(1)]
+        prefix = re.search(r'begins_with\(\w+, (:\w+)\)', KeyConditionExpression)
+        items = []
+        for key, item in sorted(self.items.items()):
+            if key[0] != hash_value:
+                continue
+            if prefix and not key[1].startswith(ExpressionAttributeValues[prefix.group(1)]):
+                continue
+            if FilterExpression and not self.check(item, FilterExpression, values=ExpressionAttributeValues):
+                continue
+            items.append(dict(item))
+        return {'Items': items}
+
+
+class FakeDynamoDB:
+    """In-memory stand-in for the boto3 DynamoDB resource and its client"""
+
+    KEY_NAMES = {'sessions': ('session_id',), 'usage': ('user_assessment_key', 'question_id'),
+                 'profiles': ('user_email',)}
+
+    def __init__(self):
+        self.tables = {}
+        self.transactions = []
+        self.meta = SimpleNamespace(client=self)
+        self._lock = threading.Lock()  # transactions are atomic; the import writes from threads
+
+    def Table(self, name):
+        if name not in self.tables:
+            kind = next((kind for kind in self.KEY_NAMES if kind in name), None)
+            self.tables[name] = FakeTable(name, self.KEY_NAMES.get(kind, ('pool_id', 'question_id')))
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems):
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            responses[name] = [table.get_item(key)['Item'] for key in request['Keys'] if table.get_item(key)]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def transact_write_items(self, TransactItems):
+        with self._lock:
+            self._transact(TransactItems)
+
+    def _transact(self, TransactItems):
+        self.transactions.append(TransactItems)
+        reasons = []
+        for action in TransactItems:
+            (kind, request), = action.items()
+            table = self.Table(request['TableName'])
+            key = request.get('Key') or request['Item']
+            passed = table.check(key, request.get('ConditionExpression'), request.get('ExpressionAttributeNames'),
+                                 request.get('ExpressionAttributeValues'))
+            reasons.append({'Code': 'None' if passed else 'ConditionalCheckFailed'})
+        if any(reason['Code'] != 'None' for reason in reasons):
+            raise ClientError({'Error': {'Code': 'TransactionCanceledException'}, 'CancellationReasons': reasons},
+                              'TransactWriteItems')
+
+        for action in TransactItems:
+            (kind, request), = action.items()
+            table = self.Table(request['TableName'])
+            if kind == 'Put':
+                table.put_item(request['Item'])
+            elif kind == 'Delete':
+                table.delete(request['Key'])
+            else:
+                table.update_item(request['Key'], request['UpdateExpression'],
+                                  request.get('ExpressionAttributeValues'), request.get('ExpressionAttributeNames'))
+
+
+@pytest.fixture
+def dal(monkeypatch):
+    dynamodb = FakeDynamoDB()
+    monkeypatch.setattr(question_bank_dal, 'get_dal', lambda: SimpleNamespace(dynamodb=dynamodb))
+    monkeypatch.setattr(question_bank_dal, 'get_question_cache', lambda: QuestionContentCache())
+    return QuestionBankDAL()
+
+
+def question_specs(count, category='speaking_part1', assessment_type='academic_speaking'):
+    return [{'assessment_type': assessment_type, 'category': category,
+             'content': {'type': 'personal', 'text': f"{category} question {index}?"}} for index in range(count)]
+
+
+def stored_questions(dal):
+    return {item['question_id']: item for item in dal.questions_table.items.values()
+            if 'content' in item}
+
+
+def test_reimport_keeps_every_question_on_its_own_shard(dal):
+    specs = question_specs(30) + question_specs(5, 'speaking_part3')
+    first = QuestionImportPipeline(dal, writers=2).run(specs)
+    assert first['written'] == 35 and first['success']
+
+    shards = {question_id: item['shard'] for question_id, item in stored_questions(dal).items()}
+    for question_id, shard in shards.items():
+        assert shard == int(question_id.rsplit('_', 1)[1], 16) % dal.shard_count
+
+    # Same questions in another order and batch, mixed with new ones
+    again = list(reversed(specs[5:])) + question_specs(40)[30:]
+    second = QuestionImportPipeline(dal, writers=3).run(again)
+    assert (second['written'], second['already_present']) == (10, 30)
+
+    stored = stored_questions(dal)
+    assert len(stored) == 45
+    assert all(stored[question_id]['shard'] == shard for question_id, shard in shards.items())
+    for result in second['results']:
+        assert result['shard'] == int(result['question_id'].rsplit('_', 1)[1], 16) % dal.shard_count
+
+    # Counters were bumped once per stored question
+    counters = dal.get_pool_counters('academic_speaking')
+    assert counters['speaking_part1']['total_questions'] == 40
+    assert counters['speaking_part3']['active_questions'] == 5
+
+
+def counter_transactions(dynamodb):
+    return [actions for actions in dynamodb.transactions if all('Update' in action for action in actions)]
+
+
+def test_counters_are_applied_once_per_pool_at_the_end(dal):
+    specs = question_specs(60) + question_specs(3, 'speaking_part2')
+    report = QuestionImportPipeline(dal, writers=4).run(specs)
+    assert report['written'] == 63 and report['success']
+
+    # Question chunks carry no counter updates; one transaction holds them all
+    assert all(all('Put' in action for action in actions) for actions in dal.dynamodb.transactions
+               if actions not in counter_transactions(dal.dynamodb))
+    (updates,) = counter_transactions(dal.dynamodb)
+    pools = {item['pool_id'] for item in stored_questions(dal).values()}
+    assert len(updates) == len(pools) == report['counter_updates']
+
+    counters = dal.get_pool_counters('academic_speaking')
+    assert counters['speaking_part1'] == {'total_questions': 60, 'active_questions': 60,
+                                          'shards_populated': len([pool for pool in pools if 'part1' in pool])}
+    assert counters['speaking_part2']['total_questions'] == 3
+
+
+def test_failing_chunk_does_not_abort_the_import(dal, monkeypatch):
+    specs = question_specs(60)
+    transact = dal.dynamodb.transact_write_items
+
+    def flaky(TransactItems):
+        if any(action.get('Put', {}).get('Item', {}).get('content', {}).get('text') == specs[30]['content']['text']
+               for action in TransactItems):
+            raise ValueError('Item too large')
+        return transact(TransactItems)
+
+    monkeypatch.setattr(dal.dynamodb, 'transact_write_items', flaky)
+    report = QuestionImportPipeline(dal, writers=2).run(specs)
+
+    assert not report['success']
+    assert (report['written'], report['failed']) == (35, 25)
+    assert [result['success'] for result in report['results']].count(False) == 25
+    assert dal.get_pool_counters('academic_speaking')['speaking_part1']['total_questions'] == 35
+
+
+def test_unapplied_counters_are_kept_in_the_checkpoint(dal, monkeypatch, tmp_path):
+    checkpoint = tmp_path / 'import.json'
+    transact = dal.dynamodb.transact_write_items
+
+    def no_counters(TransactItems):
+        if all('Update' in action for action in TransactItems):
+            raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'TransactWriteItems')
+        return transact(TransactItems)
+
+    monkeypatch.setattr(dal.dynamodb, 'transact_write_items', no_counters)
+    report = QuestionImportPipeline(dal, max_retries=1, checkpoint_path=str(checkpoint)).run(question_specs(30))
+    assert report['written'] == 30 and report['counter_failures'] > 0 and not report['success']
+    saved = json.loads(checkpoint.read_text())
+    assert sum(delta for *_, delta in saved['counter_deltas']) == 30
+
+    monkeypatch.setattr(dal.dynamodb, 'transact_write_items', transact)
+    resumed = QuestionImportPipeline(dal, checkpoint_path=str(checkpoint)).run(question_specs(30))
+    assert resumed['skipped_from_checkpoint'] == 30 and resumed['success']
+    assert dal.get_pool_counters('academic_speaking')['speaking_part1']['total_questions'] == 30
+    assert json.loads(checkpoint.read_text())['counter_deltas'] == []
+
+
+def test_deactivating_a_question_decrements_its_active_count(dal, monkeypatch):
+    QuestionImportPipeline(dal).run(question_specs(4))
+    monkeypatch.setattr(question_bank_admin, 'get_question_bank_dal', lambda: dal)
+    question = next(iter(stored_questions(dal).values()))
+
+    assert question_bank_admin.QuestionBankAdmin().deactivate_question(question['pool_id'],
+                                                                      question['question_id'])['success']
+    counters = dal.get_pool_counters('academic_speaking')['speaking_part1']
+    assert (counters['total_questions'], counters['active_questions']) == (4, 3)
+
+
+@pytest.fixture
+def writing_bank(dal):
+    # Few shards so live selection visits every pool
+    dal.shard_count = 4
+    specs = question_specs(3, 'writing_task1', 'academic_writing') + \
+        question_specs(3, 'writing_task2', 'academic_writing')
+    QuestionImportPipeline(dal).run(specs)
+    return dal
+
+
+def test_usage_bitmap_round_trips_through_its_item():
+    usage = QuestionUsageBitmap()
+    for question in ({'question_id': 'a', 'ordinal': 0}, {'question_id': 'b', 'ordinal': 9},
+                     {'question_id': 'legacy'}):
+        usage.add(question)
+    assert len(usage) == 3 and usage.bitmap == bytearray([0b1, 0b10])
+    assert not usage.contains({'question_id': 'c', 'ordinal': 1})
+    assert not usage.contains({'question_id': 'd', 'ordinal': 800})
+
+    item = usage.to_item('user#academic_writing')
+    assert (item['question_id'], item['usage_version']) == (USAGE_BITMAP_KEY, 1)
+    # boto3 hands binary attributes back wrapped
+    loaded = QuestionUsageBitmap.from_item(dict(item, bitmap=SimpleNamespace(value=item['bitmap'])))
+    assert loaded.contains({'question_id': 'x', 'ordinal': 9}) and loaded.contains({'question_id': 'legacy'})
+    assert loaded.version == 1
+    assert 'legacy_ids' not in QuestionUsageBitmap().to_item('user#academic_writing')
+
+
+def test_sessions_never_repeat_questions_and_keep_one_usage_item(writing_bank):
+    dal = writing_bank
+    seen = set()
+    for _ in range(3):
+        session = dal.start_assessment_session('user@example.com', 'academic_writing', 'purchase-1')
+        assert session['success'], session
+        question_ids = {question['question_id'] for questions in session['questions'].values()
+                        for question in questions}
+        assert len(question_ids) == 2 and not question_ids & seen
+        seen |= question_ids
+
+    usage_items = dal.usage_table.items
+    bitmap_item = usage_items[('user@example.com#academic_writing', USAGE_BITMAP_KEY)]
+    assert bitmap_item['usage_version'] == 3
+    assert len(QuestionUsageBitmap.from_item(bitmap_item)) == 6
+
+    exhausted = dal.start_assessment_session('user@example.com', 'academic_writing', 'purchase-1')
+    assert not exhausted['success'] and exhausted['category'] == 'writing_task1'
+
+
+def test_reservation_with_a_stale_bitmap_is_rejected(writing_bank):
+    dal = writing_bank
+    stale = dal.get_user_usage_bitmap('user@example.com', 'academic_writing')
+    assert dal.start_assessment_session('user@example.com', 'academic_writing', 'purchase-1')['success']
+
+    # Unused questions, but reserved against the bitmap as it was before the session
+    fresh = dal.get_user_usage_bitmap('user@example.com', 'academic_writing')
+    questions, missing = dal._select_session_questions('user@example.com', 'academic_writing', fresh)
+    assert missing is None
+    session_data = dal._build_session_data('session-2', 'user@example.com', 'academic_writing',
+                                           'purchase-2', questions)
+    assert not dal._reserve_questions_transactionally(session_data, questions, 'user@example.com',
+                                                      'academic_writing', usage=stale)
+    assert dal._reserve_questions_transactionally(session_data, questions, 'user@example.com',
+                                                  'academic_writing', usage=fresh)
+
+
+def test_usage_bitmap_is_rebuilt_from_itemised_records(dal):
+    key = 'user@example.com#academic_writing'
+    dal.usage_table.put_item({'user_assessment_key': key, 'question_id': 'q-with-ordinal', 'ordinal': 12})
+    dal.usage_table.put_item({'user_assessment_key': key, 'question_id': 'q-before-ordinals'})
+
+    usage = dal.get_user_usage_bitmap('user@example.com', 'academic_writing')
+    assert usage.version == 0 and len(usage) == 2
+    assert usage.contains({'question_id': 'other', 'ordinal': 12})
+    assert usage.contains({'question_id': 'q-before-ordinals'})
+
+
+def count_calls(monkeypatch, target, name):
+    calls = []
+    original = getattr(target, name)
+
+    def counted(*args, **kwargs):
+        calls.append(kwargs)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(target, name, counted)
+    return calls
+
+
+def test_pools_and_questions_are_served_from_the_cache(writing_bank, monkeypatch):
+    dal = writing_bank
+    queries = count_calls(monkeypatch, dal.questions_table, 'query')
+    batch_gets = count_calls(monkeypatch, dal.dynamodb, 'batch_get_item')
+    pool_id = next(iter(stored_questions(dal).values()))['pool_id']
+
+    first = dal._get_pool_questions(pool_id)
+    assert dal._get_pool_questions(pool_id) == first and len(queries) == 1
+
+    keys = {question['question_id']: question['pool_id'] for question in stored_questions(dal).values()}
+    questions = dal.get_questions_by_key(keys)
+    assert set(questions) == set(keys)
+    # Only the questions outside the cached pool were fetched
+    (request,) = batch_gets
+    assert len(request['RequestItems'][dal.questions_table_name]['Keys']) == len(keys) - len(first)
+    dal.get_questions_by_key(keys)
+    assert len(batch_gets) == 1
+
+
+def test_content_version_bump_clears_other_containers(writing_bank):
+    dal = writing_bank
+    dal.question_cache = QuestionContentCache(version_check_interval=0)
+    keys = {question['question_id']: question['pool_id'] for question in stored_questions(dal).values()}
+    dal.get_questions_by_key(keys)
+    assert dal.question_cache.stats()['cached_questions'] == len(keys)
+
+    # Another container imports or edits questions
+    dal.questions_table.update_item(Key={'pool_id': '__meta__', 'question_id': '__content_version__'},
+                                    UpdateExpression='ADD content_version :one',
+                                    ExpressionAttributeValues={':one': 1})
+    dal.question_cache.ensure_fresh(dal.get_content_version)
+    stats = dal.question_cache.stats()
+    assert (stats['cached_questions'], stats['invalidations']) == (0, 1)
+
+
+def test_cache_evicts_manifests_first_and_drops_incomplete_pools():
+    item = lambda question_id: {'question_id': question_id, 'content': {'text': 'x' * 200}}
+    size = len(json.dumps(item('q0')))
+    cache = QuestionContentCache(max_bytes=size * 3 + 5)
+    cache.put_pool('pool-a', [item('q0'), item('q1')])
+    assert [question['question_id'] for question in cache.get_pool('pool-a')] == ['q0', 'q1']
+
+    cache.put_question(item('q2'))
+    assert cache.get_pool('pool-a') is None and cache.get_question('q0') is not None
+
+    # Then the least recently used question
+    cache.put_question(item('q3'))
+    assert cache.get_question('q1') is None and cache.get_question('q0') is not None
+    assert cache.stats()['bytes_used'] <= cache.max_bytes
+
+
+def test_unreadable_version_keeps_serving_the_cache():
+    cache = QuestionContentCache(version_check_interval=0)
+    cache.ensure_fresh(lambda: 4)
+    cache.put_question({'question_id': 'q1'})
+
+    def unavailable():
+        raise ClientError({'Error': {'Code': 'ServiceUnavailable'}}, 'GetItem')
+
+    cache.ensure_fresh(unavailable)
+    assert cache.get_question('q1') == {'question_id': 'q1'} and cache.version == 4
+
+
+def stash(dal, user_email='user@example.com', assessment_type='academic_writing'):
+    return dal.usage_table.items.get((f"{user_email}#{assessment_type}", PRESELECTION_KEY))
+
+
+def test_session_start_consumes_the_preselected_set(writing_bank):
+    dal = writing_bank
+    assert dal.preselect_next_session('user@example.com', 'academic_writing')['success']
+    stashed = {question['question_id'] for questions in stash(dal)['candidates'].values() for question in questions}
+
+    session = dal.start_assessment_session('user@example.com', 'academic_writing', 'purchase-1')
+    assert {question['question_id'] for questions in session['questions'].values()
+            for question in questions} == stashed
+    assert stash(dal) is None
+
+
+def test_stash_is_not_counted_as_a_used_question(writing_bank):
+    dal = writing_bank
+    key = 'user@example.com#academic_writing'
+    dal.usage_table.put_item({'user_assessment_key': key, 'question_id': 'q-legacy', 'category': 'writing_task1'})
+    before = dal.get_user_question_stats('user@example.com', 'academic_writing')
+    assert dal.preselect_next_session('user@example.com', 'academic_writing')['success'] and stash(dal)
+
+    stats = dal.get_user_question_stats('user@example.com', 'academic_writing')
+    assert stats['total_questions_used'] == before['total_questions_used'] == 1
+    assert set(stats['questions_by_category']) == {'writing_task1'}
+
+    usage = dal.get_user_usage_bitmap('user@example.com', 'academic_writing')
+    assert len(usage) == 1 and not usage.contains({'question_id': PRESELECTION_KEY})
+    assert 'q-legacy' in dal._get_user_used_questions('user@example.com', 'academic_writing',
+                                                      QuestionCategory.WRITING_TASK1)
+    assert PRESELECTION_KEY not in dal._get_user_used_questions('user@example.com', 'academic_writing',
+                                                                QuestionCategory.WRITING_TASK1)
+
+
+def test_stash_replaced_after_it_was_read_is_kept(writing_bank, monkeypatch):
+    dal = writing_bank
+    dal.preselect_next_session('user@example.com', 'academic_writing')
+    read_at_start = dict(stash(dal))
+    dal.preselect_next_session('user@example.com', 'academic_writing')
+    newer = stash(dal)
+    assert newer['stash_id'] != read_at_start['stash_id']
+
+    usage = dal.get_user_usage_bitmap('user@example.com', 'academic_writing')
+    monkeypatch.setattr(dal, '_load_usage_and_preselection', lambda *args: (usage, read_at_start))
+    session = dal.start_assessment_session('user@example.com', 'academic_writing', 'purchase-1')
+
+    assert session['success']
+    assert stash(dal) == newer
+
+
+def test_preselection_is_scheduled_on_the_configured_function(dal, monkeypatch):
+    invocations = []
+    client = SimpleNamespace(invoke=lambda **kwargs: invocations.append(kwargs))
+    fake_boto3 = SimpleNamespace(client=lambda service: client)
+    monkeypatch.setitem(sys.modules, 'boto3', fake_boto3)
+    monkeypatch.setenv('PRESELECTION_FUNCTION_NAME', 'ielts-question-preselection')
+
+    dal.schedule_preselection('user@example.com', 'academic_writing')
+    (invocation,) = invocations
+    assert (invocation['FunctionName'], invocation['InvocationType']) == ('ielts-question-preselection', 'Event')
+    assert json.loads(invocation['Payload']) == {
+        'preselect_questions': {'user_email': 'user@example.com', 'assessment_type': 'academic_writing'}
+    }
+
+
+def test_preselection_runs_in_the_background_without_a_function(writing_bank, monkeypatch):
+    monkeypatch.delenv('PRESELECTION_FUNCTION_NAME', raising=False)
+    writing_bank.schedule_preselection('user@example.com', 'academic_writing')
+    deadline = time.time() + 5
+    while stash(writing_bank) is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert stash(writing_bank)['stash_id']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
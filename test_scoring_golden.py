@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Golden-set regression tests for band scoring
+Band outputs on the synthetic benchmark corpus must match scoring_golden.json;
+regenerate it with `python scoring_benchmark.py --update-golden` only when a
+scoring change is intended
+"""
+
+import pytest
+
+from scoring_benchmark import build_corpus, load_evaluators, load_golden, compute_outputs, compare_outputs
+
+GOLDEN = load_golden()
+CORPUS = build_corpus()
+EVALUATORS, SKIPPED = load_evaluators()
+
+
+@pytest.mark.parametrize('name', sorted(GOLDEN))
+def test_band_outputs_match_golden(name):
+    if name not in EVALUATORS:
+        pytest.skip(f"{name} unavailable: {SKIPPED.get(name, 'not registered')}")
+
+    actual = compute_outputs({name: EVALUATORS[name]}, CORPUS)
+    mismatches = compare_outputs(actual, GOLDEN)
+    assert not mismatches, '\n'.join(mismatches[:20])
+
+
+def test_every_evaluator_has_golden_outputs():
+    assert set(EVALUATORS) <= set(GOLDEN)
+
+
+def test_golden_covers_whole_corpus():
+    for name, evaluator in EVALUATORS.items():
+        assert set(GOLDEN[name]) == {item['id'] for item in CORPUS[evaluator.corpus]}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
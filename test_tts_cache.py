@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-synthesised TTS cache of Maya's scripted lines
+"""
+
+import base64
+import threading
+import time
+
+import pytest
+
+from tts_cache import (
+    DiskTTSBackend, TTSCache, TTSVoice, normalize_tts_text, register_tts_voice, tts_cache_key
+)
+
+SCRIPT = ["Hello! I'm Maya, your IELTS examiner.", "Thank you. Please continue."]
+
+
+class FakeSynthesizer:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    def __call__(self, text):
+        self.calls.append(text)
+        time.sleep(self.delay)
+        return None if self.fail else base64.b64encode(text.encode()).decode()
+
+
+@pytest.fixture
+def synthesizer():
+    synthesizer = FakeSynthesizer()
+    register_tts_voice('test-voice', TTSVoice('test', 24000, 'audio/lpcm', lambda: SCRIPT, synthesizer))
+    return synthesizer
+
+
+def test_keys_ignore_spacing_but_not_voice_or_rate():
+    assert normalize_tts_text("  Hello ,  I’m   Maya ") == "Hello , I'm Maya"
+    key = tts_cache_key("Hello  there", 'matthew', 24000, 'audio/lpcm')
+    assert key == tts_cache_key(" Hello there ", 'matthew', 24000, 'audio/lpcm')
+    assert key.startswith('matthew/24000/') and key.endswith('.pcm')
+    assert key != tts_cache_key("Hello there", 'matthew', 16000, 'audio/lpcm')
+    assert key != tts_cache_key("Hello there", 'tiffany', 24000, 'audio/lpcm')
+
+
+def test_scripted_lines_are_synthesized_once_and_stored(tmp_path, synthesizer):
+    cache = TTSCache(DiskTTSBackend(str(tmp_path)))
+    first = cache.speak('test-voice', SCRIPT[0])
+    assert first[1] == 'synthesized'
+    assert cache.speak('test-voice', " " + SCRIPT[0]) == (first[0], 'memory')
+
+    # A fresh process reads the stored audio instead of synthesising again
+    assert TTSCache(DiskTTSBackend(str(tmp_path))).speak('test-voice', SCRIPT[0]) == (first[0], 'backend')
+    assert synthesizer.calls == [SCRIPT[0]]
+
+
+def test_unscripted_and_failed_lines_are_not_cached(tmp_path, synthesizer):
+    cache = TTSCache(DiskTTSBackend(str(tmp_path)))
+    assert cache.speak('test-voice', "Tell me about your hometown.")[1] == 'uncached'
+    assert cache.speak('test-voice', "Tell me about your hometown.")[1] == 'uncached'
+    assert len(synthesizer.calls) == 2
+
+    synthesizer.fail = True
+    assert cache.speak('test-voice', SCRIPT[1]) == (None, 'synthesized')
+    assert DiskTTSBackend(str(tmp_path)).keys() == []
+
+
+def test_concurrent_first_requests_share_one_synthesis(tmp_path, synthesizer):
+    synthesizer.delay = 0.05
+    cache = TTSCache(DiskTTSBackend(str(tmp_path)))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.speak('test-voice', SCRIPT[0])))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert synthesizer.calls == [SCRIPT[0]]
+    assert len({audio for audio, _ in results}) == 1
+
+
+def test_warm_fills_missing_lines_and_prune_drops_stale_audio(tmp_path, synthesizer):
+    backend = DiskTTSBackend(str(tmp_path))
+    backend.set('test/24000/stale.pcm', b'old')
+    cache = TTSCache(backend)
+
+    report = cache.warm('test-voice')
+    assert (report['lines'], report['stored'], report['present']) == (2, 2, 0)
+    assert cache.warm('test-voice')['present'] == 2
+    assert len(synthesizer.calls) == 2
+
+    assert 'test/24000/stale.pcm' in cache.prune()
+    assert 'test/24000/stale.pcm' not in backend.keys()
+
+
+def test_default_backend_on_lambda(monkeypatch, tmp_path):
+    import tts_cache
+
+    monkeypatch.delenv('TTS_CACHE_BUCKET', raising=False)
+    monkeypatch.delenv('TTS_CACHE_DIR', raising=False)
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'ielts-genai-prep-api')
+    monkeypatch.setattr(tts_cache, 'DEFAULT_CACHE_DIR', str(tmp_path))
+    packaged = tts_cache._default_backend()
+    assert isinstance(packaged, DiskTTSBackend) and packaged.read_only
+
+    # The read-only package directory is never written to
+    packaged.set('test/24000/line.pcm', b'audio')
+    assert packaged.keys() == []
+
+    monkeypatch.setenv('TTS_CACHE_BUCKET', 'ielts-genai-prep-maya-audio-prod')
+    monkeypatch.setenv('TTS_CACHE_PREFIX', 'tts-cache/')
+    s3 = tts_cache._default_backend()
+    assert (type(s3).__name__, s3.bucket, s3.prefix) == ('S3TTSBackend', 'ielts-genai-prep-maya-audio-prod', 'tts-cache/')
+
+
+def test_maya_engine_lines_are_registered():
+    from maya_conversation_engine import PART2_PREPARATION_OVER, scripted_maya_lines
+    from tts_cache import get_tts_voice
+
+    voice = get_tts_voice('maya')
+    assert voice is not None and voice.sample_rate == 24000
+    assert PART2_PREPARATION_OVER in scripted_maya_lines()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for voice activity detection, silence trimming and pause statistics
+"""
+
+import numpy as np
+import pytest
+
+from ielts_band_scoring import IELTSBandScorer
+from voice_activity import detect_voice_activity, detect_voice_activity_pcm
+
+RATE = 16000
+RNG = np.random.default_rng(3)
+
+
+def voiced(seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return 0.3 * np.sin(2 * np.pi * 150 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+
+
+def silence(seconds):
+    return 0.001 * RNG.standard_normal(int(seconds * RATE))
+
+
+def recording(*parts):
+    return np.concatenate([voiced(seconds) if kind == 'speech' else silence(seconds)
+                           for kind, seconds in parts]).astype(np.float32)
+
+
+ANSWER = recording(('silence', 1.5), ('speech', 2.0), ('silence', 0.15), ('speech', 1.0),
+                   ('silence', 1.4), ('speech', 3.0), ('silence', 0.5), ('speech', 1.0), ('silence', 2.0))
+
+
+def test_segments_bridge_short_gaps_and_split_at_pauses():
+    segments = detect_voice_activity(ANSWER).segments * 0.02
+    np.testing.assert_allclose(segments, [[1.5, 4.66], [6.06, 9.06], [9.56, 10.56]], atol=0.06)
+
+
+def test_statistics_report_silences_and_pauses():
+    stats = detect_voice_activity(ANSWER).statistics()
+    assert stats['leading_silence_seconds'] == pytest.approx(1.5, abs=0.04)
+    assert stats['trailing_silence_seconds'] == pytest.approx(2.0, abs=0.04)
+    assert (stats['utterance_count'], stats['pause_count'], stats['long_pause_count']) == (3, 2, 1)
+    assert stats['max_pause_seconds'] == pytest.approx(1.4, abs=0.06)
+    assert stats['active_seconds'] == pytest.approx(9.06, abs=0.06)
+
+
+def test_trim_and_utterances_are_views_of_the_pcm():
+    pcm = (ANSWER * 32767).astype('<i2').tobytes()
+    activity = detect_voice_activity_pcm(pcm)
+    trimmed = activity.trim(pcm)
+    assert trimmed.obj is pcm
+    assert len(trimmed) / 2 / RATE == pytest.approx(9.06 + 0.2, abs=0.06)
+    assert [round(len(view) / 2 / RATE, 1) for view in activity.utterances(pcm)] == [3.4, 3.2, 1.2]
+
+
+def test_silence_and_quiet_fricatives():
+    assert not detect_voice_activity(silence(3.0)).has_speech
+
+    # Below the energy threshold, kept only for its dense zero crossings
+    hiss = 0.0028 * RNG.standard_normal(RATE)
+    hum = 0.004 * np.sin(2 * np.pi * 100 * np.arange(RATE) / RATE)
+    for tail, end in ((hiss, 3.0), (hum, 2.0)):
+        activity = detect_voice_activity(np.concatenate([silence(1.0), voiced(1.0), tail, silence(1.0)]))
+        assert activity.segments[-1, 1] * 0.02 == pytest.approx(end, abs=0.06)
+
+
+def test_pause_statistics_adjust_fluency():
+    response = {'word_count': 40, 'duration': 30.0, 'stage': 'part1'}
+    base = IELTSBandScorer.fluency_response_score(response)
+    hesitant = dict(response, speech_stats={'active_seconds': 20.0, 'long_pauses_per_minute': 9.0,
+                                             'speech_ratio': 0.5})
+    fluent = dict(response, speech_stats={'active_seconds': 20.0, 'long_pauses_per_minute': 0.0,
+                                           'speech_ratio': 0.9})
+    # 40 words over 30 s with silence is 80 wpm; over the 20 s spoken span it is 120 wpm
+    assert IELTSBandScorer.fluency_response_score(hesitant) == base + 2.0 - 1.0
+    assert IELTSBandScorer.fluency_response_score(fluent) == base + 2.0 + 0.5
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-q'])
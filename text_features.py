@@ -0,0 +1,80 @@
+"""
+Shared Text Features for Assessment Scoring
+Tokenises a response once so every criterion, report generator and evaluator
+reads the same counts instead of re-splitting the text
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from indicator_matcher import get_indicator_matcher, split_words
+
+
+class TextFeatures:
+    """
+    Single-pass features of one response or essay
+
+    ``tokens`` are the lower-cased whitespace tokens, ``sentences`` the
+    non-empty full-stop separated segments of the original text and
+    ``sentence_marks`` the number of terminal punctuation marks. Indicator
+    counts for every category in ``SCORING_INDICATORS`` come from one scan
+    on first use.
+    """
+
+    __slots__ = (
+        'text',
+        'lower',
+        'tokens',
+        'unique_token_count',
+        'sentences',
+        'sentence_marks',
+        'paragraph_count',
+        '_indicator_counts'
+    )
+
+    def __init__(self, text: Optional[str]):
+        text = text or ''
+        self.text = text
+        self.lower = text.lower()
+        self.tokens: Tuple[str, ...] = tuple(self.lower.split())
+        self.unique_token_count = len(set(self.tokens))
+        self.sentences: Tuple[str, ...] = tuple(
+            sentence for sentence in (segment.strip() for segment in text.split('.')) if sentence
+        )
+        self.sentence_marks = text.count('.') + text.count('!') + text.count('?')
+        self.paragraph_count = text.count('\n\n') + 1
+        self._indicator_counts: Optional[Dict[str, int]] = None
+
+    @property
+    def token_count(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def variety_ratio(self) -> float:
+        """Unique tokens over total tokens (0.0 for empty text)"""
+        return self.unique_token_count / len(self.tokens) if self.tokens else 0.0
+
+    @property
+    def indicator_counts(self) -> Dict[str, int]:
+        """Distinct indicator phrases found per scoring category"""
+        if self._indicator_counts is None:
+            self._indicator_counts = get_indicator_matcher().count(split_words(self.lower))
+        return self._indicator_counts
+
+    def count_indicators(self, category: str) -> int:
+        """Number of distinct phrases of an indicator category in the text"""
+        return self.indicator_counts[category]
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+    def __repr__(self) -> str:
+        return f"TextFeatures(tokens={len(self.tokens)}, sentences={len(self.sentences)})"
+
+
+def extract_response_features(responses: List[Dict[str, Any]]) -> List[TextFeatures]:
+    """Build TextFeatures for each response's ``text``"""
+    return [TextFeatures(response.get('text', '')) for response in responses]
+
+
+# Export
+__all__ = ['TextFeatures', 'extract_response_features']
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Maya TTS Cache
+Synthesised audio for Maya's scripted lines (greetings, transitions,
+fallbacks, moderation redirections) keyed by normalised text, voice and
+sample rate; pre-warmed at deploy time onto disk or S3 and served from
+memory, so scripted turns never wait on or pay for a Bedrock call
+"""
+
+import os
+import re
+import sys
+import json
+import base64
+import hashlib
+import argparse
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Callable, Iterable, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Pre-warmed audio shipped with the deployment package
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tts_cache')
+
+_SPACE_RE = re.compile(r'\s+')
+_QUOTES = str.maketrans({'‘': "'", '’': "'", '“': '"', '”': '"'})
+
+_FILE_EXTENSIONS = {'audio/lpcm': 'pcm', 'lpcm': 'pcm', 'pcm': 'pcm', 'mp3': 'mp3', 'audio/mpeg': 'mp3'}
+
+
+def normalize_tts_text(text: Optional[str]) -> str:
+    """Canonical spoken form: NFC, straight quotes, single spaces
+
+    Case and punctuation are kept because they change the prosody.
+    """
+    text = unicodedata.normalize('NFC', text or '').translate(_QUOTES)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+class TTSVoice(NamedTuple):
+    """A synthesis path and the fixed lines it speaks"""
+    voice_id: str
+    sample_rate: int
+    audio_format: str
+    lines: Callable[[], Iterable[str]]
+    synthesize: Callable[[str], Optional[str]]  # Base64 audio or None
+
+
+def tts_cache_key(text: str, voice_id: str, sample_rate: int, audio_format: str) -> str:
+    """Storage key over normalised text, voice, sample rate and format"""
+    digest = hashlib.sha256()
+    for part in (voice_id, str(sample_rate), audio_format, normalize_tts_text(text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    extension = _FILE_EXTENSIONS.get(audio_format.lower(), 'bin')
+    return f"{voice_id}/{sample_rate}/{digest.hexdigest()[:32]}.{extension}"
+
+
+# Voices register their scripted lines and raw synthesiser at import
+_voices: Dict[str, TTSVoice] = {}
+
+
+def register_tts_voice(name: str, voice: TTSVoice) -> None:
+    """Make a voice's scripted lines cacheable and warmable"""
+    _voices[name] = voice
+
+
+def get_tts_voice(name: str) -> Optional[TTSVoice]:
+    return _voices.get(name)
+
+
+class DiskTTSBackend:
+    """Audio files under a directory; the default ships inside the package
+
+    A read-only backend serves what is there and drops writes, for the
+    package directory on Lambda.
+    """
+
+    def __init__(self, directory: str, read_only: bool = False):
+        self.directory = directory
+        self.read_only = read_only
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, *key.split('/'))
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        if self.read_only:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def keys(self) -> List[str]:
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    found.append(os.path.relpath(os.path.join(root, name), self.directory).replace(os.sep, '/'))
+        return found
+
+    def delete(self, key: str) -> None:
+        os.remove(self._path(key))
+
+
+class S3TTSBackend:
+    """Audio objects in S3 under a prefix"""
+
+    def __init__(self, bucket: str, prefix: str = 'tts-cache/', region: Optional[str] = None):
+        import boto3
+        self.client = boto3.client('s3', region_name=region or os.environ.get('AWS_REGION', 'us-east-1'))
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data,
+                               ContentType='application/octet-stream')
+
+    def keys(self) -> List[str]:
+        found = []
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self.prefix):
+            found.extend(item['Key'][len(self.prefix):] for item in page.get('Contents', []))
+        return found
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+
+class TTSCache:
+    """
+    Memory tier over a disk or S3 backend for scripted lines
+
+    Only lines in a registered voice's catalogue are cached; anything else
+    is synthesised directly, so the store stays the size of the script.
+    Concurrent first requests for a line share one synthesis; failed
+    syntheses are not cached.
+    """
+
+    def __init__(self, backend=None, max_entries: Optional[int] = None):
+        self.backend = backend
+        self.max_entries = max_entries or int(os.environ.get('TTS_CACHE_SIZE', '256'))
+
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._scripted: Dict[str, frozenset] = {}
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'backend_hits': 0, 'synthesized': 0, 'uncached': 0}
+
+    def is_scripted(self, name: str, text: str) -> bool:
+        """Whether ``text`` is one of the voice's fixed lines"""
+        scripted = self._scripted.get(name)
+        if scripted is None:
+            voice = _voices.get(name)
+            scripted = frozenset(normalize_tts_text(line) for line in voice.lines()) if voice else frozenset()
+            self._scripted[name] = scripted
+        return normalize_tts_text(text) in scripted
+
+    def _backend_get(self, key: str) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.error(f"TTS cache backend read failed: {e}")
+            return None
+
+    def _backend_set(self, key: str, data: bytes) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, data)
+        except Exception as e:
+            logger.error(f"TTS cache backend write failed: {e}")
+
+    def _memory_set(self, key: str, audio_base64: str) -> None:
+        self._entries[key] = audio_base64
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def speak(self, name: str, text: str) -> Tuple[Optional[str], str]:
+        """Base64 audio for ``text`` in the named voice, and where it came from
+
+        The source is ``memory``, ``backend``, ``shared`` (joined an
+        identical in-flight synthesis), ``synthesized`` (scripted line stored
+        for next time) or ``uncached`` (not a scripted line).
+        """
+        voice = _voices[name]
+        if not self.is_scripted(name, text):
+            with self._lock:
+                self.stats['uncached'] += 1
+            return voice.synthesize(text), 'uncached'
+
+        key = tts_cache_key(text, voice.voice_id, voice.sample_rate, voice.audio_format)
+        with self._lock:
+            audio_base64 = self._entries.get(key)
+            if audio_base64 is not None:
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return audio_base64, 'memory'
+
+            pending = self._in_flight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._in_flight[key] = Future()
+
+        if not owner:
+            return pending.result(), 'shared'
+
+        try:
+            source = 'backend'
+            data = self._backend_get(key)
+            if data is not None:
+                audio_base64 = base64.b64encode(data).decode('ascii')
+            else:
+                source = 'synthesized'
+                audio_base64 = voice.synthesize(text)
+                if audio_base64:
+                    self._backend_set(key, base64.b64decode(audio_base64))
+
+            with self._lock:
+                if audio_base64:
+                    self._memory_set(key, audio_base64)
+                self.stats['backend_hits' if source == 'backend' else 'synthesized'] += 1
+            pending.set_result(audio_base64)
+            return audio_base64, source
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def warm(self, name: str, force: bool = False) -> Dict[str, Any]:
+        """Synthesise every scripted line of a voice missing from the backend"""
+        voice = _voices[name]
+        report = {'voice': name, 'voice_id': voice.voice_id, 'lines': 0, 'stored': 0,
+                  'present': 0, 'failed': [], 'bytes': 0}
+        for text in dict.fromkeys(normalize_tts_text(line) for line in voice.lines()):
+            report['lines'] += 1
+            key = tts_cache_key(text, voice.voice_id, voice.sample_rate, voice.audio_format)
+            existing = None if force else self._backend_get(key)
+            if existing is not None:
+                report['present'] += 1
+                report['bytes'] += len(existing)
+                continue
+
+            audio_base64 = voice.synthesize(text)
+            if not audio_base64:
+                report['failed'].append(text)
+                continue
+            data = base64.b64decode(audio_base64)
+            self._backend_set(key, data)
+            with self._lock:
+                self._memory_set(key, audio_base64)
+            report['stored'] += 1
+            report['bytes'] += len(data)
+        return report
+
+    def prune(self) -> List[str]:
+        """Delete stored audio no registered voice's script still uses"""
+        wanted = {
+            tts_cache_key(line, voice.voice_id, voice.sample_rate, voice.audio_format)
+            for voice in _voices.values() for line in voice.lines()
+        }
+        stale = [key for key in self.backend.keys() if key not in wanted]
+        for key in stale:
+            self.backend.delete(key)
+        return stale
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._scripted.clear()
+
+
+def _default_backend():
+    """S3 when TTS_CACHE_BUCKET is set, else the TTS_CACHE_DIR (or packaged) directory
+
+    The packaged directory is read-only on Lambda, so there it only serves
+    audio warmed into the package before deployment.
+    """
+    try:
+        bucket = os.environ.get('TTS_CACHE_BUCKET')
+        if bucket:
+            return S3TTSBackend(bucket, os.environ.get('TTS_CACHE_PREFIX', 'tts-cache/'))
+    except Exception as e:
+        logger.error(f"TTS cache S3 backend unavailable, using disk: {e}")
+    directory = os.environ.get('TTS_CACHE_DIR')
+    if directory:
+        return DiskTTSBackend(directory)
+    return DiskTTSBackend(DEFAULT_CACHE_DIR, read_only=bool(os.environ.get('AWS_LAMBDA_FUNCTION_NAME')))
+
+
+# Global instance
+_tts_cache = None
+
+def get_tts_cache() -> TTSCache:
+    """Get global TTS cache instance"""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSCache(backend=_default_backend())
+    return _tts_cache
+
+
+def _load_voices() -> Dict[str, str]:
+    """Import the modules that register voices; returns those that failed"""
+    failed = {}
+    for module in ('maya_conversation_engine', 'lambda_handler'):
+        try:
+            __import__(module)
+        except Exception as e:
+            failed[module] = str(e)
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-synthesise Maya's scripted lines into the TTS cache")
+    parser.add_argument('--voice', action='append', help="Limit to the named voice (repeatable)")
+    parser.add_argument('--force', action='store_true', help="Re-synthesise lines already stored (voice changed)")
+    parser.add_argument('--prune', action='store_true', help="Delete stored audio no longer in any script")
+    parser.add_argument('--list', action='store_true', help="Print the scripted lines without synthesising")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    failed_imports = _load_voices()
+    for module, reason in failed_imports.items():
+        print(f"skipped voices from {module}: {reason}", file=sys.stderr)
+
+    names = [name for name in _voices if not args.voice or name in args.voice]
+    if args.list:
+        lines = {name: sorted(dict.fromkeys(normalize_tts_text(line) for line in _voices[name].lines()))
+                 for name in names}
+        if args.json:
+            print(json.dumps(lines, indent=2))
+        else:
+            for name, texts in lines.items():
+                print(f"{name} ({_voices[name].voice_id}, {_voices[name].sample_rate} Hz): {len(texts)} lines")
+                for text in texts:
+                    print(f"  {text}")
+        return 0
+
+    cache = get_tts_cache()
+    reports = [cache.warm(name, force=args.force) for name in names]
+    pruned = cache.prune() if args.prune else []
+
+    if args.json:
+        print(json.dumps({'voices': reports, 'pruned': pruned}, indent=2))
+    else:
+        print(f"{'voice':20} {'lines':>6} {'stored':>7} {'present':>8} {'failed':>7} {'KiB':>9}")
+        for report in reports:
+            print(f"{report['voice']:20} {report['lines']:6d} {report['stored']:7d} {report['present']:8d} "
+                  f"{len(report['failed']):7d} {report['bytes'] / 1024:9.1f}")
+            for text in report['failed']:
+                print(f"  failed: {text}")
+        if args.prune:
+            print(f"\npruned {len(pruned)} stale entries")
+    return 1 if any(report['failed'] for report in reports) else 0
+
+
+# Export
+__all__ = [
+    'DiskTTSBackend',
+    'S3TTSBackend',
+    'TTSCache',
+    'TTSVoice',
+    'get_tts_cache',
+    'get_tts_voice',
+    'normalize_tts_text',
+    'register_tts_voice',
+    'tts_cache_key'
+]
+
+
+if __name__ == '__main__':
+    # Run through the importable module so voices register into its registry
+    from tts_cache import main as tts_cache_main
+    sys.exit(tts_cache_main())
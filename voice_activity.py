@@ -0,0 +1,191 @@
+"""
+Voice Activity Detection
+Frame energy and zero-crossing VAD with hangover smoothing, vectorised over
+the whole recording: trims leading and trailing silence before model
+calls, splits answers into utterances and measures speech time and pauses
+for fluency scoring
+"""
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from audio_ingest import AudioBuffer
+from audio_normalize import TARGET_SAMPLE_RATE, normalize_audio_buffer
+
+FRAME_MS = 20
+
+# Speech threshold: this far above the noise floor (10th percentile frame
+# energy), but never above the loud end of the recording less PEAK_RANGE_DB
+# (answers with no silence) and never within MIN_SNR_DB of the floor or
+# below ABSOLUTE_FLOOR_DBFS (recordings with no speech)
+ENERGY_MARGIN_DB = 12.0
+PEAK_RANGE_DB = 15.0
+MIN_SNR_DB = 6.0
+ABSOLUTE_FLOOR_DBFS = -55.0
+
+# Quiet fricatives (/s/, /f/) are kept when their zero-crossing rate is high
+FRICATIVE_MARGIN_DB = 6.0
+FRICATIVE_ZCR = 0.25
+
+# Bursts shorter than this are clicks, not speech
+MIN_SPEECH_MS = 60
+
+# Speech is held this long after energy drops; shorter gaps are not pauses
+HANGOVER_MS = 250
+
+# Silent pauses at least this long count as hesitations
+LONG_PAUSE_SECONDS = 1.0
+
+# Audio kept either side of speech when trimming or splitting
+TRIM_PADDING_MS = 100
+
+
+def _runs(mask: np.ndarray):
+    """Start and end (exclusive) indices of each run of True"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    return edges[0::2], edges[1::2]
+
+
+def frame_features(samples: np.ndarray, frame_samples: int):
+    """Per-frame energy (dBFS) and zero-crossing rate of mono float samples"""
+    count = len(samples) // frame_samples
+    frames = samples[:count * frame_samples].reshape(count, frame_samples)
+    frames = frames - frames.mean(axis=1, keepdims=True, dtype=np.float32)
+    energy_db = 10 * np.log10(np.einsum('ij,ij->i', frames, frames) / frame_samples + 1e-10)
+    crossings = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1)
+    return energy_db, crossings / (frame_samples - 1)
+
+
+class VoiceActivity:
+    """
+    Speech segments of one recording, in frames
+
+    ``segments`` is an (n, 2) array of [start, end) frame indices. Gaps
+    shorter than the hangover are part of an utterance; segments still end
+    at the last voiced frame, so pause lengths are the real silences.
+    """
+
+    def __init__(self, segments: np.ndarray, total_frames: int, sample_rate: int,
+                 frame_samples: int):
+        self.segments = segments
+        self.total_frames = total_frames
+        self.sample_rate = sample_rate
+        self.frame_samples = frame_samples
+
+    @property
+    def frame_seconds(self) -> float:
+        return self.frame_samples / self.sample_rate
+
+    @property
+    def has_speech(self) -> bool:
+        return len(self.segments) > 0
+
+    def speech_seconds(self) -> float:
+        return float(np.sum(self.segments[:, 1] - self.segments[:, 0])) * self.frame_seconds
+
+    def statistics(self) -> Dict[str, Any]:
+        """Speech time, silences and pause statistics in seconds"""
+        seconds = self.frame_seconds
+        total = self.total_frames * seconds
+        if not self.has_speech:
+            return {
+                'total_seconds': round(total, 2), 'speech_seconds': 0.0, 'active_seconds': 0.0,
+                'leading_silence_seconds': round(total, 2), 'trailing_silence_seconds': 0.0,
+                'utterance_count': 0, 'pause_count': 0, 'long_pause_count': 0,
+                'mean_pause_seconds': 0.0, 'max_pause_seconds': 0.0, 'speech_ratio': 0.0,
+                'long_pauses_per_minute': 0.0, 'mean_utterance_seconds': 0.0
+            }
+
+        starts, ends = self.segments[:, 0], self.segments[:, 1]
+        first, last = int(starts[0]), int(ends[-1])
+        pauses = (starts[1:] - ends[:-1]) * seconds
+        speech = self.speech_seconds()
+        active = (last - first) * seconds
+        long_pauses = int(np.count_nonzero(pauses >= LONG_PAUSE_SECONDS))
+        return {
+            'total_seconds': round(total, 2),
+            'speech_seconds': round(speech, 2),
+            'active_seconds': round(active, 2),
+            'leading_silence_seconds': round(first * seconds, 2),
+            'trailing_silence_seconds': round((self.total_frames - last) * seconds, 2),
+            'utterance_count': len(self.segments),
+            'pause_count': len(pauses),
+            'long_pause_count': long_pauses,
+            'mean_pause_seconds': round(float(pauses.mean()), 2) if len(pauses) else 0.0,
+            'max_pause_seconds': round(float(pauses.max()), 2) if len(pauses) else 0.0,
+            'speech_ratio': round(speech / active, 3) if active else 0.0,
+            'long_pauses_per_minute': round(long_pauses * 60 / active, 2) if active else 0.0,
+            'mean_utterance_seconds': round(speech / len(self.segments), 2)
+        }
+
+    def _byte_range(self, start: int, end: int, sample_bytes: int, total_bytes: int):
+        padding = int(TRIM_PADDING_MS * self.sample_rate / 1000)
+        first = max(0, start * self.frame_samples - padding) * sample_bytes
+        last = min(total_bytes, (end * self.frame_samples + padding) * sample_bytes)
+        return first, last
+
+    def trim(self, pcm, sample_bytes: int = 2) -> memoryview:
+        """View of mono PCM from just before the first speech to just after the last"""
+        view = memoryview(pcm)
+        if not self.has_speech:
+            return view[:0]
+        first, last = self._byte_range(self.segments[0, 0], self.segments[-1, 1], sample_bytes, view.nbytes)
+        return view[first:last]
+
+    def utterances(self, pcm, sample_bytes: int = 2) -> List[memoryview]:
+        """Views of mono PCM, one per utterance, padded either side"""
+        view = memoryview(pcm)
+        return [view[slice(*self._byte_range(start, end, sample_bytes, view.nbytes))]
+                for start, end in self.segments]
+
+
+def detect_voice_activity(samples: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE) -> VoiceActivity:
+    """Speech segments of mono float samples in [-1, 1)"""
+    frame_samples = sample_rate * FRAME_MS // 1000
+    energy_db, zcr = frame_features(np.asarray(samples, dtype=np.float32), frame_samples)
+    total_frames = len(energy_db)
+    if not total_frames:
+        return VoiceActivity(np.empty((0, 2), dtype=np.int64), 0, sample_rate, frame_samples)
+
+    floor_db, loud_db = np.percentile(energy_db, [10, 95])
+    lowest = max(floor_db + MIN_SNR_DB, ABSOLUTE_FLOOR_DBFS)
+    threshold = max(min(floor_db + ENERGY_MARGIN_DB, loud_db - PEAK_RANGE_DB), lowest)
+    fricative = max(threshold - FRICATIVE_MARGIN_DB, lowest)
+    speech = (energy_db >= threshold) | ((energy_db >= fricative) & (zcr >= FRICATIVE_ZCR))
+
+    starts, ends = _runs(speech)
+    keep = ends - starts >= -(-MIN_SPEECH_MS // FRAME_MS)
+    starts, ends = starts[keep], ends[keep]
+
+    # Hangover: a gap shorter than the hold time continues the utterance
+    if len(starts):
+        boundaries = starts[1:] - ends[:-1] >= HANGOVER_MS // FRAME_MS
+        starts = starts[np.concatenate(([True], boundaries))]
+        ends = ends[np.concatenate((boundaries, [True]))]
+    return VoiceActivity(np.stack([starts, ends], axis=1), total_frames, sample_rate, frame_samples)
+
+
+def detect_voice_activity_pcm(pcm, sample_rate: int = TARGET_SAMPLE_RATE) -> VoiceActivity:
+    """Speech segments of 16-bit little-endian mono PCM"""
+    samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32) * (1.0 / 32768)
+    return detect_voice_activity(samples, sample_rate)
+
+
+def speech_statistics(audio: AudioBuffer) -> Optional[Dict[str, Any]]:
+    """Speech and pause statistics for an uncompressed upload, else None"""
+    pcm = normalize_audio_buffer(audio)
+    if pcm is None:
+        return None
+    return detect_voice_activity_pcm(pcm).statistics()
+
+
+# Export
+__all__ = [
+    'LONG_PAUSE_SECONDS',
+    'VoiceActivity',
+    'detect_voice_activity',
+    'detect_voice_activity_pcm',
+    'frame_features',
+    'speech_statistics'
+]
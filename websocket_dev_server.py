@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Local WebSocket Server
+Stand-in for the API Gateway WebSocket API during development: accepts
+WebSocket connections, turns frames into the same $connect, message and
+$disconnect events API Gateway sends the Lambda, and writes the handler's
+posts back to the socket in order
+"""
+
+import os
+import sys
+import json
+import uuid
+import base64
+import struct
+import asyncio
+import hashlib
+import logging
+import argparse
+from typing import Dict, Any, Optional, List, Tuple, Union
+from urllib.parse import urlsplit, parse_qsl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# Largest message accepted from a client, as on API Gateway
+MAX_MESSAGE_BYTES = 128 * 1024
+
+
+def accept_key(key: str) -> str:
+    """Sec-WebSocket-Accept for a client's Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+
+
+def encode_frame(opcode: int, payload: bytes, mask: Optional[bytes] = None) -> bytes:
+    """One unfragmented frame; clients pass a 4-byte mask"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    if mask is None:
+        return header + payload
+    header = bytes([header[0], header[1] | 0x80]) + header[2:]
+    return header + mask + _apply_mask(payload, mask)
+
+
+def _apply_mask(payload: bytes, mask: bytes) -> bytes:
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """(fin, opcode, unmasked payload) of the next frame"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError('Frame too large')
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    return bool(first & 0x80), first & 0x0F, _apply_mask(payload, mask) if mask else payload
+
+
+class LocalWebSocketServer:
+    """Routes each connection's frames through a WebSocket Lambda handler"""
+
+    def __init__(self, handler=None, stage: str = 'local'):
+        if handler is None:
+            from nova_sonic_streaming import handle_websocket_event as handler
+        self.handler = handler
+        self.stage = stage
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _event(self, route_key: str, connection_id: str, body: Optional[str] = None,
+               binary: bool = False, query: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        event = {
+            'requestContext': {'routeKey': route_key, 'connectionId': connection_id, 'stage': self.stage,
+                               'eventType': {'$connect': 'CONNECT', '$disconnect': 'DISCONNECT'}.get(route_key, 'MESSAGE')},
+            'isBase64Encoded': binary
+        }
+        if body is not None:
+            event['body'] = body
+        if query is not None:
+            event['queryStringParameters'] = query
+        return event
+
+    @staticmethod
+    def _route(payload: str) -> str:
+        """API Gateway route selection on $request.body.action"""
+        try:
+            action = json.loads(payload).get('action')
+        except (ValueError, AttributeError):
+            action = None
+        return action or '$default'
+
+    async def _handshake(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Optional[Dict[str, str]]:
+        request = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        headers = dict((name.strip().lower(), value.strip()) for name, _, value in
+                       (line.partition(':') for line in request[1:] if line))
+        key = headers.get('sec-websocket-key')
+        if not key or headers.get('upgrade', '').lower() != 'websocket':
+            writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+            return None
+        writer.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                      f'Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n').encode('ascii'))
+        target = request[0].split(' ')[1] if len(request[0].split(' ')) > 1 else '/'
+        return dict(parse_qsl(urlsplit(target).query))
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        connection_id = uuid.uuid4().hex
+        query = await self._handshake(reader, writer)
+        if query is None:
+            writer.close()
+            return
+
+        def send(message: Union[str, bytes]) -> None:
+            # Handlers post from worker threads; scheduling keeps posts in order
+            opcode, data = (OP_TEXT, message.encode('utf-8')) if isinstance(message, str) else (OP_BINARY, message)
+            loop.call_soon_threadsafe(writer.write, encode_frame(opcode, data))
+
+        def dispatch(event: Dict[str, Any]) -> Dict[str, Any]:
+            return self.handler(event, None, send)
+
+        connected = await loop.run_in_executor(None, dispatch, self._event('$connect', connection_id, query=query))
+        if connected.get('statusCode') != 200:
+            writer.close()
+            return
+
+        fragments: List[bytes] = []
+        message_opcode = OP_TEXT
+        try:
+            while True:
+                fin, opcode, payload = await read_frame(reader)
+                if opcode == OP_PING:
+                    writer.write(encode_frame(OP_PONG, payload))
+                    continue
+                if opcode == OP_CLOSE:
+                    writer.write(encode_frame(OP_CLOSE, payload[:2]))
+                    break
+                if opcode != OP_CONTINUATION:
+                    message_opcode, fragments = opcode, []
+                fragments.append(payload)
+                if not fin:
+                    continue
+
+                message = b''.join(fragments)
+                if message_opcode == OP_BINARY:
+                    event = self._event('$default', connection_id, base64.b64encode(message).decode('ascii'), binary=True)
+                else:
+                    text = message.decode('utf-8')
+                    event = self._event(self._route(text), connection_id, text)
+                # One message at a time per connection, like API Gateway's ordered delivery
+                await loop.run_in_executor(None, dispatch, event)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            await loop.run_in_executor(None, dispatch, self._event('$disconnect', connection_id))
+            writer.close()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        """Start listening; returns the bound port"""
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Nova Sonic WebSocket API")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--bedrock', action='store_true', help="Stream to Nova Sonic on Bedrock instead of the local model")
+    args = parser.parse_args(argv)
+
+    if not args.bedrock:
+        os.environ['NOVA_SONIC_LOCAL_STREAM'] = 'true'
+    logging.basicConfig(level=logging.INFO)
+
+    async def serve():
+        server = LocalWebSocketServer()
+        port = await server.start(args.host, args.port)
+        print(f"Nova Sonic WebSocket stand-in on ws://{args.host}:{port}/")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())